@@ -0,0 +1,142 @@
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from lap_profile import profile_extra
+from model import RaceParams, Pilot, Stint
+
+
+# pilot = -1: стинта нет (хвост строки) или пилот не найден
+NO_PILOT = -1
+# tyre_set «до первого стинта» — не совпадает ни с одним комплектом
+_NO_TYRE = np.iinfo(np.int32).min
+
+
+@dataclass
+class PlanBatch:
+    """
+    Пачка планов в колоночном виде, форма каждой колонки (планы, стинты).
+    Короткие планы дополняются справа стинтами с pilot = NO_PILOT.
+    Вычисления идут по столбцам, поэтому pack_plans создаёт массивы в порядке "F".
+    """
+    laps: np.ndarray            # int32, кругов в стинте
+    pilot: np.ndarray           # int16, индекс пилота в списке pilots
+    tyre_set: np.ndarray        # int16, комплект шин (1..N)
+    eco: np.ndarray             # bool, стинт в экономии
+
+    @property
+    def n_plans(self) -> int:
+        return self.laps.shape[0]
+
+    @property
+    def max_stints(self) -> int:
+        return self.laps.shape[1]
+
+
+@dataclass
+class BatchResult:
+    total_sec: np.ndarray           # итоговое время гонки, как compute_total_race_time_sec
+    lap_sec: np.ndarray             # время на кругах
+    pit_sec: np.ndarray             # пит-стопы (дозаправка / смена резины)
+    driver_change_sec: np.ndarray   # смены пилота
+
+
+def _pilot_index(pilots: Sequence[Pilot]) -> Dict[str, int]:
+    # как pilot_map в compute_total_race_time_sec: при одинаковых именах побеждает последний
+    return {p.name: i for i, p in enumerate(pilots)}
+
+
+def pack_plans(plans: Sequence[List[Stint]], pilots: Sequence[Pilot]) -> PlanBatch:
+    """Упаковывает список планов (List[Stint]) в PlanBatch."""
+    index = _pilot_index(pilots)
+    n_plans = len(plans)
+    max_stints = max((len(p) for p in plans), default=0)
+
+    laps = np.zeros((n_plans, max_stints), dtype=np.int32, order="F")
+    pilot = np.full((n_plans, max_stints), NO_PILOT, dtype=np.int16, order="F")
+    tyre_set = np.zeros((n_plans, max_stints), dtype=np.int16, order="F")
+    eco = np.zeros((n_plans, max_stints), dtype=bool, order="F")
+
+    for i, plan in enumerate(plans):
+        for j, stint in enumerate(plan):
+            laps[i, j] = stint.laps
+            pilot[i, j] = index.get(stint.pilot, NO_PILOT)
+            tyre_set[i, j] = stint.tyre_set
+            eco[i, j] = stint.eco
+
+    return PlanBatch(laps=laps, pilot=pilot, tyre_set=tyre_set, eco=eco)
+
+
+def unpack_plan(batch: PlanBatch, index: int, pilots: Sequence[Pilot],
+                fuel_start: float = 0.0) -> List[Stint]:
+    """Обратно в List[Stint] (fuel_start в пачке не хранится)."""
+    stints: List[Stint] = []
+    for j in range(batch.max_stints):
+        p = int(batch.pilot[index, j])
+        if p == NO_PILOT:
+            continue
+        stints.append(Stint(
+            pilot=pilots[p].name,
+            laps=int(batch.laps[index, j]),
+            fuel_start=fuel_start,
+            tyre_set=int(batch.tyre_set[index, j]),
+            eco=bool(batch.eco[index, j]),
+        ))
+    return stints
+
+
+def evaluate_plans(race: RaceParams, pilots: Sequence[Pilot], batch: PlanBatch) -> BatchResult:
+    """
+    Векторный аналог compute_total_race_time_sec для всей пачки сразу.
+
+    Цикл идёт по номеру стинта, а не по планам: каждый план накапливает время
+    в том же порядке сложений, что и скалярная функция, поэтому результат
+    совпадает бит в бит. Стинты с неизвестным пилотом пропускаются так же,
+    как там (предыдущий комплект/пилот при этом не обновляются). Прибавка
+    профиля круга считается сразу по всем планам на часах начала стинта.
+    """
+    n_plans = batch.n_plans
+    # лишний ноль в конце: lap_times[NO_PILOT] даёт 0.0 для пустых ячеек
+    lap_times = np.array([p.lap_time_sec for p in pilots] + [0.0], dtype=np.float64)
+
+    lap_total = np.zeros(n_plans, dtype=np.float64)
+    stop_total = np.zeros(n_plans, dtype=np.float64)   # пит + смены, как в скалярной версии
+    pit_only = np.zeros(n_plans, dtype=np.float64)
+    change_only = np.zeros(n_plans, dtype=np.float64)
+
+    prev_tyre = np.full(n_plans, _NO_TYRE, dtype=np.int32)
+    prev_pilot = np.full(n_plans, NO_PILOT, dtype=np.int32)
+
+    for j in range(batch.max_stints):
+        pilot = batch.pilot[:, j].astype(np.int32)
+        valid = pilot != NO_PILOT
+        if not valid.any():
+            continue
+
+        if j > 0:
+            tyre = batch.tyre_set[:, j].astype(np.int32)
+            pit = np.where(tyre == prev_tyre, race.pit_refuel_sec, race.pit_tyre_sec)
+            np.add(stop_total, pit, out=stop_total, where=valid)
+            np.add(pit_only, pit, out=pit_only, where=valid)
+
+            change = valid & (pilot != prev_pilot)
+            np.add(stop_total, race.driver_change_sec, out=stop_total, where=change)
+            np.add(change_only, race.driver_change_sec, out=change_only, where=change)
+
+        if race.lap_profile:
+            extra = profile_extra(lap_times[pilot], race.lap_profile, lap_total + stop_total,
+                                  np.where(valid, batch.laps[:, j], 0))
+            np.add(lap_total, extra, out=lap_total, where=valid)
+        lap_sec = batch.laps[:, j] * lap_times[pilot]
+        np.add(lap_total, lap_sec, out=lap_total, where=valid)
+
+        np.copyto(prev_tyre, batch.tyre_set[:, j], where=valid)
+        np.copyto(prev_pilot, pilot, where=valid)
+
+    return BatchResult(
+        total_sec=lap_total + stop_total,
+        lap_sec=lap_total,
+        pit_sec=pit_only,
+        driver_change_sec=change_only,
+    )
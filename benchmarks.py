@@ -0,0 +1,262 @@
+"""
+Замеры планировщиков и расчёта времени гонки:
+
+    python benchmarks.py                      # все сценарии, таблица в stdout
+    python benchmarks.py --quick              # урезанная сетка
+    python benchmarks.py --save-baseline      # записать bench_baseline.json
+    python benchmarks.py --compare            # сравнить с bench_baseline.json
+
+Для каждого сценария: перцентили задержки (perf_counter), блоки памяти,
+которые остались живы после вызова (вместе с результатом), и пик памяти
+одного вызова (tracemalloc). Сколько всего было выделений, tracemalloc не
+считает — временные блоки, освобождённые до конца вызова, видны только в
+пике. При --compare выход с кодом 1, если медиана выросла больше
+допустимого порога. База для --compare лежит рядом — bench_baseline.json;
+после намеренного изменения скорости её перезаписывают --save-baseline.
+"""
+import argparse
+import gc
+import itertools
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+from engine import PLANNERS, simple_inputs
+from model import (
+    RaceParams, TyreParams, ConsumptionMode,
+    plan_stints, compute_total_race_time_sec, _assign_tyres, _build_pilots,
+)
+from strategy_core import build_stints_iterative_with_pilots, build_stints_closed_form
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+DURATIONS_H = (1, 6, 12, 24)
+PILOT_COUNTS = (1, 3, 10)
+TYRE_SETS = (1, 10, 50)
+MODES = (False, True)       # ConsumptionMode.by_fuel_per_lap
+
+
+@dataclass
+class Scenario:
+    name: str
+    race: RaceParams
+    tyre: TyreParams
+    pilot_tuples: list
+    mode: ConsumptionMode
+
+
+def _pilot_tuples(count: int) -> list:
+    return [
+        (f"P{i}", 121.0 + 0.4 * i, 2.8 + 0.05 * i, 2.5 + 0.05 * i, 36.0 - i % 3, 37.0 + i % 2)
+        for i in range(count)
+    ]
+
+
+def scenarios(quick: bool = False) -> List[Scenario]:
+    durations = (1, 24) if quick else DURATIONS_H
+    pilots = (1, 10) if quick else PILOT_COUNTS
+    sets = (1, 50) if quick else TYRE_SETS
+    out = []
+    for hours, n_pilots, n_sets, by_fuel in itertools.product(durations, pilots, sets, MODES):
+        tuples = _pilot_tuples(n_pilots)
+        out.append(Scenario(
+            name=f"{hours}h/{n_pilots}p/{n_sets}s/{'fuel' if by_fuel else 'laps'}",
+            race=RaceParams(
+                duration_hours=hours,
+                avg_lap_sec=sum(p[1] for p in tuples) / len(tuples),
+                tank_liters=100.0,
+                pit_refuel_sec=30.0,
+                pit_tyre_sec=40.0,
+                driver_change_sec=10.0,
+            ),
+            tyre=TyreParams(sets=n_sets),
+            pilot_tuples=tuples,
+            mode=ConsumptionMode(by_fuel_per_lap=by_fuel),
+        ))
+    return out
+
+
+def targets(s: Scenario) -> Dict[str, Callable[[], object]]:
+    """
+    Вызовы без аргументов — всё, что не меряем, готовится заранее.
+    Планировщики реестра engine.py меряются целиком (с переводом входов),
+    build_stints_* — на готовых входах strategy_core.
+    """
+    pilots = _build_pilots(s.pilot_tuples)
+    stints = plan_stints(s.race, s.tyre, s.pilot_tuples, s.mode)
+    n_stints = max(len(stints), 1)
+    race_simple, tyre_simple, pilots_simple, _pilots = simple_inputs(
+        s.race, s.tyre, s.pilot_tuples, s.mode)
+
+    result: Dict[str, Callable[[], object]] = {}
+    for name, info in PLANNERS.items():
+        result[f"planner:{name}"] = (
+            lambda func=info.func: func(s.race, s.tyre, s.pilot_tuples, s.mode))
+    result.update({
+        "_assign_tyres": lambda: _assign_tyres(n_stints, s.tyre),
+        "build_stints_iterative_with_pilots":
+            lambda: build_stints_iterative_with_pilots(race_simple, tyre_simple, pilots_simple),
+        "build_stints_closed_form":
+            lambda: build_stints_closed_form(race_simple, tyre_simple, pilots_simple),
+        "compute_total_race_time_sec": lambda: compute_total_race_time_sec(s.race, pilots, stints),
+    })
+    return result
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def measure(func: Callable[[], object], repeat: int, min_time: float = 0.002) -> dict:
+    """
+    Задержка: repeat замеров, в каждом цикл из number вызовов, чтобы один
+    замер длился не меньше min_time. Память — отдельным вызовом под tracemalloc.
+    """
+    func()  # прогрев
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - t0 >= min_time or number >= 1 << 16:
+            break
+        number *= 2
+
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            for _ in range(number):
+                func()
+            samples.append((time.perf_counter() - t0) / number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    samples.sort()
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        result = func()
+        _current, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    live_blocks = sum(max(d.count_diff, 0) for d in after.compare_to(before, "filename"))
+    del result
+
+    return {
+        "p50_us": _percentile(samples, 50) * 1e6,
+        "p90_us": _percentile(samples, 90) * 1e6,
+        "p99_us": _percentile(samples, 99) * 1e6,
+        "mean_us": statistics.fmean(samples) * 1e6,
+        "live_blocks": live_blocks,
+        "peak_kib": peak / 1024.0,
+    }
+
+
+def run(quick: bool, repeat: int, only: str = "") -> Dict[str, dict]:
+    results: Dict[str, dict] = {}
+    for s in scenarios(quick):
+        for target, func in targets(s).items():
+            if only and only not in target:
+                continue
+            try:
+                results[f"{target} {s.name}"] = measure(func, repeat)
+            except ValueError as e:
+                # планировщик отказался от сценария (например, ротация без допустимой расстановки)
+                print(f"пропуск {target} {s.name}: {e}", file=sys.stderr)
+    return results
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float,
+            min_delta_us: float = 2.0) -> List[str]:
+    """
+    Список регрессий по медиане задержки и пику памяти.
+    min_delta_us отсекает шум на вызовах в единицы микросекунд.
+    """
+    regressions = []
+    for key, cur in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        slower = cur["p50_us"] - base["p50_us"]
+        if cur["p50_us"] > base["p50_us"] * (1.0 + tolerance) and slower > min_delta_us:
+            regressions.append(f"{key}: p50 {base['p50_us']:.1f} -> {cur['p50_us']:.1f} мкс")
+        if cur["peak_kib"] > base["peak_kib"] * (1.0 + tolerance) + 1.0:
+            regressions.append(f"{key}: пик {base['peak_kib']:.1f} -> {cur['peak_kib']:.1f} КиБ")
+    return regressions
+
+
+def _print_table(results: Dict[str, dict], baseline: Dict[str, dict], out) -> None:
+    header = f"{'сценарий':<60} {'p50 мкс':>10} {'p90':>10} {'p99':>10} {'блоков':>8} {'пик КиБ':>9}"
+    if baseline:
+        header += f" {'к базе':>8}"
+    print(header, file=out)
+    for key, r in results.items():
+        line = (f"{key:<60} {r['p50_us']:>10.1f} {r['p90_us']:>10.1f} {r['p99_us']:>10.1f}"
+                f" {r['live_blocks']:>8d} {r['peak_kib']:>9.1f}")
+        base = baseline.get(key)
+        if base and base["p50_us"] > 0:
+            line += f" {r['p50_us'] / base['p50_us']:>7.2f}x"
+        print(line, file=out)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарки планировщиков")
+    parser.add_argument("--quick", action="store_true", help="урезанная сетка сценариев")
+    parser.add_argument("--repeat", type=int, default=15, help="замеров на сценарий")
+    parser.add_argument("--only", default="", help="только функции, содержащие подстроку")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="допуск регрессии (доля)")
+    parser.add_argument("--min-delta-us", type=float, default=2.0,
+                        help="меньший прирост медианы не считается регрессией")
+    parser.add_argument("--json", help="сохранить результаты в файл")
+    args = parser.parse_args(argv)
+
+    results = run(args.quick, args.repeat, args.only)
+
+    baseline = {}
+    if args.compare and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    _print_table(results, baseline, sys.stdout)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"results": results}, f, ensure_ascii=False, indent=1)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "results": results},
+                      f, ensure_ascii=False, indent=1)
+
+    if args.compare:
+        if not baseline:
+            print(f"нет базы {args.baseline}", file=sys.stderr)
+            return 2
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_us)
+        for r in regressions:
+            print("РЕГРЕССИЯ", r, file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, fields, is_dataclass, replace
+from functools import wraps
+from typing import Callable, List, Optional
+
+from model import Stint, plan_stints
+from strategy_core import StintSimple, build_stints_iterative_with_pilots
+
+
+# формат ключа и файла; повышать, когда меняется логика любого планировщика
+# без своей записи в PLANNER_VERSIONS — старые планы на диске станут промахами
+CACHE_VERSION = 2
+
+# версия логики планировщика (planner_name -> n) входит в ключ: повысить при
+# правке планировщика, чтобы кеш не отдавал планы прежней версии
+PLANNER_VERSIONS = {
+    "rotation.plan_stints_rotation": 3,
+}
+
+# именованные аргументы-обработчики: на план не влияют, в ключ не входят
+CALLBACK_KWARGS = frozenset({"on_progress", "should_stop"})
+
+# типы стинтов, которые умеем сохранять на диск
+_STINT_TYPES = {
+    "Stint": Stint,
+    "StintSimple": StintSimple,
+}
+
+
+def _normalize(value):
+    """Вход -> JSON-совместимое значение с однозначной записью (int и float не различаются)."""
+    if is_dataclass(value) and not isinstance(value, type):
+        return {f.name: _normalize(getattr(value, f.name)) for f in fields(value)}
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    raise TypeError(f"Нельзя построить ключ кеша по {type(value).__name__}")
+
+
+def planner_name(planner: Callable) -> str:
+    return f"{planner.__module__}.{planner.__qualname__}"
+
+
+def planner_version(planner: Callable) -> int:
+    return PLANNER_VERSIONS.get(planner_name(planner), 1)
+
+
+def plan_cache_key(planner: Callable, *inputs) -> str:
+    """Стабильный хеш нормализованных входов планировщика и версии его логики."""
+    payload = json.dumps(
+        [planner_name(planner), planner_version(planner), _normalize(list(inputs))],
+        ensure_ascii=False, sort_keys=True, separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _copy_plan(stints) -> list:
+    return [replace(s) for s in stints]
+
+
+def cacheable(stints) -> bool:
+    """План можно кешировать: перебор не остановлен по лимиту (RotationPlan.optimal)."""
+    return getattr(stints, "optimal", True)
+
+
+class PlanCache:
+    """
+    LRU-кеш планов по хешу входов. Можно сохранить в файл и загрузить обратно;
+    hits / misses показывают, окупается ли кеш.
+    """
+
+    def __init__(self, max_entries: int = 4096, path: Optional[str] = None):
+        self.max_entries = max(max_entries, 1)
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._plans: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+    def get(self, key: str) -> Optional[list]:
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is None:
+                self.misses += 1
+                return None
+            self._plans.move_to_end(key)
+            self.hits += 1
+            return _copy_plan(plan)
+
+    def put(self, key: str, stints) -> None:
+        """Кладёт план; недосчитанный (см. cacheable) не кладёт."""
+        if not cacheable(stints):
+            return
+        with self._lock:
+            self._plans[key] = _copy_plan(stints)
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.max_entries:
+                self._plans.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._plans),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def wrap(self, planner: Callable) -> Callable:
+        """
+        Планировщик с тем же вызовом, но через кеш. Именованные аргументы входят
+        в ключ, кроме CALLBACK_KWARGS — те передаются как есть. Аргумент, по
+        которому ключ не построить, — вызов мимо кеша; прерванный план не кешируется.
+        """
+        @wraps(planner)
+        def cached(*args, **kwargs):
+            keyed = {k: v for k, v in kwargs.items() if k not in CALLBACK_KWARGS}
+            try:
+                key = plan_cache_key(planner, *args, *([keyed] if keyed else []))
+            except TypeError:
+                return planner(*args, **kwargs)
+            plan = self.get(key)
+            if plan is None:
+                plan = planner(*args, **kwargs)
+                should_stop = kwargs.get("should_stop")
+                if should_stop is None or not should_stop():
+                    self.put(key, plan)
+            return plan
+        return cached
+
+    # ---------- файл ----------
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Пишет кеш в JSON (через временный файл, чтобы не оставить битый)."""
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            entries = [
+                [key, [[type(s).__name__, asdict(s)] for s in plan]]
+                for key, plan in self._plans.items()
+            ]
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "entries": entries}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def load(self, path: Optional[str] = None) -> int:
+        """Дочитывает записи из файла. Нет файла или другая версия — ничего не делает."""
+        path = path or self.path
+        if not path or not os.path.exists(path):
+            return 0
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if data.get("version") != CACHE_VERSION:
+            return 0
+
+        loaded = 0
+        for key, plan in data.get("entries", []):
+            try:
+                stints = [_STINT_TYPES[kind](**values) for kind, values in plan]
+            except (KeyError, TypeError):
+                continue
+            self.put(key, stints)
+            loaded += 1
+        return loaded
+
+
+# общий кеш процесса
+default_cache = PlanCache()
+
+
+def cached_plan_stints(race, tyre, pilot_tuples, mode, cache: Optional[PlanCache] = None) -> List[Stint]:
+    cache = cache or default_cache
+    key = plan_cache_key(plan_stints, race, tyre, pilot_tuples, mode)
+    plan = cache.get(key)
+    if plan is None:
+        plan = plan_stints(race, tyre, pilot_tuples, mode)
+        cache.put(key, plan)
+    return plan
+
+
+def cached_build_stints_iterative_with_pilots(race, tyre, pilots,
+                                              cache: Optional[PlanCache] = None) -> List[StintSimple]:
+    cache = cache or default_cache
+    key = plan_cache_key(build_stints_iterative_with_pilots, race, tyre, pilots)
+    plan = cache.get(key)
+    if plan is None:
+        plan = build_stints_iterative_with_pilots(race, tyre, pilots)
+        cache.put(key, plan)
+    return plan
@@ -0,0 +1,149 @@
+"""
+Пакетный расчёт без GUI (PyQt не импортируется):
+
+    python cli.py scenarios.jsonl --engine optimal -o results.jsonl
+    python cli.py scenarios.csv --engine closed_form
+    python cli.py scenarios.csv --engine compare     # все планировщики рядом
+    cat scenarios.jsonl | python cli.py - > results.jsonl
+    python cli.py scenarios.csv --trace trace.json     # замеры этапов (chrome://tracing)
+    python cli.py scenarios.csv --simulate 10000       # Монте-Карло по каждому плану
+
+Сценарии читаются и результаты пишутся построчно, память не растёт с размером файла.
+"""
+import argparse
+import json
+import sys
+from dataclasses import asdict
+from functools import partial
+from typing import Callable, Dict, List, Optional, TextIO
+
+import instrument
+from cache import PlanCache
+from engine import PLANNERS, compare_planners, get_planner
+from model import _build_pilots
+from montecarlo import simulate_race
+from scenario import Scenario, iter_csv, iter_jsonl
+from tyres import race_time_sec
+
+
+def _run_planner(planner, s: Scenario, cache: Optional[PlanCache] = None,
+                 simulate: int = 0) -> dict:
+    if cache is not None:
+        planner = cache.wrap(planner)
+    stints = planner(s.race, s.tyre, s.pilot_tuples, s.mode)
+    pilots = _build_pilots(s.pilot_tuples)
+    record = {
+        "total_time_sec": race_time_sec(s.race, s.tyre, pilots, stints, s.mode),
+        "stints": [asdict(st) for st in stints],
+    }
+    if simulate > 0:
+        sim = simulate_race(s.race, pilots, stints, s.mode, simulate)
+        record["montecarlo"] = {
+            "runs": sim.runs,
+            "p_out_of_fuel": sim.p_out_of_fuel,
+            "mean_sec": sim.mean_sec,
+            "std_sec": sim.std_sec,
+            "p95_sec": sim.percentile(95),
+        }
+    return record
+
+
+def _run_compare(s: Scenario, cache: Optional[PlanCache] = None) -> dict:
+    """Все планировщики реестра на одном сценарии: время гонки, стинты, скорость."""
+    runs = compare_planners(s.race, s.tyre, s.pilot_tuples, s.mode,
+                            wrap=cache.wrap if cache is not None else None)
+    return {"planners": [
+        {"engine": r.name, "error": r.error} if r.error else {
+            "engine": r.name,
+            "total_time_sec": r.total_sec,
+            "stints": len(r.stints),
+            "elapsed_ms": round(r.elapsed_sec * 1000.0, 3),
+        }
+        for r in runs
+    ]}
+
+
+ENGINES: Dict[str, Callable[..., dict]] = {
+    name: partial(_run_planner, info.func) for name, info in PLANNERS.items()
+}
+ENGINES["model"] = partial(_run_planner, get_planner("greedy"))   # прежнее имя
+ENGINES["compare"] = _run_compare
+
+
+def run_stream(lines, fmt: str, engine: str, out: TextIO,
+               cache: Optional[PlanCache] = None, simulate: int = 0) -> int:
+    """
+    Считает сценарии по одному и сразу пишет JSONL. Возвращает число ошибок.
+    simulate > 0 — столько заездов Монте-Карло по каждому плану (не для compare).
+    """
+    run = ENGINES[engine]
+    if simulate > 0:
+        run = partial(run, simulate=simulate)
+    reader = iter_csv if fmt == "csv" else iter_jsonl
+    errors = 0
+    for n, scenario, error in reader(lines):
+        if scenario is None:
+            record = {"line": n, "error": error}
+        else:
+            try:
+                record = {"id": scenario.id, "engine": engine}
+                record.update(run(scenario, cache=cache))
+            except ValueError as e:
+                record = {"id": scenario.id, "engine": engine, "error": str(e)}
+        if "error" in record:
+            errors += 1
+        out.write(json.dumps(record, ensure_ascii=False))
+        out.write("\n")
+    return errors
+
+
+def _detect_format(path: str) -> str:
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Пакетный расчёт стратегий (JSONL/CSV -> JSONL)")
+    parser.add_argument("input", help="файл сценариев или '-' для stdin")
+    parser.add_argument("-o", "--output", default="-", help="файл результатов (по умолчанию stdout)")
+    parser.add_argument("--format", choices=("jsonl", "csv"), help="формат входа (по расширению)")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="model")
+    parser.add_argument("--cache", help="файл кеша планов (читается и дописывается)")
+    parser.add_argument("--cache-size", type=int, default=100000, help="макс. планов в кеше")
+    parser.add_argument("--trace", help="записать замеры этапов в Chrome trace JSON")
+    parser.add_argument("--simulate", type=int, default=0, metavar="N",
+                        help="заездов Монте-Карло по каждому плану (0 — без симуляции)")
+    args = parser.parse_args(argv)
+    if args.simulate and args.engine == "compare":
+        parser.error("--simulate не сочетается с --engine compare")
+
+    if args.trace:
+        instrument.enable()
+
+    cache = None
+    if args.cache:
+        cache = PlanCache(max_entries=args.cache_size, path=args.cache)
+        cache.load()
+
+    fmt = args.format or ("jsonl" if args.input == "-" else _detect_format(args.input))
+
+    src = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8", newline="")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        errors = run_stream(src, fmt, args.engine, dst, cache=cache, simulate=args.simulate)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+    if cache is not None:
+        cache.save()
+        print(json.dumps({"cache": cache.stats()}), file=sys.stderr)
+    if args.trace:
+        instrument.export_chrome_trace(args.trace)
+        stages, counters = instrument.summary()
+        print(instrument.format_summary(stages, counters), file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""
+Общий вход для всех планировщиков.
+
+Каждый планировщик в реестре вызывается одинаково —
+    planner(race, tyre, pilot_tuples, mode, total_laps=None) -> List[Stint]
+— и возвращает план в типах model.py. Движок strategy_core подключается
+через обёртки, которые переводят входы в *Simple-типы и обратно.
+Компактное представление плана для пачек и сравнения — batch_eval.PlanBatch.
+"""
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from batch_eval import PlanBatch, pack_plans
+from instrument import span
+from model import (
+    RaceParams, TyreParams, ConsumptionMode, Pilot, Stint,
+    plan_stints, compute_total_race_time_sec, _build_pilots,
+    _calc_total_laps, _calc_stint_length_push, _calc_stint_length_eco,
+)
+from fuel_target import plan_stints_fuel_target
+from optimal import plan_stints_optimal, _stint_fuel_start
+from rotation import plan_stints_rotation
+from tyres import plan_stints_tyres, race_time_sec
+from strategy_core import (
+    PilotSimple, RaceSimple, TyreSimple, StintSimple,
+    build_stints_iterative_with_pilots, build_stints_closed_form,
+)
+
+
+Planner = Callable[..., List[Stint]]
+
+
+def simple_inputs(
+    race: RaceParams,
+    tyre: TyreParams,
+    pilot_tuples,
+    mode: ConsumptionMode,
+    total_laps: Optional[int] = None,
+) -> Tuple[RaceSimple, TyreSimple, List[PilotSimple], List[Pilot]]:
+    """
+    Входы в типах strategy_core и пилоты model.py: число кругов и круги на
+    баке считаются так же, как в model.py.
+    """
+    pilots = _build_pilots(pilot_tuples)
+    race_simple = RaceSimple(
+        total_laps=_calc_total_laps(race) if total_laps is None else total_laps,
+        pit_refuel_sec=race.pit_refuel_sec,
+        pit_tyre_sec=race.pit_tyre_sec,
+        driver_change_sec=race.driver_change_sec,
+    )
+    simple = [
+        PilotSimple(name=p.name, lap_time_sec=p.lap_time_sec,
+                    laps_push=_calc_stint_length_push(race, p, mode),
+                    laps_eco=_calc_stint_length_eco(race, p, mode))
+        for p in pilots
+    ]
+    return race_simple, TyreSimple(sets=tyre.sets), simple, pilots
+
+
+def from_simple(
+    race: RaceParams,
+    mode: ConsumptionMode,
+    pilots: List[Pilot],
+    stints: List[StintSimple],
+) -> List[Stint]:
+    """StintSimple -> Stint; топливо на старт — как у plan_stints и plan_stints_optimal."""
+    pilot_map = {p.name: p for p in pilots}
+    result: List[Stint] = []
+    for s in stints:
+        eco = s.mode == "eco"
+        result.append(Stint(
+            pilot=s.pilot,
+            laps=s.laps,
+            fuel_start=_stint_fuel_start(race, pilot_map[s.pilot], mode, s.laps, eco),
+            tyre_set=s.tyre_set,
+            eco=eco,
+        ))
+    return result
+
+
+def _simple_planner(build: Callable[..., List[StintSimple]], stage: str) -> Planner:
+    def planner(race: RaceParams, tyre: TyreParams, pilot_tuples, mode: ConsumptionMode,
+                total_laps: Optional[int] = None) -> List[Stint]:
+        with span(stage):
+            race_simple, tyre_simple, simple, pilots = simple_inputs(
+                race, tyre, pilot_tuples, mode, total_laps)
+            if not pilots or race_simple.total_laps <= 0:
+                return []
+            with span(f"{stage}.build"):
+                stints = build(race_simple, tyre_simple, simple)
+            return from_simple(race, mode, pilots, stints)
+    return planner
+
+
+plan_stints_iterative = _simple_planner(build_stints_iterative_with_pilots, "planner.iterative")
+plan_stints_iterative.__name__ = plan_stints_iterative.__qualname__ = "plan_stints_iterative"
+plan_stints_iterative.__doc__ = "build_stints_iterative_with_pilots с входами и планом model.py."
+
+plan_stints_closed_form = _simple_planner(build_stints_closed_form, "planner.closed_form")
+plan_stints_closed_form.__name__ = plan_stints_closed_form.__qualname__ = "plan_stints_closed_form"
+plan_stints_closed_form.__doc__ = "build_stints_closed_form с входами и планом model.py."
+
+
+@dataclass
+class PlannerInfo:
+    name: str                   # ключ реестра, он же имя движка в cli.py
+    label: str                  # подпись в интерфейсе
+    func: Planner
+
+
+# порядок регистрации — порядок в интерфейсе
+PLANNERS: Dict[str, PlannerInfo] = {}
+
+
+def register_planner(name: str, label: str, func: Planner) -> Planner:
+    if name in PLANNERS:
+        raise ValueError(f"Планировщик {name} уже зарегистрирован")
+    PLANNERS[name] = PlannerInfo(name=name, label=label, func=func)
+    return func
+
+
+def get_planner(name: str) -> Planner:
+    try:
+        return PLANNERS[name].func
+    except KeyError:
+        raise ValueError(f"Неизвестный планировщик {name}") from None
+
+
+register_planner("greedy", "Быстрый (жадный)", plan_stints)
+register_planner("iterative", "Итеративный push/eco", plan_stints_iterative)
+register_planner("closed_form", "Push/eco (аналитический)", plan_stints_closed_form)
+register_planner("optimal", "Оптимальный", plan_stints_optimal)
+register_planner("rotation", "Оптимальный + ротация пилотов", plan_stints_rotation)
+register_planner("tyres", "Оптимальный + износ резины", plan_stints_tyres)
+register_planner("fuel_target", "Непрерывный расход (цели по топливу)", plan_stints_fuel_target)
+
+
+def to_plan(stints: List[Stint], pilots: List[Pilot]) -> PlanBatch:
+    """План одной строкой PlanBatch — для evaluate_plans и сравнения."""
+    return pack_plans([stints], pilots)
+
+
+@dataclass
+class PlannerRun:
+    name: str
+    label: str
+    stints: List[Stint]
+    total_sec: float            # tyres.race_time_sec, 0 при ошибке
+    elapsed_sec: float          # время работы планировщика
+    error: Optional[str] = None
+
+
+def compare_planners(
+    race: RaceParams,
+    tyre: TyreParams,
+    pilot_tuples,
+    mode: ConsumptionMode,
+    names: Optional[Iterable[str]] = None,
+    wrap: Optional[Callable[[Planner], Planner]] = None,
+) -> List[PlannerRun]:
+    """
+    Прогоняет планировщики реестра (или только names) на одних входах.
+    wrap — обёртка над функцией планировщика, например PlanCache.wrap.
+    ValueError планировщика попадает в error, остальные ошибки не глотаются.
+    """
+    pilots = _build_pilots(pilot_tuples)
+    runs: List[PlannerRun] = []
+    for name in (PLANNERS if names is None else names):
+        info = PLANNERS[name]
+        func = wrap(info.func) if wrap is not None else info.func
+        t0 = time.perf_counter()
+        try:
+            stints = func(race, tyre, pilot_tuples, mode)
+        except ValueError as e:
+            runs.append(PlannerRun(name, info.label, [], 0.0, time.perf_counter() - t0, str(e)))
+            continue
+        elapsed = time.perf_counter() - t0
+        runs.append(PlannerRun(
+            name=name,
+            label=info.label,
+            stints=stints,
+            total_sec=race_time_sec(race, tyre, pilots, stints, mode),
+            elapsed_sec=elapsed,
+        ))
+    return runs
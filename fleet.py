@@ -0,0 +1,403 @@
+"""
+План для нескольких машин команды: общий запас комплектов шин и один
+пит-бокс (одновременно обслуживается одна машина).
+
+1) Подзадачи по машинам: план каждой машины при k комплектах — вызов
+   планировщика из реестра. Сначала с максимумом комплектов (так видно,
+   сколько машине вообще нужно), затем для меньших k. Вызовы независимы
+   и уходят в пул процессов.
+2) Распределение комплектов: ДП по машинам (рюкзак) — минимум суммы
+   времён при сумме комплектов <= tyre.sets.
+3) Координация бокса: проезд пит-стопов по времени гонки — если бокс
+   занят, машина ждёт. Затем ожидания убираются сдвигом пит-стопа на
+   несколько кругов раньше или позже (круги переходят между соседними
+   стинтами в пределах дальности пилота), пока это уменьшает общее время.
+
+Моменты заезда считаются по среднему времени круга пилота (износ резины
+и вес топлива в момент заезда не учитываются); итоговое время машины —
+tyres.race_time_sec плюс ожидание бокса.
+"""
+import heapq
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from engine import get_planner
+from instrument import span
+from model import (
+    RaceParams, TyreParams, ConsumptionMode, Pilot, Stint,
+    _build_pilots, _calc_stint_length_push, _calc_stint_length_eco,
+)
+from fuel_target import retarget_stint
+from optimal import DEFAULT_MAX_STINTS_PER_SET, _stint_fuel_start
+from tyres import race_time_sec
+
+
+INF = float("inf")
+
+DEFAULT_MAX_SHIFT = 5           # кругов сдвига пит-стопа при координации
+DEFAULT_MAX_ROUNDS = 200        # принятых сдвигов за координацию
+
+
+@dataclass
+class Car:
+    name: str
+    pilot_tuples: list
+    tank_liters: Optional[float] = None     # None — бак из race
+
+
+@dataclass
+class PitStop:
+    car: str
+    stint: int                  # номер стинта после пит-стопа (с 1)
+    lap: int                    # кругов проехано к заезду
+    arrive_sec: float           # заезд в бокс, время гонки
+    start_sec: float            # начало обслуживания (arrive + ожидание)
+    service_sec: float
+
+    @property
+    def wait_sec(self) -> float:
+        return self.start_sec - self.arrive_sec
+
+
+@dataclass
+class CarPlan:
+    name: str
+    stints: List[Stint]
+    tyre_sets: int              # комплектов из общего запаса
+    race_sec: float             # время по плану без ожидания бокса
+    wait_sec: float = 0.0
+    stops: List[PitStop] = field(default_factory=list)
+
+    @property
+    def total_sec(self) -> float:
+        return self.race_sec + self.wait_sec
+
+
+@dataclass
+class FleetPlan:
+    cars: List[CarPlan]
+    total_sec: float            # сумма по машинам
+    wait_sec: float             # ожидание бокса, сумма
+    shifts: int                 # принятых сдвигов пит-стопов
+    elapsed_sec: float
+
+    def stops(self) -> List[PitStop]:
+        """Все пит-стопы команды по времени начала обслуживания."""
+        return sorted((s for c in self.cars for s in c.stops), key=lambda s: s.start_sec)
+
+
+# ---------- Подзадачи машин ----------
+
+def car_race(race: RaceParams, car: Car) -> RaceParams:
+    """Параметры гонки для машины: свой бак и среднее время круга своих пилотов."""
+    lap_times = [p[1] for p in car.pilot_tuples]
+    avg_lap = sum(lap_times) / len(lap_times) if lap_times else race.avg_lap_sec
+    tank = race.tank_liters if car.tank_liters is None else car.tank_liters
+    return replace(race, avg_lap_sec=avg_lap, tank_liters=tank)
+
+
+def _plan_car(planner_name: str, race: RaceParams, tyre: TyreParams, pilot_tuples,
+              mode: ConsumptionMode) -> Tuple[List[Stint], float]:
+    stints = get_planner(planner_name)(race, tyre, pilot_tuples, mode)
+    return stints, race_time_sec(race, tyre, _build_pilots(pilot_tuples), stints, mode)
+
+
+def _sets_needed(stints: Sequence[Stint]) -> int:
+    """Комплектов на план: не больше DEFAULT_MAX_STINTS_PER_SET стинтов на комплект."""
+    by_count = -(-len(stints) // DEFAULT_MAX_STINTS_PER_SET)
+    return max(by_count, len({s.tyre_set for s in stints}))
+
+
+def _run_tasks(tasks: List[tuple], workers: Optional[int]) -> List[Tuple[List[Stint], float]]:
+    if workers == 1 or len(tasks) <= 1:
+        return [_plan_car(*t) for t in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_plan_car, *zip(*tasks)))
+
+
+def allocate_sets(curves: Sequence[Sequence[float]], total_sets: int) -> List[int]:
+    """
+    curves[c][k-1] — время машины c при k комплектах (k >= 1).
+    Минимум суммы при сумме комплектов <= total_sets; возвращает k по машинам.
+    """
+    n = len(curves)
+    if total_sets < n:
+        raise ValueError(f"Комплектов ({total_sets}) меньше, чем машин ({n})")
+    # best[s] — минимум по обработанным машинам при s комплектах
+    best = [0.0] + [INF] * total_sets
+    choice: List[List[int]] = []
+    for curve in curves:
+        new = [INF] * (total_sets + 1)
+        pick = [0] * (total_sets + 1)
+        for s in range(total_sets + 1):
+            if best[s] == INF:
+                continue
+            for k in range(1, min(len(curve), total_sets - s) + 1):
+                v = best[s] + curve[k - 1]
+                if v < new[s + k]:
+                    new[s + k] = v
+                    pick[s + k] = k
+        best = new
+        choice.append(pick)
+    s = min(range(total_sets + 1), key=lambda i: best[i])
+    if best[s] == INF:
+        raise ValueError("Комплектов не хватает ни при каком распределении по машинам")
+    result = [0] * n
+    for c in range(n - 1, -1, -1):
+        result[c] = choice[c][s]
+        s -= result[c]
+    return result
+
+
+# ---------- Пит-бокс ----------
+
+@dataclass
+class _CarState:
+    """Машина при координации: стинты, дальности пилотов, время без ожидания."""
+    name: str
+    race: RaceParams
+    tyre: TyreParams
+    mode: ConsumptionMode
+    pilots: List[Pilot]
+    stints: List[Stint]
+    caps: Dict[str, Tuple[int, int]]        # пилот -> (push, eco) кругов
+    race_sec: float = 0.0
+
+
+def _service_sec(race: RaceParams, prev: Stint, stint: Stint) -> float:
+    """Обслуживание в боксе — как пит-стоп в compute_total_race_time_sec."""
+    sec = race.pit_refuel_sec if stint.tyre_set == prev.tyre_set else race.pit_tyre_sec
+    if stint.pilot != prev.pilot:
+        sec += race.driver_change_sec
+    return sec
+
+
+def _stop_offsets(car: _CarState) -> List[Tuple[float, float, int]]:
+    """(заезд без ожиданий, обслуживание, кругов к заезду) по пит-стопам машины."""
+    lap_time = {p.name: p.lap_time_sec for p in car.pilots}
+    t = 0.0
+    laps = 0
+    out = []
+    for i, s in enumerate(car.stints):
+        if i > 0:
+            service = _service_sec(car.race, car.stints[i - 1], s)
+            out.append((t, service, laps))
+            t += service
+        t += s.laps * lap_time.get(s.pilot, 0.0)
+        laps += s.laps
+    return out
+
+
+def _schedule(offsets: Sequence[Sequence[Tuple[float, float, int]]]):
+    """schedule_box плюс для каждого ожидания — (машина, пит-стоп), занимавшие бокс."""
+    waits = [[0.0] * len(o) for o in offsets]
+    blockers: Dict[Tuple[int, int], Tuple[int, int]] = {}
+    heap = [(o[0][0], c, 0) for c, o in enumerate(offsets) if o]
+    heapq.heapify(heap)
+    delay = [0.0] * len(offsets)
+    free_at = -INF
+    last = None
+    while heap:
+        arrive, c, i = heapq.heappop(heap)
+        start = max(arrive, free_at)
+        if start > arrive:
+            waits[c][i] = start - arrive
+            delay[c] += start - arrive
+            blockers[(c, i)] = last
+        free_at = start + offsets[c][i][1]
+        last = (c, i)
+        if i + 1 < len(offsets[c]):
+            heapq.heappush(heap, (offsets[c][i + 1][0] + delay[c], c, i + 1))
+    return waits, blockers
+
+
+def schedule_box(offsets: Sequence[Sequence[Tuple[float, float, int]]]) -> List[List[float]]:
+    """
+    Один бокс на всех: машины обслуживаются в порядке заезда, занятый бокс —
+    ожидание, и все следующие заезды машины сдвигаются на него.
+    offsets[c] — (заезд без ожиданий, обслуживание, круг) по пит-стопам машины c.
+    Возвращает ожидание по каждому пит-стопу каждой машины.
+    """
+    return _schedule(offsets)[0]
+
+
+def _shifted(car: _CarState, stop: int, d: int) -> Optional[List[Stint]]:
+    """
+    Пит-стоп перед стинтом stop на d кругов позже (d < 0 — раньше) или None.
+    Круги забирает или отдаёт ближайший стинт начиная со stop, у которого
+    есть запас по дальности (или по длине); пит-стопы между ними сдвигаются вместе.
+    """
+    stints = car.stints
+    prev = stints[stop - 1]
+    a = prev.laps + d
+    if a < 1 or a > car.caps[prev.pilot][1]:
+        return None
+    j = stop
+    while j < len(stints):
+        b = stints[j].laps - d
+        if 1 <= b <= car.caps[stints[j].pilot][1]:
+            break
+        j += 1
+    else:
+        return None
+    by_name = {p.name: p for p in car.pilots}
+    stints = list(stints)
+    for idx, laps in ((stop - 1, a), (j, b)):
+        s = stints[idx]
+        if s.fuel_per_lap > 0:
+            # целевой расход был под прежние круги — пересчитать под бак
+            stints[idx] = retarget_stint(car.race, car.mode, by_name[s.pilot], s, laps)
+            continue
+        eco = laps > car.caps[s.pilot][0]
+        stints[idx] = replace(s, laps=laps, eco=eco,
+                              fuel_start=_stint_fuel_start(car.race, by_name[s.pilot],
+                                                           car.mode, laps, eco))
+    return stints
+
+
+def _team_cost(cars: Sequence[_CarState]):
+    waits, blockers = _schedule([_stop_offsets(c) for c in cars])
+    return sum(c.race_sec for c in cars) + sum(map(sum, waits)), blockers
+
+
+def coordinate_box(cars: List[_CarState], max_shift: int = DEFAULT_MAX_SHIFT,
+                   max_rounds: int = DEFAULT_MAX_ROUNDS) -> int:
+    """
+    Убирает ожидания бокса сдвигами пит-стопов. За раунд перебираются сдвиги
+    каждого пит-стопа с ожиданием и пит-стопа, из-за которого ждали;
+    применяется лучший, если общее время уменьшилось. Возвращает число сдвигов.
+    """
+    cost, blockers = _team_cost(cars)
+    shifts = 0
+    while shifts < max_rounds and blockers:
+        # пит-стоп i машины c стоит перед её стинтом i + 1
+        candidates = set()
+        for (c, i), blocker in blockers.items():
+            candidates.add((c, i + 1))
+            if blocker is not None:
+                candidates.add((blocker[0], blocker[1] + 1))
+        best = (cost, None)
+        for c, stop in candidates:
+            car = cars[c]
+            for d in range(-max_shift, max_shift + 1):
+                if d == 0:
+                    continue
+                stints = _shifted(car, stop, d)
+                if stints is None:
+                    continue
+                old = car.stints, car.race_sec
+                car.stints = stints
+                car.race_sec = race_time_sec(car.race, car.tyre, car.pilots, stints, car.mode)
+                trial, _ = _team_cost(cars)
+                car.stints, car.race_sec = old
+                if trial < best[0] - 1e-9:
+                    best = (trial, (c, stints))
+        if best[1] is None:
+            break
+        c, stints = best[1]
+        cars[c].stints = stints
+        cars[c].race_sec = race_time_sec(cars[c].race, cars[c].tyre, cars[c].pilots, stints,
+                                         cars[c].mode)
+        cost, blockers = _team_cost(cars)
+        shifts += 1
+    return shifts
+
+
+# ---------- Вход ----------
+
+def plan_fleet(
+    race: RaceParams,
+    tyre: TyreParams,
+    cars: Sequence[Car],
+    mode: ConsumptionMode,
+    planner: str = "optimal",
+    workers: Optional[int] = None,
+    max_shift: int = DEFAULT_MAX_SHIFT,
+    on_progress: Optional[Callable[[float], None]] = None,
+) -> FleetPlan:
+    """
+    План команды: tyre.sets — общий запас комплектов, бокс один.
+    planner — имя из реестра engine.PLANNERS (в процессы уходит имя).
+    workers=1 — без пула.
+    """
+    started = time.perf_counter()
+    cars = list(cars)
+    if not cars:
+        return FleetPlan(cars=[], total_sec=0.0, wait_sec=0.0, shifts=0, elapsed_sec=0.0)
+    get_planner(planner)
+    for car in cars:
+        if not car.pilot_tuples:
+            raise ValueError(f"У машины {car.name} нет пилотов")
+    if tyre.sets < len(cars):
+        raise ValueError(f"Комплектов ({tyre.sets}) меньше, чем машин ({len(cars)})")
+
+    races = [car_race(race, car) for car in cars]
+    max_sets = tyre.sets - (len(cars) - 1)
+
+    # 1) план каждой машины при максимуме комплектов — сколько ей нужно
+    with span("fleet.subproblems"):
+        full = _run_tasks([(planner, r, replace(tyre, sets=max_sets), car.pilot_tuples, mode)
+                           for r, car in zip(races, cars)], workers)
+        if on_progress is not None:
+            on_progress(0.3)
+        needed = [max(_sets_needed(stints), 1) for stints, _t in full]
+        tasks, where = [], []
+        for c, (r, car) in enumerate(zip(races, cars)):
+            for k in range(1, needed[c]):
+                tasks.append((planner, r, replace(tyre, sets=k), car.pilot_tuples, mode))
+                where.append((c, k))
+        partial = _run_tasks(tasks, workers)
+    if on_progress is not None:
+        on_progress(0.7)
+
+    plans: List[Dict[int, Tuple[List[Stint], float]]] = [{needed[c]: full[c]} for c in range(len(cars))]
+    for (c, k), result in zip(where, partial):
+        plans[c][k] = result
+    curves = []
+    for c in range(len(cars)):
+        curve = []
+        for k in range(1, needed[c] + 1):
+            stints, total = plans[c][k]
+            # запасной план планировщика может не уложиться в k комплектов
+            curve.append(total if stints and _sets_needed(stints) <= k else INF)
+        curves.append(curve)
+
+    # 2) распределение общего запаса комплектов
+    sets = allocate_sets(curves, tyre.sets)
+
+    # 3) координация бокса
+    states = []
+    for c, car in enumerate(cars):
+        stints, total = plans[c][sets[c]]
+        pilots = _build_pilots(car.pilot_tuples)
+        caps = {p.name: (_calc_stint_length_push(races[c], p, mode),
+                         _calc_stint_length_eco(races[c], p, mode)) for p in pilots}
+        states.append(_CarState(name=car.name, race=races[c], tyre=replace(tyre, sets=sets[c]),
+                                mode=mode, pilots=pilots, stints=list(stints), caps=caps, race_sec=total))
+    with span("fleet.coordinate"):
+        shifts = coordinate_box(states, max_shift=max_shift)
+    if on_progress is not None:
+        on_progress(1.0)
+
+    offsets = [_stop_offsets(s) for s in states]
+    waits = schedule_box(offsets)
+    result = []
+    for c, st in enumerate(states):
+        delay = 0.0
+        stops = []
+        for i, (arrive, service, lap) in enumerate(offsets[c]):
+            arrive += delay
+            stops.append(PitStop(car=st.name, stint=i + 2, lap=lap, arrive_sec=arrive,
+                                 start_sec=arrive + waits[c][i], service_sec=service))
+            delay += waits[c][i]
+        result.append(CarPlan(name=st.name, stints=st.stints, tyre_sets=sets[c],
+                              race_sec=st.race_sec, wait_sec=sum(waits[c]), stops=stops))
+    return FleetPlan(
+        cars=result,
+        total_sec=sum(c.total_sec for c in result),
+        wait_sec=sum(c.wait_sec for c in result),
+        shifts=shifts,
+        elapsed_sec=time.perf_counter() - started,
+    )
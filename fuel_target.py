@@ -0,0 +1,246 @@
+"""
+Непрерывный целевой расход вместо push/eco.
+
+Каждому стинту — свой расход на круг f между fuel_eco и fuel_push пилота
+(в режиме «кругов на баке» — бак / laps_per_tank_*). Потеря времени на круге
+линейна: race.eco_lap_loss_sec * (push - f) / (push - eco), в push — ноль.
+
+При заданном числе стинтов n выгоднее всего раскидать круги поровну и
+ехать с расходом f = бак / круги стинта (не больше push): штраф стинта
+выпуклый по числу кругов, поэтому ровная раскладка — минимум. Остаётся
+выбрать n: от наименьшего, при котором хватает дальности в eco, до числа
+стинтов чистого push (дальше штрафа уже нет). Всё считается массивами
+NumPy сразу по сетке сценариев x пилоты x варианты n (solve_batch) — так
+считаются и перебор параметров (sweep.py), и сам планировщик.
+
+Пилот — один на гонку: смены пилота в модели только стоят времени, а
+ограничения регламента учитывает планировщик с ротацией. Износ резины и
+вес топлива solve_batch не учитывает — их учитывает tyres.race_time_sec
+при оценке готового плана.
+"""
+from dataclasses import replace
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from instrument import traced
+from model import (
+    RaceParams, TyreParams, ConsumptionMode, Stint,
+    plan_stints, _build_pilots, _calc_total_laps,
+)
+from optimal import DEFAULT_MAX_STINTS_PER_SET
+
+
+INF = float("inf")
+
+# поля, по которым solve_grid принимает оси перебора
+GRID_RACE_FIELDS = ("tank_liters", "pit_refuel_sec", "pit_tyre_sec", "driver_change_sec")
+
+
+def fuel_targets(laps, tank, fuel_push, fuel_eco) -> np.ndarray:
+    """Расход на круг, при котором бака хватает ровно на laps кругов (в пределах eco..push)."""
+    laps = np.asarray(laps, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        exact = np.where(laps > 0, np.asarray(tank, dtype=np.float64) / laps, fuel_push)
+    return np.clip(exact, fuel_eco, fuel_push)
+
+
+def lap_loss(target, fuel_push, fuel_eco, eco_lap_loss_sec) -> np.ndarray:
+    """Потеря времени круга при расходе target."""
+    span = np.asarray(fuel_push, dtype=np.float64) - fuel_eco
+    with np.errstate(divide="ignore", invalid="ignore"):
+        share = np.where(span > 0, (np.asarray(fuel_push) - target) / span, 0.0)
+    return eco_lap_loss_sec * np.clip(share, 0.0, 1.0)
+
+
+def _pilot_arrays(pilots, mode: ConsumptionMode, tank: np.ndarray):
+    """
+    Расход push/eco (л/круг) и дальность в кругах (push, eco) — как
+    model._calc_stint_length_*; форма — tank x пилоты.
+    """
+    tank = tank[..., None]
+    if mode.by_fuel_per_lap:
+        push = np.array([p.fuel_push for p in pilots], dtype=np.float64)
+        eco = np.array([p.fuel_eco if p.fuel_eco > 0 else p.fuel_push for p in pilots],
+                       dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cap_push = np.where(push > 0, np.floor(tank / push), 0.0)
+            cap_eco = np.where(eco > 0, np.floor(tank / eco), 0.0)
+        cap_push = np.where(push > 0, np.maximum(cap_push, 1), 0)
+        push = np.broadcast_to(push, cap_push.shape)
+        eco = np.broadcast_to(eco, cap_push.shape)
+    else:
+        lp = np.array([p.laps_per_tank_push for p in pilots], dtype=np.float64)
+        le = np.array([p.laps_per_tank_eco if p.laps_per_tank_eco > 0 else p.laps_per_tank_push
+                       for p in pilots], dtype=np.float64)
+        cap_push = np.broadcast_to(np.where(lp > 0, np.maximum(np.floor(lp), 1), 0), tank.shape[:-1] + lp.shape)
+        cap_eco = np.broadcast_to(np.floor(le), cap_push.shape)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            push = np.where(cap_push > 0, tank / cap_push, 0.0)
+            eco = np.where(cap_eco > 0, tank / np.maximum(cap_eco, cap_push), push)
+    cap_eco = np.maximum(cap_eco, cap_push)
+    return push, eco, cap_push.astype(np.int64), cap_eco.astype(np.int64)
+
+
+def solve_batch(
+    total_laps: int,
+    tank: np.ndarray,
+    pit_refuel_sec: np.ndarray,
+    pit_tyre_sec: np.ndarray,
+    sets: np.ndarray,
+    eco_lap_loss_sec: float,
+    pilots,
+    mode: ConsumptionMode,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Лучшее число стинтов для каждого сценария сетки (массивы одной формы G
+    или скаляры). Возвращает (время гонки, стинтов, индекс пилота) формы G;
+    время inf — ни один пилот не укладывается в комплекты шин.
+    """
+    tank, refuel, tyre_pit, sets = np.broadcast_arrays(
+        np.asarray(tank, dtype=np.float64), np.asarray(pit_refuel_sec, dtype=np.float64),
+        np.asarray(pit_tyre_sec, dtype=np.float64), np.asarray(sets, dtype=np.int64),
+    )
+    shape = tank.shape
+    L = int(total_laps)
+    if L <= 0 or not pilots:
+        return (np.zeros(shape), np.zeros(shape, dtype=np.int64), np.zeros(shape, dtype=np.int64))
+
+    push, eco, cap_push, cap_eco = _pilot_arrays(pilots, mode, tank)   # G x P
+    lap_time = np.array([p.lap_time_sec for p in pilots], dtype=np.float64)
+    valid = cap_eco > 0
+    safe_eco = np.where(valid, cap_eco, 1)
+    n_min = -(-L // safe_eco)                                           # ceil
+    n_max = np.maximum(-(-L // np.where(cap_push > 0, cap_push, 1)), n_min)
+
+    width = int((n_max - n_min).max()) + 1
+    n = n_min[..., None] + np.arange(width)                             # G x P x W
+    n_ok = valid[..., None] & (n <= n_max[..., None])
+    n_ok &= n <= (np.maximum(sets, 1) * DEFAULT_MAX_STINTS_PER_SET)[..., None, None]
+    n = np.maximum(n, 1)
+
+    q, r = np.divmod(L, n)
+    t3 = tank[..., None, None]
+    p3, e3 = push[..., None], eco[..., None]
+
+    def stint_loss(laps):
+        f = fuel_targets(laps, t3, p3, e3)
+        return laps * lap_loss(f, p3, e3, eco_lap_loss_sec)
+
+    loss = r * stint_loss(q + 1) + (n - r) * np.where(q > 0, stint_loss(q), 0.0)
+    stops = n - 1
+    pits = stops * refuel[..., None, None] + (stops // DEFAULT_MAX_STINTS_PER_SET) * (
+        tyre_pit - refuel)[..., None, None]
+    total = L * lap_time[:, None] + pits + loss
+    total = np.where(n_ok, total, INF)
+
+    # меньше стинтов при равном времени — argmin берёт первый
+    best_w = total.argmin(axis=-1)                                      # G x P
+    best_t = np.take_along_axis(total, best_w[..., None], axis=-1)[..., 0]
+    best_p = best_t.argmin(axis=-1)                                     # G
+    time = np.take_along_axis(best_t, best_p[..., None], axis=-1)[..., 0]
+    stints = np.take_along_axis(n_min + best_w, best_p[..., None], axis=-1)[..., 0]
+    return time, stints, best_p
+
+
+def _pilot_fuel(race: RaceParams, mode: ConsumptionMode, pilot) -> Tuple[float, float, int]:
+    push, eco, cap_push, _cap_eco = _pilot_arrays([pilot], mode, np.array(race.tank_liters))
+    return float(push[0]), float(eco[0]), int(cap_push[0])
+
+
+def _stint_fuel(race: RaceParams, mode: ConsumptionMode, fuel: Tuple[float, float, int],
+                laps: int) -> Tuple[float, float, bool]:
+    """(целевой расход, топливо на старт, eco) стинта из laps кругов; fuel — из _pilot_fuel."""
+    push, eco, cap_push = fuel
+    target = float(fuel_targets(laps, race.tank_liters, push, eco))
+    fuel_start = laps * target if mode.by_fuel_per_lap else race.tank_liters
+    return target, fuel_start, laps > cap_push
+
+
+def retarget_stint(race: RaceParams, mode: ConsumptionMode, pilot, stint: Stint, laps: int) -> Stint:
+    """Стинт с целевым расходом на другое число кругов: расход и топливо пересчитаны под бак."""
+    target, fuel_start, eco = _stint_fuel(race, mode, _pilot_fuel(race, mode, pilot), laps)
+    return replace(stint, laps=laps, fuel_start=fuel_start, eco=eco, fuel_per_lap=target)
+
+
+def _stints_from_solution(race: RaceParams, mode: ConsumptionMode, pilot, n: int,
+                          total_laps: int) -> List[Stint]:
+    fuel = _pilot_fuel(race, mode, pilot)
+    q, r = divmod(total_laps, n)
+    stints: List[Stint] = []
+    for k in range(n):
+        laps = q + 1 if k < r else q
+        if laps <= 0:
+            continue
+        target, fuel_start, eco = _stint_fuel(race, mode, fuel, laps)
+        stints.append(Stint(
+            pilot=pilot.name,
+            laps=laps,
+            fuel_start=fuel_start,
+            tyre_set=k // DEFAULT_MAX_STINTS_PER_SET + 1,
+            eco=eco,
+            fuel_per_lap=target,
+        ))
+    return stints
+
+
+@traced("planner.fuel_target")
+def plan_stints_fuel_target(
+    race: RaceParams,
+    tyre: TyreParams,
+    pilot_tuples: List[Tuple[str, float, float, float, float, float]],
+    mode: ConsumptionMode,
+    total_laps: Optional[int] = None,
+) -> List[Stint]:
+    """
+    Стинты с непрерывным целевым расходом (Stint.fuel_per_lap).
+    Если ни один пилот не укладывается в комплекты шин — возвращает plan_stints.
+    """
+    pilots = _build_pilots(pilot_tuples)
+    if not pilots:
+        return []
+    if total_laps is None:
+        total_laps = _calc_total_laps(race)
+    if total_laps <= 0:
+        return []
+    time, n, p = solve_batch(total_laps, race.tank_liters, race.pit_refuel_sec,
+                             race.pit_tyre_sec, tyre.sets, race.eco_lap_loss_sec, pilots, mode)
+    if not np.isfinite(time):
+        return plan_stints(race, tyre, pilot_tuples, mode, total_laps=total_laps)
+    return _stints_from_solution(race, mode, pilots[int(p)], int(n), total_laps)
+
+
+def grid_exact(race: RaceParams, tyre: TyreParams) -> bool:
+    """solve_grid совпадает с tyres.race_time_sec: нет износа, веса топлива и профиля круга."""
+    return not tyre.compound and race.fuel_sec_per_liter == 0.0 and not race.lap_profile
+
+
+def solve_grid(race: RaceParams, tyre: TyreParams, pilot_tuples, mode: ConsumptionMode,
+               axes: Sequence) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Время гонки и число стинтов plan_stints_fuel_target по декартовой сетке
+    осей (a.field, a.values) — одним вызовом solve_batch, без планов.
+    Поля осей — GRID_RACE_FIELDS и "sets"; форма — (len(values) по осям).
+    """
+    pilots = _build_pilots(pilot_tuples)
+    shape = tuple(len(a.values) for a in axes)
+    grid = {
+        "tank_liters": race.tank_liters,
+        "pit_refuel_sec": race.pit_refuel_sec,
+        "pit_tyre_sec": race.pit_tyre_sec,
+        "driver_change_sec": race.driver_change_sec,
+        "sets": tyre.sets,
+    }
+    for i, a in enumerate(axes):
+        if a.field not in grid:
+            raise ValueError(f"Нельзя перебирать поле {a.field}")
+        view = [1] * len(axes)
+        view[i] = len(a.values)
+        grid[a.field] = np.asarray(a.values, dtype=np.float64).reshape(view)
+    time, stints, _p = solve_batch(
+        _calc_total_laps(race), np.broadcast_to(grid["tank_liters"], shape),
+        grid["pit_refuel_sec"], grid["pit_tyre_sec"], np.asarray(grid["sets"]).astype(np.int64),
+        race.eco_lap_loss_sec, pilots, mode,
+    )
+    # смен пилота нет: пилот один на всю гонку
+    return np.broadcast_to(time, shape), np.broadcast_to(stints, shape).astype(np.int32)
@@ -0,0 +1,193 @@
+import inspect
+import threading
+from collections import OrderedDict
+from dataclasses import astuple, replace
+from typing import Callable, List, Optional, Tuple
+
+from model import (
+    RaceParams, TyreParams, Stint, ConsumptionMode,
+    plan_stints, _calc_total_laps,
+)
+from cache import PlanCache, cacheable, plan_cache_key
+from engine import plan_stints_iterative, plan_stints_closed_form
+from rotation import plan_stints_rotation, repair_rotation
+
+
+PilotTuple = Tuple[str, float, float, float, float, float]
+
+
+def greedy_plan_key(race: RaceParams, tyre: TyreParams,
+                    pilot_tuples: List[PilotTuple], mode: ConsumptionMode) -> tuple:
+    """
+    Всё, от чего зависит результат plan_stints (и обёрток strategy_core из engine.py).
+    Время круга пилотов и время пит-стопов влияют на план только через
+    общее число кругов, поэтому правка времени круга обычно план не меняет.
+    """
+    return (
+        _calc_total_laps(race),
+        race.tank_liters,
+        max(tyre.sets, 1),
+        tuple((name, fp, fe, lp, le) for name, _lap, fp, fe, lp, le in pilot_tuples),
+        mode.by_fuel_per_lap,
+    )
+
+
+def full_plan_key(race: RaceParams, tyre: TyreParams,
+                  pilot_tuples: List[PilotTuple], mode: ConsumptionMode) -> tuple:
+    """Ключ по всем входам — для планировщиков, которым важно всё."""
+    return astuple(race), astuple(tyre), tuple(map(tuple, pilot_tuples)), mode.by_fuel_per_lap
+
+
+# структурные ключи известных планировщиков
+_PLAN_KEYS = {
+    plan_stints: greedy_plan_key,
+    plan_stints_iterative: greedy_plan_key,
+    plan_stints_closed_form: greedy_plan_key,
+}
+
+# поля RaceParams, которые не входят в структурный ключ планировщика
+_STOP_FIELDS = frozenset({"pit_refuel_sec", "pit_tyre_sec", "driver_change_sec",
+                          "fuel_sec_per_liter", "eco_lap_loss_sec"})
+_PLAN_INDEPENDENT_FIELDS = {
+    plan_stints: _STOP_FIELDS,
+    plan_stints_iterative: _STOP_FIELDS,
+    plan_stints_closed_form: _STOP_FIELDS,
+}
+
+
+# быстрый план после правки времени круга: (race, tyre, pilot_tuples, mode,
+# прежний план, имена правленых пилотов, should_stop) -> план или None
+_REPAIRS = {
+    plan_stints_rotation: repair_rotation,
+}
+
+
+def lap_time_edit(old_pilots: List[PilotTuple], new_pilots: List[PilotTuple]) -> Optional[List[str]]:
+    """Имена пилотов, у которых поменялось только время круга; None — правка другая."""
+    if len(old_pilots) != len(new_pilots):
+        return None
+    changed = []
+    for old, new in zip(old_pilots, new_pilots):
+        if old[0] != new[0] or tuple(old[2:]) != tuple(new[2:]):
+            return None
+        if old[1] != new[1]:
+            changed.append(new[0])
+    return changed
+
+
+def plan_key_for(planner: Callable[..., List[Stint]]) -> Callable[..., tuple]:
+    return _PLAN_KEYS.get(planner, full_plan_key)
+
+
+def plan_independent_fields(planner: Callable[..., List[Stint]]) -> frozenset:
+    """Поля гонки, от которых план не зависит (влияют только на итоговое время)."""
+    return _PLAN_INDEPENDENT_FIELDS.get(planner, frozenset())
+
+
+class IncrementalPlanner:
+    """
+    Обёртка над планировщиком для авто-пересчёта: помнит последние планы по
+    ключу входов и пересчитывает план только если изменилось то, от чего он
+    зависит. Вызывается как сам планировщик; хранит до max_entries планов.
+    При промахе заглядывает в общий PlanCache (если задан) по полным входам.
+
+    Правка, которая план не меняет (у жадных — время круга и пит-стопов,
+    см. greedy_plan_key), обходится без планировщика. Если правка — только
+    время круга, а у планировщика есть быстрый пересчёт (_REPAIRS, у ротации —
+    repair_rotation: прежние круги и пилоты до первого стинта правленого),
+    его план сразу уходит в on_progress(0.0, план), а полный расчёт идёт следом.
+    """
+
+    def __init__(self, planner: Callable[..., List[Stint]],
+                 key_fn: Optional[Callable[..., tuple]] = None,
+                 max_entries: int = 32,
+                 cache: Optional[PlanCache] = None):
+        self.planner = planner
+        self.cache = cache
+        self.key_fn = key_fn or plan_key_for(planner)
+        self.max_entries = max_entries
+        try:
+            params = inspect.signature(planner).parameters
+        except (TypeError, ValueError):
+            params = {}
+        self._hooks = {name for name in ("on_progress", "should_stop") if name in params}
+        self.hits = 0
+        self.misses = 0
+        self._plans: "OrderedDict[tuple, List[Stint]]" = OrderedDict()
+        # входы и план последнего расчёта — основа быстрого пересчёта
+        self._last: Optional[tuple] = None
+        self._lock = threading.Lock()
+
+    def __call__(
+        self,
+        race: RaceParams,
+        tyre: TyreParams,
+        pilot_tuples: List[PilotTuple],
+        mode: ConsumptionMode,
+        on_progress=None,
+        should_stop=None,
+        total_laps: Optional[int] = None,
+    ) -> List[Stint]:
+        key = (self.key_fn(race, tyre, pilot_tuples, mode), total_laps)
+        with self._lock:
+            cached = self._plans.get(key)
+            if cached is not None:
+                self._plans.move_to_end(key)
+                self.hits += 1
+                self._last = (race, tyre, list(pilot_tuples), mode, total_laps, cached)
+                return [replace(s) for s in cached]
+            self.misses += 1
+            last = self._last
+
+        repair = _REPAIRS.get(self.planner)
+        if repair is not None and on_progress is not None and last is not None:
+            self._send_repair(repair, last, race, tyre, pilot_tuples, mode, total_laps,
+                              on_progress, should_stop)
+
+        kwargs = {}
+        if on_progress is not None and "on_progress" in self._hooks:
+            kwargs["on_progress"] = on_progress
+        if should_stop is not None and "should_stop" in self._hooks:
+            kwargs["should_stop"] = should_stop
+        inputs = [race, tyre, pilot_tuples, mode]
+        if total_laps is not None:
+            kwargs["total_laps"] = total_laps
+            inputs.append(total_laps)
+        content_key = None
+        stints = None
+        if self.cache is not None:
+            content_key = plan_cache_key(self.planner, *inputs)
+            stints = self.cache.get(content_key)
+        if stints is None:
+            stints = self.planner(race, tyre, pilot_tuples, mode, **kwargs)
+
+            if (should_stop is not None and should_stop()) or not cacheable(stints):
+                # прерванный или остановленный по лимиту поиск — не кешируем недосчитанный план
+                return stints
+            if content_key is not None:
+                self.cache.put(content_key, stints)
+
+        with self._lock:
+            self._plans[key] = [replace(s) for s in stints]
+            while len(self._plans) > self.max_entries:
+                self._plans.popitem(last=False)
+            self._last = (race, tyre, list(pilot_tuples), mode, total_laps, self._plans[key])
+        return stints
+
+    def _send_repair(self, repair, last, race, tyre, pilot_tuples, mode, total_laps,
+                     on_progress, should_stop):
+        old_race, old_tyre, old_pilots, old_mode, old_laps, previous = last
+        if (old_race, old_tyre, old_mode, old_laps) != (race, tyre, mode, total_laps):
+            return
+        changed = lap_time_edit(old_pilots, pilot_tuples)
+        if not changed:
+            return
+        stints = repair(race, tyre, pilot_tuples, mode, [replace(s) for s in previous], changed,
+                        should_stop=should_stop)
+        if stints:
+            on_progress(0.0, stints)
+
+    def clear(self):
+        with self._lock:
+            self._plans.clear()
+            self._last = None
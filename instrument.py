@@ -0,0 +1,210 @@
+"""
+Замеры этапов расчёта: именованные интервалы (span) и счётчики (count).
+
+    from instrument import span, count, traced
+
+    @traced("model.assign_tyres")
+    def _assign_tyres(...): ...
+
+    with span("optimal.dp"):
+        ...
+    count("optimal.layers")
+
+По умолчанию выключено: span() отдаёт общий пустой контекст, traced-обёртка
+только проверяет флаг, count() сразу выходит. Включается enable() или
+переменной окружения RACE_TRACE=путь — тогда при выходе из процесса
+записывается трасса в формате Chrome (chrome://tracing, Perfetto).
+
+События лежат в кольцевом буфере (старые вытесняются); mark() + summary(mark)
+дают разбивку одного расчёта — её показывает строка состояния окна.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+DEFAULT_CAPACITY = 200_000
+
+# (номер, вид "X"/"C", имя, поток, начало нс, длительность нс или прирост счётчика)
+Event = Tuple[int, str, str, int, int, float]
+
+_enabled = False
+_lock = threading.Lock()
+_events: deque = deque(maxlen=DEFAULT_CAPACITY)
+_seq = 0
+_origin_ns = time.perf_counter_ns()
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(capacity: Optional[int] = None):
+    global _enabled, _events
+    if capacity is not None and capacity != _events.maxlen:
+        with _lock:
+            _events = deque(_events, maxlen=capacity)
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def reset():
+    with _lock:
+        _events.clear()
+
+
+def _record(kind: str, name: str, start_ns: int, value: float):
+    global _seq
+    with _lock:
+        _seq += 1
+        _events.append((_seq, kind, name, threading.get_ident(), start_ns, value))
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        _record("X", self.name, self.start, end - self.start)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str):
+    """Контекст замера; при выключенных замерах — общий пустой объект."""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def count(name: str, n: float = 1):
+    if _enabled:
+        _record("C", name, time.perf_counter_ns(), n)
+
+
+def traced(name: str) -> Callable[[Callable], Callable]:
+    """Декоратор: каждый вызов — интервал name. Сигнатура и имя функции сохраняются."""
+    def decorate(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record("X", name, start, time.perf_counter_ns() - start)
+        return wrapper
+    return decorate
+
+
+# ---------- Разбивка и выгрузка ----------
+
+def mark() -> int:
+    """Метка «с этого места»: summary(mark()) учитывает только более поздние события."""
+    with _lock:
+        return _seq
+
+
+def events(since: int = 0, thread: Optional[int] = None) -> List[Event]:
+    with _lock:
+        snapshot = list(_events)
+    return [e for e in snapshot if e[0] > since and (thread is None or e[3] == thread)]
+
+
+@dataclass
+class StageStats:
+    name: str
+    calls: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+
+def summary(since: int = 0, thread: Optional[int] = None) -> Tuple[List[StageStats], Dict[str, float]]:
+    """(этапы по убыванию суммарного времени, счётчики) по событиям после since."""
+    stages: Dict[str, StageStats] = {}
+    counters: Dict[str, float] = {}
+    for _n, kind, name, _tid, _start, value in events(since, thread):
+        if kind == "X":
+            st = stages.get(name)
+            if st is None:
+                st = stages[name] = StageStats(name)
+            ms = value / 1e6
+            st.calls += 1
+            st.total_ms += ms
+            st.max_ms = max(st.max_ms, ms)
+        else:
+            counters[name] = counters.get(name, 0) + value
+    return sorted(stages.values(), key=lambda s: -s.total_ms), counters
+
+
+def format_summary(stages: List[StageStats], counters: Dict[str, float], limit: int = 6) -> str:
+    """Одна строка для строки состояния: «этап 12.3 мс ×2 · … | счётчик=…»."""
+    parts = []
+    for st in stages[:limit]:
+        text = f"{st.name} {st.total_ms:.1f} мс"
+        if st.calls > 1:
+            text += f" ×{st.calls}"
+        parts.append(text)
+    line = " · ".join(parts)
+    if counters:
+        line += " | " + ", ".join(f"{k}={v:g}" for k, v in sorted(counters.items()))
+    return line
+
+
+def export_chrome_trace(path: str, since: int = 0):
+    """Трасса в формате Chrome Trace Event (JSON-объект с traceEvents, время в мкс)."""
+    pid = os.getpid()
+    trace = []
+    totals: Dict[str, float] = {}
+    for _n, kind, name, tid, start, value in events(since):
+        ts = (start - _origin_ns) / 1000.0
+        if kind == "X":
+            trace.append({"name": name, "ph": "X", "ts": ts, "dur": value / 1000.0,
+                          "pid": pid, "tid": tid})
+        else:
+            totals[name] = totals.get(name, 0) + value
+            trace.append({"name": name, "ph": "C", "ts": ts, "pid": pid, "tid": tid,
+                          "args": {"value": totals[name]}})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+
+
+def _enable_from_env():
+    path = os.environ.get("RACE_TRACE")
+    if path:
+        enable()
+        atexit.register(export_chrome_trace, path)
+
+
+_enable_from_env()
@@ -0,0 +1,197 @@
+"""
+Профиль времени круга по ходу гонки: ночь, погода, трафик.
+
+Профиль — кусочно-постоянная прибавка ко времени круга пилота по часам
+гонки: ((с какой секунды гонки, прибавка в сек), ...), до первой точки
+прибавка нулевая. Круг целиком едется с прибавкой на момент своего старта.
+
+LapIndex — накопленное время кругов от старта для одного базового круга:
+сколько кругов успевает до флага и когда заканчивается круг n — бинпоиском,
+без сложения кругов по одному. Внутри участка профиля круги одинаковые,
+поэтому и сам индекс, и stint_lap_times заполняются участками.
+
+profile_extra — прибавка профиля за стинт: ею оценщики времени гонки
+(model.compute_total_race_time_sec, tyres, batch_eval) учитывают профиль.
+"""
+import math
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Iterable, Sequence, Tuple
+
+import numpy as np
+
+
+# ((начало участка, сек от старта; прибавка к кругу, сек), ...) по возрастанию начала
+LapProfile = Tuple[Tuple[float, float], ...]
+
+_POINT_RE = re.compile(r"^\s*(\d+)(?::(\d{1,2}))?\s+([+-]?\d+(?:[.,]\d*)?)\s*$")
+
+
+def normalize_profile(points: Iterable[Sequence[float]]) -> LapProfile:
+    """Точки профиля -> кортеж по возрастанию времени; повтор времени — ошибка."""
+    profile = tuple(sorted((float(t), float(d)) for t, d in points))
+    for (t0, _), (t1, _) in zip(profile, profile[1:]):
+        if t0 == t1:
+            raise ValueError(f"Профиль круга: два участка с начала {format_clock(t0)}")
+    if profile and profile[0][0] < 0:
+        raise ValueError("Профиль круга: время участка меньше нуля")
+    return profile
+
+
+def format_clock(sec: float) -> str:
+    minutes = int(round(sec / 60.0))
+    return f"{minutes // 60}:{minutes % 60:02d}"
+
+
+def parse_profile(text: str) -> LapProfile:
+    """
+    «8:00 +2.5; 14:30 0» — с 8-го часа гонки круг на 2.5 с медленнее,
+    с 14:30 — снова без прибавки. Разделители — «;» или перевод строки.
+    """
+    points = []
+    for part in re.split(r"[;\n]", text or ""):
+        if not part.strip():
+            continue
+        m = _POINT_RE.match(part)
+        if m is None:
+            raise ValueError(f"Профиль круга: не разобрать «{part.strip()}» (нужно ч:мм ±сек)")
+        hours, minutes, delta = m.groups()
+        points.append((int(hours) * 3600 + int(minutes or 0) * 60, float(delta.replace(",", "."))))
+    return normalize_profile(points)
+
+
+def format_profile(profile: LapProfile) -> str:
+    return "; ".join(f"{format_clock(t)} {d:+g}" for t, d in profile)
+
+
+def delta_at(profile: LapProfile, t: float) -> float:
+    """Прибавка для круга, который стартует в момент t."""
+    i = bisect_right(profile, (t, math.inf)) - 1
+    return profile[i][1] if i >= 0 else 0.0
+
+
+def _phases(profile: LapProfile) -> Tuple[list, list]:
+    # участки с нулевого: начала и прибавки
+    starts = [0.0] + [t for t, _ in profile if t > 0]
+    deltas = [delta_at(profile, t) for t in starts]
+    return starts, deltas
+
+
+def stint_lap_times(base_lap_sec: float, profile: LapProfile, start_sec: float,
+                    laps: int) -> np.ndarray:
+    """Времена laps кругов подряд со старта в момент start_sec (без пит-стопов)."""
+    out = np.empty(max(laps, 0), dtype=np.float64)
+    if laps <= 0:
+        return out
+    if not profile:
+        out.fill(base_lap_sec)
+        return out
+    starts, deltas = _phases(profile)
+    t = start_sec
+    done = 0
+    while done < laps:
+        i = bisect_right(starts, t) - 1
+        lap = base_lap_sec + deltas[i]
+        if lap <= 0:
+            raise ValueError("Профиль круга: время круга с прибавкой не больше нуля")
+        n = laps - done
+        if i + 1 < len(starts):
+            # круги, которые стартуют до начала следующего участка
+            n = min(n, max(math.ceil((starts[i + 1] - t) / lap), 1))
+        out[done:done + n] = lap
+        t += n * lap
+        done += n
+    return out
+
+
+def profile_extra(base_lap_sec, profile: LapProfile, start_sec, laps):
+    """
+    Сумма прибавок профиля за laps кругов подряд со старта в start_sec —
+    то, что stint_lap_times добавляет к laps * base_lap_sec. Аргументы
+    могут быть массивами NumPy: считается поэлементно, участками профиля.
+    """
+    base, t, left = np.broadcast_arrays(np.asarray(base_lap_sec, dtype=np.float64),
+                                        np.asarray(start_sec, dtype=np.float64),
+                                        np.asarray(laps, dtype=np.int64))
+    extra = np.zeros(base.shape, dtype=np.float64)
+    if not profile:
+        return extra
+    starts, deltas = _phases(profile)
+    starts, deltas = np.array(starts), np.array(deltas)
+    t, left = t.copy(), np.maximum(left, 0)
+    while True:
+        active = left > 0
+        if not active.any():
+            return extra
+        i = np.searchsorted(starts, t, side="right") - 1
+        lap = base + deltas[i]
+        if (lap[active] <= 0).any():
+            raise ValueError("Профиль круга: время круга с прибавкой не больше нуля")
+        # круги, которые стартуют до начала следующего участка (как в stint_lap_times)
+        nxt = starts[np.minimum(i + 1, len(starts) - 1)]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            to_next = np.where(i + 1 < len(starts), np.maximum(np.ceil((nxt - t) / lap), 1), left)
+        n = np.where(active, np.minimum(left, to_next), 0).astype(np.int64)
+        extra += n * deltas[i]
+        t += n * lap
+        left -= n
+
+
+def laps_between(base_lap_sec: float, profile: LapProfile, start_sec: float, end_sec: float) -> int:
+    """Сколько целых кругов со старта в start_sec заканчиваются не позже end_sec."""
+    if end_sec <= start_sec or base_lap_sec <= 0:
+        return 0
+    if not profile:
+        return int((end_sec - start_sec) // base_lap_sec)
+    starts, deltas = _phases(profile)
+    t = start_sec
+    total = 0
+    while True:
+        i = bisect_right(starts, t) - 1
+        lap = base_lap_sec + deltas[i]
+        if lap <= 0:
+            raise ValueError("Профиль круга: время круга с прибавкой не больше нуля")
+        fit = int((end_sec - t) // lap)
+        if i + 1 < len(starts):
+            to_next = max(math.ceil((starts[i + 1] - t) / lap), 1)
+            if fit >= to_next:
+                total += to_next
+                t += to_next * lap
+                continue
+        return total + fit
+
+
+class LapIndex:
+    """
+    Накопленное время кругов одного базового круга от старта гонки до horizon_sec.
+    end[k] — финиш круга k + 1; массив возрастает, запросы — бинпоиск.
+    """
+
+    def __init__(self, base_lap_sec: float, profile: LapProfile, horizon_sec: float):
+        self.base_lap_sec = base_lap_sec
+        self.profile = profile
+        n = laps_between(base_lap_sec, profile, 0.0, horizon_sec) + 1
+        self.end = np.cumsum(stint_lap_times(base_lap_sec, profile, 0.0, n))
+
+    def laps_before(self, t: float) -> int:
+        """Сколько кругов закончено к моменту t."""
+        n = int(np.searchsorted(self.end, t, side="right"))
+        if n == len(self.end):
+            n += laps_between(self.base_lap_sec, self.profile, float(self.end[-1]), t)
+        return n
+
+    def lap_end(self, n: int) -> float:
+        """Момент финиша n-го круга (с 1), 0 — старт."""
+        if n <= 0:
+            return 0.0
+        if n <= len(self.end):
+            return float(self.end[n - 1])
+        tail = stint_lap_times(self.base_lap_sec, self.profile, float(self.end[-1]), n - len(self.end))
+        return float(self.end[-1] + tail.sum())
+
+
+@lru_cache(maxsize=64)
+def lap_index(base_lap_sec: float, profile: LapProfile, horizon_sec: float) -> LapIndex:
+    """LapIndex из кеша: одни входы гонки спрашивают его на каждом расчёте."""
+    return LapIndex(base_lap_sec, profile, horizon_sec)
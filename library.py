@@ -0,0 +1,496 @@
+"""
+Сохранение сессий и библиотека планов.
+
+Сессия — один JSON: входные данные окна (как scenario.scenario_to_dict),
+выбранный планировщик и посчитанный план.
+
+Библиотека — бинарный колоночный файл для миллионов планов:
+
+    заголовок     magic, версия, счётчики, смещения секций (struct)
+    strings       таблица строк: смещения u64 (n+1) + UTF-8 подряд
+    events        отсортированы по имени: имя u32, первая запись u64, записей u64
+    entries       внутри события отсортированы по сценарию:
+                  сценарий u32, первый стинт u64, стинтов u32, время гонки f64
+    stints        колонки по всем стинтам: laps u32, pilot u32 (строка),
+                  tyre_set u16, eco u8, fuel_start f32, fuel_per_lap f32
+
+Файл открывается через mmap, колонки — представления numpy без копирования.
+Поиск плана — бинпоиск по событиям и по сценариям внутри события: читаются
+O(log n) строк и стинты одного плана, остальной файл с диска не поднимается.
+
+    python library.py pack results.jsonl -o season.rsl --event "Спа 24ч"
+    python library.py ls season.rsl [событие]
+    python library.py get season.rsl событие сценарий
+"""
+import argparse
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from model import Stint
+from scenario import Scenario, scenario_from_dict, scenario_to_dict
+
+
+SESSION_VERSION = 1
+
+LIBRARY_MAGIC = b"RSLIB\x00\x00\x01"
+LIBRARY_VERSION = 2
+
+# magic, версия, резерв, строк, событий, записей, стинтов, затем смещения секций
+_HEADER = struct.Struct("<8sII4Q")
+_SECTIONS = (
+    ("str_offsets", "<u8"), ("str_blob", "u1"),
+    ("ev_name", "<u4"), ("ev_first", "<u8"), ("ev_count", "<u8"),
+    ("en_scenario", "<u4"), ("en_first", "<u8"), ("en_count", "<u4"), ("en_total", "<f8"),
+    ("st_laps", "<u4"), ("st_pilot", "<u4"), ("st_tyre", "<u2"), ("st_eco", "u1"),
+    ("st_fuel", "<f4"), ("st_target", "<f4"),
+)
+_OFFSETS = struct.Struct("<" + "Q" * len(_SECTIONS))
+_ALIGN = 8
+
+
+# ---------- Сессия ----------
+
+@dataclass
+class Session:
+    scenario: Scenario
+    planner: str = ""
+    exact_laps: bool = True
+    stints: List[Stint] = field(default_factory=list)
+    total_sec: Optional[float] = None
+
+
+def session_to_dict(s: Session) -> dict:
+    return {
+        "version": SESSION_VERSION,
+        "scenario": scenario_to_dict(s.scenario),
+        "planner": s.planner,
+        "exact_laps": s.exact_laps,
+        "stints": [asdict(st) for st in s.stints],
+        "total_sec": s.total_sec,
+    }
+
+
+def session_from_dict(d: dict) -> Session:
+    if d.get("version") != SESSION_VERSION:
+        raise ValueError(f"Неподдерживаемая версия сессии: {d.get('version')}")
+    try:
+        stints = [Stint(**st) for st in d.get("stints", [])]
+    except TypeError as e:
+        raise ValueError(f"Неверный стинт в сессии: {e}") from None
+    total = d.get("total_sec")
+    return Session(
+        scenario=scenario_from_dict(d["scenario"]),
+        planner=str(d.get("planner") or ""),
+        exact_laps=bool(d.get("exact_laps", True)),
+        stints=stints,
+        total_sec=float(total) if total is not None else None,
+    )
+
+
+def save_session(path: str, session: Session) -> None:
+    """Пишет сессию через временный файл, чтобы не оставить битый."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(session_to_dict(session), f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+def load_session(path: str) -> Session:
+    with open(path, encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"Файл сессии повреждён: {e}") from None
+    return session_from_dict(data)
+
+
+# ---------- Библиотека: запись ----------
+
+class LibraryWriter:
+    """
+    Копит планы в компактных массивах и пишет файл в close().
+    Повторный add с тем же (событие, сценарий) заменяет план.
+
+        with LibraryWriter("season.rsl") as w:
+            w.add("Спа 24ч", "дождь", stints, total_sec)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._strings: Dict[str, int] = {}
+        self._entries: Dict[Tuple[str, str], int] = {}
+        self._first = array("Q")
+        self._count = array("I")
+        self._total = array("d")
+        self._laps = array("I")
+        self._pilot = array("I")
+        self._tyre = array("H")
+        self._eco = array("B")
+        self._fuel = array("f")
+        self._target = array("f")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        return False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _string(self, text: str) -> int:
+        idx = self._strings.get(text)
+        if idx is None:
+            idx = self._strings[text] = len(self._strings)
+        return idx
+
+    def add(self, event: str, scenario_id: str, stints: Sequence[Stint],
+            total_sec: float = math.nan) -> None:
+        first = len(self._laps)
+        for s in stints:
+            self._laps.append(s.laps)
+            self._pilot.append(self._string(s.pilot))
+            self._tyre.append(s.tyre_set)
+            self._eco.append(1 if s.eco else 0)
+            self._fuel.append(s.fuel_start)
+            self._target.append(s.fuel_per_lap)
+        key = (str(event), str(scenario_id))
+        idx = self._entries.get(key)
+        if idx is None:
+            # стинты заменённого плана остаются в файле мёртвым грузом
+            self._entries[key] = len(self._first)
+            self._first.append(first)
+            self._count.append(len(stints))
+            self._total.append(total_sec)
+        else:
+            self._first[idx] = first
+            self._count[idx] = len(stints)
+            self._total[idx] = total_sec
+
+    def close(self) -> None:
+        keys = sorted(self._entries)
+        order = [self._entries[k] for k in keys]
+
+        ev_name, ev_first, ev_count = array("I"), array("Q"), array("Q")
+        en_scenario = array("I")
+        for i, (event, scenario_id) in enumerate(keys):
+            if not ev_name or keys[i - 1][0] != event:
+                ev_name.append(self._string(event))
+                ev_first.append(i)
+                ev_count.append(0)
+            ev_count[-1] += 1
+            en_scenario.append(self._string(scenario_id))
+
+        texts = sorted(self._strings, key=self._strings.get)
+        encoded = [t.encode("utf-8") for t in texts]
+        str_offsets = array("Q", [0])
+        for b in encoded:
+            str_offsets.append(str_offsets[-1] + len(b))
+
+        columns = {
+            "str_offsets": str_offsets,
+            "str_blob": b"".join(encoded),
+            "ev_name": ev_name, "ev_first": ev_first, "ev_count": ev_count,
+            "en_scenario": en_scenario,
+            "en_first": array("Q", (self._first[i] for i in order)),
+            "en_count": array("I", (self._count[i] for i in order)),
+            "en_total": array("d", (self._total[i] for i in order)),
+            "st_laps": self._laps, "st_pilot": self._pilot, "st_tyre": self._tyre,
+            "st_eco": self._eco, "st_fuel": self._fuel, "st_target": self._target,
+        }
+
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(b"\x00" * (_HEADER.size + _OFFSETS.size))
+            offsets = []
+            for name, dtype in _SECTIONS:
+                pad = -f.tell() % _ALIGN
+                f.write(b"\x00" * pad)
+                offsets.append(f.tell())
+                data = columns[name]
+                f.write(np.asarray(data, dtype=dtype).tobytes() if isinstance(data, array) else data)
+            f.seek(0)
+            f.write(_HEADER.pack(LIBRARY_MAGIC, LIBRARY_VERSION, 0,
+                                 len(texts), len(ev_name), len(keys), len(self._laps)))
+            f.write(_OFFSETS.pack(*offsets))
+        os.replace(tmp, self.path)
+
+
+def write_library(path: str, plans: Iterable[Tuple[str, str, Sequence[Stint], float]]) -> int:
+    """(событие, сценарий, стинты, время гонки) -> файл. Возвращает число планов."""
+    with LibraryWriter(path) as w:
+        for event, scenario_id, stints, total_sec in plans:
+            w.add(event, scenario_id, stints, total_sec)
+    return len(w)
+
+
+# ---------- Библиотека: чтение ----------
+
+class _Strings:
+    """Строки таблицы по индексу (последовательность для bisect)."""
+
+    def __init__(self, offsets: np.ndarray, blob: memoryview, index: np.ndarray):
+        self._offsets = offsets
+        self._blob = blob
+        self._index = index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __getitem__(self, i: int) -> str:
+        return _text(self._offsets, self._blob, int(self._index[i]))
+
+
+def _text(offsets: np.ndarray, blob: memoryview, idx: int) -> str:
+    return bytes(blob[int(offsets[idx]):int(offsets[idx + 1])]).decode("utf-8")
+
+
+def _bisect(seq, key: str) -> int:
+    """Индекс key в отсортированной seq или -1."""
+    lo, hi = 0, len(seq)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if seq[mid] < key:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo if lo < len(seq) and seq[lo] == key else -1
+
+
+@dataclass
+class LibraryPlan:
+    event: str
+    scenario: str
+    stints: List[Stint]
+    total_sec: float
+
+
+class StrategyLibrary:
+    """
+    Библиотека планов через mmap. Открытие читает только заголовок.
+
+        with StrategyLibrary("season.rsl") as lib:
+            plan = lib.get("Спа 24ч", "дождь")
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Пустой файл библиотеки: {path}") from None
+        try:
+            self._open()
+        except Exception:
+            self.close()
+            raise
+
+    def _open(self):
+        size = len(self._map)
+        if size < _HEADER.size + _OFFSETS.size:
+            raise ValueError(f"Не файл библиотеки планов: {self.path}")
+        magic, version, _reserved, n_str, n_ev, n_en, n_st = _HEADER.unpack_from(self._map, 0)
+        if magic != LIBRARY_MAGIC:
+            raise ValueError(f"Не файл библиотеки планов: {self.path}")
+        if version != LIBRARY_VERSION:
+            raise ValueError(f"Неподдерживаемая версия библиотеки: {version}")
+        offsets = _OFFSETS.unpack_from(self._map, _HEADER.size)
+        lengths = {
+            "str_offsets": n_str + 1, "ev_name": n_ev, "ev_first": n_ev, "ev_count": n_ev,
+            "en_scenario": n_en, "en_first": n_en, "en_count": n_en, "en_total": n_en,
+            "st_laps": n_st, "st_pilot": n_st, "st_tyre": n_st, "st_eco": n_st, "st_fuel": n_st,
+            "st_target": n_st,
+        }
+        cols = {}
+        for (name, dtype), offset in zip(_SECTIONS, offsets):
+            if name == "str_blob":
+                continue
+            count = lengths[name]
+            if offset + count * np.dtype(dtype).itemsize > size:
+                raise ValueError(f"Файл библиотеки обрезан: {self.path}")
+            cols[name] = np.frombuffer(self._map, dtype=dtype, count=count, offset=offset)
+        blob_start = offsets[1]
+        blob_end = blob_start + int(cols["str_offsets"][-1])
+        if blob_end > size:
+            raise ValueError(f"Файл библиотеки обрезан: {self.path}")
+        self._cols = cols
+        self._blob = memoryview(self._map)[blob_start:blob_end]
+        self._events = _Strings(cols["str_offsets"], self._blob, cols["ev_name"])
+        self.n_stints = n_st
+
+    def close(self):
+        # представления numpy держат буфер mmap — сначала отпускаем их
+        self._cols = {}
+        self._events = None
+        blob, self._blob = getattr(self, "_blob", None), None
+        if blob is not None:
+            blob.release()
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                pass    # наружу отданы массивы — файл закроется вместе с ними
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __len__(self) -> int:
+        return len(self._cols["en_first"])
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return self._find(*key) >= 0
+
+    def events(self) -> List[str]:
+        return [self._events[i] for i in range(len(self._events))]
+
+    def _event_range(self, event: str) -> Tuple[int, int]:
+        e = _bisect(self._events, event)
+        if e < 0:
+            return 0, 0
+        first = int(self._cols["ev_first"][e])
+        return first, first + int(self._cols["ev_count"][e])
+
+    def _scenarios(self, first: int, end: int) -> _Strings:
+        return _Strings(self._cols["str_offsets"], self._blob, self._cols["en_scenario"][first:end])
+
+    def scenarios(self, event: str) -> List[str]:
+        first, end = self._event_range(event)
+        names = self._scenarios(first, end)
+        return [names[i] for i in range(len(names))]
+
+    def _find(self, event: str, scenario_id: str) -> int:
+        first, end = self._event_range(event)
+        i = _bisect(self._scenarios(first, end), scenario_id)
+        return first + i if i >= 0 else -1
+
+    def _plan(self, entry: int) -> List[Stint]:
+        c = self._cols
+        start = int(c["en_first"][entry])
+        stop = start + int(c["en_count"][entry])
+        laps = c["st_laps"][start:stop].tolist()
+        pilot = c["st_pilot"][start:stop].tolist()
+        tyre = c["st_tyre"][start:stop].tolist()
+        eco = c["st_eco"][start:stop].tolist()
+        # float32 -> кратчайшая десятичная запись: 98.8, а не 98.80000305
+        fuel = [float(str(v)) for v in c["st_fuel"][start:stop]]
+        target = [float(str(v)) for v in c["st_target"][start:stop]]
+        offsets = c["str_offsets"]
+        names: Dict[int, str] = {}
+        stints = []
+        for i in range(stop - start):
+            p = pilot[i]
+            if p not in names:
+                names[p] = _text(offsets, self._blob, p)
+            stints.append(Stint(pilot=names[p], laps=laps[i], fuel_start=fuel[i],
+                                tyre_set=tyre[i], eco=bool(eco[i]), fuel_per_lap=target[i]))
+        return stints
+
+    def get(self, event: str, scenario_id: str) -> Optional[LibraryPlan]:
+        entry = self._find(event, scenario_id)
+        if entry < 0:
+            return None
+        return LibraryPlan(event=event, scenario=scenario_id, stints=self._plan(entry),
+                           total_sec=float(self._cols["en_total"][entry]))
+
+    def iter_event(self, event: str) -> Iterator[LibraryPlan]:
+        first, end = self._event_range(event)
+        names = self._scenarios(first, end)
+        for i in range(end - first):
+            yield LibraryPlan(event=event, scenario=names[i], stints=self._plan(first + i),
+                              total_sec=float(self._cols["en_total"][first + i]))
+
+
+# ---------- Командная строка ----------
+
+def _pack(args) -> int:
+    """Результаты cli.py (JSONL со стинтами) -> библиотека."""
+    src = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    skipped = 0
+    try:
+        with LibraryWriter(args.output) as w:
+            for line in src:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                    stints = [Stint(**st) for st in record["stints"]]
+                except (ValueError, KeyError, TypeError):
+                    skipped += 1
+                    continue
+                event = args.event or record.get("event") or record.get("engine") or ""
+                w.add(event, str(record.get("id", "")), stints,
+                      float(record.get("total_time_sec", math.nan)))
+            packed = len(w)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+    print(json.dumps({"plans": packed, "skipped": skipped}), file=sys.stderr)
+    return 0
+
+
+def _ls(args) -> int:
+    with StrategyLibrary(args.library) as lib:
+        names = lib.scenarios(args.event) if args.event is not None else lib.events()
+        for name in names:
+            print(name)
+    return 0
+
+
+def _get(args) -> int:
+    with StrategyLibrary(args.library) as lib:
+        plan = lib.get(args.event, args.scenario)
+    if plan is None:
+        print(f"Нет плана {args.event}/{args.scenario}", file=sys.stderr)
+        return 1
+    print(json.dumps({"event": plan.event, "id": plan.scenario, "total_time_sec": plan.total_sec,
+                      "stints": [asdict(s) for s in plan.stints]}, ensure_ascii=False))
+    return 0
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Библиотека планов (бинарный файл с mmap)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("pack", help="JSONL-результаты cli.py -> библиотека")
+    p.add_argument("input", help="файл результатов или '-' для stdin")
+    p.add_argument("-o", "--output", required=True)
+    p.add_argument("--event", help="событие для всех планов (иначе поле event или engine)")
+    p.set_defaults(run=_pack)
+
+    p = sub.add_parser("ls", help="события или сценарии события")
+    p.add_argument("library")
+    p.add_argument("event", nargs="?")
+    p.set_defaults(run=_ls)
+
+    p = sub.add_parser("get", help="план в JSON")
+    p.add_argument("library")
+    p.add_argument("event")
+    p.add_argument("scenario")
+    p.set_defaults(run=_get)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""
+Нагрузочный клиент для service.py: запросов в секунду и хвост задержки.
+
+    python loadgen.py --port 8780 --clients 32 --duration 10
+    python loadgen.py --scenarios scenarios.jsonl --engine closed_form --requests 5000
+    python loadgen.py --distinct 4      # мало разных входов — видно склейку запросов
+
+Каждый клиент держит одно keep-alive соединение и шлёт POST /plan по кругу
+по набору сценариев (по умолчанию — сетка benchmarks.py). 503 — отказ
+сервиса под нагрузкой, считается отдельно от ошибок. В конце печатается
+таблица и /stats сервиса; --json — то же одной JSON-строкой.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks import _percentile, scenarios as bench_scenarios
+from scenario import Scenario, iter_jsonl, scenario_to_dict
+from service import DEFAULT_HOST, DEFAULT_PORT
+
+
+@dataclass
+class LoadResult:
+    requests: int = 0
+    elapsed_sec: float = 0.0
+    statuses: Counter = field(default_factory=Counter)
+    latencies_ms: List[float] = field(default_factory=list)     # только ответы 200
+
+    @property
+    def rps(self) -> float:
+        return self.requests / self.elapsed_sec if self.elapsed_sec > 0 else 0.0
+
+    def summary(self) -> dict:
+        lat = sorted(self.latencies_ms)
+        return {
+            "requests": self.requests,
+            "elapsed_sec": round(self.elapsed_sec, 3),
+            "rps": round(self.rps, 1),
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+            "p50_ms": round(_percentile(lat, 50), 2),
+            "p95_ms": round(_percentile(lat, 95), 2),
+            "p99_ms": round(_percentile(lat, 99), 2),
+            "max_ms": round(lat[-1], 2) if lat else 0.0,
+        }
+
+
+def default_bodies(engine: str, distinct: int = 0) -> List[bytes]:
+    """Тела POST /plan по сетке benchmarks.py; distinct > 0 — только первые distinct."""
+    items = bench_scenarios(quick=False)
+    if distinct > 0:
+        items = items[:distinct]
+    return [
+        json.dumps({"engine": engine, "scenario": scenario_to_dict(
+            Scenario(id=b.name, race=b.race, tyre=b.tyre, pilot_tuples=b.pilot_tuples, mode=b.mode)
+        )}, ensure_ascii=False).encode("utf-8")
+        for b in items
+    ]
+
+
+def file_bodies(path: str, engine: str) -> List[bytes]:
+    with open(path, encoding="utf-8") as f:
+        return [
+            json.dumps({"engine": engine, "scenario": scenario_to_dict(s)}, ensure_ascii=False).encode("utf-8")
+            for _n, s, _err in iter_jsonl(f) if s is not None
+        ]
+
+
+async def _request(reader, writer, host: str, path: str, body: Optional[bytes]) -> Tuple[int, bytes]:
+    method = "POST" if body is not None else "GET"
+    data = body or b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1") + data
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def fetch(host: str, port: int, path: str, body: Optional[bytes] = None) -> Tuple[int, dict]:
+    """Один запрос на своём соединении."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        status, data = await _request(reader, writer, host, path, body)
+    finally:
+        writer.close()
+    return status, json.loads(data)
+
+
+async def run_load(host: str, port: int, bodies: List[bytes], clients: int,
+                   duration: float = 0.0, requests: int = 0) -> LoadResult:
+    """clients соединений до duration секунд или requests запросов (что задано)."""
+    result = LoadResult()
+    counter = itertools.count()
+    deadline = time.perf_counter() + duration if duration > 0 else None
+
+    def next_index() -> Optional[int]:
+        i = next(counter)
+        if requests > 0 and i >= requests:
+            return None
+        if deadline is not None and time.perf_counter() >= deadline:
+            return None
+        return i
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while True:
+                i = next_index()
+                if i is None:
+                    break
+                start = time.perf_counter()
+                try:
+                    status, _data = await _request(reader, writer, host, "/plan", bodies[i % len(bodies)])
+                except (ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+                    result.statuses["conn"] += 1
+                    writer.close()
+                    reader, writer = await asyncio.open_connection(host, port)
+                    continue
+                result.requests += 1
+                result.statuses[status] += 1
+                if status == 200:
+                    result.latencies_ms.append((time.perf_counter() - start) * 1000.0)
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(max(clients, 1))])
+    result.elapsed_sec = time.perf_counter() - start
+    return result
+
+
+def _print_summary(summary: dict, stats: dict, out):
+    print(f"запросов: {summary['requests']} за {summary['elapsed_sec']} с, "
+          f"{summary['rps']} в секунду", file=out)
+    print("статусы: " + ", ".join(f"{k}={v}" for k, v in summary["statuses"].items()), file=out)
+    print(f"задержка 200, мс: p50 {summary['p50_ms']}  p95 {summary['p95_ms']}  "
+          f"p99 {summary['p99_ms']}  max {summary['max_ms']}", file=out)
+    if stats:
+        print("сервис: " + ", ".join(f"{k}={v}" for k, v in stats.items()), file=out)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Нагрузка на service.py")
+    ap.add_argument("--host", default=DEFAULT_HOST)
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT)
+    ap.add_argument("--clients", type=int, default=16, help="одновременных соединений")
+    ap.add_argument("--duration", type=float, default=10.0, help="секунд (0 — по --requests)")
+    ap.add_argument("--requests", type=int, default=0, help="всего запросов (0 — по --duration)")
+    ap.add_argument("--engine", default="optimal")
+    ap.add_argument("--scenarios", default=None, help="JSONL сценариев вместо сетки benchmarks.py")
+    ap.add_argument("--distinct", type=int, default=0, help="разных сценариев из сетки (0 — все)")
+    ap.add_argument("--json", action="store_true", help="итог одной JSON-строкой")
+    args = ap.parse_args(argv)
+
+    if args.scenarios:
+        bodies = file_bodies(args.scenarios, args.engine)
+    else:
+        bodies = default_bodies(args.engine, args.distinct)
+    if not bodies:
+        print("нет сценариев", file=sys.stderr)
+        return 1
+    duration = args.duration if args.requests <= 0 else 0.0
+
+    async def go() -> Tuple[LoadResult, Dict]:
+        result = await run_load(args.host, args.port, bodies, args.clients, duration, args.requests)
+        _status, stats = await fetch(args.host, args.port, "/stats")
+        return result, stats
+
+    try:
+        result, stats = asyncio.run(go())
+    except ConnectionError as e:
+        print(f"нет связи с сервисом {args.host}:{args.port}: {e}", file=sys.stderr)
+        return 1
+    summary = result.summary()
+    if args.json:
+        print(json.dumps(dict(summary, service=stats), ensure_ascii=False))
+    else:
+        _print_summary(summary, stats, sys.stdout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,8 @@
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+
+from instrument import span, traced
+from lap_profile import LapProfile, lap_index, profile_extra
 
 
 @dataclass
@@ -10,11 +13,19 @@ class RaceParams:
     pit_refuel_sec: float       # время пит-стопа только с дозаправкой, сек
     pit_tyre_sec: float         # время пит-стопа с заменой резины, сек
     driver_change_sec: float    # время смены пилота, сек
+    # ограничения регламента на пилотов (0 — без ограничения)
+    max_continuous_sec: float = 0.0     # подряд за рулём, сек
+    min_drive_sec: float = 0.0          # минимум за рулём за гонку, сек
+    max_stints_per_pilot: int = 0       # стинтов на пилота
+    fuel_sec_per_liter: float = 0.0     # потеря на круге за литр в баке, сек (см. tyres.py)
+    eco_lap_loss_sec: float = 0.0       # круг в полной экономии медленнее push, сек (см. fuel_target.py)
+    lap_profile: LapProfile = ()        # прибавка к кругу по времени гонки (см. lap_profile.py)
 
 
 @dataclass
 class TyreParams:
     sets: int                   # количество комплектов шин
+    compound: str = ""          # состав резины из tyres.COMPOUNDS, "" — без износа
 
 
 @dataclass
@@ -36,6 +47,7 @@ class Stint:
     fuel_start: float
     tyre_set: int               # номер комплекта шин (1..N)
     eco: bool                   # True, если стинт должен ехаться в экономии
+    fuel_per_lap: float = 0.0   # целевой расход л/круг (fuel_target.py), 0 — по флагу eco
 
 
 @dataclass
@@ -44,6 +56,7 @@ class ConsumptionMode:
     by_fuel_per_lap: bool       # True: fuel_push/fuel_eco, False: laps_per_tank_*
 
 
+@traced("model.build_pilots")
 def _build_pilots(
     pilot_tuples: List[Tuple[str, float, float, float, float, float]]
 ) -> List[Pilot]:
@@ -64,10 +77,13 @@ def _build_pilots(
     return pilots
 
 
+@traced("model.total_laps")
 def _calc_total_laps(race: RaceParams) -> int:
     race_sec = race.duration_hours * 3600.0
     if race.avg_lap_sec <= 0:
         return 0
+    if race.lap_profile:
+        return lap_index(race.avg_lap_sec, race.lap_profile, race_sec).laps_before(race_sec)
     laps = int(race_sec // race.avg_lap_sec)
     return max(laps, 0)
 
@@ -85,6 +101,34 @@ def _calc_stint_length_push(race: RaceParams, pilot: Pilot, mode: ConsumptionMod
     return max(laps, 1)
 
 
+def _calc_stint_length_eco(race: RaceParams, pilot: Pilot, mode: ConsumptionMode) -> int:
+    """Длина одного стинта по баку в кругах (eco), не меньше push."""
+    if mode.by_fuel_per_lap:
+        if pilot.fuel_eco <= 0:
+            return _calc_stint_length_push(race, pilot, mode)
+        laps = int(race.tank_liters // pilot.fuel_eco)
+    else:
+        if pilot.laps_per_tank_eco <= 0:
+            return _calc_stint_length_push(race, pilot, mode)
+        laps = int(pilot.laps_per_tank_eco)
+    return max(laps, _calc_stint_length_push(race, pilot, mode))
+
+
+def _fuel_per_lap(race: RaceParams, pilot: Pilot, mode: ConsumptionMode, eco: bool) -> float:
+    """Расход на круг; в режиме «кругов на баке» — бак, делённый на целые круги стинта."""
+    if mode.by_fuel_per_lap:
+        return max(pilot.fuel_eco if eco else pilot.fuel_push, 0.0)
+    laps = _calc_stint_length_eco(race, pilot, mode) if eco else _calc_stint_length_push(race, pilot, mode)
+    return race.tank_liters / laps if laps > 0 else 0.0
+
+
+def _stint_fuel_rate(race: RaceParams, pilot: Pilot, mode: ConsumptionMode, stint, eco: bool) -> float:
+    """Расход стинта на круг: целевой (Stint.fuel_per_lap, fuel_target.py), иначе push/eco пилота."""
+    target = getattr(stint, "fuel_per_lap", 0.0)
+    return target if target > 0 else _fuel_per_lap(race, pilot, mode, eco)
+
+
+@traced("model.assign_tyres")
 def _assign_tyres(num_stints: int, tyre: TyreParams) -> List[int]:
     """
     2 стинта на комплект, при нехватке – часть комплектов по 3 стинта.
@@ -123,11 +167,13 @@ def _assign_tyres(num_stints: int, tyre: TyreParams) -> List[int]:
     return result[:num_stints]
 
 
+@traced("planner.greedy")
 def plan_stints(
     race: RaceParams,
     tyre: TyreParams,
     pilot_tuples: List[Tuple[str, float, float, float, float, float]],
     mode: ConsumptionMode,
+    total_laps: Optional[int] = None,
 ) -> List[Stint]:
     """
     Планирование:
@@ -138,12 +184,14 @@ def plan_stints(
       5) каждому комплекту даём одного пилота (по порядку в списке);
       6) если последний стинт слишком короткий — пытаемся раздать его
          круги в два предыдущих и пометить их как eco.
+    total_laps — готовое число кругов вместо оценки _calc_total_laps.
     """
     pilots = _build_pilots(pilot_tuples)
     if not pilots:
         return []
 
-    total_laps = _calc_total_laps(race)
+    if total_laps is None:
+        total_laps = _calc_total_laps(race)
     if total_laps <= 0:
         return []
 
@@ -166,31 +214,32 @@ def plan_stints(
     stints: List[Stint] = []
     laps_left = total_laps
 
-    for i in range(num_stints):
-        tyre_index = tyre_indices[i]
-        pilot = set_to_pilot[tyre_index]
-
-        stint_len = base_stint_len
-        if stint_len > laps_left:
-            stint_len = laps_left
-
-        if mode.by_fuel_per_lap:
-            fuel_start = stint_len * pilot.fuel_push if pilot.fuel_push > 0 else 0.0
-        else:
-            # режим "кругов на баке" — всегда полный бак
-            fuel_start = race.tank_liters
-
-        stints.append(
-            Stint(
-                pilot=pilot.name,
-                laps=stint_len,
-                fuel_start=fuel_start,
-                tyre_set=tyre_index + 1,
-                eco=False,
+    with span("greedy.stints"):
+        for i in range(num_stints):
+            tyre_index = tyre_indices[i]
+            pilot = set_to_pilot[tyre_index]
+
+            stint_len = base_stint_len
+            if stint_len > laps_left:
+                stint_len = laps_left
+
+            if mode.by_fuel_per_lap:
+                fuel_start = stint_len * pilot.fuel_push if pilot.fuel_push > 0 else 0.0
+            else:
+                # режим "кругов на баке" — всегда полный бак
+                fuel_start = race.tank_liters
+
+            stints.append(
+                Stint(
+                    pilot=pilot.name,
+                    laps=stint_len,
+                    fuel_start=fuel_start,
+                    tyre_set=tyre_index + 1,
+                    eco=False,
+                )
             )
-        )
 
-        laps_left -= stint_len
+            laps_left -= stint_len
 
     # Попытка убрать короткий финальный стинт  #todo бред (переписать)
     if len(stints) >= 3:
@@ -209,6 +258,7 @@ def plan_stints(
     return stints
 
 
+@traced("model.race_time")
 def compute_total_race_time_sec(
     race: RaceParams,
     pilots: List[Pilot],
@@ -216,6 +266,8 @@ def compute_total_race_time_sec(
 ) -> float:
     """
     Время гонки = круги + пит-стопы + смены пилота.
+    С профилем круга (race.lap_profile) к кругам стинта добавляется прибавка
+    профиля на часах гонки, с которых стинт стартует.
     """
     if not stints or not pilots:
         return 0.0
@@ -233,8 +285,6 @@ def compute_total_race_time_sec(
         if not pilot:
             continue
 
-        total_lap_time += stint.laps * pilot.lap_time_sec
-
         if i > 0:
             if stint.tyre_set == prev_tyre_set:
                 total_pit_time += race.pit_refuel_sec
@@ -244,6 +294,11 @@ def compute_total_race_time_sec(
             if stint.pilot != prev_pilot_name:
                 total_pit_time += race.driver_change_sec
 
+        if race.lap_profile:
+            clock = total_lap_time + total_pit_time
+            total_lap_time += float(profile_extra(pilot.lap_time_sec, race.lap_profile, clock, stint.laps))
+        total_lap_time += stint.laps * pilot.lap_time_sec
+
         prev_tyre_set = stint.tyre_set
         prev_pilot_name = stint.pilot
 
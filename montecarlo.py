@@ -0,0 +1,192 @@
+"""
+Монте-Карло по готовому плану: разброс времени финиша и вероятность остаться
+без топлива. Из командной строки — опцией cli.py:
+
+    python cli.py scenarios.jsonl --engine optimal --simulate 10000
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from model import RaceParams, Pilot, ConsumptionMode
+from timeline import build_timeline
+
+
+@dataclass
+class SimParams:
+    """Случайные факторы гонки."""
+    lap_jitter_sec: float = 0.8         # СКО времени круга, сек
+    fuel_sd_frac: float = 0.03          # СКО расхода за круг, доля от номинала
+    slow_stop_prob: float = 0.05        # вероятность медленного пит-стопа
+    slow_stop_mean_sec: float = 8.0     # средняя потеря на медленном пите (экспонента), сек
+    sc_prob_per_lap: float = 0.004      # вероятность выезда safety car на круге
+    sc_laps: int = 4                    # длительность safety car, кругов
+    sc_lap_factor: float = 1.4          # во сколько раз медленнее круг под SC
+    sc_fuel_factor: float = 0.6         # доля расхода под SC
+    fuel_margin_frac: float = 0.03      # запас топлива сверх плана, доля (не больше бака)
+    fill_tank: bool = False             # True: на каждом пите бак заливается полностью
+
+
+@dataclass
+class MonteCarloResult:
+    finish_sec: np.ndarray          # время финиша в каждом заезде
+    out_of_fuel: np.ndarray         # bool, в заезде кончилось топливо
+
+    @property
+    def runs(self) -> int:
+        return len(self.finish_sec)
+
+    @property
+    def p_out_of_fuel(self) -> float:
+        return float(self.out_of_fuel.mean()) if self.runs else 0.0
+
+    @property
+    def mean_sec(self) -> float:
+        return float(self.finish_sec.mean()) if self.runs else 0.0
+
+    @property
+    def std_sec(self) -> float:
+        return float(self.finish_sec.std()) if self.runs else 0.0
+
+    def percentile(self, q: float) -> float:
+        return float(np.percentile(self.finish_sec, q)) if self.runs else 0.0
+
+
+@dataclass
+class _CompiledPlan:
+    """План, развёрнутый в массивы по кругам — то, что уходит в процессы."""
+    lap_time: np.ndarray        # (круги,) базовое время круга
+    fuel_per_lap: np.ndarray    # (круги,) номинальный расход за круг, л
+    stint_starts: np.ndarray    # (стинты,) индекс первого круга стинта
+    fuel_loaded: np.ndarray     # (стинты,) топливо на старте стинта, л
+    pit_total_sec: float        # номинальное время всех пит-стопов
+    n_stops: int                # число пит-стопов (для медленных стопов)
+
+
+def _compile_plan(
+    race: RaceParams,
+    pilots: Sequence[Pilot],
+    stints: Sequence,
+    mode: ConsumptionMode,
+    fill_tank: bool,
+    fuel_margin_frac: float = 0.0,
+) -> _CompiledPlan:
+    """
+    Колонки из timeline.build_timeline плюс правка загрузки топлива: ровно
+    по плану расход с разбросом выходит за залитое примерно в половине стинтов,
+    поэтому заливается план с запасом fuel_margin_frac. Стинт, которому
+    план отдаёт весь бак, запаса не получает — его риск и показывает симуляция.
+    """
+    tl = build_timeline(race, pilots, stints, mode)
+
+    loaded = tl.stint_fuel_loaded * (1.0 + max(fuel_margin_frac, 0.0))
+    if fill_tank:
+        loaded[:] = race.tank_liters
+    loaded[loaded <= 0] = race.tank_liters
+    if race.tank_liters > 0:
+        np.minimum(loaded, race.tank_liters, out=loaded)
+
+    return _CompiledPlan(
+        lap_time=tl.lap_time_sec,
+        fuel_per_lap=tl.fuel_per_lap,
+        stint_starts=tl.stint_first_lap,
+        fuel_loaded=loaded,
+        pit_total_sec=float(tl.pit_sec.sum()),
+        n_stops=max(len(tl.stint_first_lap) - 1, 0),
+    )
+
+
+def _safety_car_mask(rng: np.random.Generator, runs: int, laps: int, params: SimParams) -> np.ndarray:
+    """(runs, laps) bool: круг идёт под safety car."""
+    if params.sc_prob_per_lap <= 0 or params.sc_laps <= 0 or laps == 0:
+        return np.zeros((runs, laps), dtype=bool)
+    starts = rng.random((runs, laps)) < params.sc_prob_per_lap
+    cs = np.cumsum(starts, axis=1)
+    window = cs.copy()
+    window[:, params.sc_laps:] -= cs[:, :-params.sc_laps]
+    return window > 0
+
+
+def _run_chunk(
+    plan: _CompiledPlan,
+    params: SimParams,
+    seed: np.random.SeedSequence,
+    runs: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Один кусок заездов, векторно по (заезды, круги)."""
+    rng = np.random.default_rng(seed)
+    laps = len(plan.lap_time)
+
+    sc = _safety_car_mask(rng, runs, laps, params)
+
+    lap_time = plan.lap_time * np.where(sc, params.sc_lap_factor, 1.0)
+    if params.lap_jitter_sec > 0:
+        lap_time += rng.normal(0.0, params.lap_jitter_sec, size=(runs, laps))
+    np.maximum(lap_time, 0.5 * plan.lap_time, out=lap_time)
+
+    fuel = plan.fuel_per_lap * np.where(sc, params.sc_fuel_factor, 1.0)
+    if params.fuel_sd_frac > 0:
+        fuel *= 1.0 + rng.normal(0.0, params.fuel_sd_frac, size=(runs, laps))
+    np.maximum(fuel, 0.0, out=fuel)
+
+    if laps:
+        used = np.add.reduceat(fuel, plan.stint_starts, axis=1)
+        out_of_fuel = (used > plan.fuel_loaded + 1e-9).any(axis=1)
+    else:
+        out_of_fuel = np.zeros(runs, dtype=bool)
+
+    finish = lap_time.sum(axis=1) + plan.pit_total_sec
+    if params.slow_stop_prob > 0 and params.slow_stop_mean_sec > 0 and plan.n_stops:
+        shape = (runs, plan.n_stops)
+        slow = rng.random(shape) < params.slow_stop_prob
+        finish += (slow * rng.exponential(params.slow_stop_mean_sec, size=shape)).sum(axis=1)
+
+    return finish, out_of_fuel
+
+
+def simulate_race(
+    race: RaceParams,
+    pilots: Sequence[Pilot],
+    stints: Sequence,
+    mode: ConsumptionMode,
+    runs: int,
+    params: Optional[SimParams] = None,
+    seed: int = 0,
+    chunk_size: int = 1000,
+    workers: Optional[int] = None,
+) -> MonteCarloResult:
+    """
+    Монте-Карло по готовому плану (List[Stint] или List[StintSimple]).
+
+    Заезды режутся на куски по chunk_size, каждому куску — свой дочерний
+    SeedSequence от seed. Разбиение не зависит от числа процессов, поэтому
+    результат воспроизводим при любом workers. workers=1 — без пула.
+    """
+    params = params or SimParams()
+    plan = _compile_plan(race, pilots, stints, mode, params.fill_tank, params.fuel_margin_frac)
+
+    runs = max(runs, 0)
+    chunk_size = max(chunk_size, 1)
+    sizes = [min(chunk_size, runs - start) for start in range(0, runs, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    if workers == 1 or len(sizes) <= 1:
+        parts = [_run_chunk(plan, params, s, n) for s, n in zip(seeds, sizes)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(
+                _run_chunk,
+                [plan] * len(sizes), [params] * len(sizes), seeds, sizes,
+            ))
+
+    if not parts:
+        return MonteCarloResult(
+            finish_sec=np.zeros(0, dtype=np.float64),
+            out_of_fuel=np.zeros(0, dtype=bool),
+        )
+    return MonteCarloResult(
+        finish_sec=np.concatenate([p[0] for p in parts]),
+        out_of_fuel=np.concatenate([p[1] for p in parts]),
+    )
@@ -0,0 +1,292 @@
+from collections import deque
+from typing import Callable, List, Optional, Tuple
+
+from instrument import count, traced
+
+from model import (
+    RaceParams, TyreParams, Stint, ConsumptionMode, Pilot,
+    _build_pilots, _calc_total_laps, _calc_stint_length_push,
+    _calc_stint_length_eco, plan_stints,
+)
+
+
+INF = float("inf")
+
+# (доля выполненной работы 0..1, лучший полный план на данный момент или None)
+ProgressCallback = Callable[[float, Optional[List[Stint]]], None]
+
+# больше стинтов на комплект _assign_tyres не даёт
+DEFAULT_MAX_STINTS_PER_SET = 3
+
+
+def _pit_cost(race: RaceParams, stint_index: int, max_stints_per_set: int) -> float:
+    """Время пит-стопа перед стинтом stint_index (>= 1)."""
+    if stint_index % max_stints_per_set == 0:
+        return race.pit_tyre_sec
+    return race.pit_refuel_sec
+
+
+def _stint_fuel_start(race: RaceParams, pilot: Pilot, mode: ConsumptionMode,
+                      laps: int, eco: bool) -> float:
+    if mode.by_fuel_per_lap:
+        per_lap = pilot.fuel_eco if eco else pilot.fuel_push
+        return laps * per_lap if per_lap > 0 else 0.0
+    # режим "кругов на баке" — всегда полный бак
+    return race.tank_liters
+
+
+def _lower_bounds(
+    race: RaceParams,
+    total_laps: int,
+    lap_times: List[float],
+    k_limit: int,
+    max_stints_per_set: int,
+) -> List[float]:
+    """LB(n) — все круги по самому быстрому пилоту плюс n-1 пит-стопов (индекс n-1)."""
+    bounds = [total_laps * min(lap_times)]
+    for k in range(1, k_limit):
+        bounds.append(bounds[-1] + _pit_cost(race, k, max_stints_per_set))
+    return bounds
+
+
+def _max_stints_by_bound(
+    total_laps: int,
+    lap_times: List[float],
+    caps: List[int],
+    lower: List[float],
+) -> int:
+    """
+    Верхняя граница числа стинтов.
+    UB — лучший план одним пилотом; планы с LB(n) > UB заведомо хуже.
+    """
+    k_limit = len(lower)
+    lower_laps = lower[0]
+
+    upper = INF
+    for t, cap in zip(lap_times, caps):
+        n = (total_laps + cap - 1) // cap
+        if n <= k_limit:
+            upper = min(upper, total_laps * t + lower[n - 1] - lower_laps)
+    if upper == INF:
+        return k_limit
+
+    n_max = 1
+    for n in range(1, k_limit + 1):
+        if lower[n - 1] > upper + 1e-9:
+            break
+        n_max = n
+    return n_max
+
+
+def _reconstruct(
+    race: RaceParams,
+    mode: ConsumptionMode,
+    cand: List[Pilot],
+    caps_push: List[int],
+    parents: List[List[List[Optional[Tuple[int, int]]]]],
+    layer: int,
+    pilot: int,
+    total_laps: int,
+    max_stints_per_set: int,
+) -> List[Stint]:
+    """Восстановление плана с конца по таблице родителей."""
+    segments: List[Tuple[int, int, int]] = []   # (пилот, круг начала, круг конца)
+    j, q = total_laps, pilot
+    for k in range(layer, -1, -1):
+        if k == 0:
+            segments.append((q, 0, j))
+            break
+        j0, r = parents[k][q][j]
+        segments.append((q, j0, j))
+        j, q = j0, r
+    segments.reverse()
+
+    stints: List[Stint] = []
+    for k, (q, start_lap, end_lap) in enumerate(segments):
+        laps = end_lap - start_lap
+        eco = laps > caps_push[q]
+        stints.append(
+            Stint(
+                pilot=cand[q].name,
+                laps=laps,
+                fuel_start=_stint_fuel_start(race, cand[q], mode, laps, eco),
+                tyre_set=k // max_stints_per_set + 1,
+                eco=eco,
+            )
+        )
+    return stints
+
+
+@traced("planner.optimal")
+def plan_stints_optimal(
+    race: RaceParams,
+    tyre: TyreParams,
+    pilot_tuples: List[Tuple[str, float, float, float, float, float]],
+    mode: ConsumptionMode,
+    max_stints_per_set: int = DEFAULT_MAX_STINTS_PER_SET,
+    on_progress: Optional[ProgressCallback] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    total_laps: Optional[int] = None,
+) -> List[Stint]:
+    """
+    Оптимальный план по compute_total_race_time_sec (динамическое программирование).
+
+    Состояние: (номер стинта k, круг окончания стинта, пилот). Топливо на старте
+    стинта всегда полное (стинт начинается с пит-стопа), возраст резины —
+    k % max_stints_per_set: износа в модели нет, поэтому менять комплект раньше,
+    чем он отъездил max_stints_per_set стинтов, смысла нет.
+    Длина стинта — от 1 до дальности пилота в eco; стинт длиннее дальности
+    в push помечается eco. Переход по длине стинта считается скользящим
+    минимумом, поэтому слой стоит O(пилоты * круги).
+
+    Если ни один план не укладывается в комплекты шин — возвращает plan_stints.
+
+    on_progress вызывается после каждого слоя (стинта) с долей работы и лучшим
+    найденным к этому моменту планом. should_stop() == True прерывает поиск —
+    возвращается лучший план на этот момент.
+    total_laps — готовое число кругов вместо оценки _calc_total_laps.
+    """
+    pilots = _build_pilots(pilot_tuples)
+    if not pilots:
+        return []
+
+    if total_laps is None:
+        total_laps = _calc_total_laps(race)
+    if total_laps <= 0:
+        return []
+
+    max_stints_per_set = max(max_stints_per_set, 1)
+    sets = max(tyre.sets, 1)
+
+    cand: List[Pilot] = []
+    caps: List[int] = []
+    caps_push: List[int] = []
+    for p in pilots:
+        cap = _calc_stint_length_eco(race, p, mode)
+        if cap <= 0:
+            continue
+        cand.append(p)
+        caps.append(cap)
+        caps_push.append(_calc_stint_length_push(race, p, mode))
+    if not cand:
+        return plan_stints(race, tyre, pilot_tuples, mode, total_laps=total_laps)
+
+    lap_times = [p.lap_time_sec for p in cand]
+    n_pilots = len(cand)
+    cap_max = max(caps)
+    k_limit = min(sets * max_stints_per_set, total_laps)
+    lower = _lower_bounds(race, total_laps, lap_times, k_limit, max_stints_per_set)
+    k_max = _max_stints_by_bound(total_laps, lap_times, caps, lower)
+
+    def lap_window(k: int) -> Tuple[int, int]:
+        """Допустимые круги окончания стинта k при не более k_max стинтах."""
+        lo = max(k + 1, total_laps - (k_max - 1 - k) * cap_max)
+        hi = min(total_laps, (k + 1) * cap_max)
+        return lo, hi
+
+    # слой 0: первый стинт с нулевого круга
+    cost: List[List[float]] = []
+    lo, hi = lap_window(0)
+    for q in range(n_pilots):
+        row = [INF] * (total_laps + 1)
+        for j in range(lo, min(hi, caps[q]) + 1):
+            row[j] = j * lap_times[q]
+        cost.append(row)
+
+    # родители для восстановления: parents[k][q][j] = (j0, пилот прошлого стинта)
+    parents: List[List[List[Optional[Tuple[int, int]]]]] = [
+        [[None] * (total_laps + 1) for _ in range(n_pilots)]
+    ]
+
+    best_total = INF
+    best_layer = -1
+    best_pilot = -1
+
+    for k in range(k_max):
+        count("optimal.layers")
+        improved = False
+        for q in range(n_pilots):
+            if cost[q][total_laps] < best_total:
+                best_total = cost[q][total_laps]
+                best_layer = k
+                best_pilot = q
+                improved = True
+        if on_progress is not None:
+            partial = None
+            if improved:
+                partial = _reconstruct(race, mode, cand, caps_push, parents, best_layer,
+                                       best_pilot, total_laps, max_stints_per_set)
+            on_progress((k + 1) / k_max, partial)
+        if k + 1 >= k_max or best_total <= lower[k + 1] + 1e-9:
+            # дальше только планы с большим числом стинтов — лучше не будет
+            break
+        if should_stop is not None and should_stop():
+            break
+
+        prev_lo, prev_hi = lap_window(k)
+        prev_hi = min(prev_hi, total_laps - 1)
+        pit = _pit_cost(race, k + 1, max_stints_per_set)
+
+        # лучший пилот, закончивший стинт k на круге j0
+        best_any = [INF] * (total_laps + 1)
+        best_any_pilot = [-1] * (total_laps + 1)
+        for j0 in range(prev_lo, prev_hi + 1):
+            for r in range(n_pilots):
+                c = cost[r][j0]
+                if c < best_any[j0]:
+                    best_any[j0] = c
+                    best_any_pilot[j0] = r
+
+        lo, hi = lap_window(k + 1)
+        new_cost: List[List[float]] = []
+        new_parents: List[List[Optional[Tuple[int, int]]]] = []
+        for q in range(n_pilots):
+            t = lap_times[q]
+            cap = caps[q]
+            row = [INF] * (total_laps + 1)
+            par: List[Optional[Tuple[int, int]]] = [None] * (total_laps + 1)
+            own = cost[q]
+
+            # стоимость старта стинта k+1 пилотом q на круге j0, минус j0 * t
+            start = [INF] * (total_laps + 1)
+            start_from = [-1] * (total_laps + 1)
+            for j0 in range(prev_lo, prev_hi + 1):
+                c_same = own[j0]
+                c_change = best_any[j0] + race.driver_change_sec
+                if c_same <= c_change:
+                    if c_same < INF:
+                        start[j0] = c_same + pit - j0 * t
+                        start_from[j0] = q
+                elif c_change < INF:
+                    start[j0] = c_change + pit - j0 * t
+                    start_from[j0] = best_any_pilot[j0]
+
+            window: deque = deque()
+            next_j0 = prev_lo
+            for j in range(lo, hi + 1):
+                # окно j0 in [j - cap, j - 1]
+                while next_j0 <= min(j - 1, prev_hi):
+                    v = start[next_j0]
+                    if v < INF:
+                        while window and start[window[-1]] >= v:
+                            window.pop()
+                        window.append(next_j0)
+                    next_j0 += 1
+                while window and window[0] < j - cap:
+                    window.popleft()
+                if window:
+                    j0 = window[0]
+                    row[j] = start[j0] + j * t
+                    par[j] = (j0, start_from[j0])
+
+            new_cost.append(row)
+            new_parents.append(par)
+
+        cost = new_cost
+        parents.append(new_parents)
+
+    if best_layer < 0:
+        return plan_stints(race, tyre, pilot_tuples, mode, total_laps=total_laps)
+
+    return _reconstruct(race, mode, cand, caps_push, parents, best_layer, best_pilot,
+                        total_laps, max_stints_per_set)
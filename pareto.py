@@ -0,0 +1,270 @@
+"""
+Парето-фронт планов по четырём критериям (все — меньше лучше):
+итоговое время, топливо за гонку, комплектов шин, пит-стопов.
+
+Кандидаты — декартова сетка: планировщики реестра x оси перебора из
+sweep.SWEEP_FIELDS. Сетка не разворачивается в память: точки идут
+генератором, в пул процессов уходят пачками, и одновременно в работе не
+больше max_in_flight пачек. Каждый процесс сразу отбрасывает доминируемые
+внутри своей пачки, в главный процесс приходит только локальный фронт,
+и в памяти живёт только общий фронт.
+"""
+import itertools
+import os
+import time
+from bisect import bisect_left, bisect_right
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field, replace
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from model import RaceParams, TyreParams, ConsumptionMode, Pilot, Stint, _build_pilots, _stint_fuel_rate
+from engine import PLANNERS, get_planner
+from sweep import SweepAxis, SWEEP_FIELDS, TYRE_FIELDS
+from tyres import race_time_sec
+
+
+Point = Tuple[str, Tuple[Tuple[str, float], ...]]    # (планировщик, значения осей)
+
+
+@dataclass
+class Candidate:
+    total_sec: float
+    fuel_liters: float
+    tyre_sets: int
+    stops: int
+    planner: str
+    params: Tuple[Tuple[str, float], ...] = ()
+    stints: List[Stint] = field(default_factory=list)
+
+
+class _Front2D:
+    """Фронт по (время, топливо): время строго растёт, топливо строго убывает."""
+
+    __slots__ = ("times", "fuels", "items")
+
+    def __init__(self):
+        self.times: List[float] = []
+        self.fuels: List[float] = []
+        self.items: List[Candidate] = []
+
+    def covers(self, t: float, f: float) -> bool:
+        """Есть точка не хуже (t, f) по обоим критериям."""
+        i = bisect_right(self.times, t) - 1
+        return i >= 0 and self.fuels[i] <= f
+
+    def remove_covered(self, t: float, f: float) -> int:
+        """Убирает точки не лучше (t, f): они идут подряд с первой, где время >= t."""
+        i = bisect_left(self.times, t)
+        j = i
+        while j < len(self.fuels) and self.fuels[j] >= f:
+            j += 1
+        if j > i:
+            del self.times[i:j], self.fuels[i:j], self.items[i:j]
+        return j - i
+
+    def insert(self, c: Candidate):
+        i = bisect_left(self.times, c.total_sec)
+        self.times.insert(i, c.total_sec)
+        self.fuels.insert(i, c.fuel_liters)
+        self.items.insert(i, c)
+
+
+class ParetoFront:
+    """
+    Недоминируемые кандидаты. Комплекты и пит-стопы — небольшие целые,
+    по ним точки разложены в корзины; внутри корзины — двумерный фронт
+    (время, топливо) с бинпоиском. Проверка и вставка — O(корзин * log n)
+    плюс удаление вытесненных.
+    """
+
+    def __init__(self):
+        self._buckets: Dict[Tuple[int, int], _Front2D] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def dominated(self, c: Candidate) -> bool:
+        """Есть кандидат не хуже по всем критериям (равный тоже считается)."""
+        for (sets, stops), front in self._buckets.items():
+            if sets <= c.tyre_sets and stops <= c.stops and front.covers(c.total_sec, c.fuel_liters):
+                return True
+        return False
+
+    def add(self, c: Candidate) -> bool:
+        """True — кандидат вошёл во фронт (вытесненные удалены)."""
+        if self.dominated(c):
+            return False
+        for key in list(self._buckets):
+            sets, stops = key
+            if sets >= c.tyre_sets and stops >= c.stops:
+                front = self._buckets[key]
+                self._size -= front.remove_covered(c.total_sec, c.fuel_liters)
+                if not front.times:
+                    del self._buckets[key]
+        key = (c.tyre_sets, c.stops)
+        front = self._buckets.get(key)
+        if front is None:
+            front = self._buckets[key] = _Front2D()
+        front.insert(c)
+        self._size += 1
+        return True
+
+    def __iter__(self) -> Iterator[Candidate]:
+        return iter(self.candidates())
+
+    def candidates(self) -> List[Candidate]:
+        """Фронт по возрастанию времени."""
+        items = [c for front in self._buckets.values() for c in front.items]
+        items.sort(key=lambda c: (c.total_sec, c.fuel_liters, c.tyre_sets, c.stops))
+        return items
+
+
+def plan_metrics(race: RaceParams, tyre: TyreParams, pilots: Sequence[Pilot],
+                 stints: Sequence[Stint], mode: ConsumptionMode) -> Tuple[float, float, int, int]:
+    """(время гонки, топливо за гонку, комплектов, пит-стопов)."""
+    by_name = {p.name: p for p in pilots}
+    fuel = 0.0
+    for s in stints:
+        p = by_name.get(s.pilot)
+        if p is not None:
+            fuel += s.laps * _stint_fuel_rate(race, p, mode, s, s.eco)
+    total = race_time_sec(race, tyre, list(pilots), list(stints), mode)
+    return total, fuel, len({s.tyre_set for s in stints}), max(len(stints) - 1, 0)
+
+
+def apply_params(race: RaceParams, tyre: TyreParams,
+           params: Tuple[Tuple[str, float], ...]) -> Tuple[RaceParams, TyreParams]:
+    for name, value in params:
+        if name in TYRE_FIELDS:
+            tyre = replace(tyre, **{name: int(value)})
+        else:
+            race = replace(race, **{name: float(value)})
+    return race, tyre
+
+
+def iter_points(axes: Sequence[SweepAxis], planners: Sequence[str]) -> Iterator[Point]:
+    names = [a.field for a in axes]
+    for planner in planners:
+        for combo in itertools.product(*[a.values for a in axes]):
+            yield planner, tuple(zip(names, combo))
+
+
+def _evaluate_chunk(race: RaceParams, tyre: TyreParams, pilot_tuples, mode: ConsumptionMode,
+                    points: List[Point]) -> Tuple[List[Candidate], int, int]:
+    """Пачка точек в процессе пула: (локальный фронт, посчитано, ошибок)."""
+    pilots = _build_pilots(pilot_tuples)
+    local = ParetoFront()
+    errors = 0
+    for planner_name, params in points:
+        r, t = apply_params(race, tyre, params)
+        try:
+            stints = get_planner(planner_name)(r, t, pilot_tuples, mode)
+        except ValueError:
+            errors += 1
+            continue
+        if not stints:
+            errors += 1
+            continue
+        total, fuel, sets, stops = plan_metrics(r, t, pilots, stints, mode)
+        local.add(Candidate(total, fuel, sets, stops, planner_name, params, stints))
+    return local.candidates(), len(points), errors
+
+
+@dataclass
+class ExploreResult:
+    front: List[Candidate]      # по возрастанию времени
+    evaluated: int              # кандидатов посчитано
+    errors: int                 # планировщик не справился
+    elapsed_sec: float
+    cancelled: bool = False
+
+
+def explore(
+    race: RaceParams,
+    tyre: TyreParams,
+    pilot_tuples,
+    mode: ConsumptionMode,
+    axes: Sequence[SweepAxis] = (),
+    planners: Optional[Sequence[str]] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = 64,
+    max_in_flight: Optional[int] = None,
+    on_progress: Optional[Callable[[float, int], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> ExploreResult:
+    """
+    Фронт по сетке планировщики x оси. workers=1 — без пула (для отладки).
+    on_progress(доля, размер фронта) — после каждой пачки;
+    should_stop() == True — новые пачки не отправляются, фронт на этот момент.
+    """
+    axes = list(axes)
+    for a in axes:
+        if a.field not in SWEEP_FIELDS:
+            raise ValueError(f"Нельзя перебирать поле {a.field}")
+    planners = list(PLANNERS) if planners is None else list(planners)
+    for name in planners:
+        get_planner(name)
+
+    total = len(planners)
+    for a in axes:
+        total *= len(a.values)
+
+    started = time.perf_counter()
+    front = ParetoFront()
+    evaluated = errors = 0
+    cancelled = False
+    points = iter_points(axes, planners)
+
+    def chunks():
+        while True:
+            chunk = list(itertools.islice(points, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def merge(result):
+        nonlocal evaluated, errors
+        part, n, e = result
+        for c in part:
+            front.add(c)
+        evaluated += n
+        errors += e
+        if on_progress is not None:
+            on_progress(evaluated / total if total else 1.0, len(front))
+
+    if workers == 1:
+        for chunk in chunks():
+            if should_stop is not None and should_stop():
+                cancelled = True
+                break
+            merge(_evaluate_chunk(race, tyre, pilot_tuples, mode, chunk))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            limit = max_in_flight or 2 * (workers or os.cpu_count() or 1)
+            pending = set()
+            source = chunks()
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < limit:
+                    if should_stop is not None and should_stop():
+                        cancelled = exhausted = True
+                        break
+                    chunk = next(source, None)
+                    if chunk is None:
+                        exhausted = True
+                        break
+                    pending.add(pool.submit(_evaluate_chunk, race, tyre, pilot_tuples, mode, chunk))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    merge(fut.result())
+
+    return ExploreResult(
+        front=front.candidates(),
+        evaluated=evaluated,
+        errors=errors,
+        elapsed_sec=time.perf_counter() - started,
+        cancelled=cancelled,
+    )
@@ -0,0 +1,184 @@
+"""
+Окно ближайшего пит-стопа: когда можно заехать и сколько это стоит.
+
+Из хвостовой таблицы replan.TailTable для каждого числа оставшихся кругов j,
+пилота p и слота u текущего комплекта считается S[j][p][u] — лучшее время
+«пит-стоп + остаток из j кругов» (дозаправка или смена резины, смена
+пилота — по тем же правилам, что в replan_from_state). Заезд через c кругов
+при r оставшихся стоит c * t_p + S[r - c] = r * t_p + V[r - c], где
+V[j] = S[j] - j * t_p. По V строится разреженная таблица минимумов, поэтому:
+
+    stop_cost     время остатка гонки при заезде через c кругов — O(1)
+    window        самый ранний и поздний допустимый заезд и лучший в окне — O(1)
+
+Поздний заезд ограничен топливом в баке (в экономии), ранний — комплектами
+шин: после заезда оставшиеся круги должны уложиться в свободные стинты
+(DEFAULT_MAX_STINTS_PER_SET на комплект) с наибольшей дальностью пилотов.
+Машина безопасности и износ резины в окне не учитываются — их учитывает
+replan_from_state.
+
+update() либо только подменяет входы (изменились комплекты, профиль круга
+или длительность гонки в пределах уже посчитанных кругов — массивы от них
+не зависят), либо берёт новую хвостовую таблицу у replan.tail_table: из
+кеша, достроенную или выведенную из таблицы, где отличался один пилот
+(TailTable.with_pilot). Разреженная таблица V пересчитывается только для
+пилотов, у которых поменялись S или время круга.
+"""
+from dataclasses import astuple, dataclass, replace
+
+import numpy as np
+
+from model import RaceParams, TyreParams, ConsumptionMode, _calc_total_laps, _fuel_per_lap
+from replan import RaceState, _remaining_laps, tail_table
+
+
+INF = float("inf")
+
+
+@dataclass
+class PitWindow:
+    remaining_laps: int
+    earliest: int               # через сколько кругов можно заехать раньше всего (0 — сейчас)
+    latest: int                 # через сколько кругов нужно заехать самое позднее
+    best: int                   # лучший заезд в окне
+    best_sec: float             # время остатка гонки при лучшем заезде
+    feasible: bool              # окно не пустое
+
+    def laps(self) -> range:
+        return range(self.earliest, self.latest + 1) if self.feasible else range(0)
+
+
+def _table_inputs(race: RaceParams, tyre: TyreParams, pilot_tuples, mode: ConsumptionMode) -> tuple:
+    # всё, от чего зависит хвостовая таблица (как replan._table_key, без комплектов)
+    return (astuple(replace(race, duration_hours=0.0, avg_lap_sec=0.0, lap_profile=())),
+            tuple(map(tuple, pilot_tuples)), mode.by_fuel_per_lap)
+
+
+class PitWindowIndex:
+    """Окна пит-стопа для любого состояния гонки на одни входы."""
+
+    def __init__(self, race: RaceParams, tyre: TyreParams, pilot_tuples, mode: ConsumptionMode):
+        self._key = None
+        self.update(race, tyre, pilot_tuples, mode)
+
+    def update(self, race: RaceParams, tyre: TyreParams, pilot_tuples, mode: ConsumptionMode) -> bool:
+        """
+        Новые входы; True — массивы пересчитаны (целиком или по пилотам,
+        у которых они изменились), False — хватило замены полей.
+        """
+        self.race, self.tyre, self.mode = race, tyre, mode
+        key = _table_inputs(race, tyre, pilot_tuples, mode)
+        max_laps = _calc_total_laps(race)
+        if key == self._key and max_laps <= self.max_laps:
+            return False
+        self._key = key
+        self._build(tail_table(race, pilot_tuples, mode, max_laps), max_laps)
+        return True
+
+    def _build(self, table, max_laps: int):
+        race = self.race
+        self.pilots = table.pilots
+        self.index = table.index
+        self.per_set = per_set = table.per_set
+        self.max_laps = max_laps
+        self.max_cap = max(table.caps, default=0)
+        m = len(self.pilots)
+
+        cost = np.array(table.cost[:max_laps + 1], dtype=np.float64).reshape(max_laps + 1, m, per_set)
+        change = np.where(np.eye(m, dtype=bool), 0.0, race.driver_change_sec)     # [p, q]
+        # после пит-стопа: новый комплект (слот 0) или дозаправка (слот u + 1)
+        tyre_stop = (cost[:, None, :, 0] + change[None]).min(axis=2) + race.pit_tyre_sec  # [j, p]
+        stop = np.repeat(tyre_stop[:, :, None], per_set, axis=2)
+        if per_set > 1:
+            refuel = (cost[:, None, :, 1:] + change[None, :, :, None]).min(axis=2) + race.pit_refuel_sec
+            stop[:, :, :-1] = np.minimum(stop[:, :, :-1], refuel)
+        stop[0] = 0.0                   # остатка нет — заезжать не нужно
+        lap_time = np.array(table.lap_time, dtype=np.float64)
+        old = getattr(self, "stop", None)
+        if old is not None and old.shape == stop.shape:
+            changed = np.flatnonzero((stop != old).any(axis=(0, 2)) | (lap_time != self.lap_time))
+            self.stop, self.lap_time = stop, lap_time
+            levels, args = self._sparse(changed)
+            for k in range(len(levels)):
+                self.levels[k][:, changed] = levels[k]
+                self.args[k][:, changed] = args[k]
+            return
+        self.stop, self.lap_time = stop, lap_time
+        self.levels, self.args = self._sparse(slice(None))
+
+    def _sparse(self, pilots):
+        """
+        Разреженная таблица минимумов по j для пилотов pilots (индексы или срез):
+        levels[k][j] — минимум V[j .. j + 2^k - 1], args — где он достигается.
+        """
+        stop = self.stop[:, pilots]
+        j = np.arange(self.max_laps + 1)
+        v = stop - j[:, None, None] * self.lap_time[pilots][None, :, None]
+        levels = [v]
+        args = [np.broadcast_to(j[:, None, None], v.shape).copy()]
+        width = 1
+        while width * 2 <= self.max_laps + 1:
+            prev, prev_arg = levels[-1], args[-1]
+            left, right = prev[:-width], prev[width:]
+            take_right = right < left
+            levels.append(np.where(take_right, right, left))
+            args.append(np.where(take_right, prev_arg[width:], prev_arg[:-width]))
+            width *= 2
+        return levels, args
+
+    # ---------- запросы ----------
+
+    def _pilot(self, name: str) -> int:
+        p = self.index.get(name)
+        if p is None:
+            raise ValueError(f"Неизвестный пилот {name}")
+        return p
+
+    def _slot(self, set_stints: int) -> int:
+        return min(max(set_stints, 1), self.per_set) - 1
+
+    def stop_cost(self, remaining: int, pilot: str, set_stints: int, c: int) -> float:
+        """Время остатка гонки, если заехать через c кругов (c == remaining — до финиша без заезда)."""
+        if not 0 <= c <= remaining <= self.max_laps:
+            return INF
+        p = self._pilot(pilot)
+        return float(c * self.lap_time[p] + self.stop[remaining - c, p, self._slot(set_stints)])
+
+    def _range_min(self, a: int, b: int, p: int, u: int):
+        k = (b - a + 1).bit_length() - 1
+        lo, hi = self.levels[k][a, p, u], self.levels[k][b - (1 << k) + 1, p, u]
+        if hi < lo:
+            return hi, int(self.args[k][b - (1 << k) + 1, p, u])
+        return lo, int(self.args[k][a, p, u])
+
+    def window(self, remaining: int, pilot: str, fuel_liters: float, tyre_set: int,
+               set_stints: int = 1) -> PitWindow:
+        """Окно заезда с r оставшимися кругами, топливом в баке и текущим комплектом."""
+        p = self._pilot(pilot)
+        u = self._slot(set_stints)
+        remaining = min(max(remaining, 0), self.max_laps)
+        burn = _fuel_per_lap(self.race, self.pilots[p], self.mode, True)
+        latest = int(fuel_liters / burn + 1e-9) if burn > 0 else remaining
+        latest = min(max(latest, 0), remaining)
+        # свободные стинты: остаток слотов текущего комплекта и новые комплекты
+        stints_left = (self.per_set - u - 1) + max(self.tyre.sets - tyre_set, 0) * self.per_set
+        earliest = max(remaining - stints_left * self.max_cap, 0)
+        if earliest > latest or remaining == 0:
+            return PitWindow(remaining, earliest, latest, latest, INF if remaining else 0.0,
+                             remaining == 0)
+        # c в [earliest, latest] <=> j = r - c в [r - latest, r - earliest]
+        v, j = self._range_min(remaining - latest, remaining - earliest, p, u)
+        best_sec = float(remaining * self.lap_time[p] + v)
+        return PitWindow(remaining, earliest, latest, remaining - j, best_sec, best_sec < INF)
+
+    def window_for(self, state: RaceState) -> PitWindow:
+        return self.window(_remaining_laps(self.race, state), state.pilot, state.fuel_liters,
+                           state.tyre_set, state.set_stints)
+
+    def costs(self, remaining: int, pilot: str, set_stints: int, window: PitWindow) -> np.ndarray:
+        """Время остатка для каждого заезда окна (массив по window.laps())."""
+        if not window.feasible:
+            return np.zeros(0)
+        p = self._pilot(pilot)
+        c = np.arange(window.earliest, window.latest + 1)
+        return c * self.lap_time[p] + self.stop[remaining - c, p, self._slot(set_stints)]
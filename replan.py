@@ -0,0 +1,477 @@
+"""
+Пересчёт плана по ходу гонки из текущего состояния.
+
+TailTable — хвостовые подзадачи оптимального плана: T[r][q][u] — лучшее
+время, чтобы проехать оставшиеся r кругов, если следующий стинт начинает
+пилот q и он u-й на своём комплекте (пит-стопы и смены пилота — по тем же
+правилам, что у plan_stints_optimal). Таблица считается один раз на входы
+(без длительности гонки) для всех r сразу и хранится в кеше модуля, поэтому
+пересчёт с любого круга — перебор момента ближайшего пит-стопа, O(бак),
+и восстановление плана по ссылкам таблицы: миллисекунды.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import astuple, dataclass, replace
+from typing import List, Optional, Sequence, Tuple
+
+from instrument import traced
+from lap_profile import laps_between
+from model import (
+    RaceParams, TyreParams, ConsumptionMode, Pilot, Stint,
+    _build_pilots, _calc_total_laps, _calc_stint_length_push, _calc_stint_length_eco,
+    _fuel_per_lap, _stint_fuel_rate,
+)
+from optimal import DEFAULT_MAX_STINTS_PER_SET, _stint_fuel_start
+
+
+INF = float("inf")
+
+# во время машины безопасности пит-стоп теряет меньше времени относительно соперников
+DEFAULT_SC_PIT_FACTOR = 0.5
+
+
+@dataclass
+class RaceState:
+    """Состояние гонки на момент пересчёта."""
+    laps_done: int                  # кругов проехано
+    remaining_sec: float            # до флага, сек
+    fuel_liters: float              # топлива в баке сейчас, л
+    pilot: str                      # кто за рулём
+    tyre_set: int                   # текущий комплект (1..N)
+    tyre_age: int = 0               # кругов на текущем комплекте
+    set_stints: int = 1             # стинтов на текущем комплекте, включая текущий
+    remaining_laps: Optional[int] = None    # вместо оценки remaining_sec / avg_lap_sec
+    safety_car_laps: int = 0        # машина безопасности ещё столько кругов (0 — нет)
+    sc_pit_factor: float = DEFAULT_SC_PIT_FACTOR   # доля обычного пит-стопа под SC
+
+
+@dataclass
+class ReplanResult:
+    stints: List[Stint]             # первый — продолжение текущего стинта (если pit_in > 0)
+    total_sec: float                # оставшееся время: круги + пит-стопы + смены
+    pit_in: int                     # через сколько кругов ближайший пит-стоп
+    remaining_laps: int
+    tyres_ok: bool                  # план укладывается в оставшиеся комплекты
+    elapsed_sec: float              # время пересчёта
+
+
+class TailTable:
+    """
+    Хвостовые подзадачи для всех r <= max_laps.
+
+    T[r][q][u] = r * t_q + min_{j in [r - cap_q, r - 1]} (X_qu[j] - j * t_q), где
+    X_qu[j] — время после стинта пилота q на слоте u комплекта, если осталось
+    j кругов: пит-стоп (дозаправка — следующий слот, смена резины — слот 0)
+    плюс лучший следующий стинт с учётом смены пилота. Минимум по окну
+    ведётся монотонной очередью, поэтому таблица строится за O(max_laps * пилоты * слоты).
+    """
+
+    def __init__(self, race: RaceParams, pilots: Sequence[Pilot], mode: ConsumptionMode,
+                 max_laps: int, max_stints_per_set: int = DEFAULT_MAX_STINTS_PER_SET):
+        self.race = race
+        self.mode = mode
+        self.pilots = list(pilots)
+        self.index = {p.name: i for i, p in enumerate(self.pilots)}
+        self.per_set = max(max_stints_per_set, 1)
+        self.lap_time = [p.lap_time_sec for p in self.pilots]
+        self.caps = [_calc_stint_length_eco(race, p, mode) for p in self.pilots]
+        self.caps_push = [_calc_stint_length_push(race, p, mode) for p in self.pilots]
+        self.max_laps = 0
+        # cost[r][q * per_set + u], arg[r][...] — круг окончания первого стинта (r - l)
+        self.cost: List[List[float]] = [[0.0] * (len(self.pilots) * self.per_set)]
+        self.arg: List[List[int]] = [[-1] * (len(self.pilots) * self.per_set)]
+        # after[j][q * per_set + u] = (время X, следующий пилот, следующий слот)
+        self.after: List[List[Tuple[float, int, int]]] = [
+            [(0.0, -1, -1)] * (len(self.pilots) * self.per_set)
+        ]
+        # best[j][v] = (лучший, его пилот, второй, его пилот) по строке cost[j] на слоте v
+        self.best: List[Optional[List[Tuple[float, int, float, int]]]] = [None]
+        self._windows = [deque() for _ in range(len(self.pilots) * self.per_set)]
+        self.extend(max_laps)
+
+    def _best(self, row: List[float]) -> List[Tuple[float, int, float, int]]:
+        """Лучший и второй пилот на каждый слот — для смены пилота."""
+        m, per_set = len(self.pilots), self.per_set
+        best = []
+        for v in range(per_set):
+            b1 = b2 = INF
+            q1 = q2 = -1
+            for q in range(m):
+                c = row[q * per_set + v]
+                if c < b1:
+                    b2, q2 = b1, q1
+                    b1, q1 = c, q
+                elif c < b2:
+                    b2, q2 = c, q
+            best.append((b1, q1, b2, q2))
+        return best
+
+    def _after(self, row: List[float], best, pilots: Sequence[int]) -> List[Tuple[float, int, int]]:
+        """X_qu для пилотов pilots (все слоты) по строке cost и её best."""
+        per_set = self.per_set
+        race = self.race
+
+        def next_cost(q: int, v: int) -> Tuple[float, int]:
+            own = row[q * per_set + v]
+            b1, q1, b2, q2 = best[v]
+            other, other_q = (b1, q1) if q1 != q else (b2, q2)
+            other += race.driver_change_sec
+            return (own, q) if own <= other else (other, other_q)
+
+        out: List[Tuple[float, int, int]] = []
+        for q in pilots:
+            for u in range(per_set):
+                c, nq = next_cost(q, 0)
+                choice = (c + race.pit_tyre_sec, nq, 0)
+                if u + 1 < per_set:
+                    c, nq = next_cost(q, u + 1)
+                    if c + race.pit_refuel_sec <= choice[0]:
+                        choice = (c + race.pit_refuel_sec, nq, u + 1)
+                out.append(choice)
+        return out
+
+    def _fill(self, r: int, q: int, row: List[float], arg: List[int]):
+        """Ячейки строки r для стинта пилота q на всех слотах (окна — до строки r - 1)."""
+        per_set = self.per_set
+        t = self.lap_time[q]
+        cap = self.caps[q]
+        if cap <= 0:
+            return
+        for u in range(per_set):
+            k = q * per_set + u
+            window = self._windows[k]
+            # новый кандидат j = r - 1
+            j = r - 1
+            v = self.after[j][k][0] - j * t
+            if v < INF:
+                while window and window[-1][1] >= v:
+                    window.pop()
+                window.append((j, v))
+            while window and window[0][0] < r - cap:
+                window.popleft()
+            if window:
+                j0, v0 = window[0]
+                row[k] = r * t + v0
+                arg[k] = j0
+
+    def _refill(self, q: int, r: int):
+        """Окна пилота q такими, какими их оставил бы расчёт строк до r - 1."""
+        t = self.lap_time[q]
+        for u in range(self.per_set):
+            k = q * self.per_set + u
+            window = self._windows[k]
+            window.clear()
+            for j in range(max(r - 1 - self.caps[q], 0), r - 1):
+                v = self.after[j][k][0] - j * t
+                if v < INF:
+                    while window and window[-1][1] >= v:
+                        window.pop()
+                    window.append((j, v))
+
+    def _append(self, row: List[float], arg: List[int]):
+        best = self._best(row)
+        self.cost.append(row)
+        self.arg.append(arg)
+        self.best.append(best)
+        self.after.append(self._after(row, best, range(len(self.pilots))))
+
+    def extend(self, max_laps: int):
+        """Достраивает таблицу до max_laps кругов (строки для меньших r не меняются)."""
+        m, per_set = len(self.pilots), self.per_set
+        for r in range(self.max_laps + 1, max_laps + 1):
+            row = [INF] * (m * per_set)
+            arg = [-1] * (m * per_set)
+            for q in range(m):
+                self._fill(r, q, row, arg)
+            self._append(row, arg)
+        self.max_laps = max(self.max_laps, max_laps)
+
+    def with_pilot(self, q: int, pilot: Pilot) -> "TailTable":
+        """
+        Таблица на тех же кругах, где пилот q заменён на pilot (своя таблица не меняется).
+        Пока q не входит в двух лучших ни на одном слоте ни в старой, ни в новой
+        строке, у остальных пилотов строки и X те же, что здесь, — считается только
+        столбец q. С первой строки, где q влияет на других, — все пилоты заново.
+        """
+        pilots = list(self.pilots)
+        pilots[q] = pilot
+        table = TailTable(self.race, pilots, self.mode, 0, self.per_set)
+        per_set = self.per_set
+        own = slice(q * per_set, (q + 1) * per_set)
+        shared = True
+        for r in range(1, self.max_laps + 1):
+            if shared:
+                row, arg = list(self.cost[r]), list(self.arg[r])
+                row[own], arg[own] = [INF] * per_set, [-1] * per_set
+                table._fill(r, q, row, arg)
+                best = self.best[r]
+                # новые значения q строго хуже второго — лучшие на слотах те же
+                if all(q != b[1] and q != b[3] and row[q * per_set + v] > b[2]
+                       for v, b in enumerate(best)):
+                    after = list(self.after[r])
+                    after[own] = table._after(row, best, (q,))
+                else:
+                    best = table._best(row)
+                    after = table._after(row, best, range(len(pilots)))
+                    # X других не изменились (своё продолжение выгоднее смены) — общие дальше
+                    shared = all(after[k] == self.after[r][k] for k in range(len(after))
+                                 if k // per_set != q)
+                # строка r верна целиком: у других она зависит от X до r - 1
+                table.cost.append(row)
+                table.arg.append(arg)
+                table.best.append(best)
+                table.after.append(after)
+                if not shared:
+                    for p in range(len(pilots)):
+                        if p != q:
+                            table._refill(p, r + 1)
+                continue
+            row = [INF] * (len(pilots) * per_set)
+            arg = [-1] * (len(pilots) * per_set)
+            for p in range(len(pilots)):
+                table._fill(r, p, row, arg)
+            table._append(row, arg)
+        table.max_laps = self.max_laps
+        if shared:
+            for p in range(len(pilots)):
+                if p != q:
+                    table._refill(p, self.max_laps + 1)
+        return table
+
+    def best_start(self, r: int, slot: int = 0) -> Tuple[float, int]:
+        """Лучший пилот на первый стинт свежей гонки из r кругов (на слоте slot)."""
+        if r > self.max_laps:
+            self.extend(r)
+        costs = [self.cost[r][q * self.per_set + slot] for q in range(len(self.pilots))]
+        q = min(range(len(costs)), key=costs.__getitem__)
+        return costs[q], q
+
+    def path(self, r: int, q: int, u: int, first_set: int) -> List[Stint]:
+        """Стинты хвоста из r кругов от стинта пилота q на слоте u; комплекты с first_set."""
+        stints: List[Stint] = []
+        tyre_set = first_set
+        while r > 0:
+            k = q * self.per_set + u
+            j = self.arg[r][k]
+            if j < 0:
+                return []
+            laps = r - j
+            pilot = self.pilots[q]
+            eco = laps > self.caps_push[q]
+            stints.append(Stint(
+                pilot=pilot.name,
+                laps=laps,
+                fuel_start=_stint_fuel_start(self.race, pilot, self.mode, laps, eco),
+                tyre_set=tyre_set,
+                eco=eco,
+            ))
+            if j == 0:
+                break
+            _c, q, u = self.after[j][k]
+            if u == 0:
+                tyre_set += 1
+            r = j
+        return stints
+
+
+def _table_key(race: RaceParams, pilot_tuples, mode: ConsumptionMode) -> tuple:
+    # длительность, среднее время круга и его профиль влияют только на число оставшихся кругов
+    fields = astuple(replace(race, lap_profile=()))[2:]
+    return fields, tuple(map(tuple, pilot_tuples)), mode.by_fuel_per_lap
+
+
+_TABLES: "OrderedDict[tuple, TailTable]" = OrderedDict()
+_TABLES_MAX = 8
+_tables_lock = threading.Lock()
+
+
+def _derived_table(key: tuple, race: RaceParams, pilot_tuples, mode: ConsumptionMode) -> Optional[TailTable]:
+    # таблица из кеша, где на тех же местах те же пилоты и отличается только один
+    fields, pilots, by_fuel = key
+    for (other_fields, other_pilots, other_by_fuel), table in reversed(_TABLES.items()):
+        if (other_fields, other_by_fuel) != (fields, by_fuel) or len(other_pilots) != len(pilots):
+            continue
+        diff = [q for q, (a, b) in enumerate(zip(other_pilots, pilots)) if a != b]
+        if len(diff) == 1 and other_pilots[diff[0]][0] == pilots[diff[0]][0]:
+            q = diff[0]
+            return table.with_pilot(q, _build_pilots([pilot_tuples[q]])[0])
+    return None
+
+
+@traced("replan.tail_table")
+def tail_table(race: RaceParams, pilot_tuples, mode: ConsumptionMode,
+               max_laps: Optional[int] = None) -> TailTable:
+    """
+    Таблица из кеша модуля; при необходимости строится или достраивается.
+    Если в кеше есть таблица на те же входы, где отличается один пилот,
+    новая выводится из неё (TailTable.with_pilot).
+    """
+    if max_laps is None:
+        max_laps = _calc_total_laps(race)
+    key = _table_key(race, pilot_tuples, mode)
+    with _tables_lock:
+        table = _TABLES.get(key)
+        if table is None:
+            table = _derived_table(key, race, pilot_tuples, mode)
+            if table is None:
+                table = TailTable(race, _build_pilots(pilot_tuples), mode, max_laps)
+            elif max_laps > table.max_laps:
+                table.extend(max_laps)
+            _TABLES[key] = table
+            while len(_TABLES) > _TABLES_MAX:
+                _TABLES.popitem(last=False)
+        else:
+            _TABLES.move_to_end(key)
+            if max_laps > table.max_laps:
+                table.extend(max_laps)
+        return table
+
+
+def prepare_replan(race: RaceParams, tyre: TyreParams, pilot_tuples,
+                   mode: ConsumptionMode) -> TailTable:
+    """Строит таблицу заранее (например, сразу после расчёта исходного плана)."""
+    return tail_table(race, pilot_tuples, mode)
+
+
+def _remaining_laps(race: RaceParams, state: RaceState) -> int:
+    if state.remaining_laps is not None:
+        return max(state.remaining_laps, 0)
+    if race.avg_lap_sec <= 0:
+        return 0
+    if race.lap_profile:
+        race_sec = race.duration_hours * 3600.0
+        return laps_between(race.avg_lap_sec, race.lap_profile,
+                            race_sec - state.remaining_sec, race_sec)
+    return max(int(state.remaining_sec // race.avg_lap_sec), 0)
+
+
+@traced("replan.replan")
+def replan_from_state(
+    race: RaceParams,
+    tyre: TyreParams,
+    pilot_tuples,
+    mode: ConsumptionMode,
+    state: RaceState,
+) -> ReplanResult:
+    """
+    Новый план на остаток гонки.
+
+    Перебирается момент ближайшего пит-стопа c (0 — заезжаем сейчас) в
+    пределах топлива в баке: c кругов едет текущий пилот, дальше — лучший
+    хвост из таблицы. Пока машина безопасности на трассе, пит-стоп стоит
+    state.sc_pit_factor от обычного. Из вариантов берётся лучший, который
+    укладывается в оставшиеся комплекты шин; если таких нет — лучший
+    вообще, с tyres_ok=False.
+    """
+    t0 = time.perf_counter()
+    remaining = _remaining_laps(race, state)
+    table = tail_table(race, pilot_tuples, mode, max(remaining, _calc_total_laps(race)))
+    p = table.index.get(state.pilot)
+    if p is None:
+        raise ValueError(f"Неизвестный пилот {state.pilot}")
+    if remaining <= 0:
+        return ReplanResult([], 0.0, 0, 0, True, time.perf_counter() - t0)
+
+    pilot = table.pilots[p]
+    per_set = table.per_set
+    slot = min(max(state.set_stints, 1), per_set) - 1
+    burn_eco = _fuel_per_lap(race, pilot, mode, True)
+    burn_push = _fuel_per_lap(race, pilot, mode, False)
+    fuel = max(state.fuel_liters, 0.0)
+    # допуск на округление: бак, залитый ровно на l кругов, даёт l, а не l - 1
+    max_c = int(fuel / burn_eco + 1e-9) if burn_eco > 0 else remaining
+    max_c = min(max_c, remaining)
+    push_c = int(fuel / burn_push + 1e-9) if burn_push > 0 else remaining
+
+    candidates: List[Tuple[float, int, int, int]] = []   # (время, c, следующий пилот, слот)
+    for c in range(max_c + 1):
+        drive = c * pilot.lap_time_sec
+        if c == remaining:
+            candidates.append((drive, c, -1, -1))
+            continue
+        factor = state.sc_pit_factor if c < state.safety_car_laps else 1.0
+        row = table.cost[remaining - c]
+        best = (INF, -1, -1)
+        for q in range(len(table.pilots)):
+            change = race.driver_change_sec if q != p else 0.0
+            cost = row[q * per_set] + race.pit_tyre_sec * factor + change
+            if cost < best[0]:
+                best = (cost, q, 0)
+            if slot + 1 < per_set:
+                cost = row[q * per_set + slot + 1] + race.pit_refuel_sec * factor + change
+                if cost < best[0]:
+                    best = (cost, q, slot + 1)
+        if best[0] < INF:
+            candidates.append((drive + best[0], c, best[1], best[2]))
+    if not candidates:
+        raise ValueError("Не хватает топлива или дальности пилотов до финиша")
+    candidates.sort()
+
+    sets_left = max(tyre.sets, 1) - state.tyre_set
+    chosen = None
+    for total, c, q, u in candidates:
+        stints = []
+        if c > 0:
+            stints.append(Stint(pilot=pilot.name, laps=c, fuel_start=fuel,
+                                tyre_set=state.tyre_set, eco=c > push_c))
+        if q >= 0:
+            first_set = state.tyre_set + (1 if u == 0 else 0)
+            tail = table.path(remaining - c, q, u, first_set)
+            if not tail:
+                continue
+            stints.extend(tail)
+        new_sets = stints[-1].tyre_set - state.tyre_set if stints else 0
+        if chosen is None:
+            chosen = (total, c, stints, new_sets <= sets_left)
+        if new_sets <= sets_left:
+            chosen = (total, c, stints, True)
+            break
+    if chosen is None:
+        raise ValueError("Не удалось восстановить план на остаток гонки")
+
+    total, c, stints, tyres_ok = chosen
+    return ReplanResult(
+        stints=stints,
+        total_sec=total,
+        pit_in=c,
+        remaining_laps=remaining,
+        tyres_ok=tyres_ok,
+        elapsed_sec=time.perf_counter() - t0,
+    )
+
+
+def state_from_plan(race: RaceParams, pilots: Sequence[Pilot], stints: Sequence[Stint],
+                    mode: ConsumptionMode, laps_done: int) -> RaceState:
+    """Состояние, в котором гонка была бы на круге laps_done, если ехать по плану."""
+    burn = {p.name: p for p in pilots}
+    elapsed = 0.0
+    lap = 0
+    set_stints = 0
+    age = {}
+    prev = None
+    for i, s in enumerate(stints):
+        if i > 0:
+            elapsed += race.pit_refuel_sec if s.tyre_set == prev.tyre_set else race.pit_tyre_sec
+            if s.pilot != prev.pilot:
+                elapsed += race.driver_change_sec
+        set_stints = set_stints + 1 if prev is not None and s.tyre_set == prev.tyre_set else 1
+        pilot = burn[s.pilot]
+        if lap + s.laps >= laps_done or i == len(stints) - 1:
+            done = max(min(laps_done - lap, s.laps), 0)
+            elapsed += done * pilot.lap_time_sec
+            return RaceState(
+                laps_done=laps_done,
+                remaining_sec=race.duration_hours * 3600.0 - elapsed,
+                fuel_liters=s.fuel_start - done * _stint_fuel_rate(race, pilot, mode, s, s.eco),
+                pilot=s.pilot,
+                tyre_set=s.tyre_set,
+                tyre_age=age.get(s.tyre_set, 0) + done,
+                set_stints=set_stints,
+                remaining_laps=sum(st.laps for st in stints) - laps_done,
+            )
+        elapsed += s.laps * pilot.lap_time_sec
+        age[s.tyre_set] = age.get(s.tyre_set, 0) + s.laps
+        lap += s.laps
+        prev = s
+    raise ValueError("План пуст")
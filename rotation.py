@@ -0,0 +1,664 @@
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+from instrument import count, traced
+from model import (
+    RaceParams, TyreParams, ConsumptionMode, Pilot, Stint,
+    _build_pilots, _calc_stint_length_push, _calc_stint_length_eco,
+)
+from optimal import plan_stints_optimal, _stint_fuel_start
+
+
+INF = float("inf")
+
+# перебор дольше этого числа узлов останавливается с лучшей найденной расстановкой;
+# лимит в узлах, а не в секундах — план не зависит от скорости машины
+DEFAULT_MAX_NODES = 5_000
+
+# узлов на правку пилотов в repair_rotation: быстрый план для авто-пересчёта
+REPAIR_MAX_NODES = 100
+
+# сколько серий подряд различает оценка _count_bound; больше — как без ограничения
+_WINDOWS = 4
+
+
+class RotationPlan(list):
+    """
+    Стинты plan_stints_rotation; optimal и nodes — из RotationResult.
+    optimal=False — перебор остановлен по лимиту: план допустимый, но
+    лучший ли он, не доказано.
+    """
+
+    def __init__(self, stints=(), optimal: bool = True, nodes: int = 0):
+        super().__init__(stints)
+        self.optimal = optimal
+        self.nodes = nodes
+
+
+@dataclass
+class RotationResult:
+    stints: List[Stint]
+    total_sec: float            # как compute_total_race_time_sec
+    optimal: bool               # False — перебор остановлен по лимиту или should_stop
+    nodes: int                  # узлов дерева поиска
+
+
+class _Problem:
+    """Плоские таблицы для перебора: стоимость стинта для каждого пилота и ограничения."""
+
+    def __init__(self, race: RaceParams, pilots: Sequence[Pilot], stints: Sequence[Stint],
+                 mode: ConsumptionMode):
+        n = self.n = len(stints)
+        m = self.m = len(pilots)
+        self.laps = [s.laps for s in stints]
+        self.lap_time = [p.lap_time_sec for p in pilots]
+        self.change_sec = race.driver_change_sec
+        self.max_continuous = race.max_continuous_sec if race.max_continuous_sec > 0 else INF
+        self.min_total = max(race.min_drive_sec, 0.0)
+        self.max_stints = race.max_stints_per_pilot if race.max_stints_per_pilot > 0 else n
+
+        eco_range = [_calc_stint_length_eco(race, p, mode) for p in pilots]
+        # cost[j][p] — время за рулём; INF, если пилоту не хватает бака даже в eco
+        # или стинт один длиннее лимита непрерывной езды
+        self.cost = [
+            [laps * lt if laps <= r and laps * lt <= self.max_continuous else INF
+             for lt, r in zip(self.lap_time, eco_range)]
+            for laps in self.laps
+        ]
+        # время за рулём с начала гонки, если бы пилот ехал все стинты: cont = drive[p][j] - drive[p][s]
+        self.drive = [[0.0] * (n + 1) for _ in range(m)]
+        for p in range(m):
+            for j in range(n):
+                self.drive[p][j + 1] = self.drive[p][j] + self.laps[j] * self.lap_time[p]
+
+        # пит-стопы без смен пилота от расстановки не зависят
+        self.pit_sec = 0.0
+        for i in range(1, n):
+            same = stints[i].tyre_set == stints[i - 1].tyre_set
+            self.pit_sec += race.pit_refuel_sec if same else race.pit_tyre_sec
+
+        self.lt_min = min(self.lap_time)
+        # доля времени недобора, которую пилот проезжает медленнее самого быстрого
+        self.slow_share = [1.0 - self.lt_min / lt if lt > 0 else 0.0 for lt in self.lap_time]
+        self.suffix_laps = [0] * (n + 1)
+        self.tail_max_laps = [0] * (n + 1)
+        for j in range(n - 1, -1, -1):
+            self.suffix_laps[j] = self.suffix_laps[j + 1] + self.laps[j]
+            self.tail_max_laps[j] = max(self.tail_max_laps[j + 1], self.laps[j])
+        self.fewest = self._fewest_laps()
+        self._steps = {}
+        # больше стинтов подряд одному пилоту не уложить в max_continuous
+        shortest = sorted(self.laps)
+        self.max_run, run_sec = 0, 0.0
+        while self.max_run < n and run_sec + shortest[self.max_run] * self.lt_min <= self.max_continuous:
+            run_sec += shortest[self.max_run] * self.lt_min
+            self.max_run += 1
+        self.max_run = max(self.max_run, 1)
+        # forced[j] — стыков в j..n-1, через которые никому не проехать подряд
+        self.forced = [0] * (n + 1)
+        for j in range(n - 2, -1, -1):
+            through = (self.laps[j] + self.laps[j + 1]) * self.lt_min <= self.max_continuous
+            self.forced[j] = self.forced[j + 1] + (0 if through else 1)
+
+        self._build_run_bound()
+
+        # одинаковые пилоты взаимозаменяемы, пока их счётчики совпадают
+        self.pilot_class = []
+        classes = {}
+        for p, pilot in enumerate(pilots):
+            key = (pilot.lap_time_sec, eco_range[p], _calc_stint_length_push(race, pilot, mode),
+                   pilot.fuel_push, pilot.fuel_eco)
+            self.pilot_class.append(classes.setdefault(key, len(classes)))
+
+    def _series_dp(self, cost: List[List[float]]):
+        """
+        bound[j][p][s] — точный минимум стинтов j..n-1 при стоимостях cost с учётом
+        смен пилота и max_continuous, если стинт j-1 ехал p с начала серии на стинте s;
+        start[j][q] — то же, если на стинте j начинает серию q (без смены).
+        Ограничения на сумму за гонку и число стинтов здесь не учитываются.
+        Обратный ДП за O(n^2 * m): «сменить пилота» — всегда на лучшего другого.
+        """
+        n, m, change = self.n, self.m, self.change_sec
+        bound = [[[0.0] * (n + 1) for _ in range(m)] for _ in range(n + 1)]
+        start = [[INF] * m for _ in range(n + 1)]
+        start[n] = [0.0] * m
+        for j in range(n - 1, -1, -1):
+            for q in range(m):
+                c = cost[j][q]
+                if c < INF:
+                    start[j][q] = c + bound[j + 1][q][j]
+            best_start = sorted((start[j][q], q) for q in range(m))[:2]
+            for p in range(m):
+                # лучшая серия другого пилота
+                other = best_start[0][0] if best_start[0][1] != p else (
+                    best_start[1][0] if len(best_start) > 1 else INF)
+                row = bound[j][p]
+                c = cost[j][p]
+                for s in range(j):
+                    value = other + change
+                    if c < INF and self.drive[p][j + 1] - self.drive[p][s] <= self.max_continuous:
+                        value = min(value, c + bound[j + 1][p][s])
+                    row[s] = value
+        return bound, start
+
+    def _series_path(self, cost, bound, start) -> Optional[List[int]]:
+        """Расстановка, на которой достигается минимум _series_dp из начала гонки."""
+        p = min(range(self.m), key=start[0].__getitem__)
+        if start[0][p] == INF:
+            return None
+        path, s = [p], 0
+        for j in range(1, self.n):
+            c = cost[j][p]
+            if (c < INF and self.drive[p][j + 1] - self.drive[p][s] <= self.max_continuous
+                    and c + bound[j + 1][p][s] <= bound[j][p][s] + 1e-9):
+                path.append(p)
+                continue
+            p = min((q for q in range(self.m) if q != p), key=start[j].__getitem__, default=p)
+            path.append(p)
+            s = j
+        return path
+
+    def _build_run_bound(self):
+        """run_bound по настоящим стоимостям; lag_bound — пока он же (см. tune_multipliers)."""
+        self.run_bound, self.start_bound = self._series_dp(self.cost)
+        self.lam = [0.0] * self.m
+        self.mu = [0.0] * self.m
+        self.lag_bound, self.lag_start = self.run_bound, self.start_bound
+
+    def tune_multipliers(self, upper: float, iterations: int = 40):
+        """
+        lag_bound — _series_dp, где стинт пилота p стоит cost * (1 - lam[p]) + mu[p]:
+        mu — цена стинта за лимит max_stints_per_pilot, lam — скидка за время
+        в счёт min_drive_sec. Для любых lam, mu >= 0
+            lag_bound + sum(lam * (min - total)) - sum(mu * (limit - count))
+        не больше настоящего остатка. Множители подбираются субградиентом
+        по корню дерева с шагом Поляка до верхней оценки upper (без пит-стопов).
+        """
+        n, m = self.n, self.m
+        if n == 0 or (self.min_total <= 0 and self.max_stints >= n):
+            return
+        # lam в «стинтах», чтобы шаг был соизмерим с mu
+        scale = sum(min(r) for r in self.cost if min(r) < INF) / n
+        lam, mu = [0.0] * m, [0.0] * m
+        best_value = min(self.start_bound[0])
+        theta, stale = 1.0, 0
+        for _ in range(iterations):
+            cost = [[c * (1.0 - lam[p]) + mu[p] if c < INF else INF for p, c in enumerate(row)]
+                    for row in self.cost]
+            bound, start = self._series_dp(cost)
+            value = min(start[0]) + sum(lam) * self.min_total - sum(mu) * self.max_stints
+            if value > best_value + 1e-9:
+                best_value, stale = value, 0
+                self.lam, self.mu = list(lam), list(mu)
+                self.lag_bound, self.lag_start = bound, start
+            else:
+                stale += 1
+                if stale >= 5:
+                    theta, stale = theta / 2, 0
+            path = self._series_path(cost, bound, start)
+            if path is None or upper <= value:
+                break
+            driven = [0.0] * m
+            used = [0] * m
+            for j, p in enumerate(path):
+                driven[p] += self.cost[j][p]
+                used[p] += 1
+            g_lam = [(self.min_total - driven[p]) / scale if self.min_total > 0 else 0.0
+                     for p in range(m)]
+            g_mu = [used[p] - self.max_stints if self.max_stints < n else 0
+                    for p in range(m)]
+            norm = sum(g * g for g in g_lam) + sum(g * g for g in g_mu)
+            if norm == 0:
+                break
+            t = theta * (upper - value) / norm
+            for p in range(m):
+                lam[p] = min(max(lam[p] + t * g_lam[p] / scale, 0.0), 0.9)
+                mu[p] = max(mu[p] + t * g_mu[p], 0.0)
+
+    def _fewest_laps(self) -> List[np.ndarray]:
+        """
+        fewest[j][k, r] — меньше всего кругов в k стинтах из j..n-1, если они
+        лежат не более чем r сериями подряд; столбец _WINDOWS — без ограничения
+        серий (k самых коротких стинтов хвоста).
+        """
+        n, width = self.n, _WINDOWS + 1
+        laps = np.array(self.laps, dtype=np.float64)
+        cum = np.concatenate(([0.0], np.cumsum(laps)))
+        tables: List[Optional[np.ndarray]] = [None] * (n + 1)
+        tables[n] = np.full((n + 1, width), INF)
+        tables[n][0] = 0.0
+        for pos in range(n - 1, -1, -1):
+            # стинт pos пропущен или с него начинается серия из length стинтов
+            table = tables[pos + 1].copy()
+            for length in range(1, n - pos + 1):
+                run = tables[pos + length][:n + 1 - length, :-1] + (cum[pos + length] - cum[pos])
+                np.minimum(table[length:, 1:], run, out=table[length:, 1:])
+            tables[pos] = table
+        fewest = []
+        for j in range(n + 1):
+            table = tables[j][:n - j + 1].copy()
+            table[:, _WINDOWS] = np.concatenate(([0.0], np.cumsum(np.sort(laps[j:]))))
+            table[table == INF] = 0.0       # состояния, в которые ДП не попадает
+            fewest.append(table)
+        return fewest
+
+    def _step(self, left: int, lo: int, hi: int, free: int, change: float):
+        """
+        Шаг ДП _count_bound: индексы (стинтов, серий) -> (+c стинтов, +w серий)
+        и цена смен шага (INF — так не разложить). Считается раз на набор входов.
+        """
+        key = (left, lo, hi, free, change)
+        got = self._steps.get(key)
+        if got is None:
+            width = _WINDOWS + 1
+            k = np.arange(left + 1)[:, None, None, None] - np.arange(lo, hi + 1)[None, None, :, None]
+            r = np.arange(width)[None, :, None, None]
+            w = np.arange(width)[None, None, None, :]
+            # в последний столбец попадают все, у кого серий _WINDOWS и больше
+            col = np.where(r < _WINDOWS, r - w, width + _WINDOWS - w)
+            changes = self._run_changes(lo, hi, free)
+            finite = changes < INF
+            cost = np.where(finite, np.where(finite, changes, 0.0) * change, INF)   # без inf * 0
+            extra = np.where((k < 0) | (col < 0), INF, cost[None, None])
+            # индекс в развёрнутом [dp | at_least] шириной 2 * width
+            flat = np.maximum(k, 0) * (2 * width) + np.maximum(col, 0)
+            shape = (left + 1, width, -1)
+            got = self._steps[key] = (flat.reshape(shape), extra.reshape(shape))
+        return got
+
+    def _run_changes(self, lo: int, hi: int, free: int) -> np.ndarray:
+        """
+        Смен на c стинтов пилота в w сериях (c = lo..hi, w = 0.._WINDOWS, последний
+        столбец — _WINDOWS серий и больше); INF — так не разложить. Серия не
+        длиннее max_run; первая может продолжать текущую ещё на free стинтов без смены.
+        """
+        c = np.arange(lo, hi + 1)[:, None]
+        w = np.arange(_WINDOWS + 1)[None, :]
+        variants = [(-(-c // self.max_run), 0)]
+        if free > 0:
+            variants.append((1 + -(-np.maximum(c - free, 0) // self.max_run), 1))
+        changes = np.full((len(c), _WINDOWS + 1), INF)
+        for need, saved in variants:
+            runs = np.where(w < _WINDOWS, w, np.maximum(need, _WINDOWS))
+            ok = (runs >= 1) & (runs >= need) & (runs <= c)
+            changes = np.minimum(changes, np.where(ok, runs - saved, INF))
+        if lo == 0:
+            changes[0, 0] = 0.0
+        return changes
+
+    def _count_bound(self, j: int, cur: int, carry: int, counts: List[int],
+                     owed: List[int], pace: List[float], change: Optional[float] = None) -> float:
+        """
+        Сколько стинтов и серий достанется каждому пилоту — ДП по пилотам от
+        медленного к быстрому в порядке pace. Время за рулём по кругам —
+        сумма (темп k-го - темп (k+1)-го с конца) * круги k самых медленных,
+        а круги самых медленных не меньше fewest[j][их стинтов, их серий]:
+        стинты одной серии идут подряд. Каждая серия стоит смены, кроме
+        продолжения текущей на carry стинтов; серия не длиннее max_run.
+        Порядок серий разных пилотов не учитывается — это нижняя оценка.
+        change — цена смены вместо race.driver_change_sec.
+        """
+        left = self.n - j
+        fewest = self.fewest[j]
+        change = self.change_sec if change is None else change
+        dp = np.full((left + 1, _WINDOWS + 1), INF)
+        dp[0, 0] = 0.0
+        order = sorted(range(self.m), key=pace.__getitem__)
+        for rank in range(self.m - 1, -1, -1):
+            p = order[rank]
+            lo = owed[p]
+            hi = min(self.max_stints - counts[p], left)
+            if hi < lo:
+                return INF
+            flat, extra = self._step(left, lo, hi, carry if p == cur else 0, change)
+            # «не меньше r серий»: минимум по столбцам справа
+            at_least = np.minimum.accumulate(dp[:, ::-1], axis=1)[:, ::-1]
+            dp = np.minimum.reduce(np.concatenate((dp, at_least), axis=1).take(flat) + extra, axis=2)
+            step = pace[p] - (pace[order[rank - 1]] if rank > 0 else 0.0)
+            if step:
+                dp += step * fewest
+        return float(dp[left].min()) - (change if j == 0 else 0.0)   # первый стинт без смены
+
+    def bound(self, j: int, cur: int, run_start: int,
+              totals: List[float], counts: List[int], limit: float = INF) -> float:
+        """
+        Нижняя оценка остатка начиная со стинта j или INF, если ограничения уже не выполнить.
+        Дорогие оценки не считаются, если дешёвые уже дошли до limit.
+        Максимум из пяти оценок:
+          - точный ДП по сериям без учёта суммарных ограничений (run_bound);
+          - он же с лагранжевыми множителями за суммарные ограничения (lag_bound);
+          - _count_bound по настоящему темпу (лимит стинтов, минимум стинтов
+            недобравших, смены по числу серий, серии идут подряд);
+          - _count_bound без цены смен плюс обязательные смены: на стыках,
+            которые не проехать подряд даже в темпе самого быстрого;
+          - он же с лагранжевой поправкой на минимум времени: недобравший
+            пилот считается едущим темпом самого быстрого, а разница за
+            недобранное время добавляется отдельно.
+        """
+        left = self.n - j
+        if left == 0:
+            return 0.0
+        owed = [0] * self.m
+        required = 0
+        deficit_cost = 0.0
+        relaxed_pace = list(self.lap_time)
+        for p in range(self.m):
+            need = self.min_total - totals[p]
+            if need > 1e-9:
+                # стинтов, без которых пилоту не добрать минимум даже на самых длинных
+                owed[p] = int(-(-need // (self.tail_max_laps[j] * self.lap_time[p])))
+                if counts[p] + owed[p] > self.max_stints:
+                    return INF
+                required += owed[p]
+                deficit_cost += need * self.slow_share[p]
+                relaxed_pace[p] = self.lt_min
+        if required > left:
+            return INF
+
+        value = self.run_bound[j][cur][run_start] if j > 0 else min(self.start_bound[0])
+        if self.lag_bound is not self.run_bound:
+            lag = self.lag_bound[j][cur][run_start] if j > 0 else min(self.lag_start[0])
+            for p in range(self.m):
+                lag += self.lam[p] * (self.min_total - totals[p])
+                lag -= self.mu[p] * (self.max_stints - counts[p])
+            value = max(value, lag)
+        if value >= limit:
+            return value
+
+        carry = max(self.max_run - (j - run_start), 0) if j > 0 else 0
+        value = max(value, self._count_bound(j, cur, carry, counts, owed, self.lap_time))
+        if value >= limit:
+            return value
+        forced = self.forced[j]
+        if j > 0 and (self.cost[j][cur] == INF or counts[cur] >= self.max_stints
+                      or self.drive[cur][j + 1] - self.drive[cur][run_start] > self.max_continuous):
+            forced += 1
+        if forced and self.change_sec > 0:
+            laps_only = self._count_bound(j, cur, carry, counts, owed, self.lap_time, change=0.0)
+            value = max(value, laps_only + forced * self.change_sec)
+            if value >= limit:
+                return value
+        if deficit_cost > 0:
+            relaxed = self._count_bound(j, cur, carry, counts, owed, relaxed_pace) + deficit_cost
+            value = max(value, relaxed)
+        return value
+
+
+def _greedy(prob: _Problem, shortest: bool = False) -> Optional[List[int]]:
+    """
+    Начальная расстановка для верхней оценки: на каждый стинт самый дешёвый
+    допустимый пилот, но если стинтов впритык на недобор минимального
+    времени — только из недобравших (сначала у кого недобор больше).
+    Недобор в стинтах считается по средней длине стинта, а при shortest —
+    по самому короткому из оставшихся: раньше переходит к недобравшим и
+    находит допустимую расстановку, когда короткие стинты в конце плана.
+    """
+    totals = [0.0] * prob.m
+    counts = [0] * prob.m
+    assign: List[int] = []
+    cur, run_start = -1, 0
+    avg_laps = prob.suffix_laps[0] / max(prob.n, 1)
+    for j in range(prob.n):
+        laps = min(prob.laps[j:]) if shortest else avg_laps
+        owed = [max(-(-(prob.min_total - totals[p]) // (laps * prob.lap_time[p])), 0)
+                for p in range(prob.m)]
+        forced = sum(owed) >= prob.n - j
+        best, best_key = -1, None
+        for p in range(prob.m):
+            c = prob.cost[j][p]
+            if c == INF or counts[p] >= prob.max_stints:
+                continue
+            if forced and owed[p] <= 0:
+                continue
+            start = run_start if p == cur else j
+            if prob.drive[p][j + 1] - prob.drive[p][start] > prob.max_continuous:
+                continue
+            step = c + (prob.change_sec if (j > 0 and p != cur) else 0.0)
+            key = (-owed[p], step) if forced else (step,)
+            if best_key is None or key < best_key:
+                best, best_key = p, key
+        if best < 0:
+            return None
+        run_start = run_start if best == cur else j
+        totals[best] += prob.cost[j][best]
+        counts[best] += 1
+        assign.append(best)
+        cur = best
+    if any(t < prob.min_total - 1e-9 for t in totals):
+        return None
+    return assign
+
+
+def _assignment_cost(prob: _Problem, assign: Sequence[int]) -> float:
+    total = prob.pit_sec
+    for j, p in enumerate(assign):
+        total += prob.cost[j][p]
+        if j > 0 and p != assign[j - 1]:
+            total += prob.change_sec
+    return total
+
+
+def _check(prob: _Problem, assign: Sequence[int]) -> bool:
+    totals = [0.0] * prob.m
+    counts = [0] * prob.m
+    cont = 0.0
+    for j, p in enumerate(assign):
+        c = prob.cost[j][p]
+        if c == INF:
+            return False
+        cont = cont + c if j > 0 and p == assign[j - 1] else c
+        if cont > prob.max_continuous:
+            return False
+        totals[p] += c
+        counts[p] += 1
+    return all(t >= prob.min_total - 1e-9 for t in totals) and max(counts) <= prob.max_stints
+
+
+def optimize_rotation(
+    race: RaceParams,
+    pilots: Sequence[Pilot],
+    stints: Sequence[Stint],
+    mode: ConsumptionMode,
+    max_nodes: int = DEFAULT_MAX_NODES,
+    time_limit_sec: Optional[float] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    prefix: Sequence[int] = (),
+    tune_iterations: int = 40,
+) -> Optional[RotationResult]:
+    """
+    Ветви и границы по стинтам: кто едет каждый стинт заданного плана
+    (круги и комплекты не меняются), чтобы минимизировать время гонки
+    с учётом смен пилота. Ограничения берутся из race: max_continuous_sec
+    (подряд за рулём), min_drive_sec (минимум на пилота), max_stints_per_pilot;
+    0 — без ограничения. Пилоту нельзя дать стинт длиннее его eco-бака.
+    prefix — индексы пилотов первых стинтов, которые не перебираются;
+    tune_iterations — шагов подбора лагранжевых множителей (0 — без них).
+    None — допустимой расстановки нет (или она не найдена до остановки).
+    """
+    if not stints or not pilots:
+        return None
+    prob = _Problem(race, pilots, stints, mode)
+
+    best_assign: Optional[List[int]] = None
+    best_cost = INF
+    starts = [_greedy(prob), _greedy(prob, shortest=True)]
+    # текущая расстановка плана — тоже кандидат
+    index = {p.name: i for i, p in enumerate(pilots)}
+    if all(s.pilot in index for s in stints):
+        starts.append([index[s.pilot] for s in stints])
+    prefix = list(prefix)
+    for assign in starts:
+        if assign is not None and assign[:len(prefix)] == prefix and _check(prob, assign):
+            cost = _assignment_cost(prob, assign)
+            if cost < best_cost:
+                best_assign, best_cost = list(assign), cost
+    if best_cost < INF:
+        prob.tune_multipliers(best_cost - prob.pit_sec, iterations=tune_iterations)
+
+    totals = [0.0] * prob.m
+    counts = [0] * prob.m
+    path = [0] * prob.n
+    nodes = 0
+    stopped = False
+    deadline = time.perf_counter() + time_limit_sec if time_limit_sec else None
+    # лучшее acc для состояния: одинаковые счётчики при разном порядке пилотов
+    # дают одинаковый остаток перебора
+    memo = {}
+
+    def dfs(j: int, cur: int, run_start: int, acc: float):
+        nonlocal best_assign, best_cost, nodes, stopped
+        if j == prob.n:
+            if acc < best_cost and all(t >= prob.min_total - 1e-9 for t in totals):
+                best_assign, best_cost = list(path), acc
+            return
+        nodes += 1
+        if nodes > max_nodes:
+            stopped = True
+            return
+        if nodes & 255 == 0 and (
+                (deadline is not None and time.perf_counter() > deadline)
+                or (should_stop is not None and should_stop())):
+            stopped = True
+            return
+        limit = best_cost - 1e-9 - acc
+        if prob.bound(j, cur, run_start, totals, counts, limit) >= limit:
+            return
+        if j > 0:
+            state = (j, cur, prob.drive[cur][j] - prob.drive[cur][run_start],
+                     tuple(min(t, prob.min_total) for t in totals), tuple(counts))
+            seen_acc = memo.get(state)
+            if seen_acc is not None and seen_acc <= acc + 1e-9:
+                return
+            memo[state] = acc
+
+        row = prob.cost[j]
+        children = []
+        seen = set()
+        for p in range(prob.m):
+            c = row[p]
+            if c == INF or counts[p] >= prob.max_stints or (j < len(prefix) and p != prefix[j]):
+                continue
+            if p == cur:
+                if prob.drive[p][j + 1] - prob.drive[p][run_start] > prob.max_continuous:
+                    continue
+                start, step = run_start, c
+            else:
+                sig = (prob.pilot_class[p], totals[p], counts[p])
+                if sig in seen:
+                    continue
+                seen.add(sig)
+                start, step = j, c + (prob.change_sec if j > 0 else 0.0)
+            # порядок обхода — по лагранжевой оценке остатка, чтобы рано находились
+            # хорошие и допустимые по суммарным ограничениям планы
+            estimate = step + prob.lag_bound[j + 1][p][start] - prob.lam[p] * c + prob.mu[p]
+            children.append((estimate, p, start, step))
+        children.sort()
+
+        for _, p, start, step in children:
+            path[j] = p
+            totals[p] += row[p]
+            counts[p] += 1
+            dfs(j + 1, p, start, acc + step)
+            totals[p] -= row[p]
+            counts[p] -= 1
+            if stopped:
+                return
+
+    dfs(0, -1, 0, prob.pit_sec)
+
+    if best_assign is None:
+        return None
+    result: List[Stint] = []
+    for s, p in zip(stints, best_assign):
+        pilot = pilots[p]
+        eco = s.laps > _calc_stint_length_push(race, pilot, mode)
+        result.append(Stint(
+            pilot=pilot.name,
+            laps=s.laps,
+            fuel_start=_stint_fuel_start(race, pilot, mode, s.laps, eco),
+            tyre_set=s.tyre_set,
+            eco=eco,
+        ))
+    count("rotation.nodes", nodes)
+    return RotationResult(stints=result, total_sec=best_cost, optimal=not stopped, nodes=nodes)
+
+
+def _common_range_tuples(pilot_tuples) -> list:
+    """Пилоты с одинаковым для всех (худшим) расходом — стинт по силам каждому."""
+    if not pilot_tuples:
+        return []
+    fuel_push = max(t[2] for t in pilot_tuples)
+    fuel_eco = max(t[3] for t in pilot_tuples)
+    laps_push = min(t[4] for t in pilot_tuples)
+    laps_eco = min(t[5] for t in pilot_tuples)
+    return [(t[0], t[1], fuel_push, fuel_eco, laps_push, laps_eco) for t in pilot_tuples]
+
+
+@traced("planner.rotation")
+def plan_stints_rotation(
+    race: RaceParams,
+    tyre: TyreParams,
+    pilot_tuples,
+    mode: ConsumptionMode,
+    total_laps: Optional[int] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> List[Stint]:
+    """
+    Без ограничений регламента — план plan_stints_optimal как есть. Иначе
+    круги и комплекты — plan_stints_optimal по дальности самих пилотов и по
+    худшему расходу среди них (любой стинт по силам каждому), пилоты на
+    обоих — optimize_rotation с ограничениями из race; берётся лучший.
+    Возвращает RotationPlan: если перебор хоть раз остановлен по лимиту,
+    optimal=False.
+    """
+    if race.max_continuous_sec <= 0 and race.min_drive_sec <= 0 and race.max_stints_per_pilot <= 0:
+        return RotationPlan(plan_stints_optimal(race, tyre, pilot_tuples, mode,
+                                                total_laps=total_laps))
+    pilots = _build_pilots(pilot_tuples)
+    best: Optional[RotationResult] = None
+    optimal, nodes = True, 0
+    for tuples in (pilot_tuples, _common_range_tuples(pilot_tuples)):
+        stints = plan_stints_optimal(race, tyre, tuples, mode, total_laps=total_laps)
+        if not stints:
+            return stints
+        rotation = optimize_rotation(race, pilots, stints, mode, should_stop=should_stop)
+        if rotation is None:
+            continue
+        optimal, nodes = optimal and rotation.optimal, nodes + rotation.nodes
+        if best is None or rotation.total_sec < best.total_sec - 1e-9:
+            best = rotation
+    if best is None:
+        raise ValueError("Не найдена расстановка пилотов под ограничения регламента")
+    return RotationPlan(best.stints, optimal, nodes)
+
+
+def repair_rotation(
+    race: RaceParams,
+    tyre: TyreParams,
+    pilot_tuples,
+    mode: ConsumptionMode,
+    previous: Sequence[Stint],
+    changed: Sequence[str],
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> Optional[RotationPlan]:
+    """
+    Быстрый план после правки пилотов changed (время круга): круги и комплекты
+    previous и пилоты до первого стинта правленых остаются, перебираются
+    только пилоты хвоста, до REPAIR_MAX_NODES узлов. План допустимый, но
+    не лучший по построению — optimal=False; None — хвост не расставить.
+    """
+    pilots = _build_pilots(pilot_tuples)
+    index = {p.name: i for i, p in enumerate(pilots)}
+    if not previous or any(s.pilot not in index for s in previous):
+        return None
+    first = next((j for j, s in enumerate(previous) if s.pilot in changed), len(previous))
+    # множители окупаются на долгом переборе, а здесь он короткий
+    rotation = optimize_rotation(race, pilots, previous, mode, max_nodes=REPAIR_MAX_NODES,
+                                 should_stop=should_stop, tune_iterations=0,
+                                 prefix=[index[s.pilot] for s in previous[:first]])
+    if rotation is None:
+        return None
+    return RotationPlan(rotation.stints, False, rotation.nodes)
@@ -0,0 +1,167 @@
+import csv
+import json
+from dataclasses import dataclass, asdict
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from engine import simple_inputs
+from lap_profile import LapProfile, normalize_profile, parse_profile
+from model import RaceParams, TyreParams, ConsumptionMode, Pilot
+from strategy_core import PilotSimple, RaceSimple, TyreSimple
+
+
+PilotTuple = Tuple[str, float, float, float, float, float]
+
+# поля пилота в строке CSV: name|lap_time_sec|fuel_push|fuel_eco|laps_push|laps_eco
+CSV_PILOT_SEP = ";"
+CSV_FIELD_SEP = "|"
+
+
+@dataclass
+class Scenario:
+    """Входные данные одного расчёта — то же, что собирает окно."""
+    id: str
+    race: RaceParams
+    tyre: TyreParams
+    pilot_tuples: List[PilotTuple]
+    mode: ConsumptionMode
+
+
+def _avg_lap(pilot_tuples: List[PilotTuple]) -> float:
+    # как MainWindow._read_pilots: среднее по времени круга пилотов
+    lap_times = [p[1] for p in pilot_tuples]
+    return sum(lap_times) / len(lap_times) if lap_times else 0.0
+
+
+def _pilot_tuple(p) -> PilotTuple:
+    if isinstance(p, dict):
+        return (
+            str(p["name"]),
+            float(p["lap_time_sec"]),
+            float(p.get("fuel_push", 0.0)),
+            float(p.get("fuel_eco", 0.0)),
+            float(p.get("laps_per_tank_push", 0.0)),
+            float(p.get("laps_per_tank_eco", 0.0)),
+        )
+    name, lap, fp, fe, lp, le = p
+    return str(name), float(lap), float(fp), float(fe), float(lp), float(le)
+
+
+def _lap_profile(value) -> LapProfile:
+    # JSON — список пар [сек, прибавка], CSV — строка «ч:мм ±сек; ...»
+    if not value:
+        return ()
+    if isinstance(value, str):
+        return parse_profile(value)
+    return normalize_profile(value)
+
+
+def scenario_from_dict(d: dict, default_id: str = "") -> Scenario:
+    """
+    {"id": ..., "race": {поля RaceParams, avg_lap_sec можно не указывать},
+     "tyre": {"sets": N, "compound": ""}, "pilots": [[name, lap, fp, fe, lp, le] | {...}],
+     "by_fuel_per_lap": bool}
+    """
+    pilot_tuples = [_pilot_tuple(p) for p in d.get("pilots", [])]
+    r = d["race"]
+    avg_lap = r.get("avg_lap_sec")
+    race = RaceParams(
+        duration_hours=float(r["duration_hours"]),
+        avg_lap_sec=float(avg_lap) if avg_lap is not None else _avg_lap(pilot_tuples),
+        tank_liters=float(r["tank_liters"]),
+        pit_refuel_sec=float(r["pit_refuel_sec"]),
+        pit_tyre_sec=float(r["pit_tyre_sec"]),
+        driver_change_sec=float(r["driver_change_sec"]),
+        max_continuous_sec=float(r.get("max_continuous_sec") or 0.0),
+        min_drive_sec=float(r.get("min_drive_sec") or 0.0),
+        max_stints_per_pilot=int(r.get("max_stints_per_pilot") or 0),
+        fuel_sec_per_liter=float(r.get("fuel_sec_per_liter") or 0.0),
+        eco_lap_loss_sec=float(r.get("eco_lap_loss_sec") or 0.0),
+        lap_profile=_lap_profile(r.get("lap_profile")),
+    )
+    t = d.get("tyre", {})
+    tyre = TyreParams(sets=int(t.get("sets", 1)), compound=str(t.get("compound") or ""))
+    mode = ConsumptionMode(by_fuel_per_lap=bool(d.get("by_fuel_per_lap", False)))
+    return Scenario(
+        id=str(d.get("id", default_id)),
+        race=race,
+        tyre=tyre,
+        pilot_tuples=pilot_tuples,
+        mode=mode,
+    )
+
+
+def scenario_to_dict(s: Scenario) -> dict:
+    return {
+        "id": s.id,
+        "race": asdict(s.race),
+        "tyre": asdict(s.tyre),
+        "pilots": [list(p) for p in s.pilot_tuples],
+        "by_fuel_per_lap": s.mode.by_fuel_per_lap,
+    }
+
+
+def _parse_bool(text: str) -> bool:
+    return text.strip().lower() in ("1", "true", "yes", "y", "да")
+
+
+def _scenario_from_csv_row(row: dict, default_id: str) -> Scenario:
+    pilots = []
+    for chunk in (row.get("pilots") or "").split(CSV_PILOT_SEP):
+        if chunk.strip():
+            pilots.append(chunk.split(CSV_FIELD_SEP))
+    avg_lap = (row.get("avg_lap_sec") or "").strip()
+    return scenario_from_dict(
+        {
+            "id": row.get("id") or default_id,
+            "race": {
+                "duration_hours": row["duration_hours"],
+                "avg_lap_sec": avg_lap or None,
+                "tank_liters": row["tank_liters"],
+                "pit_refuel_sec": row["pit_refuel_sec"],
+                "pit_tyre_sec": row["pit_tyre_sec"],
+                "driver_change_sec": row["driver_change_sec"],
+                "max_continuous_sec": row.get("max_continuous_sec"),
+                "min_drive_sec": row.get("min_drive_sec"),
+                "max_stints_per_pilot": row.get("max_stints_per_pilot"),
+                "fuel_sec_per_liter": row.get("fuel_sec_per_liter"),
+                "eco_lap_loss_sec": row.get("eco_lap_loss_sec"),
+                "lap_profile": row.get("lap_profile"),
+            },
+            "tyre": {"sets": row.get("tyre_sets") or 1, "compound": row.get("tyre_compound")},
+            "pilots": pilots,
+            "by_fuel_per_lap": _parse_bool(row.get("by_fuel_per_lap") or ""),
+        },
+        default_id,
+    )
+
+
+def iter_jsonl(lines: Iterable[str]) -> Iterator[Tuple[int, Optional[Scenario], Optional[str]]]:
+    """
+    Построчно: (номер строки, сценарий, ошибка). Пустые строки пропускаются,
+    битая строка не останавливает поток.
+    """
+    for n, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield n, scenario_from_dict(json.loads(line), default_id=str(n)), None
+        except (ValueError, KeyError, TypeError) as e:
+            yield n, None, f"{type(e).__name__}: {e}"
+
+
+def iter_csv(lines: Iterable[str]) -> Iterator[Tuple[int, Optional[Scenario], Optional[str]]]:
+    """Как iter_jsonl, но из CSV с заголовком (номер — строка данных, с 1)."""
+    for n, row in enumerate(csv.DictReader(lines), 1):
+        try:
+            yield n, _scenario_from_csv_row(row, default_id=str(n)), None
+        except (ValueError, KeyError, TypeError) as e:
+            yield n, None, f"{type(e).__name__}: {e}"
+
+
+def to_simple(s: Scenario) -> Tuple[RaceSimple, TyreSimple, List[PilotSimple], List[Pilot]]:
+    """
+    Перевод в типы strategy_core: общее число кругов и кругов на баке
+    считаются так же, как в model.py (engine.simple_inputs).
+    """
+    return simple_inputs(s.race, s.tyre, s.pilot_tuples, s.mode)
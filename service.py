@@ -0,0 +1,301 @@
+"""
+Локальный HTTP/JSON-сервис расчёта стратегии для ноутбуков пит-уолла и скриптов.
+
+    python service.py --port 8780 --workers 4
+    curl -s localhost:8780/plan -d '{"engine": "optimal", "scenario": {...}}'
+
+Запросы (тело и ответы — JSON, сценарий — как строка cli.py / scenario_from_dict):
+    GET  /health            живой ли сервис, процессов в пуле
+    GET  /planners          движки: планировщики реестра engine.py, "model", "compare"
+    GET  /stats             счётчики: запросы, расчёты, склеенные, отказы, в работе
+    POST /plan              {"engine": имя, "scenario": {...}} -> запись как у cli.py
+    POST /evaluate          {"scenario": {...}, "stints": [...]} -> время гонки плана
+
+Расчёты идут в пуле процессов, который поднимается при старте и прогревается,
+цикл asyncio только разбирает HTTP. Одинаковые входы, пока расчёт не закончен,
+склеиваются: второй запрос ждёт тот же future, а не занимает процесс
+(id сценария в ключ не входит). Если расчётов в работе больше max_pending,
+новый запрос сразу получает 503 с Retry-After — очередь не растёт без предела.
+Нагрузочный клиент — loadgen.py.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, replace
+from typing import Dict, Optional, Tuple
+
+from cli import ENGINES
+from engine import PLANNERS
+from model import Stint, _build_pilots
+from scenario import scenario_from_dict, scenario_to_dict
+from tyres import race_time_sec
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8780
+DEFAULT_PENDING_PER_WORKER = 8      # расчётов в работе на процесс до отказов 503
+MAX_BODY_BYTES = 4 * 1024 * 1024
+RETRY_AFTER_SEC = 1
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class RequestError(Exception):
+    """Ошибка запроса с HTTP-статусом; сообщение уходит клиенту в {"error": ...}."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# ---------- Работа в процессах пула ----------
+
+def _warm() -> int:
+    # первый вызов в процессе: импорты и таблицы модулей уже на месте
+    return os.getpid()
+
+
+def _plan(engine: str, scenario: dict) -> dict:
+    s = scenario_from_dict(scenario)
+    try:
+        return ENGINES[engine](s)
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+def _evaluate(scenario: dict, stints: list) -> dict:
+    s = scenario_from_dict(scenario)
+    plan = [Stint(**st) for st in stints]
+    return {"total_time_sec": race_time_sec(s.race, s.tyre, _build_pilots(s.pilot_tuples), plan, s.mode)}
+
+
+# ---------- Сервис ----------
+
+@dataclass
+class ServiceStats:
+    requests: int = 0
+    computed: int = 0           # расчётов отправлено в пул
+    coalesced: int = 0          # запросов, которые дождались чужого расчёта
+    rejected: int = 0           # отказов 503 из-за перегрузки
+    errors: int = 0             # ответов 4xx/5xx, кроме 503
+    in_flight: int = 0          # расчётов в работе сейчас
+
+
+class StrategyService:
+    """Пул процессов, склейка одинаковых запросов и предел расчётов в работе."""
+
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * DEFAULT_PENDING_PER_WORKER
+        self.stats = ServiceStats()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._started = time.monotonic()
+
+    async def start(self):
+        """Поднимает пул и ждёт, пока каждый процесс выполнит задачу."""
+        self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self._pool, _warm) for _ in range(self.workers)])
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    async def _submit(self, key: str, func, *args) -> dict:
+        fut = self._pending.get(key)
+        if fut is not None:
+            self.stats.coalesced += 1
+            return await asyncio.shield(fut)
+        if len(self._pending) >= self.max_pending:
+            self.stats.rejected += 1
+            raise RequestError(503, "Сервис перегружен, повторите позже")
+        loop = asyncio.get_running_loop()
+        fut = loop.run_in_executor(self._pool, func, *args)
+        self._pending[key] = fut
+        self.stats.computed += 1
+        self.stats.in_flight = len(self._pending)
+        try:
+            return await asyncio.shield(fut)
+        finally:
+            # ключ живёт, пока идёт расчёт: следующий такой же запрос — уже новый расчёт
+            if self._pending.get(key) is fut:
+                del self._pending[key]
+            self.stats.in_flight = len(self._pending)
+
+    @staticmethod
+    def _scenario(body: dict) -> Tuple[str, dict]:
+        """(id, нормализованный сценарий без id) — одинаковые входы дают один ключ."""
+        try:
+            s = scenario_from_dict(body["scenario"])
+        except KeyError as e:
+            raise RequestError(400, f"Нет поля {e}") from None
+        except (ValueError, TypeError) as e:
+            raise RequestError(400, f"Неверный сценарий: {e}") from None
+        return s.id, scenario_to_dict(replace(s, id=""))
+
+    @staticmethod
+    def _key(*parts) -> str:
+        payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def handle(self, method: str, path: str, body: Optional[dict]) -> dict:
+        if path == "/health":
+            return {"ok": True, "workers": self.workers,
+                    "uptime_sec": round(time.monotonic() - self._started, 1)}
+        if path == "/planners":
+            engines = [{"name": info.name, "label": info.label} for info in PLANNERS.values()]
+            engines += [{"name": "model", "label": "Быстрый (жадный), прежнее имя"},
+                        {"name": "compare", "label": "Все планировщики рядом"}]
+            return {"engines": engines}
+        if path == "/stats":
+            return dict(asdict(self.stats), max_pending=self.max_pending, workers=self.workers)
+        if path not in ("/plan", "/evaluate"):
+            raise RequestError(404, f"Нет такого пути {path}")
+        if method != "POST":
+            raise RequestError(405, f"{path} принимает только POST")
+        if not isinstance(body, dict):
+            raise RequestError(400, "Тело запроса — JSON-объект")
+
+        scenario_id, scenario = self._scenario(body)
+        if path == "/plan":
+            engine = str(body.get("engine", "optimal"))
+            if engine not in ENGINES:
+                raise RequestError(400, f"Неизвестный движок {engine}")
+            result = await self._submit(self._key("plan", engine, scenario), _plan, engine, scenario)
+            return dict({"id": scenario_id, "engine": engine}, **result)
+
+        stints = body.get("stints")
+        if not isinstance(stints, list):
+            raise RequestError(400, "Нет списка stints")
+        try:
+            stints = [asdict(Stint(**st)) for st in stints]
+        except TypeError as e:
+            raise RequestError(400, f"Неверный стинт: {e}") from None
+        result = await self._submit(self._key("evaluate", scenario, stints), _evaluate, scenario, stints)
+        return dict({"id": scenario_id}, **result)
+
+
+# ---------- HTTP/1.1 поверх asyncio ----------
+
+async def _read_request(reader: asyncio.StreamReader):
+    """(метод, путь, заголовки, тело) или None, если клиент закрыл соединение."""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _version = line.decode("latin-1").split()
+    except ValueError:
+        raise RequestError(400, "Неверная строка запроса") from None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        length = -1
+    if length < 0:
+        # длина тела неизвестна — соединение не продолжить, handle его закроет
+        raise RequestError(400, "Неверный Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise RequestError(413, "Слишком большой запрос")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target.split("?", 1)[0], headers, body
+
+
+def _response(status: int, payload: dict, keep_alive: bool) -> bytes:
+    data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = [
+        f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+        "Content-Type: application/json; charset=utf-8",
+        f"Content-Length: {len(data)}",
+        "Connection: " + ("keep-alive" if keep_alive else "close"),
+    ]
+    if status == 503:
+        head.append(f"Retry-After: {RETRY_AFTER_SEC}")
+    return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + data
+
+
+async def serve(service: StrategyService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                ready: Optional[asyncio.Event] = None):
+    """Принимает соединения до отмены; keep-alive — несколько запросов на соединение."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                keep_alive = False
+                try:
+                    request = await _read_request(reader)
+                    if request is None:
+                        break
+                    method, path, headers, raw = request
+                    keep_alive = headers.get("connection", "").lower() != "close"
+                    service.stats.requests += 1
+                    try:
+                        body = json.loads(raw) if raw else None
+                    except json.JSONDecodeError as e:
+                        raise RequestError(400, f"Неверный JSON: {e}") from None
+                    status, payload = 200, await service.handle(method, path, body)
+                except RequestError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except Exception as e:
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+                if status not in (200, 503):
+                    service.stats.errors += 1
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    if ready is not None:
+        ready.set()
+    async with server:
+        await server.serve_forever()
+
+
+async def run_service(host: str, port: int, workers: Optional[int], max_pending: Optional[int]):
+    service = StrategyService(workers, max_pending)
+    await service.start()
+    print(f"сервис на http://{host}:{port}, процессов: {service.workers}, "
+          f"в работе до {service.max_pending}", file=sys.stderr)
+    try:
+        await serve(service, host, port)
+    finally:
+        service.close()
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Локальный HTTP-сервис расчёта стратегии")
+    ap.add_argument("--host", default=DEFAULT_HOST, help="адрес (по умолчанию только локальный)")
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT)
+    ap.add_argument("--workers", type=int, default=None, help="процессов в пуле (по умолчанию — ядер)")
+    ap.add_argument("--max-pending", type=int, default=None,
+                    help=f"расчётов в работе до отказов 503 (по умолчанию {DEFAULT_PENDING_PER_WORKER} на процесс)")
+    args = ap.parse_args(argv)
+    try:
+        asyncio.run(run_service(args.host, args.port, args.workers, args.max_pending))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,10 @@
+from bisect import bisect_left
 from dataclasses import dataclass
+from itertools import accumulate
 from typing import List, Literal
 
+from model import TyreParams, _assign_tyres
+
 
 Mode = Literal["push", "eco"]
 
@@ -35,38 +39,8 @@ class StintSimple:
 
 
 def _assign_tyres_simple(num_stints: int, tyre: TyreSimple) -> List[int]:
-    """2 стинта на комплект, при нехватке часть комплектов по 3 стинта."""
-    sets = max(tyre.sets, 1)
-    base_capacity = 2 * sets
-
-    if num_stints <= base_capacity:
-        result: List[int] = []
-        tyre_index = 0
-        used_on_current = 0
-        for _ in range(num_stints):
-            result.append(tyre_index)
-            used_on_current += 1
-            if used_on_current == 2:
-                tyre_index = min(tyre_index + 1, sets - 1)
-                used_on_current = 0
-        return result
-
-    extra = num_stints - base_capacity
-    sets_with_3 = min(extra, sets)
-
-    counts = [2] * sets
-    for i in range(sets_with_3):
-        counts[i] += 1
-
-    result: List[int] = []
-    for tyre_index, c in enumerate(counts):
-        for _ in range(c):
-            result.append(tyre_index)
-
-    while len(result) < num_stints:
-        result.append(sets - 1)
-
-    return result[:num_stints]
+    """2 стинта на комплект, при нехватке часть комплектов по 3 стинта (см. model._assign_tyres)."""
+    return _assign_tyres(num_stints, TyreParams(sets=tyre.sets))
 
 
 def build_stints_iterative_with_pilots(
@@ -156,6 +130,84 @@ def build_stints_iterative_with_pilots(
     return stints
 
 
+def _min_stints_all_eco(total_laps: int, set_eco: List[int]) -> int:
+    """
+    Наименьшее N, при котором all-eco на N стинтах (комплекты — по
+    _assign_tyres_simple) покрывает total_laps. Каждый новый стинт добавляет
+    кругов eco пилота своего комплекта: сначала по два на комплект, затем
+    третьи стинты с первого комплекта, дальше — только последний комплект.
+    """
+    gains = [e for e in set_eco for _ in range(2)] + set_eco
+    covered = list(accumulate(gains))
+    if covered[-1] >= total_laps:
+        return bisect_left(covered, total_laps) + 1
+    last = set_eco[-1]
+    return len(gains) + (total_laps - covered[-1] + last - 1) // last
+
+
+def build_stints_closed_form(
+    race: RaceSimple,
+    tyre: TyreSimple,
+    pilots: List[PilotSimple],
+) -> List[StintSimple]:
+    """
+    То же, что build_stints_iterative_with_pilots, но без перебора по одному стинту
+    и с кругами на баке того пилота, который едет стинт:
+      1) N — наименьшее, при котором all-eco на N стинтах покрывает гонку:
+         бинпоиск по накопленной дальности 2-го и 3-го стинта на комплект,
+         сверх неё — деление с округлением вверх (_min_stints_all_eco);
+      2) если хватает all-push — eco не нужен;
+      3) иначе в eco переводим стинты с наибольшим приростом кругов
+         (при равном — более ранние), их число — первый индекс, где
+         префиксная сумма приростов закрывает недостачу;
+      4) лишние круги срезаем с конца (стинт не короче 1 круга);
+         eco-стинт, укоротившийся до push-длины, снова push.
+    """
+    if not pilots:
+        return []
+    for p in pilots:
+        if p.laps_push <= 0 or p.laps_eco < p.laps_push:
+            raise ValueError("Некорректные параметры стинта")
+
+    total_laps = race.total_laps
+    if total_laps <= 0:
+        return []
+
+    sets = max(tyre.sets, 1)
+    set_to_pilot = [pilots[t % len(pilots)] for t in range(sets)]
+    n = _min_stints_all_eco(total_laps, [p.laps_eco for p in set_to_pilot])
+    tyre_indices = _assign_tyres_simple(n, tyre)
+    assigned = [set_to_pilot[t] for t in tyre_indices]
+
+    laps = [p.laps_push for p in assigned]
+    modes: List[Mode] = ["push"] * n
+    deficit = total_laps - sum(laps)
+    if deficit > 0:
+        order = sorted(range(n), key=lambda i: (assigned[i].laps_push - assigned[i].laps_eco, i))
+        gained = 0
+        for i in order:
+            laps[i] = assigned[i].laps_eco
+            modes[i] = "eco"
+            gained += laps[i] - assigned[i].laps_push
+            if gained >= deficit:
+                break
+
+    extra = sum(laps) - total_laps
+    i = n - 1
+    while extra > 0 and i >= 0:
+        cut = min(extra, laps[i] - 1)
+        laps[i] -= cut
+        extra -= cut
+        if modes[i] == "eco" and laps[i] <= assigned[i].laps_push:
+            modes[i] = "push"
+        i -= 1
+
+    return [
+        StintSimple(pilot=p.name, laps=l, tyre_set=t + 1, mode=m)
+        for p, l, t, m in zip(assigned, laps, tyre_indices, modes)
+    ]
+
+
 if __name__ == "__main__":
     # Пример, похожий на твой кейс
     pilots = [
@@ -172,7 +224,8 @@ if __name__ == "__main__":
     )
     tyre = TyreSimple(sets=4)
 
-    stints = build_stints_iterative_with_pilots(race, tyre, pilots)
-    print("стинтов:", len(stints), "кругов:", sum(s.laps for s in stints))
-    for i, s in enumerate(stints, 1):
-        print(i, s.pilot, s.mode, s.laps, "кругов, комплект", s.tyre_set)
+    for build in (build_stints_iterative_with_pilots, build_stints_closed_form):
+        stints = build(race, tyre, pilots)
+        print(build.__name__, "стинтов:", len(stints), "кругов:", sum(s.laps for s in stints))
+        for i, s in enumerate(stints, 1):
+            print(i, s.pilot, s.mode, s.laps, "кругов, комплект", s.tyre_set)
@@ -0,0 +1,244 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from model import (
+    RaceParams, TyreParams, ConsumptionMode, Pilot, Stint,
+    plan_stints, _build_pilots,
+)
+from incremental import plan_independent_fields
+from cache import PlanCache, plan_cache_key
+from tyres import LapTimeTables, build_tables, has_lap_effects, race_time_sec
+from fuel_target import plan_stints_fuel_target, solve_grid, grid_exact
+
+
+# поля RaceParams и TyreParams, по которым можно строить перебор
+RACE_FIELDS = ("tank_liters", "pit_refuel_sec", "pit_tyre_sec", "driver_change_sec")
+TYRE_FIELDS = ("sets",)
+SWEEP_FIELDS = RACE_FIELDS + TYRE_FIELDS
+
+# время пит-стопов — коэффициенты при счётчиках плана
+_STOP_FIELDS = ("pit_refuel_sec", "pit_tyre_sec", "driver_change_sec")
+
+# планировщики, которые считают всю сетку сразу, без планов по точкам;
+# solver(race, tyre, pilot_tuples, mode, axes) -> (total_sec, stints),
+# exact(race, tyre) — совпадает ли он с tyres.race_time_sec на этих входах
+_GRID_SOLVERS = {
+    plan_stints_fuel_target: (solve_grid, grid_exact),
+}
+
+
+@dataclass
+class SweepAxis:
+    field: str                  # одно из SWEEP_FIELDS
+    values: List[float]
+
+
+@dataclass
+class SweepResult:
+    axes: List[SweepAxis]
+    total_sec: np.ndarray       # форма (len(axes[0].values), len(axes[1].values), ...)
+    stints: np.ndarray          # число стинтов в плане, та же форма
+
+
+def axis_range(field: str, start: float, stop: float, step: float) -> SweepAxis:
+    """Значения от start до stop включительно с шагом step."""
+    if field not in SWEEP_FIELDS:
+        raise ValueError(f"Нельзя перебирать поле {field}")
+    if step <= 0:
+        raise ValueError("Шаг перебора должен быть больше нуля")
+    n = int(round((stop - start) / step)) + 1
+    values = [start + i * step for i in range(max(n, 1))]
+    if field == "sets":
+        values = sorted({max(int(round(v)), 1) for v in values})
+    return SweepAxis(field=field, values=values)
+
+
+def _plan_counts(pilots: Sequence[Pilot], stints: Sequence[Stint],
+                 tables: Optional[LapTimeTables] = None) -> Tuple[float, int, int, int]:
+    """
+    (время на кругах, стопов с дозаправкой, стопов со сменой резины, смен пилота)
+    по тем же правилам, что и compute_total_race_time_sec.
+    С tables время на кругах — с износом резины и весом топлива (tyres.py).
+    """
+    pilot_map = {p.name: p for p in pilots}
+    ages = {}
+    lap_sec = 0.0
+    n_refuel = n_tyre = n_change = 0
+    prev_tyre_set = None
+    prev_pilot_name = None
+    for i, stint in enumerate(stints):
+        pilot = pilot_map.get(stint.pilot)
+        if not pilot:
+            continue
+        if tables is None:
+            lap_sec += stint.laps * pilot.lap_time_sec
+        else:
+            age = ages.get(stint.tyre_set, 0)
+            lap_sec += tables.stint_time(tables.index[stint.pilot], stint.laps, age,
+                                         stint.eco, stint.fuel_start, stint.fuel_per_lap)
+            ages[stint.tyre_set] = age + stint.laps
+        if i > 0:
+            if stint.tyre_set == prev_tyre_set:
+                n_refuel += 1
+            else:
+                n_tyre += 1
+            if stint.pilot != prev_pilot_name:
+                n_change += 1
+        prev_tyre_set = stint.tyre_set
+        prev_pilot_name = stint.pilot
+    return lap_sec, n_refuel, n_tyre, n_change
+
+
+def _point(race: RaceParams, tyre: TyreParams, axes: Sequence[SweepAxis],
+           combo: Sequence[float]) -> Tuple[RaceParams, TyreParams]:
+    """Входы одной точки сетки: значения combo по осям axes."""
+    r, t = race, tyre
+    for a, v in zip(axes, combo):
+        if a.field in TYRE_FIELDS:
+            t = replace(t, **{a.field: int(v)})
+        else:
+            r = replace(r, **{a.field: float(v)})
+    return r, t
+
+
+def _plan_group(
+    planner: Callable[..., List[Stint]],
+    points: List[Tuple[RaceParams, TyreParams]],
+    pilot_tuples,
+    mode: ConsumptionMode,
+) -> List[List[Stint]]:
+    """Пачка точек перебора для одного процесса."""
+    return [planner(race, tyre, pilot_tuples, mode) for race, tyre in points]
+
+
+def run_sweep(
+    race: RaceParams,
+    tyre: TyreParams,
+    pilot_tuples,
+    mode: ConsumptionMode,
+    axes: Sequence[SweepAxis],
+    planner: Callable[..., List[Stint]] = plan_stints,
+    workers: Optional[int] = None,
+    chunk_size: int = 64,
+    cache: Optional[PlanCache] = None,
+) -> SweepResult:
+    """
+    Полная декартова сетка по axes, остальные поля — из race/tyre.
+
+    Оси, от которых план не зависит (для plan_stints — время пит-стопов),
+    не планируются: план считается один раз на точку остальных осей и
+    сворачивается в счётчики (круги, стопы, смены), а время гонки по
+    пит-осям получается векторно. Поэтому сетка 50x50 по баку и комплектам
+    с любыми диапазонами пит-стопов стоит 2500 вызовов планировщика.
+    Итог совпадает с tyres.race_time_sec с точностью до округления.
+    С профилем круга пит-стопы сдвигают часы гонки, а с ними и время кругов,
+    поэтому пит-оси тогда планируются и считаются по точкам.
+    С cache уже известные планы берутся из него, в процессы уходят только промахи.
+    Планировщики из _GRID_SOLVERS считают сетку целиком одним вызовом.
+    """
+    axes = list(axes)
+    for a in axes:
+        if a.field not in SWEEP_FIELDS:
+            raise ValueError(f"Нельзя перебирать поле {a.field}")
+    if len({a.field for a in axes}) != len(axes):
+        raise ValueError("Поле перебора указано дважды")
+
+    grid = _GRID_SOLVERS.get(planner)
+    if grid is not None and grid[1](race, tyre):
+        total, stints = grid[0](race, tyre, pilot_tuples, mode, axes)
+        total, stints = np.array(total), np.array(stints)
+        # где решение не уложилось в комплекты, планировщик берёт plan_stints — эти точки по одной
+        pilots = _build_pilots(pilot_tuples)
+        for idx in zip(*np.nonzero(~np.isfinite(total))):
+            r, t = _point(race, tyre, axes, [a.values[i] for a, i in zip(axes, idx)])
+            plan = planner(r, t, pilot_tuples, mode)
+            total[idx] = race_time_sec(r, t, pilots, plan, mode)
+            stints[idx] = len(plan)
+        return SweepResult(axes=axes, total_sec=total, stints=stints)
+
+    independent = plan_independent_fields(planner) if not race.lap_profile else frozenset()
+    plan_axes = [a for a in axes if a.field not in independent]
+    eval_axes = [a for a in axes if a.field in independent]
+
+    # точки, где действительно нужен план
+    points: List[Tuple[RaceParams, TyreParams]] = []
+    for combo in itertools.product(*[a.values for a in plan_axes]):
+        points.append(_point(race, tyre, plan_axes, combo))
+
+    plans: List[Optional[List[Stint]]] = [None] * len(points)
+    keys: List[Optional[str]] = [None] * len(points)
+    if cache is not None:
+        for i, (r, t) in enumerate(points):
+            keys[i] = plan_cache_key(planner, r, t, pilot_tuples, mode)
+            plans[i] = cache.get(keys[i])
+    missing = [i for i, plan in enumerate(plans) if plan is None]
+
+    chunks = [missing[i:i + chunk_size] for i in range(0, len(missing), chunk_size)]
+    point_chunks = [[points[i] for i in c] for c in chunks]
+    if workers == 1 or len(chunks) <= 1:
+        parts = [_plan_group(planner, c, pilot_tuples, mode) for c in point_chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(
+                _plan_group,
+                [planner] * len(chunks), point_chunks,
+                [pilot_tuples] * len(chunks), [mode] * len(chunks),
+            ))
+    for c, part in zip(chunks, parts):
+        for i, plan in zip(c, part):
+            plans[i] = plan
+            if cache is not None:
+                cache.put(keys[i], plan)
+
+    pilots = _build_pilots(pilot_tuples)
+    rows = []
+    for (r, t), plan in zip(points, plans):
+        tables = None
+        if has_lap_effects(race, tyre):
+            tables = build_tables(r, t, pilots, mode, sum(s.laps for s in plan))
+        row = _plan_counts(pilots, plan, tables)
+        if race.lap_profile:
+            # время кругов с профилем — по часам гонки с пит-стопами этой точки
+            _lap_sec, n_refuel, n_tyre, n_change = row
+            stops = n_refuel * r.pit_refuel_sec + n_tyre * r.pit_tyre_sec + n_change * r.driver_change_sec
+            row = (race_time_sec(r, t, pilots, plan, mode) - stops,) + row[1:]
+        rows.append(row + (len(plan),))
+
+    plan_shape = tuple(len(a.values) for a in plan_axes)
+    counts = np.array(rows, dtype=np.float64).reshape(plan_shape + (5,))
+    lap_sec, n_refuel, n_tyre, n_change, n_stints = (counts[..., i] for i in range(5))
+
+    # время стопов: либо ось перебора (своё измерение, в том числе среди осей
+    # плана — для планировщиков, которым оно важно), либо из race
+    eval_shape = tuple(len(a.values) for a in eval_axes)
+    expand = (Ellipsis,) + (np.newaxis,) * len(eval_axes)
+    order = plan_axes + eval_axes
+    coef = {}
+    for name in _STOP_FIELDS:
+        coef[name] = np.float64(getattr(race, name))
+    for i, a in enumerate(order):
+        if a.field in _STOP_FIELDS:
+            shape = [1] * len(order)
+            shape[i] = len(a.values)
+            coef[a.field] = np.array(a.values, dtype=np.float64).reshape(shape)
+
+    total = (
+        lap_sec[expand]
+        + n_refuel[expand] * coef["pit_refuel_sec"]
+        + n_tyre[expand] * coef["pit_tyre_sec"]
+        + n_change[expand] * coef["driver_change_sec"]
+    )
+    total = np.broadcast_to(total, plan_shape + eval_shape)
+    stints = np.broadcast_to(n_stints[expand], total.shape).astype(np.int32)
+
+    # обратно к порядку осей, заданному пользователем
+    perm = [order.index(a) for a in axes]
+    return SweepResult(
+        axes=axes,
+        total_sec=np.transpose(total, perm),
+        stints=np.transpose(stints, perm),
+    )
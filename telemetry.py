@@ -0,0 +1,454 @@
+"""
+Телеметрия кругов: лог-файл или сокет -> скользящая статистика пилотов ->
+пересчёт плана, когда оценки уехали от введённых вручную.
+
+Формат — JSON на строку, как у cli.py:
+    {"pilot": "Пилот A", "lap_time_sec": 121.4, "fuel_used": 2.86}
+    {"pilot": "Пилот A", "lap_time_sec": 121.1, "fuel_level": 61.2, "mode": "eco"}
+fuel_used — расход за круг; если его нет, расход считается по разнице
+fuel_level с прошлым кругом того же пилота (дозаправка — новый отсчёт).
+mode ("push"/"eco", или "eco": true/false) — в каком режиме ехали круг;
+если его нет, режим берётся у стинта текущего плана, а без плана — по
+тому, к какому расходу базы ближе круг. Push и eco усредняются отдельно.
+
+Без PyQt: в окне источник крутится в своём потоке (ui_telemetry.py),
+цикл событий Qt не блокируется.
+
+    python telemetry.py listen --file laps.jsonl
+    python telemetry.py listen --port 8765
+    python telemetry.py replay recorded.jsonl --port 8765 --speed 20
+    python telemetry.py replay recorded.jsonl --file laps.jsonl --speed 20
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+from bisect import bisect_right
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from model import ConsumptionMode, Stint
+
+
+PilotTuple = Tuple[str, float, float, float, float, float]
+
+DEFAULT_WINDOW = 10             # кругов в скользящем окне
+DEFAULT_MIN_LAPS = 3            # раньше оценке не верим
+DEFAULT_LAP_TOL_SEC = 0.5       # уход времени круга, после которого пересчитываем
+DEFAULT_FUEL_TOL = 0.03         # уход расхода, доля
+DEFAULT_MAX_LAP_RATIO = 1.15    # круги медленнее — пит-стоп, SC, авария: не учитываем
+DEFAULT_PORT = 8765
+
+
+class LapSample(NamedTuple):
+    pilot: str
+    lap_time_sec: float
+    fuel_used: float            # л за круг, NaN — неизвестно
+    fuel_level: float           # л в баке на финише круга, NaN — неизвестно
+    eco: Optional[bool] = None  # круг в экономии; None — в логе не указано
+
+
+def _parse_eco(d: dict) -> Optional[bool]:
+    mode = d.get("mode")
+    if mode is not None:
+        mode = str(mode).lower()
+        if mode not in ("push", "eco"):
+            raise ValueError(f"Неизвестный режим круга {mode}")
+        return mode == "eco"
+    if d.get("eco") is not None:
+        return bool(d["eco"])
+    return None
+
+
+def parse_line(line: str) -> Optional[LapSample]:
+    """Строка лога -> LapSample; пустые строки и комментарии пропускаются."""
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    d = json.loads(line)
+    return LapSample(
+        pilot=str(d["pilot"]),
+        lap_time_sec=float(d["lap_time_sec"]),
+        fuel_used=float(d["fuel_used"]) if d.get("fuel_used") is not None else math.nan,
+        fuel_level=float(d["fuel_level"]) if d.get("fuel_level") is not None else math.nan,
+        eco=_parse_eco(d),
+    )
+
+
+class RollingMean:
+    """Среднее последних window значений: сумма поддерживается, обновление O(1)."""
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self._values: deque = deque(maxlen=max(window, 1))
+        self._sum = 0.0
+
+    def add(self, value: float):
+        if len(self._values) == self._values.maxlen:
+            self._sum -= self._values[0]
+        self._values.append(value)
+        self._sum += value
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    @property
+    def mean(self) -> float:
+        return self._sum / len(self._values) if self._values else math.nan
+
+
+@dataclass
+class PilotEstimate:
+    lap_time_sec: float         # NaN — ещё нет кругов
+    fuel_per_lap: float         # расход в push, NaN — расход не пришёл
+    laps: int                   # кругов в окне времени круга
+    fuel_eco_per_lap: float = math.nan     # расход в eco, NaN — таких кругов не было
+
+
+class _PilotStats:
+    def __init__(self, window: int):
+        self.lap = RollingMean(window)
+        self.fuel = RollingMean(window)         # круги в push
+        self.fuel_eco = RollingMean(window)     # круги в eco
+        self.last_level = math.nan
+        self.total_laps = 0
+
+    def estimate(self) -> PilotEstimate:
+        return PilotEstimate(self.lap.mean, self.fuel.mean, len(self.lap), self.fuel_eco.mean)
+
+
+class TelemetryState:
+    """
+    Скользящая статистика по пилотам и проверка ухода от базовых значений.
+
+    База — pilot_tuples, по которым посчитан текущий план. update() на каждый
+    круг: O(1). Когда у пилота набралось min_laps кругов и среднее время круга
+    ушло больше чем на lap_tol_sec (или расход push либо eco — больше чем на
+    fuel_tol от своего базового), база сдвигается на оценку и on_drift
+    получает новые pilot_tuples. plan — текущий план: по нему узнаётся режим
+    круга, если его нет в логе (круги машины считаются подряд с первого).
+    """
+
+    def __init__(
+        self,
+        pilot_tuples: List[PilotTuple],
+        mode: ConsumptionMode,
+        tank_liters: float,
+        on_drift: Optional[Callable[[List[PilotTuple]], None]] = None,
+        window: int = DEFAULT_WINDOW,
+        min_laps: int = DEFAULT_MIN_LAPS,
+        lap_tol_sec: float = DEFAULT_LAP_TOL_SEC,
+        fuel_tol: float = DEFAULT_FUEL_TOL,
+        max_lap_ratio: float = DEFAULT_MAX_LAP_RATIO,
+        plan: Optional[Sequence[Stint]] = None,
+    ):
+        self.base: Dict[str, list] = {t[0]: list(t) for t in pilot_tuples}
+        self.order = [t[0] for t in pilot_tuples]
+        self.mode = mode
+        self.tank_liters = tank_liters
+        self.on_drift = on_drift
+        self.window = window
+        self.min_laps = min_laps
+        self.lap_tol_sec = lap_tol_sec
+        self.fuel_tol = fuel_tol
+        self.max_lap_ratio = max_lap_ratio
+        self.stats: Dict[str, _PilotStats] = {}
+        self.samples = 0
+        self.skipped = 0
+        self.drifts = 0
+        self.set_plan(plan or [])
+
+    def set_plan(self, plan: Sequence[Stint]):
+        """Новый план (после пересчёта): конец каждого стинта по кругам и его режим."""
+        ends, ecos, targets, lap = [], [], [], 0
+        for stint in plan:
+            lap += stint.laps
+            ends.append(lap)
+            ecos.append(bool(stint.eco))
+            targets.append(getattr(stint, "fuel_per_lap", 0.0))
+        # одной ссылкой: поток приёма читает кортеж целиком
+        self._plan = (ends, ecos, targets)
+
+    def _base_fuel(self, base: list, eco: bool = False) -> float:
+        """Базовый расход на круг в push или eco, л."""
+        if self.mode.by_fuel_per_lap:
+            return base[3] if eco else base[2]
+        laps = base[5] if eco else base[4]
+        return self.tank_liters / laps if laps > 0 else math.nan
+
+    def _set_base_fuel(self, base: list, push: float, eco: float):
+        if self.mode.by_fuel_per_lap:
+            base[2], base[3] = push, eco
+        elif self.tank_liters > 0:
+            base[4], base[5] = self.tank_liters / push, self.tank_liters / eco
+
+    def _lap_is_eco(self, sample: LapSample, base: list, used: float) -> bool:
+        """Режим круга: из лога, иначе по стинту плана, иначе — к какому расходу базы ближе."""
+        if sample.eco is not None:
+            return sample.eco
+        ends, ecos, _targets = self._plan
+        k = bisect_right(ends, self.samples - 1)
+        if k < len(ends):
+            return ecos[k]
+        push, eco = self._base_fuel(base, False), self._base_fuel(base, True)
+        if not math.isnan(used) and eco < push:
+            return abs(used - eco) < abs(used - push)
+        return False
+
+    def _on_target(self, sample: LapSample) -> bool:
+        """Круг стинта плана с целевым расходом (fuel_target.py) — ни push, ни eco."""
+        if sample.eco is not None:
+            return False
+        ends, _ecos, targets = self._plan
+        k = bisect_right(ends, self.samples - 1)
+        return k < len(ends) and targets[k] > 0
+
+    def update(self, sample: LapSample) -> bool:
+        """Учитывает круг; True — оценки ушли, база сдвинута, on_drift вызван."""
+        self.samples += 1
+        base = self.base.get(sample.pilot)
+        if base is None:
+            self.skipped += 1
+            return False
+        st = self.stats.get(sample.pilot)
+        if st is None:
+            st = self.stats[sample.pilot] = _PilotStats(self.window)
+        st.total_laps += 1
+
+        used = sample.fuel_used
+        if math.isnan(used) and not math.isnan(sample.fuel_level):
+            if not math.isnan(st.last_level) and sample.fuel_level < st.last_level:
+                used = st.last_level - sample.fuel_level
+        if not math.isnan(sample.fuel_level):
+            st.last_level = sample.fuel_level
+
+        reference = st.lap.mean if len(st.lap) else base[1]
+        if reference > 0 and sample.lap_time_sec > reference * self.max_lap_ratio:
+            # пит-стоп, машина безопасности — в среднее не берём
+            self.skipped += 1
+            return False
+        st.lap.add(sample.lap_time_sec)
+        if not math.isnan(used) and used > 0 and not self._on_target(sample):
+            (st.fuel_eco if self._lap_is_eco(sample, base, used) else st.fuel).add(used)
+
+        if len(st.lap) < self.min_laps:
+            return False
+        est = st.estimate()
+        drift = abs(est.lap_time_sec - base[1]) > self.lap_tol_sec
+        push_ok = len(st.fuel) >= self.min_laps
+        eco_ok = len(st.fuel_eco) >= self.min_laps
+        for ok, eco, value in ((push_ok, False, est.fuel_per_lap), (eco_ok, True, est.fuel_eco_per_lap)):
+            base_fuel = self._base_fuel(base, eco)
+            if ok and base_fuel > 0:
+                drift = drift or abs(value - base_fuel) / base_fuel > self.fuel_tol
+        if not drift:
+            return False
+
+        self._rebase(base, est, push_ok, eco_ok)
+        self.drifts += 1
+        if self.on_drift is not None:
+            self.on_drift(self.pilot_tuples())
+        return True
+
+    def _rebase(self, base: list, est: PilotEstimate, push_ok: bool, eco_ok: bool):
+        base[1] = est.lap_time_sec
+        push = est.fuel_per_lap if push_ok and est.fuel_per_lap > 0 else math.nan
+        eco = est.fuel_eco_per_lap if eco_ok and est.fuel_eco_per_lap > 0 else math.nan
+        if math.isnan(push) and math.isnan(eco):
+            return
+        # режим без своих кругов сдвигается в той же пропорции, что и измеренный
+        old_push, old_eco = self._base_fuel(base, False), self._base_fuel(base, True)
+        ratio = old_eco / old_push if old_push > 0 and old_eco > 0 else 1.0
+        if math.isnan(push):
+            push = eco / ratio
+        if math.isnan(eco):
+            eco = push * ratio
+        self._set_base_fuel(base, push, eco)
+
+    def estimates(self) -> Dict[str, PilotEstimate]:
+        return {name: st.estimate() for name, st in self.stats.items()}
+
+    def pilot_tuples(self) -> List[PilotTuple]:
+        return [tuple(self.base[name]) for name in self.order]
+
+
+# ---------- источники ----------
+
+async def tail_file(path: str, poll_sec: float = 0.2, from_start: bool = True,
+                    stop: Optional[asyncio.Event] = None) -> AsyncIterator[str]:
+    """
+    Строки растущего файла (как tail -f). Опрос раз в poll_sec — без
+    зависимостей от inotify; чтение — в пуле потоков, цикл не блокируется.
+    Файл, которого ещё нет, ждём. Неполная последняя строка ждёт перевода строки.
+    """
+    loop = asyncio.get_running_loop()
+    while not os.path.exists(path):
+        if stop is not None and stop.is_set():
+            return
+        await asyncio.sleep(poll_sec)
+    with open(path, "r", encoding="utf-8") as f:
+        if not from_start:
+            f.seek(0, os.SEEK_END)
+        pending = ""
+        while stop is None or not stop.is_set():
+            chunk = await loop.run_in_executor(None, f.read, 65536)
+            if not chunk:
+                await asyncio.sleep(poll_sec)
+                continue
+            pending += chunk
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                yield line
+
+
+async def serve_socket(on_line: Callable[[str], None], host: str = "127.0.0.1",
+                       port: int = DEFAULT_PORT, stop: Optional[asyncio.Event] = None):
+    """Локальный TCP-приёмник: каждый подключившийся шлёт строки лога."""
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                on_line(raw.decode("utf-8"))
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    async with server:
+        if stop is None:
+            await server.serve_forever()
+        else:
+            await stop.wait()
+
+
+class TelemetryIngest:
+    """
+    Источник -> TelemetryState. Битые строки считаются в errors и не
+    останавливают приём. on_sample вызывается на каждый принятый круг.
+    """
+
+    def __init__(self, state: TelemetryState,
+                 on_sample: Optional[Callable[[LapSample], None]] = None):
+        self.state = state
+        self.on_sample = on_sample
+        self.errors = 0
+        self.stop_event = asyncio.Event()
+
+    def feed_line(self, line: str):
+        try:
+            sample = parse_line(line)
+        except (ValueError, KeyError, TypeError):
+            self.errors += 1
+            return
+        if sample is None:
+            return
+        self.state.update(sample)
+        if self.on_sample is not None:
+            self.on_sample(sample)
+
+    async def run_file(self, path: str, poll_sec: float = 0.2, from_start: bool = True):
+        async for line in tail_file(path, poll_sec, from_start, self.stop_event):
+            self.feed_line(line)
+
+    async def run_socket(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT):
+        await serve_socket(self.feed_line, host, port, self.stop_event)
+
+    def stop(self):
+        """Из чужого потока — через loop.call_soon_threadsafe."""
+        self.stop_event.set()
+
+
+# ---------- проигрывание записанного лога ----------
+
+async def replay(path: str, speed: float = 1.0, port: Optional[int] = None,
+                 out_path: Optional[str] = None, host: str = "127.0.0.1") -> int:
+    """
+    Отдаёт записанный лог с паузой lap_time_sec / speed между кругами —
+    в сокет приёмника или дописывая в файл, который читает tail_file.
+    Возвращает число отправленных строк.
+    """
+    writer = None
+    out = None
+    if port is not None:
+        _reader, writer = await asyncio.open_connection(host, port)
+    elif out_path is not None:
+        out = open(out_path, "a", encoding="utf-8")
+    sent = 0
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                sample = parse_line(line)
+                if sample is None:
+                    continue
+                if speed > 0:
+                    await asyncio.sleep(sample.lap_time_sec / speed)
+                data = line.rstrip("\n") + "\n"
+                if writer is not None:
+                    writer.write(data.encode("utf-8"))
+                    await writer.drain()
+                elif out is not None:
+                    out.write(data)
+                    out.flush()
+                else:
+                    sys.stdout.write(data)
+                sent += 1
+    finally:
+        if writer is not None:
+            writer.close()
+            await writer.wait_closed()
+        if out is not None:
+            out.close()
+    return sent
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Телеметрия кругов: приём и проигрывание логов")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    listen = sub.add_parser("listen", help="принимать круги и печатать оценки")
+    listen.add_argument("--file", help="лог-файл (tail -f)")
+    listen.add_argument("--port", type=int, default=None, help="локальный TCP-порт")
+    listen.add_argument("--pilots", default=None,
+                        help="JSON [[name, lap, fp, fe, lp, le], ...] — база для проверки ухода")
+    listen.add_argument("--tank", type=float, default=0.0)
+    listen.add_argument("--by-fuel", action="store_true", help="режим расход на круг")
+
+    rep = sub.add_parser("replay", help="проиграть записанный лог")
+    rep.add_argument("log")
+    rep.add_argument("--port", type=int, default=None)
+    rep.add_argument("--file", default=None, help="дописывать в файл вместо сокета")
+    rep.add_argument("--speed", type=float, default=10.0, help="во сколько раз быстрее гонки (0 — сразу)")
+
+    args = ap.parse_args(argv)
+    if args.cmd == "replay":
+        sent = asyncio.run(replay(args.log, args.speed, port=args.port, out_path=args.file))
+        print(f"отправлено кругов: {sent}", file=sys.stderr)
+        return 0
+
+    pilots = [tuple(p) for p in json.loads(args.pilots)] if args.pilots else []
+
+    def on_drift(tuples):
+        print(json.dumps({"drift": [list(t) for t in tuples]}, ensure_ascii=False), flush=True)
+
+    def on_sample(s: LapSample):
+        if not pilots:
+            print(json.dumps(s._asdict(), ensure_ascii=False), flush=True)
+
+    state = TelemetryState(pilots, ConsumptionMode(by_fuel_per_lap=args.by_fuel),
+                           args.tank, on_drift=on_drift)
+    ingest = TelemetryIngest(state, on_sample=on_sample)
+    try:
+        if args.file:
+            asyncio.run(ingest.run_file(args.file))
+        else:
+            asyncio.run(ingest.run_socket(port=args.port or DEFAULT_PORT))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+import random
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from batch_eval import evaluate_plans, pack_plans, unpack_plan
+from model import RaceParams, Stint, _build_pilots, compute_total_race_time_sec
+
+
+RACE = RaceParams(duration_hours=24.0, avg_lap_sec=100.0, tank_liters=60.0,
+                  pit_refuel_sec=31.7, pit_tyre_sec=47.3, driver_change_sec=13.1)
+PILOTS = _build_pilots([
+    ("A", 100.13, 3.0, 2.6, 0.0, 0.0),
+    ("B", 101.57, 2.9, 2.4, 0.0, 0.0),
+    ("C", 99.91, 3.1, 2.7, 0.0, 0.0),
+])
+
+
+def _random_plans(rng, count):
+    names = [p.name for p in PILOTS] + ["X"]     # X — нет в списке пилотов
+    plans = []
+    for _ in range(count):
+        plans.append([
+            Stint(pilot=rng.choice(names), laps=rng.randint(0, 40), fuel_start=0.0,
+                  tyre_set=rng.randint(1, 4), eco=rng.random() < 0.3)
+            for _ in range(rng.randint(0, 30))
+        ])
+    return plans
+
+
+@pytest.mark.parametrize("profile", [(), ((3600.0 * 8, 2.5), (3600.0 * 14.5, 0.0))])
+def test_batch_matches_scalar_bit_for_bit(profile):
+    race = replace(RACE, lap_profile=profile)
+    plans = _random_plans(random.Random(2), 400)
+    result = evaluate_plans(race, PILOTS, pack_plans(plans, PILOTS))
+    expected = np.array([compute_total_race_time_sec(race, PILOTS, plan) for plan in plans])
+    assert np.array_equal(result.total_sec, expected)
+    assert np.allclose(result.lap_sec + result.pit_sec + result.driver_change_sec, expected)
+
+
+def test_pack_unpack_round_trip():
+    plans = _random_plans(random.Random(3), 50)
+    batch = pack_plans(plans, PILOTS)
+    for i, plan in enumerate(plans):
+        known = [s for s in plan if s.pilot != "X"]
+        assert unpack_plan(batch, i, PILOTS) == known
@@ -0,0 +1,64 @@
+from cache import PLANNER_VERSIONS, PlanCache, plan_cache_key, planner_name
+from incremental import IncrementalPlanner
+from model import RaceParams, TyreParams, ConsumptionMode, Stint
+from rotation import RotationPlan
+
+
+RACE = RaceParams(duration_hours=1, avg_lap_sec=100, tank_liters=60, pit_refuel_sec=30,
+                  pit_tyre_sec=45, driver_change_sec=15)
+TYRE = TyreParams(sets=2)
+PILOTS = [("A", 100.0, 2.5, 2.2, 0.0, 0.0)]
+MODE = ConsumptionMode(by_fuel_per_lap=True)
+
+
+def _planner(optimal):
+    calls = []
+
+    def planner(race, tyre, pilot_tuples, mode):
+        calls.append(1)
+        return RotationPlan([Stint(pilot="A", laps=36, fuel_start=60, tyre_set=1, eco=False)], optimal)
+    return planner, calls
+
+
+def test_planner_version_changes_key(monkeypatch):
+    planner, _calls = _planner(True)
+    before = plan_cache_key(planner, RACE, TYRE, PILOTS, MODE)
+    monkeypatch.setitem(PLANNER_VERSIONS, planner_name(planner), 2)
+    assert plan_cache_key(planner, RACE, TYRE, PILOTS, MODE) != before
+
+
+def test_unfinished_rotation_not_cached():
+    cache = PlanCache()
+    planner, calls = _planner(False)
+    wrapped = IncrementalPlanner(planner, cache=cache)
+    wrapped(RACE, TYRE, PILOTS, MODE)
+    wrapped(RACE, TYRE, PILOTS, MODE)
+    assert len(calls) == 2 and len(cache) == 0
+
+    planner, calls = _planner(True)
+    wrapped = IncrementalPlanner(planner, cache=cache)
+    wrapped(RACE, TYRE, PILOTS, MODE)
+    wrapped(RACE, TYRE, PILOTS, MODE)
+    assert len(calls) == 1 and len(cache) == 1
+
+
+def test_wrap_passes_kwargs_and_keys_them():
+    cache = PlanCache()
+    calls = []
+
+    def planner(race, tyre, pilot_tuples, mode, total_laps=None, on_progress=None, should_stop=None):
+        calls.append((total_laps, on_progress))
+        laps = total_laps or 36
+        return [Stint(pilot="A", laps=laps, fuel_start=60, tyre_set=1, eco=False)]
+
+    wrapped = cache.wrap(planner)
+    progress = []
+    assert wrapped(RACE, TYRE, PILOTS, MODE, total_laps=30, on_progress=progress.append)[0].laps == 30
+    assert wrapped(RACE, TYRE, PILOTS, MODE, total_laps=30)[0].laps == 30
+    assert wrapped(RACE, TYRE, PILOTS, MODE, total_laps=31)[0].laps == 31
+    assert calls == [(30, progress.append), (31, None)]
+
+    # прерванный расчёт не кешируется
+    wrapped(RACE, TYRE, PILOTS, MODE, total_laps=32, should_stop=lambda: True)
+    wrapped(RACE, TYRE, PILOTS, MODE, total_laps=32)
+    assert [c[0] for c in calls[2:]] == [32, 32]
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from cli import main
+
+
+RACE = {"duration_hours": 1.0, "tank_liters": 100.0, "pit_refuel_sec": 30.0,
+        "pit_tyre_sec": 60.0, "driver_change_sec": 20.0}
+GOOD = {"id": "ok", "race": RACE, "tyre": {"sets": 2},
+        "pilots": [["A", 120.0, 3.0, 2.7, 0, 0], ["B", 121.0, 2.9, 2.6, 0, 0]],
+        "by_fuel_per_lap": True}
+CSV_HEADER = "id,duration_hours,tank_liters,pit_refuel_sec,pit_tyre_sec,driver_change_sec,tyre_sets,pilots,by_fuel_per_lap\n"
+CSV_ROW = "c1,1,100,30,60,20,2,A|120|3|2.7|0|0;B|121|2.9|2.6|0|0,yes\n"
+
+
+def _run(tmp_path, name, text, *extra):
+    src = tmp_path / name
+    src.write_text(text, encoding="utf-8")
+    dst = tmp_path / "out.jsonl"
+    code = main([str(src), "-o", str(dst), *extra])
+    return code, [json.loads(line) for line in dst.read_text(encoding="utf-8").splitlines()]
+
+
+def test_good_jsonl_exits_zero(tmp_path):
+    code, records = _run(tmp_path, "in.jsonl", json.dumps(GOOD) + "\n")
+    assert code == 0
+    assert records[0]["id"] == "ok" and records[0]["stints"]
+    assert sum(s["laps"] for s in records[0]["stints"]) > 0
+
+
+def test_good_csv_exits_zero(tmp_path):
+    code, records = _run(tmp_path, "in.csv", CSV_HEADER + CSV_ROW)
+    assert code == 0
+    assert records[0]["id"] == "c1" and "error" not in records[0]
+
+
+@pytest.mark.parametrize("bad", [
+    "{not json",
+    json.dumps({"id": "no_race", "pilots": GOOD["pilots"]}),
+    json.dumps({**GOOD, "race": {**RACE, "tank_liters": "много"}}),
+])
+def test_bad_line_exits_one_and_stream_goes_on(tmp_path, bad):
+    code, records = _run(tmp_path, "in.jsonl", bad + "\n\n" + json.dumps(GOOD) + "\n")
+    assert code == 1
+    assert len(records) == 2
+    assert records[0]["line"] == 1 and records[0]["error"]
+    assert records[1]["id"] == "ok" and "error" not in records[1]
+
+
+def test_bad_csv_row_exits_one(tmp_path):
+    code, records = _run(tmp_path, "in.csv", CSV_HEADER + "c2,час,100,30,60,20,2,A|120|3|2.7|0|0,yes\n" + CSV_ROW)
+    assert code == 1
+    assert "error" in records[0] and records[1]["id"] == "c1"
+
+
+def test_simulate_with_compare_is_usage_error(tmp_path, capsys):
+    src = tmp_path / "in.jsonl"
+    src.write_text(json.dumps(GOOD) + "\n", encoding="utf-8")
+    with pytest.raises(SystemExit) as exc:
+        main([str(src), "--engine", "compare", "--simulate", "10"])
+    assert exc.value.code == 2
+    assert "--simulate" in capsys.readouterr().err
+
+
+def test_unknown_engine_is_usage_error(tmp_path):
+    with pytest.raises(SystemExit) as exc:
+        main([str(tmp_path / "in.jsonl"), "--engine", "nope"])
+    assert exc.value.code == 2
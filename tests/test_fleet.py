@@ -0,0 +1,104 @@
+import itertools
+import random
+from dataclasses import replace
+
+import pytest
+
+from fleet import INF, Car, allocate_sets, car_race, plan_fleet, schedule_box
+from model import RaceParams, TyreParams, ConsumptionMode, _calc_total_laps
+
+
+RACE = RaceParams(duration_hours=3.0, avg_lap_sec=121.0, tank_liters=100.0,
+                  pit_refuel_sec=30.0, pit_tyre_sec=60.0, driver_change_sec=20.0)
+MODE = ConsumptionMode(by_fuel_per_lap=True)
+CARS = [Car("#1", [("A", 121.0, 3.2, 2.7, 0.0, 0.0), ("B", 120.6, 3.4, 2.8, 0.0, 0.0)]),
+        Car("#2", [("C", 121.0, 3.2, 2.7, 0.0, 0.0)]),
+        Car("#3", [("D", 122.0, 3.0, 2.6, 0.0, 0.0)], tank_liters=90.0)]
+
+
+def _brute_force(curves, total_sets):
+    best = INF
+    for ks in itertools.product(*(range(1, len(c) + 1) for c in curves)):
+        if sum(ks) <= total_sets:
+            best = min(best, sum(c[k - 1] for c, k in zip(curves, ks)))
+    return best
+
+
+def test_allocate_sets_matches_brute_force():
+    rng = random.Random(3)
+    for _ in range(300):
+        cars = rng.randint(1, 4)
+        curves = [[rng.choice([INF, rng.uniform(100.0, 200.0)]) if rng.random() < 0.2
+                   else rng.uniform(100.0, 200.0) for _k in range(rng.randint(1, 4))]
+                  for _c in range(cars)]
+        total = rng.randint(cars, cars + 5)
+        expected = _brute_force(curves, total)
+        if expected == INF:
+            with pytest.raises(ValueError):
+                allocate_sets(curves, total)
+            continue
+        ks = allocate_sets(curves, total)
+        assert len(ks) == cars and sum(ks) <= total and min(ks) >= 1
+        assert sum(c[k - 1] for c, k in zip(curves, ks)) == pytest.approx(expected)
+
+
+def test_allocate_sets_needs_a_set_per_car():
+    with pytest.raises(ValueError):
+        allocate_sets([[1.0], [1.0]], 1)
+
+
+def test_schedule_box_serves_one_car_at_a_time():
+    rng = random.Random(5)
+    offsets = []
+    for _c in range(4):
+        t, stops = 0.0, []
+        for lap in range(1, 6):
+            t += rng.uniform(50.0, 400.0)
+            service = rng.uniform(20.0, 80.0)
+            stops.append((t, service, lap))
+            t += service
+        offsets.append(stops)
+    waits = schedule_box(offsets)
+    busy = []
+    for c, stops in enumerate(offsets):
+        delay = 0.0
+        for i, (arrive, service, _lap) in enumerate(stops):
+            assert waits[c][i] >= 0.0
+            start = arrive + delay + waits[c][i]
+            busy.append((start, start + service))
+            delay += waits[c][i]
+    busy.sort()
+    assert all(a[1] <= b[0] + 1e-9 for a, b in zip(busy, busy[1:]))
+
+
+def test_plan_fleet_shares_sets_and_box():
+    tyre = TyreParams(sets=7)
+    plan = plan_fleet(RACE, tyre, CARS, MODE, planner="greedy", workers=1)
+    assert [c.name for c in plan.cars] == [c.name for c in CARS]
+    assert sum(c.tyre_sets for c in plan.cars) <= tyre.sets
+    for car, spec in zip(plan.cars, CARS):
+        assert sum(s.laps for s in car.stints) == _calc_total_laps(car_race(RACE, spec))
+        assert len({s.tyre_set for s in car.stints}) <= car.tyre_sets
+        assert len(car.stops) == len(car.stints) - 1
+    stops = plan.stops()
+    assert all(a.start_sec + a.service_sec <= b.start_sec + 1e-9 for a, b in zip(stops, stops[1:]))
+    assert plan.total_sec == pytest.approx(sum(c.race_sec + c.wait_sec for c in plan.cars))
+    assert plan.wait_sec == pytest.approx(sum(s.wait_sec for s in stops))
+
+
+def test_shifting_stops_cuts_box_waits():
+    # одинаковые машины заезжают в бокс одновременно
+    cars = [Car(f"#{i}", CARS[1].pilot_tuples) for i in range(3)]
+    race, tyre = replace(RACE, duration_hours=2.0), TyreParams(sets=6)
+    fixed = plan_fleet(race, tyre, cars, MODE, planner="greedy", workers=1, max_shift=0)
+    shifted = plan_fleet(race, tyre, cars, MODE, planner="greedy", workers=1)
+    assert fixed.shifts == 0 and fixed.wait_sec > 0
+    assert shifted.shifts > 0
+    assert shifted.total_sec < fixed.total_sec
+
+
+def test_plan_fleet_rejects_bad_input():
+    with pytest.raises(ValueError):
+        plan_fleet(RACE, TyreParams(sets=2), CARS, MODE, planner="greedy", workers=1)
+    with pytest.raises(ValueError):
+        plan_fleet(RACE, TyreParams(sets=4), [Car("#1", [])], MODE, planner="greedy", workers=1)
@@ -0,0 +1,71 @@
+import random
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from model import RaceParams, TyreParams, ConsumptionMode, _build_pilots, _calc_total_laps
+from fleet import Car, plan_fleet
+from fuel_target import plan_stints_fuel_target, solve_batch
+from pareto import plan_metrics
+from replan import state_from_plan
+from timeline import build_timeline
+from tyres import race_time_sec
+
+
+RACE = RaceParams(duration_hours=6.0, avg_lap_sec=121.0, tank_liters=100.0,
+                  pit_refuel_sec=30.0, pit_tyre_sec=60.0, driver_change_sec=20.0,
+                  eco_lap_loss_sec=0.02)
+MODE = ConsumptionMode(by_fuel_per_lap=True)
+PILOTS = [("A", 121.0, 3.2, 2.7, 0.0, 0.0)]
+
+
+def test_plan_fuel_uses_stint_target():
+    tyre = TyreParams(sets=4)
+    pilots = _build_pilots(PILOTS)
+    stints = plan_stints_fuel_target(RACE, tyre, PILOTS, MODE)
+    assert all(s.fuel_per_lap > 0 for s in stints)
+    tl = build_timeline(RACE, pilots, stints, MODE)
+    _time, fuel, _sets, _stops = plan_metrics(RACE, tyre, pilots, stints, MODE)
+    assert abs(fuel - tl.fuel_per_lap.sum()) < 1e-6
+
+    # за круг до конца стинта с целевым расходом в баке ровно один круг
+    first = stints[0]
+    state = state_from_plan(RACE, pilots, stints, MODE, first.laps - 1)
+    assert abs(state.fuel_liters - first.fuel_per_lap) < 1e-6
+
+
+def test_fleet_shift_keeps_target_within_tank():
+    cars = [Car(f"#{i}", PILOTS) for i in range(4)]
+    plan = plan_fleet(RACE, TyreParams(sets=16), cars, MODE, planner="fuel_target", workers=1)
+    assert plan.shifts > 0
+    for car in plan.cars:
+        for s in car.stints:
+            assert s.laps * s.fuel_per_lap <= RACE.tank_liters + 1e-9
+            assert abs(s.fuel_start - s.laps * s.fuel_per_lap) < 1e-9
+
+
+@pytest.mark.parametrize("by_fuel, pilot_tuples", [
+    (True, [("A", 121.0, 3.2, 2.7, 0.0, 0.0), ("B", 120.6, 3.4, 2.8, 0.0, 0.0)]),
+    (False, [("A", 121.0, 0.0, 0.0, 30.5, 35.0), ("B", 120.6, 0.0, 0.0, 28.0, 34.0)]),
+])
+def test_solve_batch_matches_plan(by_fuel, pilot_tuples):
+    mode = ConsumptionMode(by_fuel_per_lap=by_fuel)
+    pilots = _build_pilots(pilot_tuples)
+    rng = random.Random(7)
+    tank = np.array([rng.uniform(60.0, 120.0) for _ in range(40)])
+    refuel = np.array([rng.uniform(10.0, 60.0) for _ in range(40)])
+    tyre_pit = refuel + np.array([rng.uniform(0.0, 40.0) for _ in range(40)])
+    sets = np.array([rng.randint(1, 6) for _ in range(40)])
+    total_laps = _calc_total_laps(RACE)
+    time, n, _p = solve_batch(total_laps, tank, refuel, tyre_pit, sets,
+                              RACE.eco_lap_loss_sec, pilots, mode)
+    assert np.isfinite(time).sum() > 20
+    for g in np.flatnonzero(np.isfinite(time)):
+        race = replace(RACE, tank_liters=float(tank[g]), pit_refuel_sec=float(refuel[g]),
+                       pit_tyre_sec=float(tyre_pit[g]))
+        tyre = TyreParams(sets=int(sets[g]))
+        stints = plan_stints_fuel_target(race, tyre, pilot_tuples, mode)
+        assert len(stints) == n[g]
+        assert sum(s.laps for s in stints) == total_laps
+        assert abs(race_time_sec(race, tyre, pilots, stints, mode) - time[g]) < 1e-6
@@ -0,0 +1,50 @@
+import time
+
+from incremental import IncrementalPlanner
+from model import RaceParams, TyreParams, ConsumptionMode, _build_pilots
+from rotation import _Problem, _check, plan_stints_rotation, repair_rotation
+
+
+RACE = RaceParams(duration_hours=24.0, avg_lap_sec=121.0, tank_liters=100.0,
+                  pit_refuel_sec=30.0, pit_tyre_sec=60.0, driver_change_sec=20.0,
+                  max_continuous_sec=3 * 3600, min_drive_sec=3 * 3600, max_stints_per_pilot=4)
+TYRE = TyreParams(sets=20)
+MODE = ConsumptionMode(by_fuel_per_lap=True)
+PILOTS = [("A", 121.0, 2.8, 2.5, 0.0, 0.0), ("B", 121.5, 2.7, 2.4, 0.0, 0.0),
+          ("C", 122.0, 2.9, 2.6, 0.0, 0.0), ("D", 121.2, 3.0, 2.6, 0.0, 0.0),
+          ("E", 121.8, 2.8, 2.5, 0.0, 0.0), ("F", 122.4, 2.7, 2.5, 0.0, 0.0)]
+
+
+def _edited(name, delta=0.7):
+    return [(t[0], t[1] + delta if t[0] == name else t[1], *t[2:]) for t in PILOTS]
+
+
+def test_lap_time_edit_sends_repaired_plan_first():
+    planner = IncrementalPlanner(plan_stints_rotation)
+    previous = planner(RACE, TYRE, PILOTS, MODE)
+    pilots = _edited("C")
+    partials = []
+    full = planner(RACE, TYRE, pilots, MODE, on_progress=lambda f, plan: partials.append(plan))
+    assert len(partials) == 1
+    fast = partials[0]
+    assert not fast.optimal
+    assert [(s.laps, s.tyre_set) for s in fast] == [(s.laps, s.tyre_set) for s in previous]
+    first = next(j for j, s in enumerate(previous) if s.pilot == "C")
+    assert [s.pilot for s in fast[:first]] == [s.pilot for s in previous[:first]]
+    built = _build_pilots(pilots)
+    index = {p.name: i for i, p in enumerate(built)}
+    assert _check(_Problem(RACE, built, fast, MODE), [index[s.pilot] for s in fast])
+    assert sum(s.laps for s in full) == sum(s.laps for s in fast)
+
+
+def test_repair_under_50_ms():
+    previous = plan_stints_rotation(RACE, TYRE, PILOTS, MODE)
+    for name in "ACF":
+        pilots = _edited(name)
+        best = float("inf")
+        for _ in range(3):
+            started = time.perf_counter()
+            plan = repair_rotation(RACE, TYRE, pilots, MODE, previous, [name])
+            best = min(best, time.perf_counter() - started)
+            assert plan is not None
+        assert best < 0.05
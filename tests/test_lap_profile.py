@@ -0,0 +1,42 @@
+import random
+from dataclasses import replace
+
+import pytest
+
+from batch_eval import evaluate_plans, pack_plans
+from engine import PLANNERS
+from lap_profile import normalize_profile, parse_profile, profile_extra, stint_lap_times
+from model import RaceParams, TyreParams, ConsumptionMode, _build_pilots
+from timeline import build_timeline
+from tyres import race_time_sec
+
+
+RACE = RaceParams(duration_hours=24.0, avg_lap_sec=120.0, tank_liters=100.0,
+                  pit_refuel_sec=30.0, pit_tyre_sec=45.0, driver_change_sec=10.0,
+                  lap_profile=parse_profile("8:00 +2.5; 14:00 0"))
+TYRE = TyreParams(sets=10)
+PILOTS = [("A", 120.0, 3.0, 2.7, 0.0, 0.0), ("B", 121.0, 3.1, 2.8, 0.0, 0.0)]
+MODE = ConsumptionMode(by_fuel_per_lap=True)
+
+
+def test_profile_extra_matches_lap_times():
+    rng = random.Random(7)
+    for _ in range(500):
+        profile = normalize_profile([(rng.uniform(0, 40000), rng.uniform(-5, 5))
+                                     for _ in range(rng.randint(0, 4))])
+        base, start, laps = rng.uniform(80, 130), rng.uniform(0, 40000), rng.randint(0, 400)
+        expected = stint_lap_times(base, profile, start, laps).sum() - laps * base
+        assert float(profile_extra(base, profile, start, laps)) == pytest.approx(expected, abs=1e-6)
+
+
+@pytest.mark.parametrize("name", list(PLANNERS))
+def test_race_time_follows_profile_like_timeline(name):
+    pilots = _build_pilots(PILOTS)
+    stints = PLANNERS[name].func(RACE, TYRE, PILOTS, MODE)
+    total = race_time_sec(RACE, TYRE, pilots, stints, MODE)
+    assert total == pytest.approx(float(build_timeline(RACE, pilots, stints, MODE).end_sec[-1]), abs=1e-6)
+    # прибавка профиля действительно есть
+    flat = race_time_sec(replace(RACE, lap_profile=()), TYRE, pilots, stints, MODE)
+    assert total > flat
+    # пачка считает так же, бит в бит
+    assert evaluate_plans(RACE, pilots, pack_plans([stints], pilots)).total_sec[0] == total
@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+import cli
+import library
+from library import LibraryWriter, Session, StrategyLibrary, load_session, save_session, write_library
+from model import Stint
+from scenario import scenario_from_dict
+
+
+RACE = {"duration_hours": 2.0, "tank_liters": 100.0, "pit_refuel_sec": 30.0,
+        "pit_tyre_sec": 60.0, "driver_change_sec": 20.0}
+PILOTS = [["A", 120.0, 3.1, 2.7, 0, 0], ["Б", 121.0, 2.9, 2.6, 0, 0]]
+
+
+def _plan(n, pilot="A"):
+    return [Stint(pilot=pilot, laps=10 + i, fuel_start=31.7 + i, tyre_set=1 + i // 2,
+                  eco=i % 2 == 1, fuel_per_lap=2.9 if i == 0 else 0.0) for i in range(n)]
+
+
+def _same(a, b):
+    assert len(a) == len(b)
+    for x, y in zip(a, b):
+        assert (x.pilot, x.laps, x.tyre_set, x.eco) == (y.pilot, y.laps, y.tyre_set, y.eco)
+        assert x.fuel_start == pytest.approx(y.fuel_start, rel=1e-6)
+        assert x.fuel_per_lap == pytest.approx(y.fuel_per_lap, rel=1e-6)
+
+
+def test_writer_reader_round_trip(tmp_path):
+    path = str(tmp_path / "season.rsl")
+    plans = [("Спа 24ч", "дождь", _plan(3), 86400.5), ("Спа 24ч", "сухо", _plan(2, "Б"), 86000.0),
+             ("Монца", "база", _plan(1), 21600.0), ("Монца", "пусто", [], 0.0)]
+    assert write_library(path, plans) == 4
+    with StrategyLibrary(path) as lib:
+        assert len(lib) == 4
+        assert lib.events() == ["Монца", "Спа 24ч"]
+        assert lib.scenarios("Спа 24ч") == ["дождь", "сухо"]
+        for event, scenario, stints, total in plans:
+            got = lib.get(event, scenario)
+            assert (got.event, got.scenario, got.total_sec) == (event, scenario, total)
+            _same(got.stints, stints)
+        assert [p.scenario for p in lib.iter_event("Монца")] == ["база", "пусто"]
+        assert lib.get("Монца", "нет") is None and lib.get("Нет", "база") is None
+        assert ("Монца", "база") in lib and ("Монца", "нет") not in lib
+
+
+def test_repeated_add_replaces_plan(tmp_path):
+    path = str(tmp_path / "season.rsl")
+    with LibraryWriter(path) as w:
+        w.add("e", "s", _plan(4), 1.0)
+        w.add("e", "s", _plan(2, "Б"), 2.0)
+    with StrategyLibrary(path) as lib:
+        assert len(lib) == 1
+        got = lib.get("e", "s")
+        assert got.total_sec == 2.0
+        _same(got.stints, _plan(2, "Б"))
+
+
+def test_not_a_library(tmp_path):
+    path = tmp_path / "bad.rsl"
+    path.write_bytes(b"not a library at all, just some bytes here")
+    with pytest.raises(ValueError):
+        StrategyLibrary(str(path))
+    (tmp_path / "empty.rsl").write_bytes(b"")
+    with pytest.raises(ValueError):
+        StrategyLibrary(str(tmp_path / "empty.rsl"))
+
+
+def test_pack_and_get_cli_results(tmp_path, capsys):
+    scenarios = tmp_path / "in.jsonl"
+    scenarios.write_text("".join(
+        json.dumps({"id": f"s{i}", "race": {**RACE, "duration_hours": 1.0 + i}, "tyre": {"sets": 3},
+                    "pilots": PILOTS, "by_fuel_per_lap": True}, ensure_ascii=False) + "\n"
+        for i in range(3)) + "{битая строка\n", encoding="utf-8")
+    results = tmp_path / "out.jsonl"
+    assert cli.main([str(scenarios), "-o", str(results)]) == 1
+    rsl = str(tmp_path / "season.rsl")
+    assert library.main(["pack", str(results), "-o", rsl, "--event", "Тест"]) == 0
+    assert json.loads(capsys.readouterr().err) == {"plans": 3, "skipped": 1}
+
+    for line in results.read_text(encoding="utf-8").splitlines()[:3]:
+        record = json.loads(line)
+        assert library.main(["get", rsl, "Тест", record["id"]]) == 0
+        got = json.loads(capsys.readouterr().out)
+        assert got["id"] == record["id"] and got["total_time_sec"] == record["total_time_sec"]
+        _same([Stint(**s) for s in got["stints"]], [Stint(**s) for s in record["stints"]])
+
+    assert library.main(["get", rsl, "Тест", "нет"]) == 1
+    assert library.main(["ls", rsl, "Тест"]) == 0
+    assert capsys.readouterr().out.split() == ["s0", "s1", "s2"]
+
+
+def test_session_round_trip(tmp_path):
+    scenario = scenario_from_dict({"id": "s", "race": RACE, "tyre": {"sets": 3}, "pilots": PILOTS})
+    session = Session(scenario=scenario, planner="optimal", exact_laps=False,
+                      stints=_plan(3), total_sec=7200.0)
+    path = str(tmp_path / "s.json")
+    save_session(path, session)
+    assert load_session(path) == session
+    (tmp_path / "bad.json").write_text("{", encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_session(str(tmp_path / "bad.json"))
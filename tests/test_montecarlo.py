@@ -0,0 +1,36 @@
+import numpy as np
+
+from model import RaceParams, ConsumptionMode, Stint, _build_pilots, compute_total_race_time_sec
+from montecarlo import SimParams, simulate_race
+
+
+RACE = RaceParams(duration_hours=3.0, avg_lap_sec=121.0, tank_liters=100.0,
+                  pit_refuel_sec=30.0, pit_tyre_sec=60.0, driver_change_sec=20.0)
+MODE = ConsumptionMode(by_fuel_per_lap=True)
+PILOTS = _build_pilots([("A", 121.0, 2.8, 2.5, 0.0, 0.0), ("B", 121.5, 2.7, 2.4, 0.0, 0.0)])
+# push-стинты по 30 кругов: в баке остаётся место под запас
+PLAN = [Stint(pilot="A", laps=30, fuel_start=84.0, tyre_set=1, eco=False),
+        Stint(pilot="B", laps=30, fuel_start=81.0, tyre_set=1, eco=False),
+        Stint(pilot="A", laps=29, fuel_start=81.2, tyre_set=1, eco=False)]
+QUIET = SimParams(lap_jitter_sec=0.0, fuel_sd_frac=0.0, slow_stop_prob=0.0, sc_prob_per_lap=0.0)
+
+
+def test_without_randomness_matches_race_time():
+    result = simulate_race(RACE, PILOTS, PLAN, MODE, 50, params=QUIET, workers=1)
+    assert np.allclose(result.finish_sec, compute_total_race_time_sec(RACE, PILOTS, PLAN))
+    assert not result.out_of_fuel.any()
+
+
+def test_same_seed_same_result_for_any_workers():
+    one = simulate_race(RACE, PILOTS, PLAN, MODE, 3000, seed=4, chunk_size=500, workers=1)
+    pool = simulate_race(RACE, PILOTS, PLAN, MODE, 3000, seed=4, chunk_size=500, workers=2)
+    assert np.array_equal(one.finish_sec, pool.finish_sec)
+    assert np.array_equal(one.out_of_fuel, pool.out_of_fuel)
+
+
+def test_fuel_margin_covers_consumption_spread():
+    exact = simulate_race(RACE, PILOTS, PLAN, MODE, 2000, params=SimParams(fuel_margin_frac=0.0),
+                          workers=1)
+    assert exact.p_out_of_fuel > 0.5      # ровно по плану — почти в каждом заезде хоть раз
+    default = simulate_race(RACE, PILOTS, PLAN, MODE, 2000, workers=1)
+    assert default.p_out_of_fuel < 0.01
@@ -0,0 +1,101 @@
+import random
+
+import pytest
+
+from model import (
+    RaceParams, TyreParams, ConsumptionMode, Stint,
+    _build_pilots, _calc_stint_length_eco, compute_total_race_time_sec,
+)
+from optimal import DEFAULT_MAX_STINTS_PER_SET, plan_stints_optimal
+
+
+INF = float("inf")
+
+
+def _brute(race, pilots, caps, total_laps, max_stints):
+    """(время, стинтов) лучшего плана перебором всех разбиений кругов и пилотов."""
+    best = (INF, 0)
+    plan = []
+
+    def walk(left):
+        nonlocal best
+        if left == 0:
+            stints = [Stint(pilot=name, laps=laps, fuel_start=0.0,
+                            tyre_set=k // DEFAULT_MAX_STINTS_PER_SET + 1, eco=False)
+                      for k, (name, laps) in enumerate(plan)]
+            total = compute_total_race_time_sec(race, pilots, stints)
+            if total < best[0] - 1e-9 or (abs(total - best[0]) <= 1e-9 and len(stints) < best[1]):
+                best = (total, len(stints))
+            return
+        if len(plan) == max_stints:
+            return
+        for p, cap in zip(pilots, caps):
+            for laps in range(1, min(cap, left) + 1):
+                plan.append((p.name, laps))
+                walk(left - laps)
+                plan.pop()
+
+    walk(total_laps)
+    return best
+
+
+def _case(rng, by_fuel):
+    race = RaceParams(duration_hours=1.0, avg_lap_sec=100.0, tank_liters=6.0,
+                      pit_refuel_sec=rng.choice([5.0, 30.0]), pit_tyre_sec=rng.choice([30.0, 60.0]),
+                      driver_change_sec=rng.choice([0.0, 15.0, 80.0]))
+    pilots = []
+    for i in range(rng.randint(1, 3)):
+        lap = 100.0 + rng.choice([0.0, 0.5, 3.0, 20.0])
+        if by_fuel:
+            push = rng.choice([1.5, 2.0, 3.4])
+            pilots.append((f"P{i}", lap, push, push - rng.choice([0.0, 0.4]), 0.0, 0.0))
+        else:
+            push = rng.choice([1.0, 2.0, 3.5])
+            pilots.append((f"P{i}", lap, 0.0, 0.0, push, push + rng.choice([0.0, 1.0])))
+    return race, TyreParams(sets=rng.choice([1, 1, 2, 3])), pilots
+
+
+@pytest.mark.parametrize("by_fuel", [True, False])
+def test_optimal_matches_brute_force(by_fuel):
+    mode = ConsumptionMode(by_fuel_per_lap=by_fuel)
+    rng = random.Random(3)
+    compared = 0
+    for _ in range(50):
+        race, tyre, pilot_tuples = _case(rng, by_fuel)
+        total_laps = rng.randint(1, 8)
+        pilots = _build_pilots(pilot_tuples)
+        caps = [_calc_stint_length_eco(race, p, mode) for p in pilots]
+        best_sec, best_stints = _brute(race, pilots, caps, total_laps,
+                                       tyre.sets * DEFAULT_MAX_STINTS_PER_SET)
+        stints = plan_stints_optimal(race, tyre, pilot_tuples, mode, total_laps=total_laps)
+        if best_sec == INF:
+            continue        # в комплекты не уложиться — план от plan_stints
+        compared += 1
+        assert sum(s.laps for s in stints) == total_laps
+        assert len(stints) <= tyre.sets * DEFAULT_MAX_STINTS_PER_SET
+        assert abs(compute_total_race_time_sec(race, pilots, stints) - best_sec) < 1e-6
+        assert len(stints) == best_stints
+    assert compared > 25
+
+
+@pytest.mark.parametrize("by_fuel", [True, False])
+@pytest.mark.parametrize("sets", [1, 2, 3])
+def test_tyre_sets_limit_matches_brute_force(by_fuel, sets):
+    # быстрому пилоту хватает бака на 2 круга, медленному — на 4: лимит стинтов решает, кто едет
+    mode = ConsumptionMode(by_fuel_per_lap=by_fuel)
+    race = RaceParams(duration_hours=1.0, avg_lap_sec=100.0, tank_liters=6.0,
+                      pit_refuel_sec=5.0, pit_tyre_sec=30.0, driver_change_sec=15.0)
+    if by_fuel:
+        pilot_tuples = [("fast", 100.0, 3.0, 3.0, 0.0, 0.0), ("slow", 106.0, 1.5, 1.5, 0.0, 0.0)]
+    else:
+        pilot_tuples = [("fast", 100.0, 0.0, 0.0, 2.0, 2.0), ("slow", 106.0, 0.0, 0.0, 4.0, 4.0)]
+    pilots = _build_pilots(pilot_tuples)
+    caps = [_calc_stint_length_eco(race, p, mode) for p in pilots]
+    tyre = TyreParams(sets=sets)
+    limit = sets * DEFAULT_MAX_STINTS_PER_SET
+    best_sec, best_stints = _brute(race, pilots, caps, 10, limit)
+    # одному комплекту (3 стинта) быстрый не успевает — лимит меняет лучший план
+    assert (best_sec > _brute(race, pilots, caps, 10, 99)[0] + 1e-9) == (sets == 1)
+    stints = plan_stints_optimal(race, tyre, pilot_tuples, mode, total_laps=10)
+    assert len(stints) == best_stints <= limit
+    assert abs(compute_total_race_time_sec(race, pilots, stints) - best_sec) < 1e-6
@@ -0,0 +1,53 @@
+import random
+
+from model import RaceParams, TyreParams, ConsumptionMode, _build_pilots
+from pareto import Candidate, ParetoFront, apply_params, explore, iter_points, plan_metrics
+from engine import get_planner
+from sweep import SweepAxis
+
+
+def _key(c):
+    return c.total_sec, c.fuel_liters, c.tyre_sets, c.stops
+
+
+def _brute_front(candidates):
+    """Ключи недоминируемых кандидатов перебором всех пар."""
+    keys = {_key(c) for c in candidates}
+    return {k for k in keys
+            if not any(o != k and all(x <= y for x, y in zip(o, k)) for o in keys)}
+
+
+def test_front_matches_brute_force():
+    rng = random.Random(5)
+    for _ in range(200):
+        candidates = [Candidate(rng.randint(0, 30), rng.randint(0, 30), rng.randint(1, 4),
+                                rng.randint(0, 5), "x") for _ in range(rng.randint(1, 80))]
+        front = ParetoFront()
+        for c in candidates:
+            front.add(c)
+        got = [_key(c) for c in front]
+        assert len(got) == len(set(got)) == len(front)
+        assert set(got) == _brute_front(candidates)
+
+
+def test_explore_matches_brute_force():
+    race = RaceParams(duration_hours=3.0, avg_lap_sec=100.0, tank_liters=60.0,
+                      pit_refuel_sec=30.0, pit_tyre_sec=45.0, driver_change_sec=20.0,
+                      eco_lap_loss_sec=0.4)
+    tyre = TyreParams(sets=4)
+    pilot_tuples = [("A", 100.0, 3.0, 2.6, 0.0, 0.0), ("B", 101.5, 2.9, 2.4, 0.0, 0.0)]
+    mode = ConsumptionMode(by_fuel_per_lap=True)
+    axes = [SweepAxis("tank_liters", [45.0, 60.0, 75.0]), SweepAxis("sets", [1, 2, 4])]
+    planners = ["greedy", "iterative", "optimal", "fuel_target"]
+
+    result = explore(race, tyre, pilot_tuples, mode, axes, planners, workers=1, chunk_size=4)
+
+    pilots = _build_pilots(pilot_tuples)
+    candidates = []
+    for planner, params in iter_points(axes, planners):
+        r, t = apply_params(race, tyre, params)
+        stints = get_planner(planner)(r, t, pilot_tuples, mode)
+        candidates.append(Candidate(*plan_metrics(r, t, pilots, stints, mode), planner, params))
+    assert result.evaluated == len(candidates) and result.errors == 0
+    assert len(result.front) > 1
+    assert {_key(c) for c in result.front} == _brute_front(candidates)
@@ -0,0 +1,81 @@
+import random
+from dataclasses import replace
+
+import numpy as np
+
+import replan
+from model import RaceParams, TyreParams, ConsumptionMode, _build_pilots, _calc_total_laps
+from pit_window import PitWindowIndex
+from replan import RaceState, TailTable, replan_from_state
+
+
+RACE = RaceParams(duration_hours=6.0, avg_lap_sec=121.0, tank_liters=100.0,
+                  pit_refuel_sec=30.0, pit_tyre_sec=60.0, driver_change_sec=20.0)
+TYRE = TyreParams(sets=8)
+MODE = ConsumptionMode(by_fuel_per_lap=True)
+PILOTS = [("A", 121.0, 2.8, 2.5, 36.0, 37.0), ("B", 121.5, 2.7, 2.4, 36.0, 37.0),
+          ("C", 122.0, 2.9, 2.6, 36.0, 37.0)]
+
+
+def test_best_stop_matches_replan():
+    index = PitWindowIndex(RACE, TYRE, PILOTS, MODE)
+    rng = random.Random(5)
+    compared = 0
+    for _ in range(300):
+        remaining = rng.randint(1, 178)
+        pilot = rng.choice("ABC")
+        fuel = rng.uniform(0, 100)
+        tyre_set, set_stints = rng.randint(1, 8), rng.randint(1, 3)
+        window = index.window(remaining, pilot, fuel, tyre_set, set_stints)
+        try:
+            result = replan_from_state(RACE, TYRE, PILOTS, MODE, RaceState(
+                0, 0.0, fuel, pilot, tyre_set, 0, set_stints, remaining_laps=remaining))
+        except ValueError:
+            result = None
+        ok = result is not None and result.tyres_ok
+        assert window.feasible == ok
+        if ok:
+            compared += 1
+            assert abs(window.best_sec - result.total_sec) < 1e-6
+            costs = index.costs(remaining, pilot, set_stints, window)
+            assert abs(costs.min() - window.best_sec) < 1e-6
+    assert compared > 100
+
+
+def _pilots_24h():
+    rng = random.Random(1)
+    return [(f"P{i}", 121 + rng.uniform(0, 2), rng.uniform(2.6, 3.0), rng.uniform(2.3, 2.5), 0.0, 0.0)
+            for i in range(10)]
+
+
+def test_with_pilot_matches_fresh_table():
+    race = replace(RACE, duration_hours=24.0)
+    pilots = _pilots_24h()
+    max_laps = _calc_total_laps(race)
+    base = TailTable(race, _build_pilots(pilots), MODE, max_laps)
+    for q in range(len(pilots)):
+        for delta in (0.5, -3.0):
+            edited = list(pilots)
+            edited[q] = (pilots[q][0], pilots[q][1] + delta, *pilots[q][2:])
+            derived = base.with_pilot(q, _build_pilots([edited[q]])[0])
+            fresh = TailTable(race, _build_pilots(edited), MODE, max_laps)
+            derived.extend(max_laps + 40)
+            fresh.extend(max_laps + 40)
+            assert derived.cost == fresh.cost and derived.arg == fresh.arg
+            assert derived.after == fresh.after
+
+
+def test_update_matches_fresh_index():
+    race = replace(RACE, duration_hours=24.0)
+    pilots = _pilots_24h()
+    index = PitWindowIndex(race, TYRE, pilots, MODE)
+    for q in (0, 4, 8):
+        edited = list(pilots)
+        edited[q] = (pilots[q][0], pilots[q][1] + 0.5, pilots[q][2] - 0.1, *pilots[q][3:])
+        assert index.update(race, TYRE, edited, MODE)
+        replan._TABLES.clear()
+        fresh = PitWindowIndex(race, TYRE, edited, MODE)
+        assert np.array_equal(index.stop, fresh.stop)
+        for mine, theirs in zip(index.levels + index.args, fresh.levels + fresh.args):
+            assert np.array_equal(mine, theirs)
+        pilots = edited
@@ -0,0 +1,59 @@
+import pytest
+
+from model import RaceParams, TyreParams, ConsumptionMode, _build_pilots, compute_total_race_time_sec
+from optimal import plan_stints_optimal
+from replan import RaceState, replan_from_state, state_from_plan
+
+
+RACE = RaceParams(duration_hours=4.0, avg_lap_sec=121.0, tank_liters=100.0,
+                  pit_refuel_sec=30.0, pit_tyre_sec=60.0, driver_change_sec=20.0)
+TYRE = TyreParams(sets=6)
+PILOTS = [("A", 121.0, 2.8, 2.5, 36.0, 40.0), ("B", 121.5, 2.7, 2.4, 37.0, 41.0)]
+MODES = [ConsumptionMode(by_fuel_per_lap=True), ConsumptionMode(by_fuel_per_lap=False)]
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_replan_covers_remaining_laps(mode):
+    pilots = _build_pilots(PILOTS)
+    plan = plan_stints_optimal(RACE, TYRE, PILOTS, mode)
+    total_laps = sum(s.laps for s in plan)
+    plan_sec = compute_total_race_time_sec(RACE, pilots, plan)
+    for laps_done in range(0, total_laps, 7):
+        state = state_from_plan(RACE, pilots, plan, mode, laps_done)
+        result = replan_from_state(RACE, TYRE, PILOTS, mode, state)
+        assert result.tyres_ok
+        assert result.remaining_laps == total_laps - laps_done
+        assert sum(s.laps for s in result.stints) == result.remaining_laps
+        if result.pit_in > 0:
+            first = result.stints[0]
+            assert (first.pilot, first.tyre_set, first.laps) == (state.pilot, state.tyre_set, result.pit_in)
+            assert first.fuel_start == pytest.approx(state.fuel_liters)
+        assert all(s.laps > 0 and s.fuel_start <= RACE.tank_liters + 1e-9 for s in result.stints)
+        # остаток исходного плана — тоже кандидат, пересчёт не хуже
+        tail_sec = plan_sec - (RACE.duration_hours * 3600.0 - state.remaining_sec)
+        assert result.total_sec <= tail_sec + 1e-6
+
+
+def test_replan_stops_before_the_tank_runs_dry():
+    mode = MODES[0]
+    state = RaceState(laps_done=10, remaining_sec=0.0, fuel_liters=12.6, pilot="A",
+                      tyre_set=1, remaining_laps=80)
+    result = replan_from_state(RACE, TYRE, PILOTS, mode, state)
+    assert result.pit_in <= int(12.6 / 2.5 + 1e-9)
+    assert sum(s.laps for s in result.stints) == 80
+
+
+def test_remaining_laps_from_clock():
+    state = RaceState(laps_done=0, remaining_sec=121.0 * 50 + 60.0, fuel_liters=100.0,
+                      pilot="B", tyre_set=1)
+    result = replan_from_state(RACE, TYRE, PILOTS, MODES[0], state)
+    assert result.remaining_laps == 50
+    assert sum(s.laps for s in result.stints) == 50
+
+
+def test_finished_race_and_unknown_pilot():
+    done = RaceState(0, 0.0, 10.0, "A", 1, remaining_laps=0)
+    result = replan_from_state(RACE, TYRE, PILOTS, MODES[0], done)
+    assert result.stints == [] and result.total_sec == 0.0
+    with pytest.raises(ValueError):
+        replan_from_state(RACE, TYRE, PILOTS, MODES[0], RaceState(0, 0.0, 10.0, "Z", 1, remaining_laps=5))
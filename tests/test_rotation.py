@@ -0,0 +1,100 @@
+import itertools
+import random
+
+from model import (
+    RaceParams, TyreParams, ConsumptionMode, Stint, _build_pilots, compute_total_race_time_sec,
+)
+from optimal import plan_stints_optimal
+from rotation import (
+    _Problem, _assignment_cost, _check, _common_range_tuples, optimize_rotation, plan_stints_rotation,
+)
+
+
+INF = float("inf")
+MODE = ConsumptionMode(by_fuel_per_lap=True)
+
+
+def _small_case(rng):
+    m, n = rng.randint(2, 4), rng.randint(1, 7)
+    pilots = [(f"P{i}", 100.0 + rng.choice([0, 0.3, 1, 2.5]) * i, 2.5, 2.2, 0.0, 0.0) for i in range(m)]
+    stints = [Stint(pilot="P0", laps=rng.choice([3, 5, 10, 11, 12]), fuel_start=0,
+                    tyre_set=k // 2 + 1, eco=False) for k in range(n)]
+    race = RaceParams(duration_hours=1, avg_lap_sec=100, tank_liters=60, pit_refuel_sec=30,
+                      pit_tyre_sec=45, driver_change_sec=rng.choice([0.0, 15.0, 200.0]),
+                      max_continuous_sec=rng.choice([0, 1200, 2500, 3600]),
+                      min_drive_sec=rng.choice([0, 0, 500, 1500]),
+                      max_stints_per_pilot=rng.choice([0, 2, 3]))
+    return race, _build_pilots(pilots), stints
+
+
+def test_rotation_matches_brute_force():
+    rng = random.Random(5)
+    for _ in range(300):
+        race, pilots, stints = _small_case(rng)
+        prob = _Problem(race, pilots, stints, MODE)
+        best = min((_assignment_cost(prob, a) for a in itertools.product(range(prob.m), repeat=prob.n)
+                    if _check(prob, a)), default=INF)
+        result = optimize_rotation(race, pilots, stints, MODE, time_limit_sec=None)
+        got = result.total_sec if result is not None else INF
+        assert got == best or abs(got - best) < 1e-6
+        if result is not None:
+            assert result.optimal
+
+
+def _ten_pilots(**limits):
+    rng = random.Random(0)
+    pilot_tuples = [(f"P{i}", 100.0 + rng.uniform(0, 3), 2.5, 2.2, 0.0, 0.0) for i in range(10)]
+    race = RaceParams(duration_hours=40 * 24 * 101 / 3600, avg_lap_sec=101.0, tank_liters=60.0,
+                      pit_refuel_sec=30, pit_tyre_sec=45, driver_change_sec=15,
+                      max_stints_per_pilot=4, **limits)
+    tyre = TyreParams(sets=21)
+    stints = plan_stints_optimal(race, tyre, _common_range_tuples(pilot_tuples), MODE)
+    return race, tyre, pilot_tuples, stints
+
+
+def test_ten_pilots_max_stints_proved_optimal():
+    race, _tyre, pilot_tuples, stints = _ten_pilots()
+    result = optimize_rotation(race, _build_pilots(pilot_tuples), stints, MODE,
+                               max_nodes=20000, time_limit_sec=None)
+    assert result is not None and result.optimal
+
+
+def test_plan_reports_unfinished_search():
+    race, tyre, pilot_tuples, _stints = _ten_pilots()
+    plan = plan_stints_rotation(race, tyre, pilot_tuples, MODE)
+    assert plan.optimal
+    race, tyre, pilot_tuples, _stints = _ten_pilots(min_drive_sec=7200, max_continuous_sec=4900)
+    stopped = plan_stints_rotation(race, tyre, pilot_tuples, MODE, should_stop=lambda: True)
+    assert not stopped.optimal
+
+
+def _mixed_fuel_case(rng, **limits):
+    pilot_tuples = [(f"P{i}", 100.0 + rng.uniform(0, 2), rng.uniform(2.4, 3.2), rng.uniform(2.0, 2.4),
+                     0.0, 0.0) for i in range(rng.randint(2, 4))]
+    race = RaceParams(duration_hours=rng.choice([3.0, 6.0]), avg_lap_sec=100.0, tank_liters=60.0,
+                      pit_refuel_sec=30.0, pit_tyre_sec=45.0, driver_change_sec=15.0, **limits)
+    return race, TyreParams(sets=rng.randint(2, 6)), pilot_tuples
+
+
+def _race_sec(race, pilot_tuples, stints):
+    return compute_total_race_time_sec(race, _build_pilots(pilot_tuples), stints)
+
+
+def test_unconstrained_rotation_is_optimal():
+    rng = random.Random(11)
+    for _ in range(30):
+        race, tyre, pilot_tuples = _mixed_fuel_case(rng)
+        plan = plan_stints_rotation(race, tyre, pilot_tuples, MODE)
+        best = plan_stints_optimal(race, tyre, pilot_tuples, MODE)
+        assert plan.optimal
+        assert _race_sec(race, pilot_tuples, plan) <= _race_sec(race, pilot_tuples, best) + 1e-6
+
+
+def test_loose_limits_no_worse_than_optimal():
+    # лимит стинтов, который план optimal и так выполняет: ротация не хуже
+    rng = random.Random(12)
+    for _ in range(20):
+        race, tyre, pilot_tuples = _mixed_fuel_case(rng, max_stints_per_pilot=50)
+        plan = plan_stints_rotation(race, tyre, pilot_tuples, MODE)
+        best = plan_stints_optimal(race, tyre, pilot_tuples, MODE)
+        assert _race_sec(race, pilot_tuples, plan) <= _race_sec(race, pilot_tuples, best) + 1e-6
@@ -0,0 +1,37 @@
+import asyncio
+import socket
+
+from service import StrategyService, serve
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _exchange(port: int, request: bytes) -> bytes:
+    service = StrategyService(workers=1)
+    ready = asyncio.Event()
+    server = asyncio.ensure_future(serve(service, "127.0.0.1", port, ready))
+    await ready.wait()
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(request)
+        await writer.drain()
+        # сервис должен сам закрыть соединение — иначе read() не вернётся
+        data = await asyncio.wait_for(reader.read(), timeout=5)
+        writer.close()
+        return data
+    finally:
+        server.cancel()
+        service.close()
+
+
+def test_bad_content_length_is_400_and_closes():
+    for value in (b"abc", b"-5"):
+        request = b"POST /plan HTTP/1.1\r\nContent-Length: " + value + b"\r\n\r\n{}"
+        response = asyncio.run(_exchange(_free_port(), request))
+        head = response.split(b"\r\n\r\n", 1)[0]
+        assert head.startswith(b"HTTP/1.1 400 ")
+        assert b"Connection: close" in head
@@ -0,0 +1,28 @@
+import random
+
+from strategy_core import (
+    PilotSimple, RaceSimple, TyreSimple, _assign_tyres_simple, build_stints_closed_form,
+)
+
+
+def _min_stints_by_loop(total_laps, set_eco, sets):
+    n = 1
+    while sum(set_eco[t] for t in _assign_tyres_simple(n, TyreSimple(sets=sets))) < total_laps:
+        n += 1
+    return n
+
+
+def test_closed_form_stint_count_is_minimal():
+    rng = random.Random(1)
+    for _ in range(500):
+        sets = rng.randint(1, 6)
+        pilots = []
+        for i in range(rng.randint(1, 4)):
+            push = rng.randint(1, 30)
+            pilots.append(PilotSimple(f"P{i}", 40.0, push, push + rng.randint(0, 10)))
+        race = RaceSimple(total_laps=rng.randint(1, 600), pit_refuel_sec=30.0,
+                          pit_tyre_sec=45.0, driver_change_sec=10.0)
+        stints = build_stints_closed_form(race, TyreSimple(sets=sets), pilots)
+        set_eco = [pilots[t % len(pilots)].laps_eco for t in range(sets)]
+        assert len(stints) == _min_stints_by_loop(race.total_laps, set_eco, sets)
+        assert sum(s.laps for s in stints) == race.total_laps
@@ -0,0 +1,54 @@
+import itertools
+from dataclasses import replace
+
+import pytest
+
+from model import (
+    RaceParams, TyreParams, ConsumptionMode,
+    plan_stints, _build_pilots, compute_total_race_time_sec,
+)
+from optimal import plan_stints_optimal
+from sweep import SweepAxis, run_sweep
+
+
+RACE = RaceParams(duration_hours=6.0, avg_lap_sec=100.0, tank_liters=60.0,
+                  pit_refuel_sec=30.0, pit_tyre_sec=45.0, driver_change_sec=20.0)
+TYRE = TyreParams(sets=4)
+PILOTS = [
+    ("A", 100.0, 3.0, 2.6, 0.0, 0.0),
+    ("B", 101.5, 2.9, 2.4, 0.0, 0.0),
+]
+MODE = ConsumptionMode(by_fuel_per_lap=True)
+
+
+def _expected(planner, axes, combo):
+    race, tyre = RACE, TYRE
+    for a, v in zip(axes, combo):
+        if a.field == "sets":
+            tyre = replace(tyre, sets=int(v))
+        else:
+            race = replace(race, **{a.field: float(v)})
+    plan = planner(race, tyre, PILOTS, MODE)
+    return compute_total_race_time_sec(race, _build_pilots(PILOTS), plan), len(plan)
+
+
+@pytest.mark.parametrize("planner", [plan_stints, plan_stints_optimal])
+@pytest.mark.parametrize("axes", [
+    [SweepAxis("pit_refuel_sec", [10.0, 30.0, 90.0])],
+    [SweepAxis("pit_tyre_sec", [20.0, 120.0]), SweepAxis("tank_liters", [50.0, 70.0])],
+    [SweepAxis("sets", [2, 5]), SweepAxis("driver_change_sec", [0.0, 60.0]),
+     SweepAxis("pit_refuel_sec", [15.0, 60.0])],
+])
+def test_sweep_matches_race_time_point_by_point(planner, axes):
+    result = run_sweep(RACE, TYRE, PILOTS, MODE, axes, planner=planner, workers=1)
+    assert result.total_sec.shape == tuple(len(a.values) for a in axes)
+    for idx in itertools.product(*[range(len(a.values)) for a in axes]):
+        total, stints = _expected(planner, axes, [a.values[i] for a, i in zip(axes, idx)])
+        assert result.total_sec[idx] == pytest.approx(total, abs=1e-6)
+        assert result.stints[idx] == stints
+
+
+def test_sweep_pit_axis_changes_optimal_total():
+    axis = SweepAxis("pit_refuel_sec", [10.0, 30.0, 90.0])
+    result = run_sweep(RACE, TYRE, PILOTS, MODE, [axis], planner=plan_stints_optimal, workers=1)
+    assert len(set(result.total_sec.tolist())) == 3
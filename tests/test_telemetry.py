@@ -0,0 +1,56 @@
+import math
+
+import pytest
+
+from model import ConsumptionMode, Stint
+from telemetry import LapSample, TelemetryState, parse_line
+
+
+PILOTS = [("A", 120.0, 3.0, 2.6, 0.0, 0.0)]
+FUEL = ConsumptionMode(by_fuel_per_lap=True)
+LAPS = ConsumptionMode(by_fuel_per_lap=False)
+
+
+def _lap(used, eco=None, lap=120.0):
+    return LapSample("A", lap, used, math.nan, eco)
+
+
+def test_parse_line_reads_lap_mode():
+    assert parse_line('{"pilot": "A", "lap_time_sec": 120, "fuel_used": 2.6, "mode": "eco"}').eco is True
+    assert parse_line('{"pilot": "A", "lap_time_sec": 120, "eco": false}').eco is False
+    assert parse_line('{"pilot": "A", "lap_time_sec": 120}').eco is None
+    with pytest.raises(ValueError):
+        parse_line('{"pilot": "A", "lap_time_sec": 120, "mode": "quali"}')
+
+
+@pytest.mark.parametrize("from_log", [True, False])
+def test_planned_eco_laps_are_not_drift(from_log):
+    plan = [Stint("A", 5, 15.0, 1, False), Stint("A", 5, 13.0, 1, True)]
+    state = TelemetryState(PILOTS, FUEL, 100.0, plan=None if from_log else plan)
+    for k in range(10):
+        eco = k >= 5
+        assert not state.update(_lap(2.6 if eco else 3.0, eco if from_log else None))
+    est = state.estimates()["A"]
+    assert est.fuel_per_lap == pytest.approx(3.0)
+    assert est.fuel_eco_per_lap == pytest.approx(2.6)
+
+
+def test_push_and_eco_rebase_separately():
+    state = TelemetryState(PILOTS, FUEL, 100.0)
+    for _ in range(3):
+        state.update(_lap(3.3, eco=False))
+    for _ in range(3):
+        state.update(_lap(2.5, eco=True))
+    name, lap, push, eco, _lp, _le = state.pilot_tuples()[0]
+    assert push == pytest.approx(3.3)
+    assert eco == pytest.approx(2.5)
+
+
+def test_laps_per_tank_rebase_keeps_precision():
+    state = TelemetryState([("A", 120.0, 0.0, 0.0, 35.0, 40.0)], LAPS, 100.0)
+    for _ in range(3):
+        state.update(_lap(100.0 / 32.9, eco=False))
+    _name, _lap_sec, _fp, _fe, laps_push, laps_eco = state.pilot_tuples()[0]
+    assert laps_push == pytest.approx(32.9)
+    assert math.floor(laps_push) == 32
+    assert laps_eco == pytest.approx(32.9 * 40.0 / 35.0)
@@ -0,0 +1,48 @@
+from model import RaceParams, TyreParams, ConsumptionMode, _build_pilots, plan_stints
+from optimal import plan_stints_optimal
+from timeline import build_timeline, exact_total_laps
+from tyres import LapTimeTables
+
+
+RACE = RaceParams(duration_hours=24.0, avg_lap_sec=40.0, tank_liters=30.0,
+                  pit_refuel_sec=30.0, pit_tyre_sec=45.0, driver_change_sec=10.0)
+TYRE = TyreParams(sets=10)
+PILOTS = [(name, 40.0 + i, 1.0, 0.8, 0.0, 0.0) for i, name in enumerate("ABCD")]
+MODE = ConsumptionMode(by_fuel_per_lap=True)
+
+
+def test_exact_total_laps_reports_progress():
+    progress = []
+    n, stints = exact_total_laps(RACE, TYRE, PILOTS, MODE, planner=plan_stints_optimal,
+                                 on_progress=lambda fraction, _plan: progress.append(fraction))
+    assert progress and progress == sorted(progress)
+    assert 0.0 < progress[-1] < 1.0
+    assert sum(s.laps for s in stints) == n
+
+
+def test_exact_total_laps_stops_between_passes():
+    passes = []
+
+    def planner(race, tyre, pilot_tuples, mode, total_laps=None, should_stop=None):
+        passes.append(should_stop)
+        return plan_stints_optimal(race, tyre, pilot_tuples, mode, total_laps=total_laps,
+                                   should_stop=should_stop)
+
+    n, stints = exact_total_laps(RACE, TYRE, PILOTS, MODE, planner=planner, should_stop=lambda: True)
+    # первый проход нужен, чтобы было что вернуть; дальше — сразу остановка
+    assert len(passes) == 1 and passes[0] is not None
+    assert stints
+
+
+def test_laps_per_tank_burn_matches_tyres():
+    # 20.5 круга на баке — стинт 20 кругов, бак кончается ровно на последнем
+    race = RaceParams(duration_hours=3.0, avg_lap_sec=100.0, tank_liters=60.0,
+                      pit_refuel_sec=30.0, pit_tyre_sec=45.0, driver_change_sec=10.0)
+    pilot_tuples = [("A", 100.0, 0.0, 0.0, 20.5, 22.5)]
+    mode = ConsumptionMode(by_fuel_per_lap=False)
+    pilots = _build_pilots(pilot_tuples)
+    stints = plan_stints(race, TyreParams(sets=4), pilot_tuples, mode)
+    tl = build_timeline(race, pilots, stints, mode)
+    tables = LapTimeTables(race, TyreParams(sets=4), pilots, mode, 100)
+    assert tl.fuel_per_lap[0] == tables.burn[0][0] == 3.0
+    assert abs(tl.fuel_start[stints[0].laps - 1] - tl.fuel_per_lap[0]) < 1e-9
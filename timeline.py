@@ -0,0 +1,296 @@
+import inspect
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from lap_profile import delta_at, stint_lap_times
+from model import (
+    RaceParams, TyreParams, ConsumptionMode, Pilot, Stint,
+    plan_stints, _build_pilots, _calc_total_laps, _stint_fuel_rate,
+)
+
+
+class LapRecord(NamedTuple):
+    lap: int                    # номер круга с 1
+    stint: int                  # номер стинта с 0
+    pilot: str
+    tyre_set: int
+    tyre_age: int               # кругов на комплекте до этого круга
+    eco: bool
+    fuel_start: float           # л в баке на старте круга
+    fuel_end: float             # л в баке на финише круга
+    pit_sec: float              # пит-стоп перед кругом (0, если его нет)
+    lap_time_sec: float
+    end_sec: float              # время гонки на финише круга, включая пит-стопы
+    under_clock: bool           # круг закончен до флага (duration_hours)
+
+
+@dataclass
+class Timeline:
+    """
+    Покруговая раскладка плана в колонках NumPy — без объекта на круг.
+    pilot — индекс в списке pilots.
+    """
+    stint: np.ndarray           # int16
+    pilot: np.ndarray           # int16
+    tyre_set: np.ndarray        # int16
+    tyre_age: np.ndarray        # int32
+    eco: np.ndarray             # bool
+    fuel_per_lap: np.ndarray    # float64, номинальный расход
+    fuel_start: np.ndarray      # float64
+    pit_sec: np.ndarray         # float64
+    lap_time_sec: np.ndarray    # float64
+    end_sec: np.ndarray         # float64
+    stint_first_lap: np.ndarray # int64, индекс первого круга каждого непустого стинта
+    stint_fuel_loaded: np.ndarray  # float64, топливо на старте этих стинтов
+    race_sec: float
+
+    def __len__(self) -> int:
+        return len(self.lap_time_sec)
+
+    @property
+    def fuel_end(self) -> np.ndarray:
+        return self.fuel_start - self.fuel_per_lap
+
+    @property
+    def under_clock(self) -> np.ndarray:
+        return self.end_sec <= self.race_sec
+
+    def laps_under_clock(self) -> int:
+        """Сколько кругов плана закончено до флага (end_sec возрастает — бинпоиск)."""
+        return int(np.searchsorted(self.end_sec, self.race_sec, side="right"))
+
+
+def _stint_eco(stint) -> bool:
+    # Stint (model.py) хранит eco, StintSimple (strategy_core.py) — mode
+    if hasattr(stint, "eco"):
+        return bool(stint.eco)
+    return getattr(stint, "mode", "push") == "eco"
+
+
+def _iter_stints(race: RaceParams, pilots: Sequence[Pilot], stints: Sequence):
+    """
+    (стинт, пилот, индекс пилота, пит-стоп перед стинтом) по правилам
+    compute_total_race_time_sec: стинты с неизвестным пилотом пропускаются.
+    """
+    index = {p.name: i for i, p in enumerate(pilots)}
+    prev_tyre_set = None
+    prev_pilot_name = None
+    for i, stint in enumerate(stints):
+        p = index.get(stint.pilot)
+        if p is None:
+            continue
+        pit = 0.0
+        if i > 0:
+            pit = race.pit_refuel_sec if stint.tyre_set == prev_tyre_set else race.pit_tyre_sec
+            if stint.pilot != prev_pilot_name:
+                pit += race.driver_change_sec
+        yield stint, pilots[p], p, pit
+        prev_tyre_set = stint.tyre_set
+        prev_pilot_name = stint.pilot
+
+
+def iter_timeline(
+    race: RaceParams,
+    pilots: Sequence[Pilot],
+    stints: Sequence,
+    mode: ConsumptionMode,
+) -> Iterator[LapRecord]:
+    """
+    Ленивый поток кругов по плану (List[Stint] или List[StintSimple]).
+    Пит-стоп относится к первому кругу следующего стинта.
+    """
+    race_sec = race.duration_hours * 3600.0
+    tyre_laps = {}
+    elapsed = 0.0
+    lap_no = 0
+    pending_pit = 0.0
+
+    for k, (stint, pilot, _p, pit) in enumerate(_iter_stints(race, pilots, stints)):
+        pending_pit += pit
+        if stint.laps <= 0:
+            continue
+        eco = _stint_eco(stint)
+        per_lap = _stint_fuel_rate(race, pilot, mode, stint, eco)
+        fuel = getattr(stint, "fuel_start", race.tank_liters)
+        age = tyre_laps.get(stint.tyre_set, 0)
+
+        for _ in range(stint.laps):
+            lap_no += 1
+            pit_now, pending_pit = pending_pit, 0.0
+            lap_sec = pilot.lap_time_sec + delta_at(race.lap_profile, elapsed + pit_now)
+            elapsed += lap_sec + pit_now
+            yield LapRecord(
+                lap=lap_no,
+                stint=k,
+                pilot=pilot.name,
+                tyre_set=stint.tyre_set,
+                tyre_age=age,
+                eco=eco,
+                fuel_start=fuel,
+                fuel_end=fuel - per_lap,
+                pit_sec=pit_now,
+                lap_time_sec=lap_sec,
+                end_sec=elapsed,
+                under_clock=elapsed <= race_sec,
+            )
+            fuel -= per_lap
+            age += 1
+        tyre_laps[stint.tyre_set] = age
+
+
+def build_timeline(
+    race: RaceParams,
+    pilots: Sequence[Pilot],
+    stints: Sequence,
+    mode: ConsumptionMode,
+) -> Timeline:
+    """То же, что iter_timeline, но сразу колонками (цикл только по стинтам)."""
+    laps: List[int] = []
+    pilot_idx: List[int] = []
+    tyre_sets: List[int] = []
+    age_start: List[int] = []
+    ecos: List[bool] = []
+    lap_times: List[float] = []
+    fuel_rates: List[float] = []
+    loaded: List[float] = []
+    pits: List[float] = []
+    stint_no: List[int] = []
+    # с профилем круга времена кругов зависят от часов гонки — считаются по стинтам
+    profile_times: List[np.ndarray] = []
+    clock = 0.0
+
+    tyre_laps = {}
+    pending_pit = 0.0
+    for k, (stint, pilot, p, pit) in enumerate(_iter_stints(race, pilots, stints)):
+        pending_pit += pit
+        if stint.laps <= 0:
+            continue
+        eco = _stint_eco(stint)
+        laps.append(stint.laps)
+        pilot_idx.append(p)
+        tyre_sets.append(stint.tyre_set)
+        age_start.append(tyre_laps.get(stint.tyre_set, 0))
+        tyre_laps[stint.tyre_set] = age_start[-1] + stint.laps
+        ecos.append(eco)
+        lap_times.append(pilot.lap_time_sec)
+        if race.lap_profile:
+            clock += pending_pit
+            profile_times.append(stint_lap_times(pilot.lap_time_sec, race.lap_profile, clock, stint.laps))
+            clock += float(profile_times[-1].sum())
+        fuel_rates.append(_stint_fuel_rate(race, pilot, mode, stint, eco))
+        loaded.append(getattr(stint, "fuel_start", race.tank_liters))
+        pits.append(pending_pit)
+        pending_pit = 0.0
+        stint_no.append(k)
+
+    counts = np.array(laps, dtype=np.int64)
+    total = int(counts.sum()) if len(counts) else 0
+    first = np.zeros(len(counts), dtype=np.int64)
+    if len(counts):
+        first[1:] = np.cumsum(counts)[:-1]
+    offset = np.arange(total, dtype=np.int64) - np.repeat(first, counts)
+
+    fuel_per_lap = np.repeat(np.array(fuel_rates, dtype=np.float64), counts)
+    if profile_times:
+        lap_time = np.concatenate(profile_times)
+    else:
+        lap_time = np.repeat(np.array(lap_times, dtype=np.float64), counts)
+    pit = np.zeros(total, dtype=np.float64)
+    pit[first] = pits
+    end_sec = np.cumsum(lap_time + pit)
+
+    return Timeline(
+        stint=np.repeat(np.array(stint_no, dtype=np.int16), counts),
+        pilot=np.repeat(np.array(pilot_idx, dtype=np.int16), counts),
+        tyre_set=np.repeat(np.array(tyre_sets, dtype=np.int16), counts),
+        tyre_age=(np.repeat(np.array(age_start, dtype=np.int64), counts) + offset).astype(np.int32),
+        eco=np.repeat(np.array(ecos, dtype=bool), counts),
+        fuel_per_lap=fuel_per_lap,
+        fuel_start=np.repeat(np.array(loaded, dtype=np.float64), counts) - offset * fuel_per_lap,
+        pit_sec=pit,
+        lap_time_sec=lap_time,
+        end_sec=end_sec,
+        stint_first_lap=first,
+        stint_fuel_loaded=np.array(loaded, dtype=np.float64),
+        race_sec=race.duration_hours * 3600.0,
+    )
+
+
+def count_laps_under_clock(
+    race: RaceParams,
+    pilots: Sequence[Pilot],
+    stints: Sequence,
+    mode: ConsumptionMode,
+) -> int:
+    return build_timeline(race, pilots, stints, mode).laps_under_clock()
+
+
+def _accepted(planner: Callable[..., List[Stint]], **kwargs) -> dict:
+    # только заданные аргументы, которые планировщик принимает
+    try:
+        params = inspect.signature(planner).parameters
+    except (TypeError, ValueError):
+        return {}
+    return {k: v for k, v in kwargs.items() if v is not None and k in params}
+
+
+def exact_total_laps(
+    race: RaceParams,
+    tyre: TyreParams,
+    pilot_tuples,
+    mode: ConsumptionMode,
+    planner: Callable[..., List[Stint]] = plan_stints,
+    max_iter: int = 20,
+    on_progress: Optional[Callable[[float, Optional[List[Stint]]], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> Tuple[int, List[Stint]]:
+    """
+    Точное число кругов до флага вместо оценки _calc_total_laps
+    (которая делит длительность на среднее время круга без пит-стопов).
+
+    План на N кругов раскладывается по времени; N заменяется числом кругов,
+    закрытых до флага (если план кончился раньше флага — добавляем круги,
+    которые влезают в остаток по времени последнего круга). Повторяем до
+    неподвижной точки; при зацикливании берём наибольшее N, которое план
+    целиком успевает до флага. planner должен принимать total_laps.
+
+    on_progress и should_stop передаются планировщику, если он их принимает.
+    Проход k занимает отрезок [1 - 2^-k, 1 - 2^-(k+1)] общей доли: число
+    проходов заранее неизвестно, обычно их два-три; в конце прохода
+    on_progress получает его план. should_stop проверяется и между
+    проходами — тогда возвращается лучший из уже посчитанных.
+    """
+    pilots = _build_pilots(pilot_tuples)
+    race_sec = race.duration_hours * 3600.0
+
+    n = _calc_total_laps(race)
+    seen = {}
+    for k in range(max_iter):
+        if should_stop is not None and should_stop() and seen:
+            break
+        pass_progress = None
+        if on_progress is not None:
+            def pass_progress(fraction, partial, k=k):
+                on_progress(1.0 - 0.5 ** k * (1.0 - 0.5 * fraction), partial)
+        kwargs = _accepted(planner, on_progress=pass_progress, should_stop=should_stop)
+        stints = planner(race, tyre, pilot_tuples, mode, total_laps=n, **kwargs)
+        timeline = build_timeline(race, pilots, stints, mode)
+        done = timeline.laps_under_clock()
+        if done >= len(timeline) and len(timeline):
+            left = race_sec - float(timeline.end_sec[-1])
+            last_lap = float(timeline.lap_time_sec[-1])
+            done = len(timeline) + (int(left // last_lap) if last_lap > 0 else 0)
+        seen[n] = (done, stints)
+        if on_progress is not None:
+            on_progress(1.0 - 0.5 ** (k + 1), stints)
+        if done == n:
+            return n, stints
+        if done in seen:
+            break
+        n = done
+
+    fitting = [m for m, (done, _) in seen.items() if done >= m]
+    n = max(fitting) if fitting else min(seen)
+    return n, seen[n][1]
@@ -0,0 +1,371 @@
+"""
+Износ резины и вес топлива во времени круга.
+
+Время круга = время пилота + compound.lap_delta(возраст резины)
+            + race.fuel_sec_per_liter * топливо в баке на старте круга
+            + прибавка профиля круга (race.lap_profile) на часах гонки.
+
+LapTimeTables считаются один раз на входы: префиксные суммы износа по
+возрасту резины и расход пилотов. Время стинта из таблиц — O(1) при любом
+возрасте резины на старте, без суммирования по кругам.
+
+plan_stints_tyres берёт стинты оптимального планировщика и решает, на каких
+пит-стопах менять резину, по стоимости (ДП по точкам смены комплекта),
+а не по правилу «2–3 стинта на комплект».
+"""
+import math
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+
+from instrument import traced
+from lap_profile import profile_extra
+from model import (
+    RaceParams, TyreParams, ConsumptionMode, Pilot, Stint,
+    compute_total_race_time_sec, _build_pilots, _calc_total_laps,
+    _calc_stint_length_push, _fuel_per_lap,
+)
+from optimal import plan_stints_optimal
+
+
+INF = float("inf")
+
+
+@dataclass
+class Compound:
+    """Кривая износа: прибавка ко времени круга в зависимости от возраста резины."""
+    name: str
+    offset_sec: float = 0.0         # новая резина относительно времени круга пилота
+    deg_sec_per_lap: float = 0.0    # линейный износ, сек на круг возраста
+    deg_quad_sec: float = 0.0       # квадратичный износ, сек * возраст^2
+    cliff_lap: int = 0              # возраст, после которого резина «падает» (0 — нет)
+    cliff_sec_per_lap: float = 0.0  # доп. потеря за каждый круг после cliff_lap
+
+    def lap_delta(self, age: int) -> float:
+        """Прибавка ко времени круга, который начинается на резине возраста age."""
+        delta = self.offset_sec + self.deg_sec_per_lap * age + self.deg_quad_sec * age * age
+        if self.cliff_lap > 0 and age > self.cliff_lap:
+            delta += self.cliff_sec_per_lap * (age - self.cliff_lap)
+        return delta
+
+
+# порядок регистрации — порядок в интерфейсе; "" — без износа
+COMPOUNDS: Dict[str, Compound] = {}
+
+
+def register_compound(compound: Compound) -> Compound:
+    if compound.name in COMPOUNDS:
+        raise ValueError(f"Состав {compound.name} уже зарегистрирован")
+    COMPOUNDS[compound.name] = compound
+    return compound
+
+
+def get_compound(name: str) -> Optional[Compound]:
+    """Состав по имени; пустое имя — без износа (None)."""
+    if not name:
+        return None
+    try:
+        return COMPOUNDS[name]
+    except KeyError:
+        raise ValueError(f"Неизвестный состав резины {name}") from None
+
+
+register_compound(Compound("soft", offset_sec=-0.8, deg_sec_per_lap=0.06,
+                           deg_quad_sec=0.0008, cliff_lap=60, cliff_sec_per_lap=0.25))
+register_compound(Compound("medium", offset_sec=0.0, deg_sec_per_lap=0.035,
+                           deg_quad_sec=0.0004, cliff_lap=90, cliff_sec_per_lap=0.15))
+register_compound(Compound("hard", offset_sec=0.6, deg_sec_per_lap=0.02,
+                           deg_quad_sec=0.0002, cliff_lap=130, cliff_sec_per_lap=0.1))
+
+
+class LapTimeTables:
+    """
+    Таблицы времени стинтов на одни входы.
+
+    wear[a] — суммарная прибавка износа за круги возраста 0..a-1, поэтому
+    k кругов с резиной возраста a стоят wear[a + k] - wear[a]. Топливо
+    убывает по кругам линейно, его вклад — арифметическая прогрессия.
+    Время стинта не зависит от номера комплекта, только от возраста резины;
+    с профилем круга — ещё от часов гонки на старте стинта (start_sec), внутри
+    стинта часы идут по времени пилота с прибавкой профиля.
+    """
+
+    def __init__(self, race: RaceParams, tyre: TyreParams, pilots: List[Pilot],
+                 mode: ConsumptionMode, max_age: int):
+        self.race = race
+        self.compound = get_compound(tyre.compound)
+        self.pilots = pilots
+        self.index = {p.name: i for i, p in enumerate(pilots)}
+        self.lap_time = [p.lap_time_sec for p in pilots]
+        self.burn = [
+            (_fuel_per_lap(race, p, mode, False), _fuel_per_lap(race, p, mode, True))
+            for p in pilots
+        ]
+        self.full_tank = not mode.by_fuel_per_lap
+        self.fuel_weight = race.fuel_sec_per_liter
+        self.eco_loss = race.eco_lap_loss_sec
+        self.profile = race.lap_profile
+
+        wear = [0.0] * (max_age + 1)
+        if self.compound is not None:
+            for a in range(max_age):
+                wear[a + 1] = wear[a] + self.compound.lap_delta(a)
+        self.wear = wear
+
+    def _wear(self, age: int, laps: int) -> float:
+        end = age + laps
+        if end >= len(self.wear):
+            # резина старше, чем считали при построении, — достраиваем таблицу
+            wear = self.wear
+            for a in range(len(wear) - 1, end):
+                wear.append(wear[a] + (self.compound.lap_delta(a) if self.compound else 0.0))
+        return self.wear[end] - self.wear[age]
+
+    def stint_time(self, pilot: int, laps: int, age: int, eco: bool,
+                   fuel_start: Optional[float] = None, target: float = 0.0,
+                   start_sec: float = 0.0) -> float:
+        """
+        Время laps кругов пилота pilot на резине возраста age (без пит-стопа).
+        target — целевой расход л/круг (Stint.fuel_per_lap), 0 — по флагу eco.
+        start_sec — часы гонки на старте стинта, нужны только профилю круга.
+        """
+        if laps <= 0:
+            return 0.0
+        total = laps * self.lap_time[pilot] + self._wear(age, laps)
+        if self.profile:
+            total += float(profile_extra(self.lap_time[pilot], self.profile, start_sec, laps))
+        push, eco_burn = self.burn[pilot]
+        burn = target if target > 0 else (eco_burn if eco else push)
+        if self.eco_loss:
+            # потеря линейна по расходу: push — ноль, полная экономия — eco_loss
+            if push > eco_burn:
+                share = min(max((push - burn) / (push - eco_burn), 0.0), 1.0)
+            else:
+                share = 1.0 if eco else 0.0
+            total += self.eco_loss * share * laps
+        if self.fuel_weight:
+            if fuel_start is None:
+                fuel_start = self.race.tank_liters if self.full_tank else laps * burn
+            carried = laps * fuel_start - burn * laps * (laps - 1) / 2.0
+            total += self.fuel_weight * carried
+        return total
+
+
+@traced("tyres.tables")
+def build_tables(race: RaceParams, tyre: TyreParams, pilots: List[Pilot],
+                 mode: ConsumptionMode, total_laps: Optional[int] = None) -> LapTimeTables:
+    if total_laps is None:
+        total_laps = _calc_total_laps(race)
+    return LapTimeTables(race, tyre, pilots, mode, max_age=max(total_laps, 0))
+
+
+def has_lap_effects(race: RaceParams, tyre: TyreParams) -> bool:
+    """Есть ли что-то кроме постоянного времени круга пилота."""
+    return bool(tyre.compound) or race.fuel_sec_per_liter != 0.0 or race.eco_lap_loss_sec != 0.0
+
+
+def compute_total_race_time_with_tyres(
+    race: RaceParams,
+    tyre: TyreParams,
+    pilots: List[Pilot],
+    stints: List[Stint],
+    mode: ConsumptionMode,
+    tables: Optional[LapTimeTables] = None,
+) -> float:
+    """
+    compute_total_race_time_sec с износом резины, весом топлива и потерей в экономии.
+    Возраст резины копится по номеру комплекта, пит-стопы и смены пилота —
+    по тем же правилам.
+    """
+    if not stints or not pilots:
+        return 0.0
+    if tables is None:
+        tables = build_tables(race, tyre, pilots, mode, sum(s.laps for s in stints))
+
+    ages: Dict[int, int] = {}
+    total = 0.0
+    prev_tyre_set = None
+    prev_pilot_name = None
+    for i, stint in enumerate(stints):
+        p = tables.index.get(stint.pilot)
+        if p is None:
+            continue
+        pit = 0.0
+        if i > 0:
+            pit = race.pit_refuel_sec if stint.tyre_set == prev_tyre_set else race.pit_tyre_sec
+            if stint.pilot != prev_pilot_name:
+                pit += race.driver_change_sec
+        age = ages.get(stint.tyre_set, 0)
+        total += tables.stint_time(p, stint.laps, age, stint.eco, stint.fuel_start,
+                                   stint.fuel_per_lap, total + pit)
+        ages[stint.tyre_set] = age + stint.laps
+        total += pit
+        prev_tyre_set = stint.tyre_set
+        prev_pilot_name = stint.pilot
+    return total
+
+
+@traced("tyres.race_time")
+def race_time_sec(race: RaceParams, tyre: TyreParams, pilots: List[Pilot],
+                  stints: List[Stint], mode: ConsumptionMode) -> float:
+    """Итоговое время гонки: с износом, если он задан, иначе compute_total_race_time_sec."""
+    if has_lap_effects(race, tyre):
+        return compute_total_race_time_with_tyres(race, tyre, pilots, stints, mode)
+    return compute_total_race_time_sec(race, pilots, stints)
+
+
+def _stint_clocks(race: RaceParams, tables: LapTimeTables, stints: List[Stint]) -> List[float]:
+    # часы старта стинтов, если все стопы — дозаправки без износа; нужны профилю круга
+    clocks = []
+    clock = 0.0
+    for j, s in enumerate(stints):
+        p = tables.index[s.pilot]
+        if j > 0:
+            clock += race.pit_refuel_sec
+            if s.pilot != stints[j - 1].pilot:
+                clock += race.driver_change_sec
+        clocks.append(clock)
+        clock += s.laps * tables.lap_time[p]
+        if tables.profile:
+            clock += float(profile_extra(tables.lap_time[p], tables.profile, clocks[-1], s.laps))
+    return clocks
+
+
+def _segment_costs(race: RaceParams, tables: LapTimeTables,
+                   stints: List[Stint]) -> List[List[float]]:
+    """
+    seg[i][j] — стинты i..j-1 на одном новом комплекте: круги с износом
+    плюс дозаправки внутри отрезка. O(n^2) вызовов stint_time, каждый O(1).
+    С профилем круга часы старта стинта берутся по _stint_clocks: от выбора
+    смен резины они сдвигаются на секунды, итог плана считает race_time_sec.
+    """
+    n = len(stints)
+    clocks = _stint_clocks(race, tables, stints) if tables.profile else [0.0] * n
+    seg = [[INF] * (n + 1) for _ in range(n)]
+    for i in range(n):
+        age = 0
+        cost = 0.0
+        for j in range(i, n):
+            s = stints[j]
+            p = tables.index[s.pilot]
+            if j > i:
+                cost += race.pit_refuel_sec
+            cost += tables.stint_time(p, s.laps, age, s.eco, s.fuel_start, s.fuel_per_lap,
+                                      clocks[j])
+            age += s.laps
+            seg[i][j + 1] = cost
+    return seg
+
+
+@traced("tyres.assign_changes")
+def assign_tyre_changes(race: RaceParams, tyre: TyreParams, pilots: List[Pilot],
+                        stints: List[Stint], mode: ConsumptionMode,
+                        tables: Optional[LapTimeTables] = None) -> Tuple[List[Stint], float]:
+    """
+    Точки смены резины на заданной последовательности стинтов.
+
+    best[s][j] — лучшее время первых j стинтов на s комплектах, переход
+    best[s][j] = min_i best[s-1][i] + pit_tyre + seg[i][j]. Смены пилотов от
+    комплектов не зависят и добавляются в конце. Возвращает стинты с новыми
+    номерами комплектов и итоговое время гонки.
+    """
+    n = len(stints)
+    if n == 0:
+        return [], 0.0
+    if tables is None:
+        tables = build_tables(race, tyre, pilots, mode, sum(s.laps for s in stints))
+    sets = min(max(tyre.sets, 1), n)
+    seg = _segment_costs(race, tables, stints)
+
+    best = [[INF] * (n + 1) for _ in range(sets + 1)]
+    parent = [[-1] * (n + 1) for _ in range(sets + 1)]
+    best[0][0] = 0.0
+    for s in range(1, sets + 1):
+        prev = best[s - 1]
+        row = best[s]
+        par = parent[s]
+        for j in range(s, n + 1):
+            for i in range(s - 1, j):
+                if prev[i] == INF:
+                    continue
+                c = prev[i] + seg[i][j] + (race.pit_tyre_sec if i > 0 else 0.0)
+                if c < row[j]:
+                    row[j] = c
+                    par[j] = i
+
+    used = min(range(1, sets + 1), key=lambda s: best[s][n])
+    total = best[used][n]
+
+    starts: List[int] = []
+    j = n
+    for s in range(used, 0, -1):
+        i = parent[s][j]
+        starts.append(i)
+        j = i
+    starts.reverse()
+
+    result: List[Stint] = []
+    set_no = 0
+    for k, st in enumerate(stints):
+        if set_no < len(starts) and starts[set_no] == k:
+            set_no += 1
+        result.append(replace(st, tyre_set=set_no))
+        if k > 0 and st.pilot != stints[k - 1].pilot:
+            total += race.driver_change_sec
+    return result, total
+
+
+@traced("planner.tyres")
+def plan_stints_tyres(
+    race: RaceParams,
+    tyre: TyreParams,
+    pilot_tuples: List[Tuple[str, float, float, float, float, float]],
+    mode: ConsumptionMode,
+    total_laps: Optional[int] = None,
+) -> List[Stint]:
+    """
+    Оптимальный план с выбором пит-стопов для смены резины по износу.
+
+    Стинты (пилоты, круги, eco) берутся у plan_stints_optimal с лимитом стинтов
+    на комплект, которого хватает на всю гонку, затем assign_tyre_changes
+    расставляет смены комплектов. Без износа и веса топлива — обычный
+    plan_stints_optimal.
+    """
+    if not has_lap_effects(race, tyre):
+        return plan_stints_optimal(race, tyre, pilot_tuples, mode, total_laps=total_laps)
+
+    pilots = _build_pilots(pilot_tuples)
+    if not pilots:
+        return []
+    if total_laps is None:
+        total_laps = _calc_total_laps(race)
+    if total_laps <= 0:
+        return []
+
+    # скелет стинтов без привязки к комплектам: одного комплекта на всё хватает
+    min_cap = min((c for c in (_calc_stint_length_push(race, p, mode) for p in pilots) if c > 0),
+                  default=1)
+    per_set = max(3, math.ceil(total_laps / min_cap))
+    skeleton = plan_stints_optimal(race, TyreParams(sets=1, compound=tyre.compound),
+                                   pilot_tuples, mode, max_stints_per_set=per_set,
+                                   total_laps=total_laps)
+    if not skeleton:
+        return skeleton
+    tables = build_tables(race, tyre, pilots, mode, total_laps)
+    stints, _total = assign_tyre_changes(race, tyre, pilots, skeleton, mode, tables)
+    return stints
+
+
+if __name__ == "__main__":
+    race = RaceParams(duration_hours=6.0, avg_lap_sec=121.0, tank_liters=100.0,
+                      pit_refuel_sec=30.0, pit_tyre_sec=45.0, driver_change_sec=10.0,
+                      fuel_sec_per_liter=0.03)
+    mode = ConsumptionMode(by_fuel_per_lap=True)
+    pilot_tuples = [("A", 121.0, 3.0, 2.7, 0, 0), ("B", 121.5, 3.1, 2.8, 0, 0)]
+    pilots = _build_pilots(pilot_tuples)
+    for compound in ("soft", "medium", "hard"):
+        tyre = TyreParams(sets=6, compound=compound)
+        stints = plan_stints_tyres(race, tyre, pilot_tuples, mode)
+        total = compute_total_race_time_with_tyres(race, tyre, pilots, stints, mode)
+        print(compound, f"{total:.1f} с, комплектов: {max(s.tyre_set for s in stints)}")
+        for s in stints:
+            print("  ", s.pilot, s.laps, "кругов, комплект", s.tyre_set, "eco" if s.eco else "")
@@ -0,0 +1,68 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget,
+    QTableWidgetItem, QLabel, QAbstractItemView
+)
+from PyQt5.QtGui import QColor
+
+from engine import compare_planners
+from ui_sweep import _format_time
+
+
+class CompareDialog(QDialog):
+    """Все планировщики реестра на текущих входах: итоговое время и скорость расчёта."""
+
+    COLUMNS = ["Планировщик", "Время гонки", "Отставание", "Стинтов", "Eco-стинтов", "Расчёт, мс"]
+
+    def __init__(self, collect_inputs, parent=None, wrap=None):
+        super().__init__(parent)
+        self.setWindowTitle("Сравнение планировщиков")
+        self._collect_inputs = collect_inputs
+        self._wrap = wrap
+
+        layout = QVBoxLayout(self)
+
+        buttons = QHBoxLayout()
+        self.run_btn = QPushButton("Пересчитать")
+        self.run_btn.clicked.connect(self.on_run_clicked)
+        buttons.addWidget(self.run_btn)
+        self.status_label = QLabel("")
+        buttons.addWidget(self.status_label)
+        layout.addLayout(buttons)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        self.resize(700, 260)
+        self.on_run_clicked()
+
+    def on_run_clicked(self):
+        inputs = self._collect_inputs()
+        if inputs is None:
+            return
+        race, tyre, pilot_tuples, mode = inputs
+        runs = compare_planners(race, tyre, pilot_tuples, mode, wrap=self._wrap)
+
+        ok = [r.total_sec for r in runs if r.error is None and r.stints]
+        best = min(ok) if ok else 0.0
+
+        self.table.setRowCount(len(runs))
+        for row, r in enumerate(runs):
+            if r.error is not None:
+                cells = [r.label, r.error, "", "", "", f"{r.elapsed_sec * 1000:.2f}"]
+            else:
+                cells = [
+                    r.label,
+                    _format_time(r.total_sec),
+                    f"+{r.total_sec - best:.0f} с" if r.total_sec > best else "лучший",
+                    str(len(r.stints)),
+                    str(sum(1 for s in r.stints if s.eco)),
+                    f"{r.elapsed_sec * 1000:.2f}",
+                ]
+            for col, text in enumerate(cells):
+                item = QTableWidgetItem(text)
+                if r.error is None and r.stints and r.total_sec == best:
+                    item.setBackground(QColor(200, 255, 200))
+                self.table.setItem(row, col, item)
+        self.status_label.setText(f"планировщиков: {len(runs)}")
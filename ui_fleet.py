@@ -0,0 +1,225 @@
+import logging
+import traceback
+
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem,
+    QLabel, QAbstractItemView, QSpinBox, QComboBox, QTableView, QSplitter
+)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+
+from engine import PLANNERS
+from fleet import Car, car_race, plan_fleet
+from model import _build_pilots
+from ui_models import PlanTableModel
+from ui_sweep import _format_time
+
+
+log = logging.getLogger(__name__)
+
+
+class FleetThread(QThread):
+    """plan_fleet в фоне; подзадачи машин — в пуле процессов внутри потока."""
+    progress = pyqtSignal(float)
+    finished_ok = pyqtSignal(object)        # FleetPlan
+    failed = pyqtSignal(str)
+
+    def __init__(self, race, tyre, cars, mode, planner, workers, parent=None):
+        super().__init__(parent)
+        self._args = (race, tyre, cars, mode)
+        self._planner = planner
+        self._workers = workers
+
+    def run(self):
+        try:
+            result = plan_fleet(*self._args, planner=self._planner, workers=self._workers,
+                                on_progress=self.progress.emit)
+        except ValueError as e:
+            self.failed.emit(str(e))
+            return
+        except Exception:
+            self.failed.emit(traceback.format_exc())
+            return
+        self.finished_ok.emit(result)
+
+
+class FleetDialog(QDialog):
+    """
+    Несколько машин команды: общий запас комплектов (из окна) и один пит-бокс.
+    Пилоты машины — имена из таблицы пилотов окна через запятую.
+    """
+
+    CAR_COLUMNS = ["Машина", "Пилоты (через запятую)", "Бак, л"]
+    RESULT_COLUMNS = ["Машина", "Комплектов", "Время гонки", "Ожидание бокса", "Стинтов"]
+    STOP_COLUMNS = ["Начало", "Машина", "Перед стинтом", "Круг", "Ожидание, с", "Обслуживание, с"]
+
+    def __init__(self, collect_inputs, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("План команды")
+        self._collect_inputs = collect_inputs
+        self._thread = None
+        self._fleet = None
+
+        inputs = collect_inputs()
+        self._pilot_names = [p[0] for p in inputs[2]] if inputs is not None else []
+        self._tank = inputs[0].tank_liters if inputs is not None else 0.0
+
+        layout = QVBoxLayout(self)
+
+        top = QHBoxLayout()
+        top.addWidget(QLabel("Машин"))
+        self.car_count = QSpinBox()
+        self.car_count.setRange(1, 12)
+        self.car_count.valueChanged.connect(self._on_car_count_changed)
+        top.addWidget(self.car_count)
+        top.addWidget(QLabel("Планировщик"))
+        self.planner_combo = QComboBox()
+        for info in PLANNERS.values():
+            self.planner_combo.addItem(info.label, info.name)
+        self.planner_combo.setCurrentIndex(self.planner_combo.findData("optimal"))
+        top.addWidget(self.planner_combo)
+        top.addWidget(QLabel("Процессов"))
+        self.workers = QSpinBox()
+        self.workers.setRange(1, 64)
+        self.workers.setValue(4)
+        top.addWidget(self.workers)
+        self.run_btn = QPushButton("Рассчитать команду")
+        self.run_btn.clicked.connect(self.on_run_clicked)
+        top.addWidget(self.run_btn)
+        self.status_label = QLabel("")
+        top.addWidget(self.status_label, 1)
+        layout.addLayout(top)
+
+        self.car_table = QTableWidget(0, len(self.CAR_COLUMNS))
+        self.car_table.setHorizontalHeaderLabels(self.CAR_COLUMNS)
+        self.car_table.horizontalHeader().setStretchLastSection(True)
+        self.car_table.setMaximumHeight(150)
+        layout.addWidget(self.car_table)
+
+        splitter = QSplitter(Qt.Horizontal)
+        self.result_table = QTableWidget(0, len(self.RESULT_COLUMNS))
+        self.result_table.setHorizontalHeaderLabels(self.RESULT_COLUMNS)
+        self.result_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.result_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.result_table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.result_table.itemSelectionChanged.connect(self._on_car_selected)
+        splitter.addWidget(self.result_table)
+
+        self.plan_model = PlanTableModel(self)
+        self.plan_view = QTableView()
+        self.plan_view.setModel(self.plan_model)
+        self.plan_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        splitter.addWidget(self.plan_view)
+        layout.addWidget(splitter, 1)
+
+        layout.addWidget(QLabel("Пит-бокс"))
+        self.stop_table = QTableWidget(0, len(self.STOP_COLUMNS))
+        self.stop_table.setHorizontalHeaderLabels(self.STOP_COLUMNS)
+        self.stop_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        layout.addWidget(self.stop_table, 1)
+
+        self.car_count.setValue(2)
+        self.resize(1000, 720)
+
+    def _on_car_count_changed(self, count: int):
+        rows = self.car_table.rowCount()
+        self.car_table.setRowCount(count)
+        for row in range(rows, count):
+            self.car_table.setItem(row, 0, QTableWidgetItem(f"#{row + 1}"))
+            self.car_table.setItem(row, 1, QTableWidgetItem(", ".join(self._pilot_names)))
+            self.car_table.setItem(row, 2, QTableWidgetItem(f"{self._tank:g}"))
+
+    def _cars(self, pilot_tuples):
+        """Машины из таблицы; данные пилотов — из таблицы пилотов окна."""
+        by_name = {p[0]: p for p in pilot_tuples}
+        cars = []
+        for row in range(self.car_table.rowCount()):
+            cells = [self.car_table.item(row, col) for col in range(3)]
+            name = cells[0].text().strip() if cells[0] else f"#{row + 1}"
+            pilots = []
+            for pilot in (cells[1].text() if cells[1] else "").split(","):
+                pilot = pilot.strip()
+                if not pilot:
+                    continue
+                if pilot not in by_name:
+                    raise ValueError(f"{name}: нет пилота «{pilot}» в таблице пилотов")
+                pilots.append(by_name[pilot])
+            try:
+                tank = float(cells[2].text()) if cells[2] and cells[2].text().strip() else None
+            except ValueError:
+                raise ValueError(f"{name}: неверный объём бака") from None
+            cars.append(Car(name=name, pilot_tuples=pilots, tank_liters=tank))
+        return cars
+
+    def on_run_clicked(self):
+        inputs = self._collect_inputs()
+        if inputs is None:
+            return
+        race, tyre, pilot_tuples, mode = inputs
+        try:
+            cars = self._cars(pilot_tuples)
+        except ValueError as e:
+            self.status_label.setText(str(e))
+            return
+
+        thread = FleetThread(race, tyre, cars, mode, self.planner_combo.currentData(),
+                             self.workers.value(), self)
+        thread.progress.connect(lambda f: self.status_label.setText(f"расчёт… {f * 100:.0f}%"))
+        thread.finished_ok.connect(self._on_finished)
+        thread.failed.connect(self._on_failed)
+        self._thread = thread
+        self.run_btn.setEnabled(False)
+        self.status_label.setText("расчёт…")
+        thread.start()
+
+    def _on_failed(self, message: str):
+        self._thread = None
+        self.run_btn.setEnabled(True)
+        self.status_label.setText(f"ошибка: {message.strip().splitlines()[-1]}")
+        log.error("Расчёт парка машин не удался:\n%s", message)
+
+    def _on_finished(self, fleet):
+        self._thread = None
+        self.run_btn.setEnabled(True)
+        self._fleet = fleet
+        self.status_label.setText(
+            f"сумма {_format_time(fleet.total_sec)}, ожидание бокса {fleet.wait_sec:.0f} с, "
+            f"сдвигов пит-стопов: {fleet.shifts}, {fleet.elapsed_sec:.2f} с"
+        )
+
+        self.result_table.setRowCount(len(fleet.cars))
+        for row, car in enumerate(fleet.cars):
+            cells = [car.name, str(car.tyre_sets), _format_time(car.total_sec),
+                     f"{car.wait_sec:.0f} с", str(len(car.stints))]
+            for col, text in enumerate(cells):
+                self.result_table.setItem(row, col, QTableWidgetItem(text))
+
+        stops = fleet.stops()
+        self.stop_table.setRowCount(len(stops))
+        for row, stop in enumerate(stops):
+            cells = [_format_time(stop.start_sec), stop.car, str(stop.stint), str(stop.lap),
+                     f"{stop.wait_sec:.1f}", f"{stop.service_sec:.0f}"]
+            for col, text in enumerate(cells):
+                self.stop_table.setItem(row, col, QTableWidgetItem(text))
+
+        if fleet.cars:
+            self.result_table.selectRow(0)
+
+    def _on_car_selected(self):
+        row = self.result_table.currentRow()
+        inputs = self._collect_inputs()
+        if self._fleet is None or not (0 <= row < len(self._fleet.cars)) or inputs is None:
+            return
+        race, _tyre, pilot_tuples, mode = inputs
+        plan = self._fleet.cars[row]
+        try:
+            car = self._cars(pilot_tuples)[row]
+        except (ValueError, IndexError):
+            # таблицу машин поменяли после расчёта — план без покругового вида
+            self.plan_model.set_plan(plan.stints)
+            return
+        self.plan_model.set_plan(plan.stints, car_race(race, car), _build_pilots(car.pilot_tuples), mode)
+
+    def closeEvent(self, event):
+        if self._thread is not None:
+            self._thread.wait()
+        super().closeEvent(event)
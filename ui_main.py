@@ -1,15 +1,40 @@
+import logging
+import os
+
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QFormLayout,
     QDoubleSpinBox, QSpinBox, QPushButton, QTableWidget,
     QTableWidgetItem, QAbstractItemView, QLabel, QTimeEdit,
-    QRadioButton, QButtonGroup
+    QRadioButton, QButtonGroup, QComboBox, QProgressBar, QCheckBox,
+    QTableView, QHeaderView, QLineEdit, QFileDialog
 )
-from PyQt5.QtCore import QTime
-from PyQt5.QtGui import QColor
+from PyQt5.QtCore import QTime, QThreadPool, QTimer
+import instrument
+from instrument import span, traced
 from model import (
-    plan_stints, RaceParams, TyreParams,
-    _build_pilots, compute_total_race_time_sec, ConsumptionMode
+    RaceParams, TyreParams, ConsumptionMode, _build_pilots
 )
+from engine import PLANNERS
+from ui_worker import CalcJob
+from incremental import IncrementalPlanner
+from cache import PlanCache
+from ui_sweep import SweepDialog
+from ui_compare import CompareDialog
+from ui_replan import ReplanDialog
+from ui_pareto import ParetoDialog
+from ui_fleet import FleetDialog
+from pareto import apply_params
+from ui_telemetry import TelemetryThread
+from tyres import COMPOUNDS
+from lap_profile import format_profile, parse_profile
+from library import Session, load_session, save_session
+from scenario import Scenario
+from ui_models import PlanTableModel, GRANULARITY_STINTS, GRANULARITY_LAPS
+
+
+PLAN_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".race_calc", "plan_cache.json")
+
+log = logging.getLogger(__name__)
 
 
 class MainWindow(QMainWindow):
@@ -17,9 +42,17 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.setWindowTitle("Race Strategy Calculator")
 
+        # планы прошлых сессий
+        self.plan_cache = PlanCache(path=PLAN_CACHE_PATH)
+        self.plan_cache.load()
+
         central = QWidget()
         self.setCentralWidget(central)
 
+        file_menu = self.menuBar().addMenu("Файл")
+        file_menu.addAction("Открыть сессию…", self.on_open_session)
+        file_menu.addAction("Сохранить сессию…", self.on_save_session)
+
         main_layout = QVBoxLayout(central)
 
         # ---------- Параметры гонки ----------
@@ -38,6 +71,29 @@ class MainWindow(QMainWindow):
         self.tyre_sets = QSpinBox()
         self.tyre_sets.setRange(1, 50)
 
+        # Износ резины и вес топлива (tyres.py)
+        self.compound_combo = QComboBox()
+        self.compound_combo.addItem("без износа", "")
+        for name in COMPOUNDS:
+            self.compound_combo.addItem(name, name)
+
+        self.fuel_weight = QDoubleSpinBox()
+        self.fuel_weight.setSuffix(" с/л")
+        self.fuel_weight.setDecimals(3)
+        self.fuel_weight.setSingleStep(0.005)
+        self.fuel_weight.setRange(0, 1)
+
+        # Цена экономии для непрерывного расхода (fuel_target.py)
+        self.eco_loss = QDoubleSpinBox()
+        self.eco_loss.setSuffix(" с")
+        self.eco_loss.setDecimals(2)
+        self.eco_loss.setSingleStep(0.1)
+        self.eco_loss.setRange(0, 30)
+
+        # Профиль времени круга по часам гонки (lap_profile.py)
+        self.lap_profile_edit = QLineEdit()
+        self.lap_profile_edit.setPlaceholderText("ч:мм ±сек; например 8:00 +2.5; 14:00 0")
+
         # Кол-во пилотов
         self.pilot_count_spin = QSpinBox()
         self.pilot_count_spin.setRange(1, 10)
@@ -61,11 +117,32 @@ class MainWindow(QMainWindow):
         race_form.addRow("Длительность гонки (ч:мин)", self.race_time_edit)
         race_form.addRow("Объём бака", self.tank)
         race_form.addRow("Кол-во комплектов шин", self.tyre_sets)
+        race_form.addRow("Состав резины", self.compound_combo)
+        race_form.addRow("Потеря на круге за литр топлива", self.fuel_weight)
+        race_form.addRow("Потеря круга в экономии", self.eco_loss)
+        race_form.addRow("Профиль круга по времени гонки", self.lap_profile_edit)
         race_form.addRow("Кол-во пилотов", self.pilot_count_spin)
         race_form.addRow("Пит-стоп дозаправка (м:с)", self.pit_refuel_time)
         race_form.addRow("Пит-стоп со сменой резины (м:с)", self.pit_tyre_time)
         race_form.addRow("Смена пилота (м:с)", self.driver_change_time)
 
+        # Регламент по пилотам (0 — без ограничения), учитывает планировщик с ротацией
+        self.max_continuous_time = QTimeEdit()
+        self.max_continuous_time.setDisplayFormat("HH:mm")
+        self.max_continuous_time.setTime(QTime(0, 0))
+
+        self.min_drive_time = QTimeEdit()
+        self.min_drive_time.setDisplayFormat("HH:mm")
+        self.min_drive_time.setTime(QTime(0, 0))
+
+        self.max_stints_spin = QSpinBox()
+        self.max_stints_spin.setRange(0, 100)
+        self.max_stints_spin.setSpecialValueText("без ограничения")
+
+        race_form.addRow("Макс. за рулём подряд (ч:мин)", self.max_continuous_time)
+        race_form.addRow("Мин. время пилота за гонку (ч:мин)", self.min_drive_time)
+        race_form.addRow("Макс. стинтов на пилота", self.max_stints_spin)
+
         main_layout.addLayout(race_form)
 
         # ---------- Режим ввода расхода ----------
@@ -113,22 +190,240 @@ class MainWindow(QMainWindow):
 
         # ---------- Кнопка расчёта ----------
         buttons_layout = QHBoxLayout()
+        self.solver_combo = QComboBox()
+        for info in PLANNERS.values():
+            self.solver_combo.addItem(info.label, IncrementalPlanner(info.func, cache=self.plan_cache))
+        buttons_layout.addWidget(self.solver_combo)
+
         self.calc_btn = QPushButton("Рассчитать стратегию")
         self.calc_btn.clicked.connect(self.on_calc_clicked)
         buttons_layout.addWidget(self.calc_btn)
+
+        self.cancel_btn = QPushButton("Отмена")
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.clicked.connect(self.on_cancel_clicked)
+        buttons_layout.addWidget(self.cancel_btn)
+
+        self.calc_progress = QProgressBar()
+        self.calc_progress.setRange(0, 100)
+        self.calc_progress.setValue(0)
+        buttons_layout.addWidget(self.calc_progress)
+
+        self.auto_calc_check = QCheckBox("Авто-пересчёт")
+        buttons_layout.addWidget(self.auto_calc_check)
+
+        self.exact_laps_check = QCheckBox("Круги по часам с пит-стопами")
+        self.exact_laps_check.setChecked(True)
+        buttons_layout.addWidget(self.exact_laps_check)
+
+        # разбивка последнего расчёта по этапам — в строке состояния
+        self.profile_check = QCheckBox("Замер этапов")
+        self.profile_check.setChecked(instrument.enabled())
+        self.profile_check.toggled.connect(self._on_profile_toggled)
+        buttons_layout.addWidget(self.profile_check)
+        self._profile_mark = 0
+
+        self.sweep_btn = QPushButton("Перебор параметров…")
+        self.sweep_btn.clicked.connect(self.on_sweep_clicked)
+        buttons_layout.addWidget(self.sweep_btn)
+
+        self.compare_btn = QPushButton("Сравнить планировщики…")
+        self.compare_btn.clicked.connect(self.on_compare_clicked)
+        buttons_layout.addWidget(self.compare_btn)
+
+        self.replan_btn = QPushButton("Пересчёт по ходу гонки…")
+        self.replan_btn.clicked.connect(self.on_replan_clicked)
+        buttons_layout.addWidget(self.replan_btn)
+
+        self.pareto_btn = QPushButton("Парето-фронт…")
+        self.pareto_btn.clicked.connect(self.on_pareto_clicked)
+        buttons_layout.addWidget(self.pareto_btn)
+
+        self.fleet_btn = QPushButton("Команда машин…")
+        self.fleet_btn.clicked.connect(self.on_fleet_clicked)
+        buttons_layout.addWidget(self.fleet_btn)
         main_layout.addLayout(buttons_layout)
 
-        # ---------- Таблица результата стинтов ----------
-        self.stints_table = QTableWidget(0, 4)
-        self.stints_table.setHorizontalHeaderLabels(
-            ["Пилот", "Круги в стинте", "Стартовое топливо, л", "Комплект шин"]
+        # ---------- Телеметрия: лог кругов -> пилоты -> пересчёт ----------
+        telemetry_layout = QHBoxLayout()
+        telemetry_layout.addWidget(QLabel("Телеметрия"))
+        self.telemetry_source = QComboBox()
+        self.telemetry_source.addItem("лог-файл", "file")
+        self.telemetry_source.addItem("TCP-порт", "port")
+        telemetry_layout.addWidget(self.telemetry_source)
+        self.telemetry_target = QLineEdit()
+        self.telemetry_target.setPlaceholderText("путь к логу или номер порта")
+        telemetry_layout.addWidget(self.telemetry_target)
+        self.telemetry_btn = QPushButton("Старт")
+        self.telemetry_btn.clicked.connect(self.on_telemetry_clicked)
+        telemetry_layout.addWidget(self.telemetry_btn)
+        self.telemetry_label = QLabel("")
+        telemetry_layout.addWidget(self.telemetry_label)
+        main_layout.addLayout(telemetry_layout)
+        self._telemetry = None
+
+        # фоновый расчёт: новый клик отменяет незавершённый
+        self._calc_pool = QThreadPool(self)
+        self._calc_job = None
+        self._calc_job_id = 0
+
+        # ---------- Таблица результата: стинты или круги ----------
+        view_layout = QHBoxLayout()
+        view_layout.addWidget(QLabel("Результат"))
+        self.granularity_combo = QComboBox()
+        self.granularity_combo.addItem("по стинтам", GRANULARITY_STINTS)
+        self.granularity_combo.addItem("по кругам", GRANULARITY_LAPS)
+        self.granularity_combo.currentIndexChanged.connect(self._on_granularity_changed)
+        view_layout.addWidget(self.granularity_combo)
+        view_layout.addStretch(1)
+        main_layout.addLayout(view_layout)
+
+        self.stints_model = PlanTableModel(self)
+        self.stints_table = QTableView()
+        self.stints_table.setModel(self.stints_model)
+        self.stints_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        # фиксированная высота строк — вид не меряет тысячи строк покругового плана
+        self.stints_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.stints_table.verticalHeader().setDefaultSectionSize(
+            self.stints_table.fontMetrics().height() + 6
         )
         main_layout.addWidget(self.stints_table)
+        self._plan_inputs = None   # (race, pilots, mode) последнего запущенного расчёта
+        self._last_total_sec = None
 
         # ---------- Итоговое время гонки ----------
         self.total_time_label = QLabel("Итоговое время гонки: —")
         main_layout.addWidget(self.total_time_label)
 
+        # ---------- Авто-пересчёт при изменении входных данных ----------
+        self._auto_calc_timer = QTimer(self)
+        self._auto_calc_timer.setSingleShot(True)
+        self._auto_calc_timer.setInterval(150)
+        self._auto_calc_timer.timeout.connect(self._on_auto_calc_timeout)
+
+        self.pilot_table.itemChanged.connect(self._schedule_auto_calc)
+        self.pilot_count_spin.valueChanged.connect(self._schedule_auto_calc)
+        self.tank.valueChanged.connect(self._schedule_auto_calc)
+        self.tyre_sets.valueChanged.connect(self._schedule_auto_calc)
+        self.compound_combo.currentIndexChanged.connect(self._schedule_auto_calc)
+        self.fuel_weight.valueChanged.connect(self._schedule_auto_calc)
+        self.eco_loss.valueChanged.connect(self._schedule_auto_calc)
+        self.lap_profile_edit.editingFinished.connect(self._schedule_auto_calc)
+        for edit in (self.race_time_edit, self.pit_refuel_time,
+                     self.pit_tyre_time, self.driver_change_time,
+                     self.max_continuous_time, self.min_drive_time):
+            edit.timeChanged.connect(self._schedule_auto_calc)
+        self.max_stints_spin.valueChanged.connect(self._schedule_auto_calc)
+        self.mode_group.buttonClicked.connect(self._schedule_auto_calc)
+        self.solver_combo.currentIndexChanged.connect(self._schedule_auto_calc)
+        self.auto_calc_check.toggled.connect(self._schedule_auto_calc)
+        self.exact_laps_check.toggled.connect(self._schedule_auto_calc)
+
+    def closeEvent(self, event):
+        if self._calc_job is not None:
+            self._calc_job.cancel()
+        if self._telemetry is not None:
+            self._telemetry.stop()
+        try:
+            self.plan_cache.save()
+        except OSError:
+            pass
+        super().closeEvent(event)
+
+    # ---------- Сессия ----------
+
+    def on_save_session(self):
+        inputs = self._collect_inputs()
+        if inputs is None:
+            self.statusBar().showMessage("Нечего сохранять: нет пилотов")
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Сохранить сессию", "", "Сессия (*.json)")
+        if not path:
+            return
+        race, tyre, pilots_tuples, mode = inputs
+        stints = self.stints_model.stints()
+        session = Session(
+            scenario=Scenario(id=os.path.splitext(os.path.basename(path))[0], race=race,
+                              tyre=tyre, pilot_tuples=pilots_tuples, mode=mode),
+            planner=list(PLANNERS)[self.solver_combo.currentIndex()],
+            exact_laps=self.exact_laps_check.isChecked(),
+            stints=stints,
+            total_sec=self._last_total_sec if stints else None,
+        )
+        try:
+            save_session(path, session)
+        except OSError as e:
+            self.statusBar().showMessage(f"Не удалось сохранить: {e}")
+            return
+        self.statusBar().showMessage(f"Сессия сохранена: {path}")
+
+    def on_open_session(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Открыть сессию", "", "Сессия (*.json)")
+        if not path:
+            return
+        try:
+            session = load_session(path)
+        except (OSError, ValueError, KeyError) as e:
+            self.statusBar().showMessage(f"Не удалось открыть: {e}")
+            return
+        self._apply_session(session)
+        self.statusBar().showMessage(f"Сессия открыта: {path}")
+
+    def _apply_session(self, session: Session):
+        """Входные данные и план сессии — в виджеты окна (без пересчёта)."""
+        s = session.scenario
+        race, tyre = s.race, s.tyre
+        # пока виджеты заполняются, авто-пересчёт не нужен
+        self.auto_calc_check.blockSignals(True)
+        auto = self.auto_calc_check.isChecked()
+        self.auto_calc_check.setChecked(False)
+        try:
+            minutes = int(round(race.duration_hours * 60))
+            self.race_time_edit.setTime(QTime(min(minutes // 60, 23), minutes % 60))
+            self.tank.setValue(race.tank_liters)
+            self.tyre_sets.setValue(tyre.sets)
+            index = self.compound_combo.findData(tyre.compound)
+            self.compound_combo.setCurrentIndex(max(index, 0))
+            self.fuel_weight.setValue(race.fuel_sec_per_liter)
+            self.eco_loss.setValue(race.eco_lap_loss_sec)
+            self.lap_profile_edit.setText(format_profile(race.lap_profile))
+            self.pit_refuel_time.setTime(QTime(0, 0).addSecs(int(race.pit_refuel_sec)))
+            self.pit_tyre_time.setTime(QTime(0, 0).addSecs(int(race.pit_tyre_sec)))
+            self.driver_change_time.setTime(QTime(0, 0).addSecs(int(race.driver_change_sec)))
+            self.max_continuous_time.setTime(QTime(0, 0).addSecs(int(race.max_continuous_sec)))
+            self.min_drive_time.setTime(QTime(0, 0).addSecs(int(race.min_drive_sec)))
+            self.max_stints_spin.setValue(race.max_stints_per_pilot)
+            (self.rb_mode_fuel if s.mode.by_fuel_per_lap else self.rb_mode_laps).setChecked(True)
+            self._on_mode_changed()
+
+            self.pilot_count_spin.blockSignals(True)
+            self.pilot_count_spin.setValue(max(len(s.pilot_tuples), 1))
+            self.pilot_count_spin.blockSignals(False)
+            self.pilot_table.setRowCount(0)
+            for name, lap, fp, fe, lp, le in s.pilot_tuples:
+                self._add_pilot_row(name, self._format_lap_time(lap), fp, fe, lp, le)
+
+            if session.planner in PLANNERS:
+                self.solver_combo.setCurrentIndex(list(PLANNERS).index(session.planner))
+            self.exact_laps_check.setChecked(session.exact_laps)
+        finally:
+            self.auto_calc_check.setChecked(auto)
+            self.auto_calc_check.blockSignals(False)
+
+        if self._calc_job is not None:
+            self._calc_job.cancel()
+            self._calc_job = None
+        self._auto_calc_timer.stop()
+        self._plan_inputs = (race, _build_pilots(s.pilot_tuples), s.mode)
+        self._show_stints(session.stints)
+        if session.stints and session.total_sec is not None:
+            self._last_total_sec = session.total_sec
+            self.total_time_label.setText(
+                f"Итоговое время гонки: {self._format_race_time(session.total_sec)}"
+            )
+        else:
+            self.total_time_label.setText("Итоговое время гонки: —")
+
     # ---------- Пилоты ----------
 
     def _add_demo_pilots(self):
@@ -194,6 +489,7 @@ class MainWindow(QMainWindow):
         except ValueError:
             return 0.0
 
+    @traced("ui.read_pilots")
     def _read_pilots(self):
         """
         Возвращает:
@@ -232,16 +528,25 @@ class MainWindow(QMainWindow):
     def _time_to_seconds(self, t: QTime) -> float:
         return t.minute() * 60.0 + t.second()
 
+    def _hours_minutes_to_seconds(self, t: QTime) -> float:
+        return t.hour() * 3600.0 + t.minute() * 60.0
+
     def _current_consumption_mode(self) -> ConsumptionMode:
         by_fuel = self.rb_mode_fuel.isChecked()
         return ConsumptionMode(by_fuel_per_lap=by_fuel)
 
     # ---------- Расчёт ----------
 
-    def on_calc_clicked(self):
+    def _collect_inputs(self):
+        """Текущие входные данные окна: (race, tyre, pilot_tuples, mode) или None."""
         pilots_tuples, avg_lap = self._read_pilots()
         if not pilots_tuples or avg_lap <= 0:
-            return
+            return None
+        try:
+            lap_profile = parse_profile(self.lap_profile_edit.text())
+        except ValueError as e:
+            self.statusBar().showMessage(str(e))
+            return None
 
         race = RaceParams(
             duration_hours=self._race_duration_hours(),
@@ -250,42 +555,238 @@ class MainWindow(QMainWindow):
             pit_refuel_sec=self._time_to_seconds(self.pit_refuel_time.time()),
             pit_tyre_sec=self._time_to_seconds(self.pit_tyre_time.time()),
             driver_change_sec=self._time_to_seconds(self.driver_change_time.time()),
+            max_continuous_sec=self._hours_minutes_to_seconds(self.max_continuous_time.time()),
+            min_drive_sec=self._hours_minutes_to_seconds(self.min_drive_time.time()),
+            max_stints_per_pilot=self.max_stints_spin.value(),
+            fuel_sec_per_liter=self.fuel_weight.value(),
+            eco_lap_loss_sec=self.eco_loss.value(),
+            lap_profile=lap_profile,
         )
         tyre = TyreParams(
             sets=self.tyre_sets.value(),
+            compound=self.compound_combo.currentData(),
         )
 
         mode = self._current_consumption_mode()
+        return race, tyre, pilots_tuples, mode
 
-        stints = plan_stints(race, tyre, pilots_tuples, mode)
-        self._show_stints(stints)
+    def on_calc_clicked(self):
+        self._profile_mark = instrument.mark()
+        inputs = self._collect_inputs()
+        if inputs is None:
+            return
+        race, tyre, pilots_tuples, mode = inputs
+        planner = self.solver_combo.currentData()
+        self._plan_inputs = (race, _build_pilots(pilots_tuples), mode)
+
+        if self._calc_job is not None:
+            self._calc_job.cancel()
+
+        self._calc_job_id += 1
+        job = CalcJob(self._calc_job_id, planner, race, tyre, pilots_tuples, mode,
+                      exact_laps=self.exact_laps_check.isChecked())
+        job.signals.progress.connect(self._on_calc_progress)
+        job.signals.finished.connect(self._on_calc_finished)
+        job.signals.failed.connect(self._on_calc_failed)
+        self._calc_job = job
+
+        self.calc_progress.setValue(0)
+        self.cancel_btn.setEnabled(True)
+        self._calc_pool.start(job)
+
+    def on_sweep_clicked(self):
+        planner = self.solver_combo.currentData().planner
+        dialog = SweepDialog(self._collect_inputs, self, planner=planner)
+        dialog.exec_()
+
+    def on_compare_clicked(self):
+        dialog = CompareDialog(self._collect_inputs, self, wrap=self.plan_cache.wrap)
+        dialog.exec_()
+
+    def on_replan_clicked(self):
+        dialog = ReplanDialog(self._collect_inputs, self, plan=self.stints_model.stints())
+        dialog.exec_()
+
+    def on_pareto_clicked(self):
+        dialog = ParetoDialog(self._collect_inputs, self, on_pick=self._show_candidate)
+        dialog.exec_()
+
+    def on_fleet_clicked(self):
+        dialog = FleetDialog(self._collect_inputs, self)
+        dialog.exec_()
+
+    def _show_candidate(self, candidate):
+        inputs = self._collect_inputs()
+        if inputs is None:
+            return
+        race, tyre, pilots_tuples, mode = inputs
+        # у кандидата могут быть свои значения перебираемых полей
+        race, _tyre = apply_params(race, tyre, candidate.params)
+        self._plan_inputs = (race, _build_pilots(pilots_tuples), mode)
+        self._show_stints(candidate.stints)
+        self._last_total_sec = candidate.total_sec
+        self.total_time_label.setText(
+            f"Итоговое время гонки: {self._format_race_time(candidate.total_sec)} (с Парето-фронта)"
+        )
+
+    # ---------- Телеметрия ----------
+
+    def on_telemetry_clicked(self):
+        if self._telemetry is not None:
+            self._telemetry.stop()
+            self._telemetry = None
+            self.telemetry_btn.setText("Старт")
+            return
+        inputs = self._collect_inputs()
+        target = self.telemetry_target.text().strip()
+        if inputs is None or not target:
+            return
+        race, _tyre, pilot_tuples, mode = inputs
+        kind = self.telemetry_source.currentData()
+        if kind == "port" and not target.isdigit():
+            self.telemetry_label.setText("порт — число")
+            return
+        thread = TelemetryThread((kind, target), pilot_tuples, mode, race.tank_liters, self,
+                                 plan=self.stints_model.stints())
+        thread.sample.connect(self._on_telemetry_sample)
+        thread.drift.connect(self._on_telemetry_drift)
+        thread.failed.connect(self._on_telemetry_failed)
+        self._telemetry = thread
+        self.telemetry_btn.setText("Стоп")
+        self.telemetry_label.setText("ждём круги…")
+        thread.start()
+
+    def _on_telemetry_sample(self, sample):
+        if self._telemetry is None:
+            return
+        state = self._telemetry.state
+        self.telemetry_label.setText(
+            f"кругов: {state.samples}, пересчётов: {state.drifts}, "
+            f"последний: {sample.pilot} {self._format_lap_time(sample.lap_time_sec)}"
+        )
+
+    def _on_telemetry_drift(self, pilot_tuples):
+        """Оценки пилотов ушли — обновляем таблицу пилотов и пересчитываем план в фоне."""
+        by_name = {t[0]: t for t in pilot_tuples}
+        self.pilot_table.blockSignals(True)
+        try:
+            for row in range(self.pilot_table.rowCount()):
+                item = self.pilot_table.item(row, 0)
+                t = by_name.get(item.text()) if item else None
+                if t is None:
+                    continue
+                self.pilot_table.setItem(row, 1, QTableWidgetItem(self._format_lap_time(t[1])))
+                # полная точность: из таблицы строится следующий план, а округление
+                # «кругов на баке» вверх (34.97 -> 35) дало бы стинт, на который не хватит бака
+                for col, value in zip(range(2, 6), t[2:]):
+                    self.pilot_table.setItem(row, col, QTableWidgetItem(repr(float(value))))
+        finally:
+            self.pilot_table.blockSignals(False)
+        self.on_calc_clicked()
+
+    def _on_telemetry_failed(self, message: str):
+        self._telemetry = None
+        self.telemetry_btn.setText("Старт")
+        self.telemetry_label.setText("ошибка телеметрии")
+        self.statusBar().showMessage(message.strip().splitlines()[-1])
+        log.error("Телеметрия остановилась:\n%s", message)
+
+    @staticmethod
+    def _format_lap_time(sec: float) -> str:
+        minutes = int(sec // 60)
+        return f"{minutes:02d}:{sec - minutes * 60:04.1f}"
+
+    def _schedule_auto_calc(self, *args):
+        """Каждое изменение перезапускает таймер — считаем, когда правки затихли."""
+        if self.auto_calc_check.isChecked():
+            self._auto_calc_timer.start()
+
+    def _on_auto_calc_timeout(self):
+        try:
+            self.on_calc_clicked()
+        except ValueError:
+            # ячейка в процессе редактирования ("2." и т.п.) — ждём следующей правки
+            pass
+
+    def on_cancel_clicked(self):
+        if self._calc_job is not None:
+            self._calc_job.cancel()
+            self._calc_job = None
+        self.cancel_btn.setEnabled(False)
+        self.calc_progress.setValue(0)
+
+    def _is_current_job(self, job_id: int) -> bool:
+        return self._calc_job is not None and job_id == self._calc_job.job_id
 
-        pilots = _build_pilots(pilots_tuples)
-        total_time_sec = compute_total_race_time_sec(race, pilots, stints)
+    def _on_calc_progress(self, job_id: int, fraction: float, partial, partial_time_sec: float):
+        if not self._is_current_job(job_id):
+            return
+        self.calc_progress.setValue(int(fraction * 100))
+        if partial:
+            self._show_stints(partial)
+            self.total_time_label.setText(
+                f"Итоговое время гонки: {self._format_race_time(partial_time_sec)} (промежуточное)"
+            )
+
+    def _on_calc_finished(self, job_id: int, stints, total_time_sec: float):
+        if not self._is_current_job(job_id):
+            return
+        self._calc_job = None
+        self.cancel_btn.setEnabled(False)
+        self.calc_progress.setValue(100)
 
+        self._show_stints(stints)
+        if self._telemetry is not None:
+            # режим кругов без поля mode в логе берётся из стинтов нового плана
+            self._telemetry.state.set_plan(stints)
+
+        self._last_total_sec = total_time_sec
+        race_time_str = self._format_race_time(total_time_sec)
+        note = ""
+        if not getattr(stints, "optimal", True):
+            # перебор с ротацией упёрся в лимит узлов
+            note = " (поиск остановлен по лимиту перебора, план может быть не лучшим)"
+        self.total_time_label.setText(f"Итоговое время гонки: {race_time_str}{note}")
+        self.setWindowTitle(f"Race Strategy Calculator — {race_time_str}")
+        if instrument.enabled():
+            stages, counters = instrument.summary(since=self._profile_mark)
+            self.statusBar().showMessage(instrument.format_summary(stages, counters))
+
+    def _on_profile_toggled(self, checked: bool):
+        if checked:
+            instrument.enable()
+        else:
+            instrument.disable()
+            self.statusBar().clearMessage()
+
+    def _on_calc_failed(self, job_id: int, message: str):
+        if not self._is_current_job(job_id):
+            return
+        self._calc_job = None
+        self.cancel_btn.setEnabled(False)
+        self.calc_progress.setValue(0)
+        self.total_time_label.setText("Итоговое время гонки: ошибка расчёта")
+        self.statusBar().showMessage(message.strip().splitlines()[-1])
+        log.error("Расчёт стратегии не удался:\n%s", message)
+
+    @staticmethod
+    def _format_race_time(total_time_sec: float) -> str:
         hours = int(total_time_sec // 3600)
         minutes = int((total_time_sec % 3600) // 60)
         seconds = int(total_time_sec % 60)
-        race_time_str = f"{hours:d}:{minutes:02d}:{seconds:02d}"
-
-        self.total_time_label.setText(f"Итоговое время гонки: {race_time_str}")
-        self.setWindowTitle(f"Race Strategy Calculator — {race_time_str}")
+        return f"{hours:d}:{minutes:02d}:{seconds:02d}"
 
     # ---------- Отображение стинтов ----------
 
     def _show_stints(self, stints):
-        self.stints_table.setRowCount(0)
-        for stint in stints:
-            row = self.stints_table.rowCount()
-            self.stints_table.insertRow(row)
-            self.stints_table.setItem(row, 0, QTableWidgetItem(stint.pilot))
-            self.stints_table.setItem(row, 1, QTableWidgetItem(str(stint.laps)))
-            self.stints_table.setItem(row, 2, QTableWidgetItem(f"{stint.fuel_start:.1f}"))
-            self.stints_table.setItem(row, 3, QTableWidgetItem(str(stint.tyre_set)))
-
-            if getattr(stint, "eco", False):
-                color = QColor(200, 255, 200)
-                for col in range(4):
-                    item = self.stints_table.item(row, col)
-                    if item:
-                        item.setBackground(color)
+        race, pilots, mode = self._plan_inputs or (None, (), None)
+        with span("ui.render"):
+            self.stints_model.set_plan(stints, race, pilots, mode)
+        index = self.granularity_combo.findData(self.stints_model.granularity())
+        if index != self.granularity_combo.currentIndex():
+            self.granularity_combo.blockSignals(True)
+            self.granularity_combo.setCurrentIndex(index)
+            self.granularity_combo.blockSignals(False)
+
+    def _on_granularity_changed(self, _index: int):
+        self.stints_model.set_granularity(self.granularity_combo.currentData())
@@ -0,0 +1,200 @@
+from typing import List, Optional, Sequence
+
+import numpy as np
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt, QVariant
+from PyQt5.QtGui import QBrush, QColor
+
+from model import RaceParams, ConsumptionMode, Pilot, Stint
+from timeline import Timeline, build_timeline
+
+
+ECO_BRUSH = QBrush(QColor(200, 255, 200))
+PIT_BRUSH = QBrush(QColor(255, 240, 200))
+
+GRANULARITY_STINTS = "stints"
+GRANULARITY_LAPS = "laps"
+
+
+def _format_lap(sec: float) -> str:
+    minutes = int(sec // 60)
+    return f"{minutes:d}:{sec - minutes * 60:04.1f}"
+
+
+def _format_clock(sec: float) -> str:
+    hours = int(sec // 3600)
+    minutes = int((sec % 3600) // 60)
+    seconds = int(sec % 60)
+    return f"{hours:d}:{minutes:02d}:{seconds:02d}"
+
+
+class PlanTableModel(QAbstractTableModel):
+    """
+    План в таблице результатов: по стинтам или по кругам.
+
+    План хранится колонками (массивы NumPy), ячейки форматируются только
+    когда вид их запрашивает, поэтому покруговая раскладка суточной гонки
+    (тысячи строк) не создаёт объекта на ячейку. Eco-строки и круги после
+    пит-стопа подсвечиваются через BackgroundRole.
+    Покруговая раскладка (timeline.build_timeline) строится только в виде
+    по кругам и живёт до следующего плана.
+    """
+
+    STINT_COLUMNS = ["Пилот", "Круги в стинте", "Стартовое топливо, л", "Комплект шин"]
+    LAP_COLUMNS = [
+        "Круг", "Стинт", "Пилот", "Комплект", "Возраст резины",
+        "Топливо на старте, л", "Пит-стоп, с", "Время круга", "Время гонки",
+    ]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._granularity = GRANULARITY_STINTS
+        self._race: Optional[RaceParams] = None
+        self._mode: Optional[ConsumptionMode] = None
+        self._pilots: List[Pilot] = []
+        self._stints: List[Stint] = []
+        # колонки плана по стинтам
+        self._names: List[str] = []
+        self._laps = np.zeros(0, dtype=np.int64)
+        self._fuel = np.zeros(0, dtype=np.float64)
+        self._tyre_set = np.zeros(0, dtype=np.int64)
+        self._eco = np.zeros(0, dtype=bool)
+        self._timeline: Optional[Timeline] = None
+
+    # ---------- данные ----------
+
+    def set_plan(self, stints: Sequence[Stint], race: Optional[RaceParams] = None,
+                 pilots: Sequence[Pilot] = (), mode: Optional[ConsumptionMode] = None):
+        """Новый план; без race/pilots/mode доступен только вид по стинтам."""
+        self.beginResetModel()
+        self._stints = list(stints)
+        self._race = race
+        self._pilots = list(pilots)
+        self._mode = mode
+        self._names = [s.pilot for s in self._stints]
+        self._laps = np.fromiter((s.laps for s in self._stints), dtype=np.int64, count=len(self._stints))
+        self._fuel = np.fromiter((s.fuel_start for s in self._stints), dtype=np.float64,
+                                 count=len(self._stints))
+        self._tyre_set = np.fromiter((s.tyre_set for s in self._stints), dtype=np.int64,
+                                     count=len(self._stints))
+        self._eco = np.fromiter((bool(s.eco) for s in self._stints), dtype=bool,
+                                count=len(self._stints))
+        self._timeline = None
+        if self._granularity == GRANULARITY_LAPS:
+            if self._can_show_laps():
+                self._timeline = build_timeline(self._race, self._pilots, self._stints, self._mode)
+            else:
+                self._granularity = GRANULARITY_STINTS
+        self.endResetModel()
+
+    def clear(self):
+        self.set_plan([])
+
+    def stints(self) -> List[Stint]:
+        return list(self._stints)
+
+    def granularity(self) -> str:
+        return self._granularity
+
+    def _can_show_laps(self) -> bool:
+        return self._race is not None and self._mode is not None and bool(self._pilots)
+
+    def set_granularity(self, granularity: str):
+        if granularity not in (GRANULARITY_STINTS, GRANULARITY_LAPS):
+            raise ValueError(f"Неизвестный вид таблицы {granularity}")
+        if granularity == GRANULARITY_LAPS and not self._can_show_laps():
+            granularity = GRANULARITY_STINTS
+        if granularity == self._granularity:
+            return
+        self.beginResetModel()
+        self._granularity = granularity
+        if granularity == GRANULARITY_LAPS and self._timeline is None:
+            self._timeline = build_timeline(self._race, self._pilots, self._stints, self._mode)
+        self.endResetModel()
+
+    def timeline(self) -> Optional[Timeline]:
+        return self._timeline
+
+    # ---------- QAbstractTableModel ----------
+
+    def _columns(self) -> List[str]:
+        return self.LAP_COLUMNS if self._granularity == GRANULARITY_LAPS else self.STINT_COLUMNS
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        if self._granularity == GRANULARITY_LAPS:
+            return len(self._timeline) if self._timeline is not None else 0
+        return len(self._stints)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._columns())
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return QVariant()
+        if orientation == Qt.Horizontal:
+            columns = self._columns()
+            return columns[section] if 0 <= section < len(columns) else QVariant()
+        return str(section + 1)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return QVariant()
+        row, col = index.row(), index.column()
+        if self._granularity == GRANULARITY_LAPS:
+            return self._lap_data(row, col, role)
+        return self._stint_data(row, col, role)
+
+    def _stint_data(self, row: int, col: int, role):
+        if role == Qt.DisplayRole:
+            if col == 0:
+                return self._names[row]
+            if col == 1:
+                return str(int(self._laps[row]))
+            if col == 2:
+                return f"{self._fuel[row]:.1f}"
+            if col == 3:
+                return str(int(self._tyre_set[row]))
+        elif role == Qt.BackgroundRole:
+            if self._eco[row]:
+                return ECO_BRUSH
+        elif role == Qt.TextAlignmentRole and col > 0:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return QVariant()
+
+    def _lap_data(self, row: int, col: int, role):
+        t = self._timeline
+        if role == Qt.DisplayRole:
+            if col == 0:
+                return str(row + 1)
+            if col == 1:
+                return str(int(t.stint[row]) + 1)
+            if col == 2:
+                return self._pilots[int(t.pilot[row])].name
+            if col == 3:
+                return str(int(t.tyre_set[row]))
+            if col == 4:
+                return str(int(t.tyre_age[row]))
+            if col == 5:
+                return f"{t.fuel_start[row]:.1f}"
+            if col == 6:
+                pit = float(t.pit_sec[row])
+                return f"{pit:.0f}" if pit > 0 else ""
+            if col == 7:
+                return _format_lap(float(t.lap_time_sec[row]))
+            if col == 8:
+                return _format_clock(float(t.end_sec[row]))
+        elif role == Qt.BackgroundRole:
+            if col == 6 and t.pit_sec[row] > 0:
+                return PIT_BRUSH
+            if t.eco[row]:
+                return ECO_BRUSH
+        elif role == Qt.ForegroundRole:
+            if t.end_sec[row] > t.race_sec:
+                # круг после флага
+                return QBrush(QColor(150, 150, 150))
+        elif role == Qt.TextAlignmentRole and col != 2:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return QVariant()
@@ -0,0 +1,216 @@
+import logging
+import threading
+import traceback
+
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QGridLayout, QPushButton, QTableWidget,
+    QTableWidgetItem, QLabel, QAbstractItemView, QListWidget, QListWidgetItem,
+    QProgressBar, QSpinBox
+)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtGui import QColor
+
+from engine import PLANNERS
+from pareto import explore
+from ui_sweep import _AxisRow, _format_time
+
+
+log = logging.getLogger(__name__)
+
+
+class ExploreThread(QThread):
+    """pareto.explore в фоне; пул процессов создаётся внутри потока."""
+    progress = pyqtSignal(float, int)       # доля, размер фронта
+    finished_ok = pyqtSignal(object)        # ExploreResult
+    failed = pyqtSignal(str)
+
+    def __init__(self, inputs, axes, planners, workers, parent=None):
+        super().__init__(parent)
+        self._inputs = inputs
+        self._axes = axes
+        self._planners = planners
+        self._workers = workers
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def run(self):
+        race, tyre, pilot_tuples, mode = self._inputs
+        try:
+            result = explore(race, tyre, pilot_tuples, mode, self._axes, self._planners,
+                             workers=self._workers, on_progress=self.progress.emit,
+                             should_stop=self._cancelled.is_set)
+        except Exception:
+            self.failed.emit(traceback.format_exc())
+            return
+        self.finished_ok.emit(result)
+
+
+class ParetoDialog(QDialog):
+    """
+    Недоминируемые планы по времени, топливу, комплектам и пит-стопам.
+    on_pick(candidate) — показать выбранный план в главном окне.
+    """
+
+    COLUMNS = ["Время гонки", "Отставание", "Топливо, л", "Комплектов", "Пит-стопов",
+               "Планировщик", "Параметры"]
+
+    def __init__(self, collect_inputs, parent=None, on_pick=None):
+        super().__init__(parent)
+        self.setWindowTitle("Парето-фронт стратегий")
+        self._collect_inputs = collect_inputs
+        self._on_pick = on_pick
+        self._thread = None
+        self._front = []
+
+        layout = QVBoxLayout(self)
+
+        top = QHBoxLayout()
+        self.planner_list = QListWidget()
+        for info in PLANNERS.values():
+            item = QListWidgetItem(info.label)
+            item.setData(Qt.UserRole, info.name)
+            # перебор ротации на каждой точке сетки слишком долгий — по умолчанию выключен
+            item.setCheckState(Qt.Unchecked if info.name == "rotation" else Qt.Checked)
+            self.planner_list.addItem(item)
+        self.planner_list.setMaximumHeight(130)
+        top.addWidget(self.planner_list)
+
+        grid = QGridLayout()
+        self.x_axis = _AxisRow(grid, 0, "Ось 1", 1)
+        self.y_axis = _AxisRow(grid, 1, "Ось 2", 0)
+        grid.addWidget(QLabel("Процессов"), 2, 0)
+        self.workers = QSpinBox()
+        self.workers.setRange(1, 64)
+        self.workers.setValue(4)
+        grid.addWidget(self.workers, 2, 1)
+        top.addLayout(grid)
+        layout.addLayout(top)
+
+        buttons = QHBoxLayout()
+        self.run_btn = QPushButton("Построить фронт")
+        self.run_btn.clicked.connect(self.on_run_clicked)
+        buttons.addWidget(self.run_btn)
+        self.cancel_btn = QPushButton("Стоп")
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.clicked.connect(self.on_cancel_clicked)
+        buttons.addWidget(self.cancel_btn)
+        self.pick_btn = QPushButton("Показать план")
+        self.pick_btn.setEnabled(False)
+        self.pick_btn.clicked.connect(self.on_pick_clicked)
+        buttons.addWidget(self.pick_btn)
+        self.progress = QProgressBar()
+        self.progress.setRange(0, 100)
+        buttons.addWidget(self.progress)
+        self.status_label = QLabel("")
+        buttons.addWidget(self.status_label)
+        layout.addLayout(buttons)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.itemSelectionChanged.connect(
+            lambda: self.pick_btn.setEnabled(bool(self.table.selectedItems()))
+        )
+        self.table.cellDoubleClicked.connect(lambda *_: self.on_pick_clicked())
+        layout.addWidget(self.table)
+
+        self.resize(950, 560)
+
+    def _planners(self):
+        names = []
+        for i in range(self.planner_list.count()):
+            item = self.planner_list.item(i)
+            if item.checkState() == Qt.Checked:
+                names.append(item.data(Qt.UserRole))
+        return names
+
+    def on_run_clicked(self):
+        inputs = self._collect_inputs()
+        if inputs is None:
+            return
+        try:
+            axes = [self.x_axis.axis(), self.y_axis.axis()]
+        except ValueError as e:
+            self.status_label.setText(str(e))
+            return
+        if axes[0].field == axes[1].field:
+            axes = axes[:1]
+        planners = self._planners()
+        if not planners:
+            self.status_label.setText("Выберите планировщики")
+            return
+
+        thread = ExploreThread(inputs, axes, planners, self.workers.value(), self)
+        thread.progress.connect(self._on_progress)
+        thread.finished_ok.connect(self._on_finished)
+        thread.failed.connect(self._on_failed)
+        self._thread = thread
+        self.run_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
+        self.progress.setValue(0)
+        self.status_label.setText("")
+        thread.start()
+
+    def on_cancel_clicked(self):
+        if self._thread is not None:
+            self._thread.cancel()
+
+    def _on_progress(self, fraction: float, front_size: int):
+        self.progress.setValue(int(fraction * 100))
+        self.status_label.setText(f"во фронте: {front_size}")
+
+    def _on_finished(self, result):
+        self._thread = None
+        self.run_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(False)
+        self.progress.setValue(100 if not result.cancelled else self.progress.value())
+        self._front = result.front
+        self._show_front(result.front)
+        note = " (остановлено)" if result.cancelled else ""
+        self.status_label.setText(
+            f"кандидатов: {result.evaluated}, во фронте: {len(result.front)}, "
+            f"ошибок: {result.errors}, {result.elapsed_sec:.1f} с{note}"
+        )
+
+    def _on_failed(self, message: str):
+        self._thread = None
+        self.run_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(False)
+        self.status_label.setText(f"ошибка: {message.strip().splitlines()[-1]}")
+        log.error("Поиск фронта Парето не удался:\n%s", message)
+
+    def _show_front(self, front):
+        labels = {name: info.label for name, info in PLANNERS.items()}
+        best = front[0].total_sec if front else 0.0
+        self.table.setRowCount(len(front))
+        for row, c in enumerate(front):
+            cells = [
+                _format_time(c.total_sec),
+                f"+{c.total_sec - best:.0f} с" if c.total_sec > best else "лучший",
+                f"{c.fuel_liters:.1f}",
+                str(c.tyre_sets),
+                str(c.stops),
+                labels.get(c.planner, c.planner),
+                ", ".join(f"{name}={value:g}" for name, value in c.params),
+            ]
+            for col, text in enumerate(cells):
+                item = QTableWidgetItem(text)
+                if row == 0:
+                    item.setBackground(QColor(200, 255, 200))
+                self.table.setItem(row, col, item)
+
+    def on_pick_clicked(self):
+        row = self.table.currentRow()
+        if self._on_pick is None or not (0 <= row < len(self._front)):
+            return
+        self._on_pick(self._front[row])
+
+    def closeEvent(self, event):
+        if self._thread is not None:
+            self._thread.cancel()
+            self._thread.wait()
+        super().closeEvent(event)
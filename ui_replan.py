@@ -0,0 +1,218 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QSpinBox, QDoubleSpinBox,
+    QComboBox, QPushButton, QLabel, QTimeEdit, QTableView, QAbstractItemView,
+    QTableWidget, QTableWidgetItem, QSplitter
+)
+from PyQt5.QtCore import Qt, QTime
+
+from model import _build_pilots
+from pit_window import PitWindowIndex
+from replan import RaceState, DEFAULT_SC_PIT_FACTOR, prepare_replan, replan_from_state, state_from_plan
+from ui_models import PlanTableModel
+from ui_sweep import _format_time
+
+
+class ReplanDialog(QDialog):
+    """
+    Новый план на остаток гонки из текущего состояния (круг, топливо, резина, пилот).
+    Окно ближайшего пит-стопа (pit_window.py) обновляется сразу при правке состояния.
+    """
+
+    WINDOW_COLUMNS = ["Через, кр.", "Круг", "Остаток гонки", "Хуже лучшего, с"]
+
+    def __init__(self, collect_inputs, parent=None, plan=None):
+        super().__init__(parent)
+        self.setWindowTitle("Пересчёт по ходу гонки")
+        self._collect_inputs = collect_inputs
+        self._plan = list(plan or [])
+        self._windows = None
+
+        inputs = collect_inputs()
+        pilot_tuples = inputs[2] if inputs is not None else []
+
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+
+        self.laps_done = QSpinBox()
+        self.laps_done.setRange(0, 100000)
+
+        self.remaining_time = QTimeEdit()
+        self.remaining_time.setDisplayFormat("HH:mm")
+        # -1 — оценка по времени до финиша; «по плану» подставляет круги плана
+        self.remaining_laps = QSpinBox()
+        self.remaining_laps.setRange(-1, 100000)
+        self.remaining_laps.setSpecialValueText("по времени")
+        self.remaining_laps.setValue(-1)
+
+        self.fuel = QDoubleSpinBox()
+        self.fuel.setSuffix(" л")
+        self.fuel.setDecimals(1)
+        self.fuel.setRange(0, 500)
+
+        self.pilot_combo = QComboBox()
+        for p in pilot_tuples:
+            self.pilot_combo.addItem(p[0])
+
+        self.tyre_set = QSpinBox()
+        self.tyre_set.setRange(1, 50)
+        self.tyre_age = QSpinBox()
+        self.tyre_age.setRange(0, 10000)
+        self.set_stints = QSpinBox()
+        self.set_stints.setRange(1, 10)
+
+        self.sc_laps = QSpinBox()
+        self.sc_laps.setRange(0, 100)
+        self.sc_laps.setSpecialValueText("нет")
+        self.sc_factor = QDoubleSpinBox()
+        self.sc_factor.setDecimals(2)
+        self.sc_factor.setRange(0, 1)
+        self.sc_factor.setSingleStep(0.05)
+        self.sc_factor.setValue(DEFAULT_SC_PIT_FACTOR)
+
+        form.addRow("Кругов проехано", self.laps_done)
+        form.addRow("До финиша (ч:мин)", self.remaining_time)
+        form.addRow("Кругов до финиша", self.remaining_laps)
+        form.addRow("Топливо в баке", self.fuel)
+        form.addRow("За рулём", self.pilot_combo)
+        form.addRow("Комплект шин", self.tyre_set)
+        form.addRow("Возраст комплекта, кругов", self.tyre_age)
+        form.addRow("Стинтов на комплекте", self.set_stints)
+        form.addRow("Машина безопасности, кругов", self.sc_laps)
+        form.addRow("Пит-стоп под SC, доля", self.sc_factor)
+        layout.addLayout(form)
+
+        buttons = QHBoxLayout()
+        self.from_plan_btn = QPushButton("Состояние по плану")
+        self.from_plan_btn.setEnabled(bool(self._plan))
+        self.from_plan_btn.clicked.connect(self.on_from_plan_clicked)
+        buttons.addWidget(self.from_plan_btn)
+        self.run_btn = QPushButton("Пересчитать остаток")
+        self.run_btn.clicked.connect(self.on_run_clicked)
+        buttons.addWidget(self.run_btn)
+        self.status_label = QLabel("")
+        buttons.addWidget(self.status_label)
+        layout.addLayout(buttons)
+
+        self.window_label = QLabel("")
+        layout.addWidget(self.window_label)
+
+        splitter = QSplitter(Qt.Horizontal)
+        self.model = PlanTableModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        splitter.addWidget(self.table)
+        self.window_table = QTableWidget(0, len(self.WINDOW_COLUMNS))
+        self.window_table.setHorizontalHeaderLabels(self.WINDOW_COLUMNS)
+        self.window_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        splitter.addWidget(self.window_table)
+        layout.addWidget(splitter, 1)
+
+        self.resize(860, 600)
+        if inputs is not None:
+            race, tyre, pilot_tuples, mode = inputs
+            # хвостовые подзадачи считаются один раз, дальше пересчёт — миллисекунды
+            prepare_replan(race, tyre, pilot_tuples, mode)
+            self._windows = PitWindowIndex(race, tyre, pilot_tuples, mode)
+            self.tyre_set.setRange(1, max(tyre.sets, 1))
+            self.fuel.setValue(race.tank_liters)
+            minutes = int(race.duration_hours * 60)
+            self.remaining_time.setTime(QTime(min(minutes // 60, 23), minutes % 60))
+
+        for spin in (self.laps_done, self.remaining_laps, self.tyre_set, self.set_stints):
+            spin.valueChanged.connect(self._update_window)
+        self.fuel.valueChanged.connect(self._update_window)
+        self.remaining_time.timeChanged.connect(self._update_window)
+        self.pilot_combo.currentIndexChanged.connect(self._update_window)
+        self._update_window()
+
+    def _state(self) -> RaceState:
+        t = self.remaining_time.time()
+        laps = self.remaining_laps.value()
+        return RaceState(
+            laps_done=self.laps_done.value(),
+            remaining_sec=t.hour() * 3600.0 + t.minute() * 60.0,
+            fuel_liters=self.fuel.value(),
+            pilot=self.pilot_combo.currentText(),
+            tyre_set=self.tyre_set.value(),
+            tyre_age=self.tyre_age.value(),
+            set_stints=self.set_stints.value(),
+            remaining_laps=laps if laps >= 0 else None,
+            safety_car_laps=self.sc_laps.value(),
+            sc_pit_factor=self.sc_factor.value(),
+        )
+
+    def on_from_plan_clicked(self):
+        inputs = self._collect_inputs()
+        if inputs is None or not self._plan:
+            return
+        race, _tyre, pilot_tuples, mode = inputs
+        try:
+            state = state_from_plan(race, _build_pilots(pilot_tuples), self._plan, mode,
+                                    self.laps_done.value())
+        except (KeyError, ValueError) as e:
+            self.status_label.setText(f"ошибка: {e}")
+            return
+        minutes = max(int(state.remaining_sec // 60), 0)
+        self.remaining_time.setTime(QTime(min(minutes // 60, 23), minutes % 60))
+        self.remaining_laps.setValue(max(state.remaining_laps, 0))
+        self.fuel.setValue(state.fuel_liters)
+        self.pilot_combo.setCurrentText(state.pilot)
+        self.tyre_set.setValue(state.tyre_set)
+        self.tyre_age.setValue(state.tyre_age)
+        self.set_stints.setValue(state.set_stints)
+
+    def on_run_clicked(self):
+        inputs = self._collect_inputs()
+        if inputs is None:
+            return
+        race, tyre, pilot_tuples, mode = inputs
+        # входы окна могли поменяться: индекс пересобирает только зависящее от них
+        if self._windows is None:
+            self._windows = PitWindowIndex(race, tyre, pilot_tuples, mode)
+        else:
+            self._windows.update(race, tyre, pilot_tuples, mode)
+        self._update_window()
+        try:
+            result = replan_from_state(race, tyre, pilot_tuples, mode, self._state())
+        except ValueError as e:
+            self.model.clear()
+            self.status_label.setText(f"ошибка: {e}")
+            return
+        self.model.set_plan(result.stints)
+        text = (f"остаток {_format_time(result.total_sec)}, пит-стоп через {result.pit_in} кр., "
+                f"{result.elapsed_sec * 1000:.1f} мс")
+        if not result.tyres_ok:
+            text += " — не хватает комплектов шин"
+        self.status_label.setText(text)
+
+    def _update_window(self, *_args):
+        """Окно ближайшего пит-стопа для текущего состояния — запросы к индексу, без пересчёта."""
+        self.window_table.setRowCount(0)
+        if self._windows is None or not self.pilot_combo.currentText():
+            self.window_label.setText("")
+            return
+        state = self._state()
+        try:
+            window = self._windows.window_for(state)
+        except ValueError as e:
+            self.window_label.setText(f"окно пит-стопа: {e}")
+            return
+        if not window.feasible:
+            self.window_label.setText(
+                f"окно пит-стопа: нет — топлива на {window.latest} кр., "
+                f"а комплектов хватает, только если заехать не раньше чем через {window.earliest} кр.")
+            return
+        if window.remaining_laps == 0:
+            self.window_label.setText("окно пит-стопа: гонка закончена")
+            return
+        self.window_label.setText(
+            f"окно пит-стопа: через {window.earliest}–{window.latest} кр., лучше через {window.best} "
+            f"(остаток {_format_time(window.best_sec)})")
+        costs = self._windows.costs(window.remaining_laps, state.pilot, state.set_stints, window)
+        self.window_table.setRowCount(len(costs))
+        for row, (c, sec) in enumerate(zip(window.laps(), costs)):
+            cells = [str(c), str(state.laps_done + c), _format_time(float(sec)),
+                     f"{sec - window.best_sec:.1f}"]
+            for col, text in enumerate(cells):
+                self.window_table.setItem(row, col, QTableWidgetItem(text))
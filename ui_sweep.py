@@ -0,0 +1,187 @@
+import logging
+
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QGridLayout, QComboBox,
+    QDoubleSpinBox, QPushButton, QTableWidget, QTableWidgetItem, QLabel
+)
+from PyQt5.QtCore import QThreadPool
+from PyQt5.QtGui import QColor
+
+from model import plan_stints
+from sweep import axis_range
+from ui_worker import SweepJob
+
+
+log = logging.getLogger(__name__)
+
+
+FIELD_LABELS = [
+    ("tank_liters", "Объём бака, л"),
+    ("sets", "Комплектов шин"),
+    ("pit_refuel_sec", "Пит-стоп дозаправка, с"),
+    ("pit_tyre_sec", "Пит-стоп со сменой резины, с"),
+    ("driver_change_sec", "Смена пилота, с"),
+]
+
+# диапазоны по умолчанию (от, до, шаг)
+DEFAULT_RANGES = {
+    "tank_liters": (80.0, 120.0, 5.0),
+    "sets": (2.0, 12.0, 1.0),
+    "pit_refuel_sec": (20.0, 40.0, 5.0),
+    "pit_tyre_sec": (30.0, 60.0, 5.0),
+    "driver_change_sec": (0.0, 20.0, 5.0),
+}
+
+
+def _format_time(total_sec: float) -> str:
+    hours = int(total_sec // 3600)
+    minutes = int((total_sec % 3600) // 60)
+    seconds = int(total_sec % 60)
+    return f"{hours:d}:{minutes:02d}:{seconds:02d}"
+
+
+class _AxisRow:
+    """Поле перебора и его диапазон."""
+
+    def __init__(self, grid: QGridLayout, row: int, title: str, default_index: int):
+        self.field = QComboBox()
+        for field, label in FIELD_LABELS:
+            self.field.addItem(label, field)
+        self.start = QDoubleSpinBox()
+        self.stop = QDoubleSpinBox()
+        self.step = QDoubleSpinBox()
+        for spin in (self.start, self.stop, self.step):
+            spin.setDecimals(1)
+            spin.setRange(0, 10000)
+
+        grid.addWidget(QLabel(title), row, 0)
+        grid.addWidget(self.field, row, 1)
+        grid.addWidget(QLabel("от"), row, 2)
+        grid.addWidget(self.start, row, 3)
+        grid.addWidget(QLabel("до"), row, 4)
+        grid.addWidget(self.stop, row, 5)
+        grid.addWidget(QLabel("шаг"), row, 6)
+        grid.addWidget(self.step, row, 7)
+
+        self.field.currentIndexChanged.connect(self._on_field_changed)
+        self.field.setCurrentIndex(default_index)
+        self._on_field_changed()
+
+    def _on_field_changed(self, *args):
+        start, stop, step = DEFAULT_RANGES[self.field.currentData()]
+        self.start.setValue(start)
+        self.stop.setValue(stop)
+        self.step.setValue(step)
+
+    def axis(self):
+        return axis_range(
+            self.field.currentData(),
+            self.start.value(), self.stop.value(), self.step.value(),
+        )
+
+
+class SweepDialog(QDialog):
+    """Перебор двух параметров по сетке и тепловая карта итогового времени."""
+
+    def __init__(self, collect_inputs, parent=None, planner=plan_stints):
+        super().__init__(parent)
+        self.setWindowTitle("Перебор параметров")
+        self._collect_inputs = collect_inputs
+        self._planner = planner
+
+        layout = QVBoxLayout(self)
+
+        grid = QGridLayout()
+        self.x_axis = _AxisRow(grid, 0, "Столбцы", 0)
+        self.y_axis = _AxisRow(grid, 1, "Строки", 1)
+        layout.addLayout(grid)
+
+        buttons = QHBoxLayout()
+        self.run_btn = QPushButton("Рассчитать сетку")
+        self.run_btn.clicked.connect(self.on_run_clicked)
+        buttons.addWidget(self.run_btn)
+        self.status_label = QLabel("")
+        buttons.addWidget(self.status_label)
+        layout.addLayout(buttons)
+
+        self.heatmap = QTableWidget(0, 0)
+        layout.addWidget(self.heatmap)
+
+        # перебор идёт в фоне; новый запуск отменяет незавершённый
+        self._pool = QThreadPool(self)
+        self._job = None
+        self._job_id = 0
+
+        self.resize(900, 500)
+
+    def on_run_clicked(self):
+        inputs = self._collect_inputs()
+        if inputs is None:
+            return
+        race, tyre, pilot_tuples, mode = inputs
+
+        try:
+            x_axis = self.x_axis.axis()
+            y_axis = self.y_axis.axis()
+        except ValueError as e:
+            self.status_label.setText(str(e))
+            return
+        if x_axis.field == y_axis.field:
+            self.status_label.setText("Выберите два разных параметра")
+            return
+
+        if self._job is not None:
+            self._job.cancel()
+        self._job_id += 1
+        job = SweepJob(self._job_id, self._planner, race, tyre, pilot_tuples, mode, [y_axis, x_axis])
+        job.signals.finished.connect(self._on_finished)
+        job.signals.failed.connect(self._on_failed)
+        self._job = job
+        self.status_label.setText("считаем…")
+        self._pool.start(job)
+
+    def _is_current_job(self, job_id: int) -> bool:
+        return self._job is not None and job_id == self._job.job_id
+
+    def _on_finished(self, job_id: int, result, elapsed: float):
+        if not self._is_current_job(job_id):
+            return
+        self._job = None
+        y_axis, x_axis = result.axes
+        self._show_heatmap(y_axis, x_axis, result.total_sec)
+        points = result.total_sec.size
+        self.status_label.setText(f"{points} точек за {elapsed * 1000:.0f} мс")
+
+    def _on_failed(self, job_id: int, message: str):
+        if not self._is_current_job(job_id):
+            return
+        self._job = None
+        self.status_label.setText("ошибка расчёта")
+        log.error("Перебор параметров не удался:\n%s", message)
+
+    def done(self, result):
+        # закрытие окна: результат незавершённого перебора больше не нужен
+        if self._job is not None:
+            self._job.cancel()
+            self._job = None
+        super().done(result)
+
+    def _show_heatmap(self, y_axis, x_axis, total_sec):
+        self.heatmap.clear()
+        self.heatmap.setRowCount(len(y_axis.values))
+        self.heatmap.setColumnCount(len(x_axis.values))
+        self.heatmap.setHorizontalHeaderLabels([f"{v:g}" for v in x_axis.values])
+        self.heatmap.setVerticalHeaderLabels([f"{v:g}" for v in y_axis.values])
+
+        lo = float(total_sec.min()) if total_sec.size else 0.0
+        hi = float(total_sec.max()) if total_sec.size else 0.0
+        span = hi - lo if hi > lo else 1.0
+
+        for row in range(len(y_axis.values)):
+            for col in range(len(x_axis.values)):
+                value = float(total_sec[row, col])
+                item = QTableWidgetItem(_format_time(value))
+                # зелёный — быстрее, красный — медленнее
+                k = (value - lo) / span
+                item.setBackground(QColor(int(120 + 135 * k), int(255 - 135 * k), 120))
+                self.heatmap.setItem(row, col, item)
@@ -0,0 +1,49 @@
+import asyncio
+import traceback
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from telemetry import TelemetryIngest, TelemetryState
+
+
+class TelemetryThread(QThread):
+    """
+    Приём телеметрии в своём потоке со своим циклом asyncio — цикл Qt не
+    блокируется. Оценки и уходы приходят в окно сигналами (через очередь).
+    source — ("file", путь) или ("port", номер).
+    """
+    sample = pyqtSignal(object)         # LapSample
+    drift = pyqtSignal(object)          # новые pilot_tuples
+    failed = pyqtSignal(str)
+
+    def __init__(self, source, pilot_tuples, mode, tank_liters, parent=None, plan=None):
+        super().__init__(parent)
+        self._source = source
+        self.state = TelemetryState(pilot_tuples, mode, tank_liters, on_drift=self.drift.emit,
+                                    plan=plan)
+        self.ingest = TelemetryIngest(self.state, on_sample=self.sample.emit)
+        self._loop = None
+
+    def run(self):
+        kind, value = self._source
+        try:
+            self._loop = asyncio.new_event_loop()
+            if kind == "file":
+                self._loop.run_until_complete(self.ingest.run_file(value))
+            else:
+                self._loop.run_until_complete(self.ingest.run_socket(port=int(value)))
+        except Exception:
+            self.failed.emit(traceback.format_exc())
+        finally:
+            if self._loop is not None:
+                self._loop.close()
+                self._loop = None
+
+    def stop(self):
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self.ingest.stop)
+        else:
+            # цикл ещё не запущен — он увидит флаг сразу
+            self.ingest.stop()
+        self.wait(2000)
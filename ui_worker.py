@@ -0,0 +1,127 @@
+import inspect
+import threading
+import time
+import traceback
+
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+from instrument import span
+from model import _build_pilots
+from sweep import run_sweep
+from timeline import exact_total_laps
+from tyres import race_time_sec
+
+
+class CalcSignals(QObject):
+    """Сигналы фонового расчёта; job_id позволяет отбросить устаревшие результаты."""
+    progress = pyqtSignal(int, float, object, float)    # job_id, доля, промежуточный план, его время
+    finished = pyqtSignal(int, object, float)           # job_id, план, итоговое время
+    failed = pyqtSignal(int, str)                       # job_id, текст ошибки
+
+
+def _accepts(func, name: str) -> bool:
+    try:
+        return name in inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+class CalcJob(QRunnable):
+    """
+    Планирование + расчёт времени гонки в пуле потоков.
+    Сигналы создаются в потоке окна, поэтому доставляются в него через очередь.
+    """
+
+    def __init__(self, job_id: int, planner, race, tyre, pilot_tuples, mode,
+                 exact_laps: bool = False):
+        super().__init__()
+        self.job_id = job_id
+        self.signals = CalcSignals()
+        self._planner = planner
+        self._race = race
+        self._tyre = tyre
+        self._pilot_tuples = pilot_tuples
+        self._mode = mode
+        self._exact_laps = exact_laps
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def run(self):
+        with span("ui.calc_job"):
+            self._run()
+
+    def _run(self):
+        try:
+            pilots = _build_pilots(self._pilot_tuples)
+
+            def on_progress(fraction, partial):
+                if self.is_cancelled():
+                    return
+                partial_time = 0.0
+                if partial:
+                    partial_time = race_time_sec(self._race, self._tyre, pilots, partial, self._mode)
+                self.signals.progress.emit(self.job_id, fraction, partial, partial_time)
+
+            kwargs = {}
+            if _accepts(self._planner, "on_progress"):
+                kwargs["on_progress"] = on_progress
+            if _accepts(self._planner, "should_stop"):
+                kwargs["should_stop"] = self.is_cancelled
+
+            if self._exact_laps:
+                # число кругов по часам с учётом пит-стопов — несколько проходов планировщика
+                _laps, stints = exact_total_laps(
+                    self._race, self._tyre, self._pilot_tuples, self._mode, planner=self._planner,
+                    on_progress=on_progress, should_stop=self.is_cancelled,
+                )
+            else:
+                stints = self._planner(self._race, self._tyre, self._pilot_tuples, self._mode, **kwargs)
+            if self.is_cancelled():
+                return
+            total_time_sec = race_time_sec(self._race, self._tyre, pilots, stints, self._mode)
+            self.signals.finished.emit(self.job_id, stints, total_time_sec)
+        except Exception:
+            if not self.is_cancelled():
+                self.signals.failed.emit(self.job_id, traceback.format_exc())
+
+
+class SweepJob(QRunnable):
+    """
+    sweep.run_sweep в пуле потоков: окно перебора не замирает на большой сетке.
+    finished — (job_id, SweepResult, секунд на расчёт); прогресса у перебора нет.
+    """
+
+    def __init__(self, job_id: int, planner, race, tyre, pilot_tuples, mode, axes):
+        super().__init__()
+        self.job_id = job_id
+        self.signals = CalcSignals()
+        self._planner = planner
+        self._inputs = (race, tyre, pilot_tuples, mode)
+        self._axes = axes
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def run(self):
+        with span("ui.sweep_job"):
+            self._run()
+
+    def _run(self):
+        try:
+            started = time.perf_counter()
+            result = run_sweep(*self._inputs, self._axes, planner=self._planner)
+            if self.is_cancelled():
+                return
+            self.signals.finished.emit(self.job_id, result, time.perf_counter() - started)
+        except Exception:
+            if not self.is_cancelled():
+                self.signals.failed.emit(self.job_id, traceback.format_exc())